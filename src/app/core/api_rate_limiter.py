@@ -0,0 +1,280 @@
+"""
+API 请求速率限制引擎（GCRA）
+
+RateLimitMiddleware 原先对每个请求执行一次 Redis 固定窗口计数（INCR + EXPIRE），
+窗口边界处允许两倍突发，且每个请求都要等待一次 Redis 往返。本模块提供：
+
+- GCRA（通用信元速率算法）：按“理论到达时间”平滑限流，支持突发容量（burst），
+  效果等价于连续滑动窗口，状态只有一个数值
+- 本地许可缓存：每次向 Redis 批量领取若干许可，后续请求在进程内直接判定；
+  领取量随使用速度自适应增减，未用完的许可在下次领取时退还
+- 拒绝缓存：被拒绝后在 retry_after 时间内直接本地拒绝，不再访问 Redis
+- Redis 不可用时退化为进程内 GCRA，而不是放行全部请求
+- 端点规则在初始化时加载一次（RATE_LIMIT_RULES）
+
+外部数据源的调用限流见 app.core.rate_limiter。
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rate_limit:gcra:"
+
+# 默认端点规则（每分钟次数）
+DEFAULT_ENDPOINT_LIMITS = {
+    "/api/analysis/single": 10,      # 单股分析：每分钟10次
+    "/api/analysis/batch": 5,        # 批量分析：每分钟5次
+    "/api/screening/filter": 20,     # 股票筛选：每分钟20次
+    "/api/auth/login": 5,            # 登录：每分钟5次
+    "/api/auth/register": 3,         # 注册：每分钟3次
+}
+
+# KEYS[1]=状态键  ARGV: 每个许可的间隔(ms)、突发容量、申请数量、退还数量
+# 返回 {获得的许可数, 无许可时需等待的毫秒数}；时间取 Redis 服务器时钟，多进程一致
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local refund = tonumber(ARGV[4])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call("GET", KEYS[1]) or now) - refund * interval
+if tat < now then tat = now end
+local available = math.floor((now + burst * interval - tat) / interval)
+local granted = math.min(requested, math.max(available, 0))
+tat = tat + granted * interval
+-- 未获得许可时也要写回，否则本次退还的许可会丢失
+if granted > 0 or refund > 0 then
+    redis.call("SET", KEYS[1], string.format("%.3f", tat), "PX", math.ceil(tat - now) + 1)
+end
+if granted > 0 then
+    return {granted, 0}
+end
+return {0, math.ceil(tat - burst * interval + interval - now)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """limit 次 / period 秒，burst 为突发容量（默认等于 limit）"""
+
+    limit: int
+    period: float = 60.0
+    burst: Optional[int] = None
+
+    @property
+    def interval_ms(self) -> float:
+        return self.period * 1000.0 / max(1, self.limit)
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.burst if self.burst is not None else self.limit)
+
+
+def parse_rate_limit_rules(text: str) -> Dict[str, RateLimitRule]:
+    """
+    解析端点规则，格式：路径=次数[/周期秒][:突发]，逗号分隔
+
+    例如 "/api/analysis/single=10/60:3,/api/auth/login=5"
+    """
+    rules: Dict[str, RateLimitRule] = {}
+    for item in (text or "").split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        path, spec = item.rsplit("=", 1)
+        try:
+            burst = None
+            if ":" in spec:
+                spec, burst_text = spec.split(":", 1)
+                burst = int(burst_text)
+            limit_text, _, period_text = spec.partition("/")
+            rules[path.strip()] = RateLimitRule(int(limit_text), float(period_text or 60), burst)
+        except ValueError:
+            logger.warning(f"⚠️ 忽略无效的速率限制规则: {item}")
+    return rules
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    retry_after: float = 0.0
+    source: str = "local"  # local | redis | fallback | denied_cache
+
+
+class _Slot:
+    """单个 (身份, 端点) 的本地许可状态"""
+
+    __slots__ = ("permits", "expires_at", "batch", "denied_until", "fallback_tat", "last_seen")
+
+    def __init__(self):
+        self.permits = 0
+        self.expires_at = 0.0
+        self.batch = 1
+        self.denied_until = 0.0
+        self.fallback_tat = 0.0
+        self.last_seen = 0.0
+
+
+class ApiRateLimiter:
+    """GCRA 速率限制器：Redis 共享状态 + 本地批量许可"""
+
+    def __init__(
+        self,
+        rules: Optional[Dict[str, RateLimitRule]] = None,
+        default_rule: Optional[RateLimitRule] = None,
+        redis_getter: Optional[Callable[[], Any]] = None,
+        max_batch: int = 10,
+        lease_seconds: float = 1.0,
+        max_slots: int = 50_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rules = rules if rules is not None else {p: RateLimitRule(n) for p, n in DEFAULT_ENDPOINT_LIMITS.items()}
+        self.default_rule = default_rule or RateLimitRule(settings.DEFAULT_RATE_LIMIT)
+        self.max_batch = max(1, max_batch)
+        self.lease_seconds = lease_seconds
+        self.max_slots = max_slots
+        self._redis_getter = redis_getter or _default_redis
+        self._script = None
+        self._script_client = None
+        self._clock = clock
+        self._slots: Dict[Tuple[str, str], _Slot] = {}
+        self._redis_down_logged = False
+        self.stats: Dict[str, int] = {"local": 0, "redis": 0, "fallback": 0, "denied": 0, "denied_cache": 0}
+
+    def rule_for(self, path: str) -> RateLimitRule:
+        return self.rules.get(path, self.default_rule)
+
+    def _max_batch_for(self, rule: RateLimitRule) -> int:
+        # 领取量不超过突发容量的 1/10，多进程时超发上限可控
+        return max(1, min(self.max_batch, rule.capacity // 10))
+
+    def _slot(self, key: Tuple[str, str], now: float) -> _Slot:
+        slot = self._slots.get(key)
+        if slot is None:
+            if len(self._slots) >= self.max_slots:
+                self._evict(now)
+            slot = self._slots[key] = _Slot()
+        slot.last_seen = now
+        return slot
+
+    def _evict(self, now: float) -> None:
+        idle = [k for k, s in self._slots.items() if now - s.last_seen > 120]
+        for k in idle:
+            self._slots.pop(k, None)
+        if len(self._slots) >= self.max_slots:
+            for k in list(self._slots)[: len(self._slots) // 2]:
+                self._slots.pop(k, None)
+
+    async def acquire(self, identity: str, path: str) -> RateLimitDecision:
+        """为一次请求申请许可"""
+        rule = self.rule_for(path)
+        now = self._clock()
+        slot = self._slot((identity, path), now)
+
+        # 快速路径：本地已有未过期的许可
+        if slot.permits > 0 and now < slot.expires_at:
+            slot.permits -= 1
+            self.stats["local"] += 1
+            return RateLimitDecision(True, rule.limit)
+        if now < slot.denied_until:
+            self.stats["denied_cache"] += 1
+            return RateLimitDecision(False, rule.limit, slot.denied_until - now, "denied_cache")
+
+        # 调整领取量：上一批在租期内用完则加倍，过期未用完则减半并退还
+        refund = 0
+        if slot.permits > 0:
+            refund = slot.permits
+            slot.batch = max(1, slot.batch // 2)
+        elif slot.expires_at and now < slot.expires_at:
+            slot.batch = min(self._max_batch_for(rule), slot.batch * 2)
+        slot.permits = 0
+
+        granted, retry_ms, source = await self._take(identity, path, rule, slot, slot.batch, refund, now)
+        if granted > 0:
+            slot.permits = granted - 1
+            slot.expires_at = now + self.lease_seconds
+            self.stats[source] += 1
+            return RateLimitDecision(True, rule.limit, source=source)
+
+        slot.batch = 1
+        slot.expires_at = 0.0
+        slot.denied_until = now + retry_ms / 1000.0
+        self.stats["denied"] += 1
+        return RateLimitDecision(False, rule.limit, retry_ms / 1000.0, source)
+
+    async def _take(self, identity, path, rule, slot, requested, refund, now):
+        client = self._redis_getter()
+        if client is not None:
+            try:
+                if self._script is None or self._script_client is not client:
+                    self._script = client.register_script(_GCRA_SCRIPT)
+                    self._script_client = client
+                granted, retry_ms = await self._script(
+                    keys=[f"{KEY_PREFIX}{identity}:{path}"],
+                    args=[rule.interval_ms, rule.capacity, requested, refund],
+                )
+                self._redis_down_logged = False
+                return int(granted), int(retry_ms), "redis"
+            except Exception as e:
+                if not self._redis_down_logged:
+                    logger.warning(f"⚠️ 速率限制Redis不可用，使用进程内限流: {e}")
+                    self._redis_down_logged = True
+        granted, retry_ms = self._local_gcra(slot, rule, 1, now)
+        return granted, retry_ms, "fallback"
+
+    @staticmethod
+    def _local_gcra(slot: _Slot, rule: RateLimitRule, requested: int, now: float) -> Tuple[int, float]:
+        interval = rule.interval_ms
+        now_ms = now * 1000.0
+        tat = max(slot.fallback_tat, now_ms)
+        available = int((now_ms + rule.capacity * interval - tat) // interval)
+        granted = min(requested, max(available, 0))
+        if granted > 0:
+            slot.fallback_tat = tat + granted * interval
+            return granted, 0.0
+        return 0, tat - rule.capacity * interval + interval - now_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = sum(self.stats[k] for k in ("local", "redis", "fallback", "denied", "denied_cache"))
+        local = self.stats["local"] + self.stats["denied_cache"]
+        return {
+            **self.stats,
+            "total": total,
+            "local_decision_rate": round(local / total, 4) if total else 0.0,
+            "tracked_keys": len(self._slots),
+        }
+
+
+def _default_redis():
+    from .database import db_manager
+    return db_manager.redis_client
+
+
+_api_rate_limiter: Optional[ApiRateLimiter] = None
+
+
+def get_api_rate_limiter() -> ApiRateLimiter:
+    """获取API速率限制器（规则在首次调用时从配置加载）"""
+    global _api_rate_limiter
+    if _api_rate_limiter is None:
+        rules = {p: RateLimitRule(n) for p, n in DEFAULT_ENDPOINT_LIMITS.items()}
+        rules.update(parse_rate_limit_rules(settings.RATE_LIMIT_RULES))
+        _api_rate_limiter = ApiRateLimiter(
+            rules=rules,
+            max_batch=settings.RATE_LIMIT_LOCAL_BATCH,
+            lease_seconds=settings.RATE_LIMIT_LEASE_SECONDS,
+        )
+        logger.info(
+            f"🔧 API速率限制器初始化: {len(rules)} 条端点规则, 默认 {settings.DEFAULT_RATE_LIMIT}次/分钟, "
+            f"本地批量上限 {settings.RATE_LIMIT_LOCAL_BATCH}"
+        )
+    return _api_rate_limiter
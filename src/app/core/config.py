@@ -92,15 +92,37 @@ class Settings(BaseSettings):
     GLOBAL_CONCURRENT_LIMIT: int = Field(default=50)
     DEFAULT_DAILY_QUOTA: int = Field(default=1000)
 
+    # 分析任务执行器
+    ANALYSIS_EXECUTOR_BACKEND: str = Field(default="thread")  # thread | process
+    ANALYSIS_EXECUTOR_MAX_WORKERS: int = Field(default=3)  # 同时执行的分析任务数
+    ANALYSIS_EXECUTOR_MAX_WAITING: int = Field(default=20)  # 本进程最多排队的分析任务数，超出则拒绝
+    ANALYSIS_EXECUTOR_MAX_QUEUE_DEPTH: int = Field(default=0)  # Redis 分析队列积压达到该值时拒绝（0 表示不检查）
+    ANALYSIS_PROVIDER_CONCURRENCY: str = Field(default="")  # LLM 供应商并发上限，如 "dashscope:2,openai:4"
+
+    # TradingAgentsGraph 实例池（复用已编译的图、LLM客户端和记忆库句柄）
+    TRADING_GRAPH_POOL_ENABLED: bool = Field(default=True)
+    TRADING_GRAPH_POOL_MAX_IDLE: int = Field(default=2)  # 每种配置最多保留的空闲实例数
+
     # 速率限制
-    RATE_LIMIT_ENABLED: bool = Field(default=True)
+    # 默认关闭：开启后按 JWT 用户限流，未登录请求按客户端IP限流；
+    # 部署在反向代理之后时需配置 RATE_LIMIT_TRUSTED_PROXIES，否则所有请求共用代理IP的额度
+    RATE_LIMIT_ENABLED: bool = Field(default=False)
+    RATE_LIMIT_TRUSTED_PROXIES: str = Field(default="")  # 受信任代理IP/网段，逗号分隔，如 "127.0.0.1,10.0.0.0/8"
     DEFAULT_RATE_LIMIT: int = Field(default=100)  # 每分钟请求数
+    RATE_LIMIT_RULES: str = Field(default="")  # 端点规则，如 "/api/analysis/single=10/60:3,/api/auth/login=5"
+    RATE_LIMIT_LOCAL_BATCH: int = Field(default=10)  # 每次从Redis批量领取的许可上限（本地判定）
+    RATE_LIMIT_LEASE_SECONDS: float = Field(default=1.0)  # 本地许可有效期，过期未用的许可下次退还
 
     # 日志配置
     LOG_LEVEL: str = Field(default="INFO")
     LOG_FORMAT: str = Field(default="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     LOG_FILE: str = Field(default="logs/tradingagents.log")
 
+    # 操作日志批量写入
+    OPERATION_LOG_BUFFER_MAX_SIZE: int = Field(default=10000)  # 待写入队列上限，超出后按用户/操作类型汇总丢弃
+    OPERATION_LOG_FLUSH_BATCH_SIZE: int = Field(default=200)  # 达到该条数立即批量写入
+    OPERATION_LOG_FLUSH_INTERVAL_SECONDS: float = Field(default=2.0)  # 最长写入间隔
+
     # 代理配置
     # 用于配置需要绕过代理的域名（国内数据源）
     # 多个域名用逗号分隔
@@ -119,6 +141,12 @@ class Settings(BaseSettings):
     # 缓存配置
     CACHE_TTL: int = Field(default=3600)  # 1小时
     SCREENING_CACHE_TTL: int = Field(default=1800)  # 30分钟
+    # 筛选内存快照（stock_basic_info + market_quotes + 财务指标），行情/基础信息写库时增量刷新
+    SCREENING_SNAPSHOT_ENABLED: bool = Field(default=True)
+    # 快照全量重载间隔（秒）：兜底其他进程写入的数据
+    SCREENING_SNAPSHOT_MAX_AGE_SECONDS: int = Field(default=600)
+    # 筛选结果集缓存的最大行数（分页从缓存结果集中读取，TTL 使用 SCREENING_CACHE_TTL）
+    SCREENING_RESULT_SET_MAX_ROWS: int = Field(default=5000)
 
     # 安全配置
     BCRYPT_ROUNDS: int = Field(default=12)
@@ -149,6 +177,11 @@ class Settings(BaseSettings):
     CONFIG_SOT: str = Field(default="file")
 
 
+    # 启动与部署：多 worker 部署时可只在一个进程中运行定时任务，
+    # 只提供报告/分析查询的 worker 可禁用数据相关路由分组（market_data,data_sync,paper），跳过数据源 SDK 的导入
+    SCHEDULER_ENABLED: bool = Field(default=True, description="本进程是否运行定时任务（含启动时的基础信息同步和行情补数）")
+    API_DISABLED_ROUTER_GROUPS: str = Field(default="", description="禁用的路由分组，逗号分隔")
+
     # 基础信息同步任务配置（可配置调度）
     SYNC_STOCK_BASICS_ENABLED: bool = Field(default=True)
     # 优先使用 CRON 表达式，例如 "30 6 * * *" 表示每日 06:30
@@ -182,6 +215,19 @@ class Settings(BaseSettings):
         description="自动检测Tushare rt_k接口权限，付费用户自动切换到高频模式（5秒）"
     )
 
+    # 行情增量写入配置（只写入发生变化的股票）
+    QUOTES_UPSERT_CHUNK_SIZE: int = Field(default=500, ge=50, description="每个 bulk_write 批次的最大操作数")
+    QUOTES_UPSERT_CONCURRENCY: int = Field(default=4, ge=1, description="并发执行的 bulk_write 批次数")
+    # 盘中行情环形缓冲区（记录每个采集时点，收盘后聚合为分钟K线）
+    INTRADAY_BUFFER_ENABLED: bool = Field(default=True)
+    INTRADAY_BUFFER_MAX_TICKS: int = Field(
+        default=600, ge=8, description="每个交易日最多保留的采集时点数（采集更密时按间隔抽样），决定内存占用"
+    )
+    QUOTES_FULL_REWRITE_SECONDS: int = Field(
+        default=1800,
+        description="全量重写间隔（秒）。其他任务也会写 market_quotes，定期全量写入以校正内存快照；0 表示每次都全量写入"
+    )
+
     # Tushare基础配置
     TUSHARE_TOKEN: str = Field(default="", description="Tushare API Token")
     TUSHARE_ENABLED: bool = Field(default=True, description="启用Tushare数据源")
@@ -276,6 +322,21 @@ class Settings(BaseSettings):
     NEWS_SYNC_HOURS_BACK: int = Field(default=24)
     NEWS_SYNC_MAX_PER_SOURCE: int = Field(default=50)
 
+    # ===== 本地全文索引配置（新闻/社媒中文检索） =====
+    FULLTEXT_INDEX_ENABLED: bool = Field(default=True)  # 关闭后回退到 MongoDB $text 检索
+    FULLTEXT_INDEX_DIR: str = Field(default="./data/fulltext_index")
+
+    # ===== 分析报告正文存储 =====
+    REPORT_BLOB_ENABLED: bool = Field(default=True, description="报告正文是否压缩后单独存入 report_blobs 集合")
+    REPORT_BLOB_MIN_BYTES: int = Field(default=2048, ge=0, description="超过该字节数的报告模块正文才外部存储")
+
+    # ===== 报告导出（Word/PDF）渲染 =====
+    REPORT_EXPORT_WORKERS: int = Field(default=2, ge=0, description="导出渲染进程数，0 表示在请求线程中渲染")
+    REPORT_EXPORT_CACHE_DIR: str = Field(default="./data/export_cache", description="导出结果缓存目录，留空关闭缓存")
+    REPORT_EXPORT_CACHE_MAX_MB: int = Field(default=256, ge=1, description="导出结果缓存上限（MB）")
+    REPORT_EXPORT_TIMEOUT: float = Field(default=120.0, gt=0, description="单份报告渲染超时（秒）")
+    REPORT_BATCH_EXPORT_MAX: int = Field(default=50, ge=1, description="批量导出单次最多报告数")
+
     @property
     def is_production(self) -> bool:
         """是否为生产环境"""
@@ -362,6 +362,18 @@ async def create_database_indexes(db):
         await market_quotes.create_index([("amount", -1)])
         await market_quotes.create_index([("updated_at", -1)])
 
+        # intraday_minute_bars 的索引（收盘后由盘中缓冲区聚合写入）
+        minute_bars = db["intraday_minute_bars"]
+        await minute_bars.create_index([("code", 1), ("trade_date", -1)], unique=True)
+
+        # token_usage_rollups 的索引（使用量小时/日预聚合，每个维度组合一个文档）
+        usage_rollups = db["token_usage_rollups"]
+        await usage_rollups.create_index(
+            [("granularity", 1), ("bucket", 1), ("provider", 1), ("model_name", 1),
+             ("user_id", 1), ("analysis_type", 1), ("currency", 1)],
+            unique=True,
+        )
+
         logger.info("✅ 数据库索引创建完成")
 
     except Exception as e:
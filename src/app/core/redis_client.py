@@ -61,10 +61,43 @@ async def close_redis():
 
 
 def get_redis() -> redis.Redis:
-    """获取Redis客户端实例"""
-    if redis_client is None:
-        raise RuntimeError("Redis客户端未初始化")
-    return redis_client
+    """
+    获取Redis客户端实例
+
+    Worker 通过 init_redis() 初始化本模块的连接池；API 进程由 app.core.database
+    统一初始化，此处复用同一连接池，保证每个进程只有一个异步连接池。
+    """
+    if redis_client is not None:
+        return redis_client
+    from .database import db_manager
+    if db_manager.redis_client is not None:
+        return db_manager.redis_client
+    raise RuntimeError("Redis客户端未初始化")
+
+
+def get_redis_stats() -> dict:
+    """Redis 操作耗时统计与各连接池的连接数"""
+    from .database import db_manager
+    from tradingagents.utils.redis_pool import get_redis_op_stats, get_sync_pool_stats, pool_stats
+
+    return {
+        "operations": get_redis_op_stats().snapshot(),
+        "pools": {
+            "async": pool_stats(redis_pool or db_manager.redis_pool),
+            "sync": get_sync_pool_stats(),
+        },
+    }
+
+
+# 固定窗口计数：仅在窗口内首次递增（或键缺少过期时间）时设置TTL，
+# 后续递增不再刷新过期时间，一次往返完成
+_INCR_WITH_TTL_SCRIPT = """
+local count = redis.call("INCR", KEYS[1])
+if count == 1 or redis.call("TTL", KEYS[1]) == -1 then
+    redis.call("EXPIRE", KEYS[1], ARGV[1])
+end
+return count
+"""
 
 
 class RedisKeys:
@@ -106,6 +139,8 @@ class RedisService:
     
     def __init__(self):
         self.redis = get_redis()
+        # 脚本只注册一次，之后通过 EVALSHA 调用
+        self._incr_script = self.redis.register_script(_INCR_WITH_TTL_SCRIPT)
     
     async def set_with_ttl(self, key: str, value: str, ttl: int = 3600):
         """设置带TTL的键值"""
@@ -114,7 +149,10 @@ class RedisService:
     async def get_json(self, key: str):
         """获取JSON格式的值"""
         import json
-        value = await self.redis.get(key)
+        from tradingagents.utils.redis_pool import redis_timer
+
+        with redis_timer("get_json"):
+            value = await self.redis.get(key)
         if value:
             return json.loads(value)
         return None
@@ -122,19 +160,21 @@ class RedisService:
     async def set_json(self, key: str, value: dict, ttl: int = None):
         """设置JSON格式的值"""
         import json
+        from tradingagents.utils.redis_pool import redis_timer
+
         json_str = json.dumps(value, ensure_ascii=False)
-        if ttl:
-            await self.redis.setex(key, ttl, json_str)
-        else:
-            await self.redis.set(key, json_str)
+        with redis_timer("set_json"):
+            if ttl:
+                await self.redis.setex(key, ttl, json_str)
+            else:
+                await self.redis.set(key, json_str)
     
     async def increment_with_ttl(self, key: str, ttl: int = 3600):
-        """递增计数器并设置TTL"""
-        pipe = self.redis.pipeline()
-        pipe.incr(key)
-        pipe.expire(key, ttl)
-        results = await pipe.execute()
-        return results[0]
+        """递增计数器，首次递增时设置TTL（固定窗口）"""
+        from tradingagents.utils.redis_pool import redis_timer
+
+        with redis_timer("incr_with_ttl"):
+            return int(await self._incr_script(keys=[key], args=[ttl]))
     
     async def add_to_queue(self, queue_key: str, item: dict):
         """添加项目到队列"""
@@ -0,0 +1,210 @@
+"""
+启动耗时分析
+
+- StartupProfiler：记录启动各阶段（路由模块导入、数据库初始化、调度器等）的耗时、
+  期间新加载的模块数，以及数据源 SDK 等重型依赖是否已被加载
+- parse_importtime / run_importtime：在子进程中以 `python -X importtime` 导入指定模块，
+  按累计耗时汇总顶层导入和各包自身耗时，用于定位拖慢启动的依赖
+
+管理员可通过 GET /api/system/startup-report 查看，也可以运行 scripts/startup_report.py。
+"""
+
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 允许通过 API 做 importtime 分析的入口模块（接口不接受任意模块名，避免在子进程中导入任意代码）
+IMPORTTIME_ENTRY_MODULES = (
+    "app.main",
+    "app.worker",
+    "tradingagents",
+    "tradingagents.graph.trading_graph",
+)
+
+# 关注的重型依赖（数据源 SDK、数据处理和 LLM 相关库）
+HEAVY_MODULES = (
+    "akshare",
+    "baostock",
+    "tushare",
+    "yfinance",
+    "pandas",
+    "numpy",
+    "openai",
+    "dashscope",
+    "langchain_core",
+    "langgraph",
+    "apscheduler",
+)
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+# 项目根目录（src），子进程在此目录下导入 app.main
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+class StartupProfiler:
+    """记录进程启动阶段耗时（线程安全）"""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_seconds: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str, **meta: Any) -> Iterator[None]:
+        """计时一个启动阶段，同时记录期间新加载的模块数"""
+        start = time.perf_counter()
+        modules_before = len(sys.modules)
+        try:
+            yield
+        finally:
+            self.record(
+                name,
+                time.perf_counter() - start,
+                modules_loaded=len(sys.modules) - modules_before,
+                **meta,
+            )
+
+    def record(self, name: str, seconds: float, **meta: Any) -> None:
+        with self._lock:
+            self.phases.append({"name": name, "seconds": round(seconds, 4), **meta})
+
+    def mark_ready(self) -> None:
+        """应用启动完成（lifespan 进入服务阶段）"""
+        self.ready_seconds = round(time.perf_counter() - self._t0, 4)
+        logger.info(f"🚀 启动完成，耗时 {self.ready_seconds:.2f}s（{len(sys.modules)} 个模块已加载）")
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            "started_at": self.started_at.isoformat(),
+            "ready_seconds": self.ready_seconds,
+            "uptime_seconds": round(time.perf_counter() - self._t0, 2),
+            "phases": phases,
+            "slowest_phases": sorted(phases, key=lambda p: p["seconds"], reverse=True)[:top],
+            "modules_loaded": len(sys.modules),
+            "heavy_modules": {name: name in sys.modules for name in HEAVY_MODULES},
+        }
+
+
+def parse_importtime(output: str, module: Optional[str] = None, top: int = 30) -> Dict[str, Any]:
+    """
+    解析 `python -X importtime` 的 stderr 输出
+
+    Args:
+        module: 入口模块；给出时只统计该模块（及其父包）的导入树，不含解释器启动（site 等）
+
+    Returns:
+        total_ms: 入口模块累计耗时
+        top_level: 入口模块直接导入的模块，按累计耗时排序
+        by_package: 按顶层包汇总的自身耗时（如 akshare 及其全部子模块）
+    """
+    entries = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+
+    # 输出按导入完成顺序排列，子模块在父模块之前；按根节点切分为若干棵导入树
+    trees: List[List[tuple]] = []
+    current: List[tuple] = []
+    for entry in entries:
+        current.append(entry)
+        if entry[2] == 0:
+            trees.append(current)
+            current = []
+    if module:
+        root_package = module.split(".")[0]
+        trees = [tree for tree in trees if tree[-1][3] == module or module.startswith(tree[-1][3] + ".")
+                 or tree[-1][3] == root_package]
+
+    selected = [entry for tree in trees for entry in tree]
+    total_ms = sum(tree[-1][1] for tree in trees) / 1000
+    top_level = sorted(
+        ({"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(self_us / 1000, 1)}
+         for self_us, cumulative, depth, name in selected if depth == 1),
+        key=lambda item: item["cumulative_ms"],
+        reverse=True,
+    )
+
+    packages: Dict[str, Dict[str, Any]] = {}
+    for self_us, _, _, name in selected:
+        package = packages.setdefault(name.split(".")[0], {"package": name.split(".")[0], "self_ms": 0.0, "modules": 0})
+        package["self_ms"] += self_us / 1000
+        package["modules"] += 1
+    by_package = sorted(packages.values(), key=lambda item: item["self_ms"], reverse=True)
+    for package in by_package:
+        package["self_ms"] = round(package["self_ms"], 1)
+
+    return {
+        "total_ms": round(total_ms, 1),
+        "module_count": len(selected),
+        "top_level": top_level[:top],
+        "by_package": by_package[:top],
+    }
+
+
+def run_importtime(module: str = "app.main", top: int = 30, timeout: float = 120.0) -> Dict[str, Any]:
+    """在干净的子进程中导入 module 并返回耗时分解（冷启动口径，不受当前进程已加载模块影响）"""
+    if not re.fullmatch(r"[A-Za-z_][\w.]*", module):
+        raise ValueError(f"无效的模块名: {module}")
+
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(PROJECT_ROOT),
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    result = parse_importtime(completed.stderr, module=module, top=top)
+    result.update({
+        "module": module,
+        "wall_seconds": round(time.perf_counter() - start, 2),
+        "returncode": completed.returncode,
+    })
+    if completed.returncode != 0:
+        # 导入失败时附带错误信息末尾（非 importtime 行）
+        errors = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")]
+        result["error"] = "\n".join(errors[-10:])
+    return result
+
+
+def format_importtime(result: Dict[str, Any]) -> str:
+    lines = [
+        f"📦 导入 {result.get('module', '')}: {result['total_ms']:.0f}ms，共 {result['module_count']} 个模块",
+        "",
+        "顶层导入（累计耗时）:",
+    ]
+    lines += [f"  {item['cumulative_ms']:>9.1f}ms  {item['module']}" for item in result["top_level"]]
+    lines += ["", "按包汇总（自身耗时）:"]
+    lines += [f"  {item['self_ms']:>9.1f}ms  {item['package']} ({item['modules']} 个模块)" for item in result["by_package"]]
+    if result.get("error"):
+        lines += ["", f"❌ 导入失败:\n{result['error']}"]
+    return "\n".join(lines)
+
+
+_startup_profiler: Optional[StartupProfiler] = None
+
+
+def get_startup_profiler() -> StartupProfiler:
+    """获取启动耗时记录器（首次调用时开始计时，应在 app.main 最先调用）"""
+    global _startup_profiler
+    if _startup_profiler is None:
+        _startup_profiler = StartupProfiler()
+    return _startup_profiler
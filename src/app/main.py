@@ -23,80 +23,125 @@ import time
 from datetime import datetime
 from contextlib import asynccontextmanager
 import asyncio
+import importlib
 from pathlib import Path
 
+from app.core.startup_profile import get_startup_profiler
+
+# 启动耗时从这里开始计时（路由导入、数据库初始化、调度器等阶段见 /api/system/startup-report）
+startup_profiler = get_startup_profiler()
+
 from app.core.config import settings
 from app.core.database import init_db, close_db
 from app.core.logging_config import setup_logging
-from app.routers import (
-    auth_db as auth, 
-    analysis, 
-    screening, 
-    queue, 
-    sse, 
-    health, 
-    favorites, 
-    config, 
-    reports, 
-    database, 
-    operation_logs, 
-    tags, 
-    # tushare_init,  # 注释掉：依赖缺失的 Tushare 模块
-    akshare_init, 
-    baostock_init, 
-    historical_data, 
-    # multi_period_sync,  # 注释掉：依赖缺失的 Tushare 模块
-    # financial_data,  # 注释掉：依赖缺失的 Tushare 模块
-    news_data, 
-    social_media, 
-    internal_messages, 
-    usage_statistics, 
-    model_capabilities, 
-    cache, 
-    logs
-)
-from app.routers import sync as sync_router, multi_source_sync
-from app.routers import stocks as stocks_router
-from app.routers import stock_data as stock_data_router
-from app.routers import stock_sync as stock_sync_router
-from app.routers import multi_market_stocks as multi_market_stocks_router
-from app.routers import notifications as notifications_router
-from app.routers import websocket_notifications as websocket_notifications_router
-from app.routers import scheduler as scheduler_router
-from app.services.basics_sync_service import get_basics_sync_service
-from app.services.multi_source_basics_sync_service import MultiSourceBasicsSyncService
-from app.services.scheduler_service import set_scheduler_instance
-
-# 注释掉：Tushare worker 导入（模块缺失）
-# from app.worker.tushare_sync_service import (
-#     run_tushare_basic_info_sync,
-#     run_tushare_quotes_sync,
-#     run_tushare_historical_sync,
-#     run_tushare_financial_sync,
-#     run_tushare_status_check
-# )
-from app.worker.akshare_sync_service import (
-    run_akshare_basic_info_sync,
-    run_akshare_quotes_sync,
-    run_akshare_historical_sync,
-    run_akshare_financial_sync,
-    run_akshare_status_check
-)
-from app.worker.baostock_sync_service import (
-    run_baostock_basic_info_sync,
-    run_baostock_daily_quotes_sync,
-    run_baostock_historical_sync,
-    run_baostock_status_check
-)
-# 港股和美股改为按需获取+缓存模式，不再需要定时同步任务
-# from app.worker.hk_sync_service import ...
-# from app.worker.us_sync_service import ...
 from app.middleware.operation_log_middleware import OperationLogMiddleware
+from app.middleware.rate_limit import QuotaMiddleware, RateLimitMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from app.services.quotes_ingestion_service import QuotesIngestionService
-from app.routers import paper as paper_router
+
+# 路由表：(分组, 模块, include_router 参数)，按注册顺序排列。
+# 路由模块在注册时才导入，API_DISABLED_ROUTER_GROUPS 中的分组不会被导入，
+# 例如只提供报告查询的 worker 可禁用 market_data/data_sync，跳过数据源 SDK 的加载。
+# - core：认证、分析、报告、配置、系统管理、通知等
+# - market_data：行情、筛选、历史/新闻/社媒数据查询
+# - data_sync：数据同步、数据源初始化、定时任务管理
+# - paper：模拟交易
+ROUTER_TABLE = [
+    ("core", "app.routers.health", {"prefix": "/api", "tags": ["health"]}),
+    ("core", "app.routers.auth_db", {"prefix": "/api/auth", "tags": ["authentication"]}),
+    ("core", "app.routers.analysis", {"prefix": "/api/analysis", "tags": ["analysis"]}),
+    ("core", "app.routers.reports", {"tags": ["reports"]}),
+    ("market_data", "app.routers.screening", {"prefix": "/api/screening", "tags": ["screening"]}),
+    ("core", "app.routers.queue", {"prefix": "/api/queue", "tags": ["queue"]}),
+    ("core", "app.routers.favorites", {"prefix": "/api", "tags": ["favorites"]}),
+    ("market_data", "app.routers.stocks", {"prefix": "/api", "tags": ["stocks"]}),
+    ("market_data", "app.routers.multi_market_stocks", {"prefix": "/api", "tags": ["multi-market"]}),
+    ("market_data", "app.routers.stock_data", {"tags": ["stock-data"]}),
+    ("data_sync", "app.routers.stock_sync", {"tags": ["stock-sync"]}),
+    ("core", "app.routers.tags", {"prefix": "/api", "tags": ["tags"]}),
+    ("core", "app.routers.config", {"prefix": "/api", "tags": ["config"]}),
+    ("core", "app.routers.model_capabilities", {"tags": ["model-capabilities"]}),
+    ("core", "app.routers.usage_statistics", {"tags": ["usage-statistics"]}),
+    ("core", "app.routers.database", {"prefix": "/api/system", "tags": ["database"]}),
+    ("core", "app.routers.cache", {"tags": ["cache"]}),
+    ("core", "app.routers.operation_logs", {"prefix": "/api/system", "tags": ["operation_logs"]}),
+    ("core", "app.routers.logs", {"prefix": "/api/system", "tags": ["logs"]}),
+    # 系统配置只读摘要、启动耗时报告
+    ("core", "app.routers.system_config", {"prefix": "/api/system", "tags": ["system"]}),
+    # 通知模块（REST + SSE）
+    ("core", "app.routers.notifications", {"prefix": "/api", "tags": ["notifications"]}),
+    # 🔥 WebSocket 通知模块（替代 SSE + Redis PubSub）
+    ("core", "app.routers.websocket_notifications", {"prefix": "/api", "tags": ["websocket"]}),
+    # 定时任务管理
+    ("data_sync", "app.routers.scheduler", {"tags": ["scheduler"]}),
+    ("core", "app.routers.sse", {"prefix": "/api/stream", "tags": ["streaming"]}),
+    ("data_sync", "app.routers.sync", {}),
+    ("data_sync", "app.routers.multi_source_sync", {}),
+    ("paper", "app.routers.paper", {"prefix": "/api", "tags": ["paper"]}),
+    # ("data_sync", "app.routers.tushare_init", {"prefix": "/api", "tags": ["tushare-init"]}),  # 注释掉：依赖缺失的 Tushare 模块
+    ("data_sync", "app.routers.akshare_init", {"prefix": "/api", "tags": ["akshare-init"]}),
+    ("data_sync", "app.routers.baostock_init", {"prefix": "/api", "tags": ["baostock-init"]}),
+    ("market_data", "app.routers.historical_data", {"tags": ["historical-data"]}),
+    # ("data_sync", "app.routers.multi_period_sync", {"tags": ["multi-period-sync"]}),  # 注释掉：依赖缺失的 Tushare 模块
+    # ("market_data", "app.routers.financial_data", {"tags": ["financial-data"]}),  # 注释掉：依赖缺失的 Tushare 模块
+    ("market_data", "app.routers.news_data", {"tags": ["news-data"]}),
+    ("market_data", "app.routers.news_stats", {"prefix": "/api", "tags": ["news-stats"]}),
+    ("market_data", "app.routers.social_media", {"tags": ["social-media"]}),
+    ("core", "app.routers.internal_messages", {"tags": ["internal-messages"]}),
+]
+
+# 定时任务在首次执行时才导入对应的同步服务（暂停的任务不会加载 akshare/baostock）
+# 注释掉：Tushare worker（模块缺失）
+# 港股和美股改为按需获取+缓存模式，不再需要定时同步任务
+AKSHARE_WORKER = "app.worker.akshare_sync_service"
+BAOSTOCK_WORKER = "app.worker.baostock_sync_service"
+
+
+# 数据源相关服务在首次使用时才导入（作为模块属性访问时也会导入，便于测试替换）
+LAZY_SERVICES = {
+    "get_basics_sync_service": "app.services.basics_sync_service",
+    "MultiSourceBasicsSyncService": "app.services.multi_source_basics_sync_service",
+    "QuotesIngestionService": "app.services.quotes_ingestion_service",
+    "set_scheduler_instance": "app.services.scheduler_service",
+}
+
+
+def __getattr__(name: str):
+    if name in LAZY_SERVICES:
+        value = getattr(importlib.import_module(LAZY_SERVICES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _service(name: str):
+    """获取延迟导入的服务（已被替换或导入过时直接返回）"""
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+def _lazy_job(module_name: str, func_name: str):
+    """定时任务函数的延迟引用：首次执行时导入模块，任务名称与原函数一致"""
+    async def job(*args, **kwargs):
+        func = getattr(importlib.import_module(module_name), func_name)
+        return await func(*args, **kwargs)
+
+    job.__module__ = module_name
+    job.__name__ = job.__qualname__ = func_name
+    return job
+
+
+def include_routers(app: FastAPI) -> None:
+    """按路由表导入并注册路由，跳过被禁用的分组"""
+    disabled = {g.strip() for g in settings.API_DISABLED_ROUTER_GROUPS.split(",") if g.strip()}
+    for group, module_name, options in ROUTER_TABLE:
+        if group in disabled:
+            continue
+        with startup_profiler.phase(f"路由 {module_name}", group=group):
+            module = importlib.import_module(module_name)
+        app.include_router(module.router, **options)
+    if disabled:
+        logging.getLogger("app.main").info(f"⏸️ 已禁用路由分组: {', '.join(sorted(disabled))}")
 
 
 def get_version() -> str:
@@ -240,6 +285,436 @@ async def _print_config_summary(logger):
         logger.error(f"Failed to print config summary: {e}")
 
 
+async def _setup_scheduler(logger):
+    """创建并启动定时任务调度器（数据源同步服务在此处才导入）"""
+    MultiSourceBasicsSyncService = _service("MultiSourceBasicsSyncService")
+    QuotesIngestionService = _service("QuotesIngestionService")
+    set_scheduler_instance = _service("set_scheduler_instance")
+
+    try:
+        from croniter import croniter
+    except Exception:
+        croniter = None  # 可选依赖
+
+    scheduler = AsyncIOScheduler(timezone=settings.TIMEZONE)
+
+    # 使用多数据源同步服务（支持自动切换）
+    multi_source_service = MultiSourceBasicsSyncService()
+
+    # 根据 TUSHARE_ENABLED 配置决定优先数据源
+    # 如果 Tushare 被禁用，系统会自动使用其他可用数据源（AKShare/BaoStock）
+    preferred_sources = None  # None 表示使用默认优先级顺序
+
+    if settings.TUSHARE_ENABLED:
+        # Tushare 启用时，优先使用 Tushare
+        preferred_sources = ["tushare", "akshare", "baostock"]
+        logger.info(f"📊 股票基础信息同步优先数据源: Tushare > AKShare > BaoStock")
+    else:
+        # Tushare 禁用时，使用 AKShare 和 BaoStock
+        preferred_sources = ["akshare", "baostock"]
+        logger.info(f"📊 股票基础信息同步优先数据源: AKShare > BaoStock (Tushare已禁用)")
+
+    # 立即在启动后尝试一次（不阻塞）
+    async def run_sync_with_sources():
+        await multi_source_service.run_full_sync(force=False, preferred_sources=preferred_sources)
+
+    asyncio.create_task(run_sync_with_sources())
+
+    # 配置调度：优先使用 CRON，其次使用 HH:MM
+    if settings.SYNC_STOCK_BASICS_ENABLED:
+        if settings.SYNC_STOCK_BASICS_CRON:
+            # 如果提供了cron表达式
+            scheduler.add_job(
+                lambda: multi_source_service.run_full_sync(force=False, preferred_sources=preferred_sources),
+                CronTrigger.from_crontab(settings.SYNC_STOCK_BASICS_CRON, timezone=settings.TIMEZONE),
+                id="basics_sync_service",
+                name="股票基础信息同步（多数据源）"
+            )
+            logger.info(f"📅 Stock basics sync scheduled by CRON: {settings.SYNC_STOCK_BASICS_CRON} ({settings.TIMEZONE})")
+        else:
+            hh, mm = (settings.SYNC_STOCK_BASICS_TIME or "06:30").split(":")
+            scheduler.add_job(
+                lambda: multi_source_service.run_full_sync(force=False, preferred_sources=preferred_sources),
+                CronTrigger(hour=int(hh), minute=int(mm), timezone=settings.TIMEZONE),
+                id="basics_sync_service",
+                name="股票基础信息同步（多数据源）"
+            )
+            logger.info(f"📅 Stock basics sync scheduled daily at {settings.SYNC_STOCK_BASICS_TIME} ({settings.TIMEZONE})")
+
+    # 实时行情入库任务（每N秒），内部自判交易时段
+    if settings.QUOTES_INGEST_ENABLED:
+        quotes_ingestion = QuotesIngestionService()
+        await quotes_ingestion.ensure_indexes()
+        scheduler.add_job(
+            quotes_ingestion.run_once,  # coroutine function; AsyncIOScheduler will await it
+            IntervalTrigger(seconds=settings.QUOTES_INGEST_INTERVAL_SECONDS, timezone=settings.TIMEZONE),
+            id="quotes_ingestion_service",
+            name="实时行情入库服务"
+        )
+        logger.info(f"⏱ 实时行情入库任务已启动: 每 {settings.QUOTES_INGEST_INTERVAL_SECONDS}s")
+
+    # Tushare统一数据同步任务配置（已注释：模块缺失）
+    # logger.info("🔄 配置Tushare统一数据同步任务...")
+    #
+    # # 基础信息同步任务
+    # scheduler.add_job(
+    #     run_tushare_basic_info_sync,
+    #     CronTrigger.from_crontab(settings.TUSHARE_BASIC_INFO_SYNC_CRON, timezone=settings.TIMEZONE),
+    #     id="tushare_basic_info_sync",
+    #     name="股票基础信息同步（Tushare）",
+    #     kwargs={"force_update": False}
+    # )
+    # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_BASIC_INFO_SYNC_ENABLED):
+    #     scheduler.pause_job("tushare_basic_info_sync")
+    #     logger.info(f"⏸️ Tushare基础信息同步已添加但暂停: {settings.TUSHARE_BASIC_INFO_SYNC_CRON}")
+    # else:
+    #     logger.info(f"📅 Tushare基础信息同步已配置: {settings.TUSHARE_BASIC_INFO_SYNC_CRON}")
+    #
+    # # 实时行情同步任务
+    # scheduler.add_job(
+    #     run_tushare_quotes_sync,
+    #     CronTrigger.from_crontab(settings.TUSHARE_QUOTES_SYNC_CRON, timezone=settings.TIMEZONE),
+    #     id="tushare_quotes_sync",
+    #     name="实时行情同步（Tushare）"
+    # )
+    # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_QUOTES_SYNC_ENABLED):
+    #     scheduler.pause_job("tushare_quotes_sync")
+    #     logger.info(f"⏸️ Tushare行情同步已添加但暂停: {settings.TUSHARE_QUOTES_SYNC_CRON}")
+    # else:
+    #     logger.info(f"📈 Tushare行情同步已配置: {settings.TUSHARE_QUOTES_SYNC_CRON}")
+    #
+    # # 历史数据同步任务
+    # scheduler.add_job(
+    #     run_tushare_historical_sync,
+    #     CronTrigger.from_crontab(settings.TUSHARE_HISTORICAL_SYNC_CRON, timezone=settings.TIMEZONE),
+    #     id="tushare_historical_sync",
+    #     name="历史数据同步（Tushare）",
+    #     kwargs={"incremental": True}
+    # )
+    # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_HISTORICAL_SYNC_ENABLED):
+    #     scheduler.pause_job("tushare_historical_sync")
+    #     logger.info(f"⏸️ Tushare历史数据同步已添加但暂停: {settings.TUSHARE_HISTORICAL_SYNC_CRON}")
+    # else:
+    #     logger.info(f"📊 Tushare历史数据同步已配置: {settings.TUSHARE_HISTORICAL_SYNC_CRON}")
+    #
+    # # 财务数据同步任务
+    # scheduler.add_job(
+    #     run_tushare_financial_sync,
+    #     CronTrigger.from_crontab(settings.TUSHARE_FINANCIAL_SYNC_CRON, timezone=settings.TIMEZONE),
+    #     id="tushare_financial_sync",
+    #     name="财务数据同步（Tushare）"
+    # )
+    # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_FINANCIAL_SYNC_ENABLED):
+    #     scheduler.pause_job("tushare_financial_sync")
+    #     logger.info(f"⏸️ Tushare财务数据同步已添加但暂停: {settings.TUSHARE_FINANCIAL_SYNC_CRON}")
+    # else:
+    #     logger.info(f"💰 Tushare财务数据同步已配置: {settings.TUSHARE_FINANCIAL_SYNC_CRON}")
+    #
+    # # 状态检查任务
+    # scheduler.add_job(
+    #     run_tushare_status_check,
+    #     CronTrigger.from_crontab(settings.TUSHARE_STATUS_CHECK_CRON, timezone=settings.TIMEZONE),
+    #     id="tushare_status_check",
+    #     name="数据源状态检查（Tushare）"
+    # )
+    # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_STATUS_CHECK_ENABLED):
+    #     scheduler.pause_job("tushare_status_check")
+    #     logger.info(f"⏸️ Tushare状态检查已添加但暂停: {settings.TUSHARE_STATUS_CHECK_CRON}")
+    # else:
+    #     logger.info(f"🔍 Tushare状态检查已配置: {settings.TUSHARE_STATUS_CHECK_CRON}")
+
+    # AKShare统一数据同步任务配置
+    logger.info("🔄 配置AKShare统一数据同步任务...")
+
+    # 基础信息同步任务
+    scheduler.add_job(
+        _lazy_job(AKSHARE_WORKER, "run_akshare_basic_info_sync"),
+        CronTrigger.from_crontab(settings.AKSHARE_BASIC_INFO_SYNC_CRON, timezone=settings.TIMEZONE),
+        id="akshare_basic_info_sync",
+        name="股票基础信息同步（AKShare）",
+        kwargs={"force_update": False}
+    )
+    if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_BASIC_INFO_SYNC_ENABLED):
+        scheduler.pause_job("akshare_basic_info_sync")
+        logger.info(f"⏸️ AKShare基础信息同步已添加但暂停: {settings.AKSHARE_BASIC_INFO_SYNC_CRON}")
+    else:
+        logger.info(f"📅 AKShare基础信息同步已配置: {settings.AKSHARE_BASIC_INFO_SYNC_CRON}")
+
+    # 实时行情同步任务
+    scheduler.add_job(
+        _lazy_job(AKSHARE_WORKER, "run_akshare_quotes_sync"),
+        CronTrigger.from_crontab(settings.AKSHARE_QUOTES_SYNC_CRON, timezone=settings.TIMEZONE),
+        id="akshare_quotes_sync",
+        name="实时行情同步（AKShare）"
+    )
+    if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_QUOTES_SYNC_ENABLED):
+        scheduler.pause_job("akshare_quotes_sync")
+        logger.info(f"⏸️ AKShare行情同步已添加但暂停: {settings.AKSHARE_QUOTES_SYNC_CRON}")
+    else:
+        logger.info(f"📈 AKShare行情同步已配置: {settings.AKSHARE_QUOTES_SYNC_CRON}")
+
+    # 历史数据同步任务
+    scheduler.add_job(
+        _lazy_job(AKSHARE_WORKER, "run_akshare_historical_sync"),
+        CronTrigger.from_crontab(settings.AKSHARE_HISTORICAL_SYNC_CRON, timezone=settings.TIMEZONE),
+        id="akshare_historical_sync",
+        name="历史数据同步（AKShare）",
+        kwargs={"incremental": True}
+    )
+    if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_HISTORICAL_SYNC_ENABLED):
+        scheduler.pause_job("akshare_historical_sync")
+        logger.info(f"⏸️ AKShare历史数据同步已添加但暂停: {settings.AKSHARE_HISTORICAL_SYNC_CRON}")
+    else:
+        logger.info(f"📊 AKShare历史数据同步已配置: {settings.AKSHARE_HISTORICAL_SYNC_CRON}")
+
+    # 财务数据同步任务
+    scheduler.add_job(
+        _lazy_job(AKSHARE_WORKER, "run_akshare_financial_sync"),
+        CronTrigger.from_crontab(settings.AKSHARE_FINANCIAL_SYNC_CRON, timezone=settings.TIMEZONE),
+        id="akshare_financial_sync",
+        name="财务数据同步（AKShare）"
+    )
+    if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_FINANCIAL_SYNC_ENABLED):
+        scheduler.pause_job("akshare_financial_sync")
+        logger.info(f"⏸️ AKShare财务数据同步已添加但暂停: {settings.AKSHARE_FINANCIAL_SYNC_CRON}")
+    else:
+        logger.info(f"💰 AKShare财务数据同步已配置: {settings.AKSHARE_FINANCIAL_SYNC_CRON}")
+
+    # 状态检查任务
+    scheduler.add_job(
+        _lazy_job(AKSHARE_WORKER, "run_akshare_status_check"),
+        CronTrigger.from_crontab(settings.AKSHARE_STATUS_CHECK_CRON, timezone=settings.TIMEZONE),
+        id="akshare_status_check",
+        name="数据源状态检查（AKShare）"
+    )
+    if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_STATUS_CHECK_ENABLED):
+        scheduler.pause_job("akshare_status_check")
+        logger.info(f"⏸️ AKShare状态检查已添加但暂停: {settings.AKSHARE_STATUS_CHECK_CRON}")
+    else:
+        logger.info(f"🔍 AKShare状态检查已配置: {settings.AKSHARE_STATUS_CHECK_CRON}")
+
+    # BaoStock统一数据同步任务配置
+    logger.info("🔄 配置BaoStock统一数据同步任务...")
+
+    # 基础信息同步任务
+    scheduler.add_job(
+        _lazy_job(BAOSTOCK_WORKER, "run_baostock_basic_info_sync"),
+        CronTrigger.from_crontab(settings.BAOSTOCK_BASIC_INFO_SYNC_CRON, timezone=settings.TIMEZONE),
+        id="baostock_basic_info_sync",
+        name="股票基础信息同步（BaoStock）"
+    )
+    if not (settings.BAOSTOCK_UNIFIED_ENABLED and settings.BAOSTOCK_BASIC_INFO_SYNC_ENABLED):
+        scheduler.pause_job("baostock_basic_info_sync")
+        logger.info(f"⏸️ BaoStock基础信息同步已添加但暂停: {settings.BAOSTOCK_BASIC_INFO_SYNC_CRON}")
+    else:
+        logger.info(f"📋 BaoStock基础信息同步已配置: {settings.BAOSTOCK_BASIC_INFO_SYNC_CRON}")
+
+    # 日K线同步任务（注意：BaoStock不支持实时行情）
+    scheduler.add_job(
+        _lazy_job(BAOSTOCK_WORKER, "run_baostock_daily_quotes_sync"),
+        CronTrigger.from_crontab(settings.BAOSTOCK_DAILY_QUOTES_SYNC_CRON, timezone=settings.TIMEZONE),
+        id="baostock_daily_quotes_sync",
+        name="日K线数据同步（BaoStock）"
+    )
+    if not (settings.BAOSTOCK_UNIFIED_ENABLED and settings.BAOSTOCK_DAILY_QUOTES_SYNC_ENABLED):
+        scheduler.pause_job("baostock_daily_quotes_sync")
+        logger.info(f"⏸️ BaoStock日K线同步已添加但暂停: {settings.BAOSTOCK_DAILY_QUOTES_SYNC_CRON}")
+    else:
+        logger.info(f"📈 BaoStock日K线同步已配置: {settings.BAOSTOCK_DAILY_QUOTES_SYNC_CRON} (注意：BaoStock不支持实时行情)")
+
+    # 历史数据同步任务
+    scheduler.add_job(
+        _lazy_job(BAOSTOCK_WORKER, "run_baostock_historical_sync"),
+        CronTrigger.from_crontab(settings.BAOSTOCK_HISTORICAL_SYNC_CRON, timezone=settings.TIMEZONE),
+        id="baostock_historical_sync",
+        name="历史数据同步（BaoStock）"
+    )
+    if not (settings.BAOSTOCK_UNIFIED_ENABLED and settings.BAOSTOCK_HISTORICAL_SYNC_ENABLED):
+        scheduler.pause_job("baostock_historical_sync")
+        logger.info(f"⏸️ BaoStock历史数据同步已添加但暂停: {settings.BAOSTOCK_HISTORICAL_SYNC_CRON}")
+    else:
+        logger.info(f"📊 BaoStock历史数据同步已配置: {settings.BAOSTOCK_HISTORICAL_SYNC_CRON}")
+
+    # 状态检查任务
+    scheduler.add_job(
+        _lazy_job(BAOSTOCK_WORKER, "run_baostock_status_check"),
+        CronTrigger.from_crontab(settings.BAOSTOCK_STATUS_CHECK_CRON, timezone=settings.TIMEZONE),
+        id="baostock_status_check",
+        name="数据源状态检查（BaoStock）"
+    )
+    if not (settings.BAOSTOCK_UNIFIED_ENABLED and settings.BAOSTOCK_STATUS_CHECK_ENABLED):
+        scheduler.pause_job("baostock_status_check")
+        logger.info(f"⏸️ BaoStock状态检查已添加但暂停: {settings.BAOSTOCK_STATUS_CHECK_CRON}")
+    else:
+        logger.info(f"🔍 BaoStock状态检查已配置: {settings.BAOSTOCK_STATUS_CHECK_CRON}")
+
+    # 新闻数据同步任务配置（使用AKShare同步所有股票新闻）
+    logger.info("🔄 配置新闻数据同步任务...")
+
+    async def run_news_sync():
+        """运行新闻同步任务 - 使用AKShare同步自选股新闻"""
+        try:
+            from app.worker.akshare_sync_service import get_akshare_sync_service
+            logger.info("📰 开始新闻数据同步（AKShare - 仅自选股）...")
+            service = await get_akshare_sync_service()
+            result = await service.sync_news_data(
+                symbols=None,  # None + favorites_only=True 表示只同步自选股
+                max_news_per_stock=settings.NEWS_SYNC_MAX_PER_SOURCE,
+                favorites_only=True,  # 只同步自选股
+                sync_type="auto"
+            )
+            logger.info(
+                f"✅ 新闻同步完成: "
+                f"处理{result['total_processed']}只自选股, "
+                f"成功{result['success_count']}只, "
+                f"失败{result['error_count']}只, "
+                f"新闻总数{result['news_count']}条, "
+                f"耗时{(datetime.utcnow() - result['start_time']).total_seconds():.2f}秒"
+            )
+        except Exception as e:
+            logger.error(f"❌ 新闻同步失败: {e}", exc_info=True)
+    
+    # ==================== 多源新闻同步（新增）====================
+    async def run_multi_source_news_sync():
+        """运行多源新闻同步任务 - 整合AKShare、Alpha Vantage、FinnHub、RSS"""
+        try:
+            logger.info("📰 开始多源新闻数据同步...")
+            from app.worker.multi_source_news_service import get_multi_source_news_service
+            
+            service = await get_multi_source_news_service()
+            result = await service.sync_news_data(
+                symbols=None,
+                max_news_per_stock=settings.NEWS_SYNC_MAX_PER_SOURCE,
+                favorites_only=True  # 只同步自选股
+            )
+            
+            logger.info(
+                f"✅ 多源新闻同步完成: "
+                f"处理{result['total_processed']}只自选股, "
+                f"成功{result['success_count']}只, "
+                f"新闻总数{result['news_count']}条, "
+                f"耗时{result.get('duration', 0):.2f}秒"
+            )
+            
+            # 输出各源统计
+            for source, count in result.get('source_stats', {}).items():
+                logger.info(f"  📰 {source}: {count} 条新闻")
+                
+        except Exception as e:
+            logger.error(f"❌ 多源新闻同步失败: {e}", exc_info=True)
+
+    # ==================== 港股/美股数据配置 ====================
+    # 港股和美股采用按需获取+缓存模式，不再配置定时同步任务
+    logger.info("🇭🇰 港股数据采用按需获取+缓存模式")
+    logger.info("🇺🇸 美股数据采用按需获取+缓存模式")
+
+    # ==================== 原有AKShare新闻同步（保留作为备份）====================
+    if settings.NEWS_SYNC_ENABLED:
+        # 优化调度：每4小时整点执行，与爬虫错峰
+        akshare_cron = "0 */4 * * *"
+        scheduler.add_job(
+            run_news_sync,
+            CronTrigger.from_crontab(akshare_cron, timezone=settings.TIMEZONE),
+            id='news_sync',
+            name='新闻数据同步（AKShare）',
+            replace_existing=True
+        )
+        logger.info(f"✅ 新闻同步任务已配置: {akshare_cron} (每4小时整点)")
+    
+    # ==================== 多源新闻同步（新增）====================
+    # 使用环境变量控制是否启用多源新闻同步
+    import os
+    multi_source_enabled = os.getenv("MULTI_SOURCE_NEWS_ENABLED", "true").lower() == "true"
+    
+    if multi_source_enabled and settings.NEWS_SYNC_ENABLED:
+        # 优化调度：每天关键时点 (05:00, 10:00, 21:00) 执行，节省配额
+        multi_source_cron = "0 5,10,21 * * *"
+        scheduler.add_job(
+            run_multi_source_news_sync,
+            CronTrigger.from_crontab(multi_source_cron, timezone=settings.TIMEZONE),
+            id='multi_source_news_sync',
+            name='多源新闻数据同步',
+            replace_existing=True
+        )
+        logger.info(f"✅ 多源新闻同步任务已配置: {multi_source_cron} (每天05:00, 10:00, 21:00)")
+    else:
+        logger.info(f"⏸️ 多源新闻同步任务未启用或已暂停")
+
+    # ==================== PlaywriteOCR爬虫新闻同步（新增）====================
+    scraper_sync_enabled = os.getenv("SCRAPER_SYNC_ENABLED", "true").lower() == "true"
+    
+    if scraper_sync_enabled:
+        async def run_scraper_news_sync():
+            """运行爬虫新闻同步任务 - 同步自选股到数据库"""
+            try:
+                from app.worker.scraper_sync_service import get_scraper_sync_service, get_sync_interval
+                interval = get_sync_interval()
+                logger.info(f"🕷️ 开始爬虫新闻同步（智能频率: {interval}分钟间隔）...")
+                
+                service = get_scraper_sync_service()
+                result = await service.sync_favorite_stocks()
+                
+                if result.get("status") == "success":
+                    logger.info(
+                        f"✅ 爬虫同步完成: "
+                        f"{result.get('success_count', 0)}/{result.get('favorites_count', 0)}只股票成功, "
+                        f"新增{result.get('total_news_saved', 0)}条新闻, "
+                        f"耗时{result.get('elapsed_seconds', 0):.1f}秒"
+                    )
+                elif result.get("status") == "skipped":
+                    logger.info(f"⏭️ 爬虫同步跳过: {result.get('reason', '无自选股')}")
+                else:
+                    logger.warning(f"⚠️ 爬虫同步异常: {result.get('error', '未知错误')}")
+                    
+            except Exception as e:
+                logger.error(f"❌ 爬虫同步失败: {e}", exc_info=True)
+        
+        # 优化调度：每4小时半点执行 (00:30, 04:30...)，与AKShare错峰30分钟
+        scraper_cron = "30 */4 * * *"
+        scheduler.add_job(
+            run_scraper_news_sync,
+            CronTrigger.from_crontab(scraper_cron, timezone=settings.TIMEZONE),
+            id='scraper_news_sync',
+            name='爬虫新闻同步（自选股）',
+            replace_existing=True
+        )
+        logger.info(f"✅ 爬虫新闻同步任务已配置: {scraper_cron} (每4小时半点)")
+        
+        # 清理任务（每天凌晨3点）
+        async def run_scraper_cleanup():
+            """运行爬虫新闻清理任务"""
+            try:
+                from app.scheduler.cleanup_news import cleanup_old_scraper_news
+                logger.info("🧹 开始清理过期爬虫新闻...")
+                result = await cleanup_old_scraper_news(retention_days=90)
+                
+                if result.get("status") == "success":
+                    logger.info(f"✅ 爬虫清理完成: 删除{result.get('deleted_count', 0)}条过期新闻")
+                else:
+                    logger.warning(f"⚠️ 爬虫清理异常: {result.get('error', '未知错误')}")
+                    
+            except Exception as e:
+                logger.error(f"❌ 爬虫清理失败: {e}", exc_info=True)
+        
+        scheduler.add_job(
+            run_scraper_cleanup,
+            CronTrigger(hour=3, minute=0, timezone=settings.TIMEZONE),
+            id='scraper_news_cleanup',
+            name='爬虫新闻清理（90天）',
+            replace_existing=True
+        )
+        logger.info(f"✅ 爬虫清理任务已配置: 每天凌晨3:00（保留90天）")
+    else:
+        logger.info(f"⏸️ 爬虫新闻同步任务已禁用")
+
+    scheduler.start()
+
+    # 设置调度器实例到服务中，以便API可以管理任务
+    set_scheduler_instance(scheduler)
+    logger.info("✅ 调度器服务已初始化")
+    return scheduler
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
@@ -250,17 +725,20 @@ async def lifespan(app: FastAPI):
     # 验证启动配置
     try:
         from app.core.startup_validator import validate_startup_config
-        validate_startup_config()
+        with startup_profiler.phase("配置验证"):
+            validate_startup_config()
     except Exception as e:
         logger.error(f"配置验证失败: {e}")
         raise
 
-    await init_db()
+    with startup_profiler.phase("数据库初始化"):
+        await init_db()
 
     #  配置桥接：将统一配置写入环境变量，供 TradingAgents 核心库使用
     try:
         from app.core.config_bridge import bridge_config_to_env
-        bridge_config_to_env()
+        with startup_profiler.phase("配置桥接"):
+            bridge_config_to_env()
     except Exception as e:
         logger.warning(f"⚠️  配置桥接失败: {e}")
         logger.warning("⚠️  TradingAgents 将使用 .env 文件中的配置")
@@ -286,444 +764,29 @@ async def lifespan(app: FastAPI):
 
     logger.info("TradingAgents FastAPI backend started")
 
-    # 启动期：若需要在休市时补充上一交易日收盘快照
-    if settings.QUOTES_BACKFILL_ON_STARTUP:
+    # 启动期：若需要在休市时补充上一交易日收盘快照（仅运行调度器的进程执行）
+    if settings.QUOTES_BACKFILL_ON_STARTUP and settings.SCHEDULER_ENABLED:
         try:
-            qi = QuotesIngestionService()
-            await qi.ensure_indexes()
-            await qi.backfill_last_close_snapshot_if_needed()
+            with startup_profiler.phase("行情快照补数"):
+                qi = _service("QuotesIngestionService")()
+                await qi.ensure_indexes()
+                await qi.backfill_last_close_snapshot_if_needed()
         except Exception as e:
             logger.warning(f"Startup backfill failed (ignored): {e}")
 
-    # 启动每日定时任务：可配置
-    scheduler: AsyncIOScheduler | None = None
-    try:
-        from croniter import croniter
-    except Exception:
-        croniter = None  # 可选依赖
-    try:
-        scheduler = AsyncIOScheduler(timezone=settings.TIMEZONE)
-
-        # 使用多数据源同步服务（支持自动切换）
-        multi_source_service = MultiSourceBasicsSyncService()
-
-        # 根据 TUSHARE_ENABLED 配置决定优先数据源
-        # 如果 Tushare 被禁用，系统会自动使用其他可用数据源（AKShare/BaoStock）
-        preferred_sources = None  # None 表示使用默认优先级顺序
-
-        if settings.TUSHARE_ENABLED:
-            # Tushare 启用时，优先使用 Tushare
-            preferred_sources = ["tushare", "akshare", "baostock"]
-            logger.info(f"📊 股票基础信息同步优先数据源: Tushare > AKShare > BaoStock")
-        else:
-            # Tushare 禁用时，使用 AKShare 和 BaoStock
-            preferred_sources = ["akshare", "baostock"]
-            logger.info(f"📊 股票基础信息同步优先数据源: AKShare > BaoStock (Tushare已禁用)")
-
-        # 立即在启动后尝试一次（不阻塞）
-        async def run_sync_with_sources():
-            await multi_source_service.run_full_sync(force=False, preferred_sources=preferred_sources)
-
-        asyncio.create_task(run_sync_with_sources())
-
-        # 配置调度：优先使用 CRON，其次使用 HH:MM
-        if settings.SYNC_STOCK_BASICS_ENABLED:
-            if settings.SYNC_STOCK_BASICS_CRON:
-                # 如果提供了cron表达式
-                scheduler.add_job(
-                    lambda: multi_source_service.run_full_sync(force=False, preferred_sources=preferred_sources),
-                    CronTrigger.from_crontab(settings.SYNC_STOCK_BASICS_CRON, timezone=settings.TIMEZONE),
-                    id="basics_sync_service",
-                    name="股票基础信息同步（多数据源）"
-                )
-                logger.info(f"📅 Stock basics sync scheduled by CRON: {settings.SYNC_STOCK_BASICS_CRON} ({settings.TIMEZONE})")
-            else:
-                hh, mm = (settings.SYNC_STOCK_BASICS_TIME or "06:30").split(":")
-                scheduler.add_job(
-                    lambda: multi_source_service.run_full_sync(force=False, preferred_sources=preferred_sources),
-                    CronTrigger(hour=int(hh), minute=int(mm), timezone=settings.TIMEZONE),
-                    id="basics_sync_service",
-                    name="股票基础信息同步（多数据源）"
-                )
-                logger.info(f"📅 Stock basics sync scheduled daily at {settings.SYNC_STOCK_BASICS_TIME} ({settings.TIMEZONE})")
-
-        # 实时行情入库任务（每N秒），内部自判交易时段
-        if settings.QUOTES_INGEST_ENABLED:
-            quotes_ingestion = QuotesIngestionService()
-            await quotes_ingestion.ensure_indexes()
-            scheduler.add_job(
-                quotes_ingestion.run_once,  # coroutine function; AsyncIOScheduler will await it
-                IntervalTrigger(seconds=settings.QUOTES_INGEST_INTERVAL_SECONDS, timezone=settings.TIMEZONE),
-                id="quotes_ingestion_service",
-                name="实时行情入库服务"
-            )
-            logger.info(f"⏱ 实时行情入库任务已启动: 每 {settings.QUOTES_INGEST_INTERVAL_SECONDS}s")
-
-        # Tushare统一数据同步任务配置（已注释：模块缺失）
-        # logger.info("🔄 配置Tushare统一数据同步任务...")
-        #
-        # # 基础信息同步任务
-        # scheduler.add_job(
-        #     run_tushare_basic_info_sync,
-        #     CronTrigger.from_crontab(settings.TUSHARE_BASIC_INFO_SYNC_CRON, timezone=settings.TIMEZONE),
-        #     id="tushare_basic_info_sync",
-        #     name="股票基础信息同步（Tushare）",
-        #     kwargs={"force_update": False}
-        # )
-        # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_BASIC_INFO_SYNC_ENABLED):
-        #     scheduler.pause_job("tushare_basic_info_sync")
-        #     logger.info(f"⏸️ Tushare基础信息同步已添加但暂停: {settings.TUSHARE_BASIC_INFO_SYNC_CRON}")
-        # else:
-        #     logger.info(f"📅 Tushare基础信息同步已配置: {settings.TUSHARE_BASIC_INFO_SYNC_CRON}")
-        #
-        # # 实时行情同步任务
-        # scheduler.add_job(
-        #     run_tushare_quotes_sync,
-        #     CronTrigger.from_crontab(settings.TUSHARE_QUOTES_SYNC_CRON, timezone=settings.TIMEZONE),
-        #     id="tushare_quotes_sync",
-        #     name="实时行情同步（Tushare）"
-        # )
-        # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_QUOTES_SYNC_ENABLED):
-        #     scheduler.pause_job("tushare_quotes_sync")
-        #     logger.info(f"⏸️ Tushare行情同步已添加但暂停: {settings.TUSHARE_QUOTES_SYNC_CRON}")
-        # else:
-        #     logger.info(f"📈 Tushare行情同步已配置: {settings.TUSHARE_QUOTES_SYNC_CRON}")
-        #
-        # # 历史数据同步任务
-        # scheduler.add_job(
-        #     run_tushare_historical_sync,
-        #     CronTrigger.from_crontab(settings.TUSHARE_HISTORICAL_SYNC_CRON, timezone=settings.TIMEZONE),
-        #     id="tushare_historical_sync",
-        #     name="历史数据同步（Tushare）",
-        #     kwargs={"incremental": True}
-        # )
-        # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_HISTORICAL_SYNC_ENABLED):
-        #     scheduler.pause_job("tushare_historical_sync")
-        #     logger.info(f"⏸️ Tushare历史数据同步已添加但暂停: {settings.TUSHARE_HISTORICAL_SYNC_CRON}")
-        # else:
-        #     logger.info(f"📊 Tushare历史数据同步已配置: {settings.TUSHARE_HISTORICAL_SYNC_CRON}")
-        #
-        # # 财务数据同步任务
-        # scheduler.add_job(
-        #     run_tushare_financial_sync,
-        #     CronTrigger.from_crontab(settings.TUSHARE_FINANCIAL_SYNC_CRON, timezone=settings.TIMEZONE),
-        #     id="tushare_financial_sync",
-        #     name="财务数据同步（Tushare）"
-        # )
-        # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_FINANCIAL_SYNC_ENABLED):
-        #     scheduler.pause_job("tushare_financial_sync")
-        #     logger.info(f"⏸️ Tushare财务数据同步已添加但暂停: {settings.TUSHARE_FINANCIAL_SYNC_CRON}")
-        # else:
-        #     logger.info(f"💰 Tushare财务数据同步已配置: {settings.TUSHARE_FINANCIAL_SYNC_CRON}")
-        #
-        # # 状态检查任务
-        # scheduler.add_job(
-        #     run_tushare_status_check,
-        #     CronTrigger.from_crontab(settings.TUSHARE_STATUS_CHECK_CRON, timezone=settings.TIMEZONE),
-        #     id="tushare_status_check",
-        #     name="数据源状态检查（Tushare）"
-        # )
-        # if not (settings.TUSHARE_UNIFIED_ENABLED and settings.TUSHARE_STATUS_CHECK_ENABLED):
-        #     scheduler.pause_job("tushare_status_check")
-        #     logger.info(f"⏸️ Tushare状态检查已添加但暂停: {settings.TUSHARE_STATUS_CHECK_CRON}")
-        # else:
-        #     logger.info(f"🔍 Tushare状态检查已配置: {settings.TUSHARE_STATUS_CHECK_CRON}")
-
-        # AKShare统一数据同步任务配置
-        logger.info("🔄 配置AKShare统一数据同步任务...")
-
-        # 基础信息同步任务
-        scheduler.add_job(
-            run_akshare_basic_info_sync,
-            CronTrigger.from_crontab(settings.AKSHARE_BASIC_INFO_SYNC_CRON, timezone=settings.TIMEZONE),
-            id="akshare_basic_info_sync",
-            name="股票基础信息同步（AKShare）",
-            kwargs={"force_update": False}
-        )
-        if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_BASIC_INFO_SYNC_ENABLED):
-            scheduler.pause_job("akshare_basic_info_sync")
-            logger.info(f"⏸️ AKShare基础信息同步已添加但暂停: {settings.AKSHARE_BASIC_INFO_SYNC_CRON}")
-        else:
-            logger.info(f"📅 AKShare基础信息同步已配置: {settings.AKSHARE_BASIC_INFO_SYNC_CRON}")
-
-        # 实时行情同步任务
-        scheduler.add_job(
-            run_akshare_quotes_sync,
-            CronTrigger.from_crontab(settings.AKSHARE_QUOTES_SYNC_CRON, timezone=settings.TIMEZONE),
-            id="akshare_quotes_sync",
-            name="实时行情同步（AKShare）"
-        )
-        if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_QUOTES_SYNC_ENABLED):
-            scheduler.pause_job("akshare_quotes_sync")
-            logger.info(f"⏸️ AKShare行情同步已添加但暂停: {settings.AKSHARE_QUOTES_SYNC_CRON}")
-        else:
-            logger.info(f"📈 AKShare行情同步已配置: {settings.AKSHARE_QUOTES_SYNC_CRON}")
-
-        # 历史数据同步任务
-        scheduler.add_job(
-            run_akshare_historical_sync,
-            CronTrigger.from_crontab(settings.AKSHARE_HISTORICAL_SYNC_CRON, timezone=settings.TIMEZONE),
-            id="akshare_historical_sync",
-            name="历史数据同步（AKShare）",
-            kwargs={"incremental": True}
-        )
-        if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_HISTORICAL_SYNC_ENABLED):
-            scheduler.pause_job("akshare_historical_sync")
-            logger.info(f"⏸️ AKShare历史数据同步已添加但暂停: {settings.AKSHARE_HISTORICAL_SYNC_CRON}")
-        else:
-            logger.info(f"📊 AKShare历史数据同步已配置: {settings.AKSHARE_HISTORICAL_SYNC_CRON}")
-
-        # 财务数据同步任务
-        scheduler.add_job(
-            run_akshare_financial_sync,
-            CronTrigger.from_crontab(settings.AKSHARE_FINANCIAL_SYNC_CRON, timezone=settings.TIMEZONE),
-            id="akshare_financial_sync",
-            name="财务数据同步（AKShare）"
-        )
-        if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_FINANCIAL_SYNC_ENABLED):
-            scheduler.pause_job("akshare_financial_sync")
-            logger.info(f"⏸️ AKShare财务数据同步已添加但暂停: {settings.AKSHARE_FINANCIAL_SYNC_CRON}")
-        else:
-            logger.info(f"💰 AKShare财务数据同步已配置: {settings.AKSHARE_FINANCIAL_SYNC_CRON}")
-
-        # 状态检查任务
-        scheduler.add_job(
-            run_akshare_status_check,
-            CronTrigger.from_crontab(settings.AKSHARE_STATUS_CHECK_CRON, timezone=settings.TIMEZONE),
-            id="akshare_status_check",
-            name="数据源状态检查（AKShare）"
-        )
-        if not (settings.AKSHARE_UNIFIED_ENABLED and settings.AKSHARE_STATUS_CHECK_ENABLED):
-            scheduler.pause_job("akshare_status_check")
-            logger.info(f"⏸️ AKShare状态检查已添加但暂停: {settings.AKSHARE_STATUS_CHECK_CRON}")
-        else:
-            logger.info(f"🔍 AKShare状态检查已配置: {settings.AKSHARE_STATUS_CHECK_CRON}")
-
-        # BaoStock统一数据同步任务配置
-        logger.info("🔄 配置BaoStock统一数据同步任务...")
-
-        # 基础信息同步任务
-        scheduler.add_job(
-            run_baostock_basic_info_sync,
-            CronTrigger.from_crontab(settings.BAOSTOCK_BASIC_INFO_SYNC_CRON, timezone=settings.TIMEZONE),
-            id="baostock_basic_info_sync",
-            name="股票基础信息同步（BaoStock）"
-        )
-        if not (settings.BAOSTOCK_UNIFIED_ENABLED and settings.BAOSTOCK_BASIC_INFO_SYNC_ENABLED):
-            scheduler.pause_job("baostock_basic_info_sync")
-            logger.info(f"⏸️ BaoStock基础信息同步已添加但暂停: {settings.BAOSTOCK_BASIC_INFO_SYNC_CRON}")
-        else:
-            logger.info(f"📋 BaoStock基础信息同步已配置: {settings.BAOSTOCK_BASIC_INFO_SYNC_CRON}")
-
-        # 日K线同步任务（注意：BaoStock不支持实时行情）
-        scheduler.add_job(
-            run_baostock_daily_quotes_sync,
-            CronTrigger.from_crontab(settings.BAOSTOCK_DAILY_QUOTES_SYNC_CRON, timezone=settings.TIMEZONE),
-            id="baostock_daily_quotes_sync",
-            name="日K线数据同步（BaoStock）"
-        )
-        if not (settings.BAOSTOCK_UNIFIED_ENABLED and settings.BAOSTOCK_DAILY_QUOTES_SYNC_ENABLED):
-            scheduler.pause_job("baostock_daily_quotes_sync")
-            logger.info(f"⏸️ BaoStock日K线同步已添加但暂停: {settings.BAOSTOCK_DAILY_QUOTES_SYNC_CRON}")
-        else:
-            logger.info(f"📈 BaoStock日K线同步已配置: {settings.BAOSTOCK_DAILY_QUOTES_SYNC_CRON} (注意：BaoStock不支持实时行情)")
-
-        # 历史数据同步任务
-        scheduler.add_job(
-            run_baostock_historical_sync,
-            CronTrigger.from_crontab(settings.BAOSTOCK_HISTORICAL_SYNC_CRON, timezone=settings.TIMEZONE),
-            id="baostock_historical_sync",
-            name="历史数据同步（BaoStock）"
-        )
-        if not (settings.BAOSTOCK_UNIFIED_ENABLED and settings.BAOSTOCK_HISTORICAL_SYNC_ENABLED):
-            scheduler.pause_job("baostock_historical_sync")
-            logger.info(f"⏸️ BaoStock历史数据同步已添加但暂停: {settings.BAOSTOCK_HISTORICAL_SYNC_CRON}")
-        else:
-            logger.info(f"📊 BaoStock历史数据同步已配置: {settings.BAOSTOCK_HISTORICAL_SYNC_CRON}")
-
-        # 状态检查任务
-        scheduler.add_job(
-            run_baostock_status_check,
-            CronTrigger.from_crontab(settings.BAOSTOCK_STATUS_CHECK_CRON, timezone=settings.TIMEZONE),
-            id="baostock_status_check",
-            name="数据源状态检查（BaoStock）"
-        )
-        if not (settings.BAOSTOCK_UNIFIED_ENABLED and settings.BAOSTOCK_STATUS_CHECK_ENABLED):
-            scheduler.pause_job("baostock_status_check")
-            logger.info(f"⏸️ BaoStock状态检查已添加但暂停: {settings.BAOSTOCK_STATUS_CHECK_CRON}")
-        else:
-            logger.info(f"🔍 BaoStock状态检查已配置: {settings.BAOSTOCK_STATUS_CHECK_CRON}")
-
-        # 新闻数据同步任务配置（使用AKShare同步所有股票新闻）
-        logger.info("🔄 配置新闻数据同步任务...")
-
-        from app.worker.akshare_sync_service import get_akshare_sync_service
-
-        async def run_news_sync():
-            """运行新闻同步任务 - 使用AKShare同步自选股新闻"""
-            try:
-                logger.info("📰 开始新闻数据同步（AKShare - 仅自选股）...")
-                service = await get_akshare_sync_service()
-                result = await service.sync_news_data(
-                    symbols=None,  # None + favorites_only=True 表示只同步自选股
-                    max_news_per_stock=settings.NEWS_SYNC_MAX_PER_SOURCE,
-                    favorites_only=True,  # 只同步自选股
-                    sync_type="auto"
-                )
-                logger.info(
-                    f"✅ 新闻同步完成: "
-                    f"处理{result['total_processed']}只自选股, "
-                    f"成功{result['success_count']}只, "
-                    f"失败{result['error_count']}只, "
-                    f"新闻总数{result['news_count']}条, "
-                    f"耗时{(datetime.utcnow() - result['start_time']).total_seconds():.2f}秒"
-                )
-            except Exception as e:
-                logger.error(f"❌ 新闻同步失败: {e}", exc_info=True)
-        
-        # ==================== 多源新闻同步（新增）====================
-        async def run_multi_source_news_sync():
-            """运行多源新闻同步任务 - 整合AKShare、Alpha Vantage、FinnHub、RSS"""
-            try:
-                logger.info("📰 开始多源新闻数据同步...")
-                from app.worker.multi_source_news_service import get_multi_source_news_service
-                
-                service = await get_multi_source_news_service()
-                result = await service.sync_news_data(
-                    symbols=None,
-                    max_news_per_stock=settings.NEWS_SYNC_MAX_PER_SOURCE,
-                    favorites_only=True  # 只同步自选股
-                )
-                
-                logger.info(
-                    f"✅ 多源新闻同步完成: "
-                    f"处理{result['total_processed']}只自选股, "
-                    f"成功{result['success_count']}只, "
-                    f"新闻总数{result['news_count']}条, "
-                    f"耗时{result.get('duration', 0):.2f}秒"
-                )
-                
-                # 输出各源统计
-                for source, count in result.get('source_stats', {}).items():
-                    logger.info(f"  📰 {source}: {count} 条新闻")
-                    
-            except Exception as e:
-                logger.error(f"❌ 多源新闻同步失败: {e}", exc_info=True)
-
-        # ==================== 港股/美股数据配置 ====================
-        # 港股和美股采用按需获取+缓存模式，不再配置定时同步任务
-        logger.info("🇭🇰 港股数据采用按需获取+缓存模式")
-        logger.info("🇺🇸 美股数据采用按需获取+缓存模式")
-
-        # ==================== 原有AKShare新闻同步（保留作为备份）====================
-        if settings.NEWS_SYNC_ENABLED:
-            # 优化调度：每4小时整点执行，与爬虫错峰
-            akshare_cron = "0 */4 * * *"
-            scheduler.add_job(
-                run_news_sync,
-                CronTrigger.from_crontab(akshare_cron, timezone=settings.TIMEZONE),
-                id='news_sync',
-                name='新闻数据同步（AKShare）',
-                replace_existing=True
-            )
-            logger.info(f"✅ 新闻同步任务已配置: {akshare_cron} (每4小时整点)")
-        
-        # ==================== 多源新闻同步（新增）====================
-        # 使用环境变量控制是否启用多源新闻同步
-        import os
-        multi_source_enabled = os.getenv("MULTI_SOURCE_NEWS_ENABLED", "true").lower() == "true"
-        
-        if multi_source_enabled and settings.NEWS_SYNC_ENABLED:
-            # 优化调度：每天关键时点 (05:00, 10:00, 21:00) 执行，节省配额
-            multi_source_cron = "0 5,10,21 * * *"
-            scheduler.add_job(
-                run_multi_source_news_sync,
-                CronTrigger.from_crontab(multi_source_cron, timezone=settings.TIMEZONE),
-                id='multi_source_news_sync',
-                name='多源新闻数据同步',
-                replace_existing=True
-            )
-            logger.info(f"✅ 多源新闻同步任务已配置: {multi_source_cron} (每天05:00, 10:00, 21:00)")
-        else:
-            logger.info(f"⏸️ 多源新闻同步任务未启用或已暂停")
-
-        # ==================== PlaywriteOCR爬虫新闻同步（新增）====================
-        scraper_sync_enabled = os.getenv("SCRAPER_SYNC_ENABLED", "true").lower() == "true"
-        
-        if scraper_sync_enabled:
-            from app.worker.scraper_sync_service import get_scraper_sync_service, get_sync_interval
-            
-            async def run_scraper_news_sync():
-                """运行爬虫新闻同步任务 - 同步自选股到数据库"""
-                try:
-                    interval = get_sync_interval()
-                    logger.info(f"🕷️ 开始爬虫新闻同步（智能频率: {interval}分钟间隔）...")
-                    
-                    service = get_scraper_sync_service()
-                    result = await service.sync_favorite_stocks()
-                    
-                    if result.get("status") == "success":
-                        logger.info(
-                            f"✅ 爬虫同步完成: "
-                            f"{result.get('success_count', 0)}/{result.get('favorites_count', 0)}只股票成功, "
-                            f"新增{result.get('total_news_saved', 0)}条新闻, "
-                            f"耗时{result.get('elapsed_seconds', 0):.1f}秒"
-                        )
-                    elif result.get("status") == "skipped":
-                        logger.info(f"⏭️ 爬虫同步跳过: {result.get('reason', '无自选股')}")
-                    else:
-                        logger.warning(f"⚠️ 爬虫同步异常: {result.get('error', '未知错误')}")
-                        
-                except Exception as e:
-                    logger.error(f"❌ 爬虫同步失败: {e}", exc_info=True)
-            
-            # 优化调度：每4小时半点执行 (00:30, 04:30...)，与AKShare错峰30分钟
-            scraper_cron = "30 */4 * * *"
-            scheduler.add_job(
-                run_scraper_news_sync,
-                CronTrigger.from_crontab(scraper_cron, timezone=settings.TIMEZONE),
-                id='scraper_news_sync',
-                name='爬虫新闻同步（自选股）',
-                replace_existing=True
-            )
-            logger.info(f"✅ 爬虫新闻同步任务已配置: {scraper_cron} (每4小时半点)")
-            
-            # 清理任务（每天凌晨3点）
-            from app.scheduler.cleanup_news import cleanup_old_scraper_news
-            
-            async def run_scraper_cleanup():
-                """运行爬虫新闻清理任务"""
-                try:
-                    logger.info("🧹 开始清理过期爬虫新闻...")
-                    result = await cleanup_old_scraper_news(retention_days=90)
-                    
-                    if result.get("status") == "success":
-                        logger.info(f"✅ 爬虫清理完成: 删除{result.get('deleted_count', 0)}条过期新闻")
-                    else:
-                        logger.warning(f"⚠️ 爬虫清理异常: {result.get('error', '未知错误')}")
-                        
-                except Exception as e:
-                    logger.error(f"❌ 爬虫清理失败: {e}", exc_info=True)
-            
-            scheduler.add_job(
-                run_scraper_cleanup,
-                CronTrigger(hour=3, minute=0, timezone=settings.TIMEZONE),
-                id='scraper_news_cleanup',
-                name='爬虫新闻清理（90天）',
-                replace_existing=True
-            )
-            logger.info(f"✅ 爬虫清理任务已配置: 每天凌晨3:00（保留90天）")
-        else:
-            logger.info(f"⏸️ 爬虫新闻同步任务已禁用")
-
-        scheduler.start()
+    # 启动每日定时任务：可配置（多 worker 部署时可只在一个进程中启用）
+    scheduler = None
+    if settings.SCHEDULER_ENABLED:
+        try:
+            with startup_profiler.phase("调度器初始化"):
+                scheduler = await _setup_scheduler(logger)
+        except Exception as e:
+            logger.error(f"❌ 调度器启动失败: {e}", exc_info=True)
+            raise  # 抛出异常，阻止应用启动
+    else:
+        logger.info("⏸️ 定时任务已禁用（SCHEDULER_ENABLED=false），本进程不加载数据源同步服务")
 
-        # 设置调度器实例到服务中，以便API可以管理任务
-        set_scheduler_instance(scheduler)
-        logger.info("✅ 调度器服务已初始化")
-    except Exception as e:
-        logger.error(f"❌ 调度器启动失败: {e}", exc_info=True)
-        raise  # 抛出异常，阻止应用启动
+    startup_profiler.mark_ready()
 
     try:
         yield
@@ -736,6 +799,20 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.warning(f"Scheduler shutdown error: {e}")
 
+        # 刷新待写入的操作日志
+        try:
+            from app.services.operation_log_service import get_operation_log_buffer
+            await get_operation_log_buffer().stop()
+        except Exception as e:
+            logger.warning(f"Operation log flush error: {e}")
+
+        # 关闭报告导出渲染进程池
+        try:
+            from app.utils.report_render_pool import shutdown_report_render_pool
+            shutdown_report_render_pool()
+        except Exception as e:
+            logger.warning(f"Report render pool shutdown error: {e}")
+
         # 关闭 UserService MongoDB 连接
         try:
             from app.services.user_service import user_service
@@ -764,6 +841,11 @@ if not settings.DEBUG:
         allowed_hosts=settings.ALLOWED_HOSTS
     )
 
+# 速率限制和每日配额（在 CORS 内层，429 响应同样带 CORS 头）
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(QuotaMiddleware, daily_quota=settings.DEFAULT_DAILY_QUOTA)
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS中间件
 app.add_middleware(
     CORSMiddleware,
@@ -830,53 +912,7 @@ async def test_log():
     return {"message": "测试成功", "timestamp": time.time()}
 
 # 注册路由
-app.include_router(health.router, prefix="/api", tags=["health"])
-app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
-app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
-app.include_router(reports.router, tags=["reports"])
-app.include_router(screening.router, prefix="/api/screening", tags=["screening"])
-app.include_router(queue.router, prefix="/api/queue", tags=["queue"])
-app.include_router(favorites.router, prefix="/api", tags=["favorites"])
-app.include_router(stocks_router.router, prefix="/api", tags=["stocks"])
-app.include_router(multi_market_stocks_router.router, prefix="/api", tags=["multi-market"])
-app.include_router(stock_data_router.router, tags=["stock-data"])
-app.include_router(stock_sync_router.router, tags=["stock-sync"])
-app.include_router(tags.router, prefix="/api", tags=["tags"])
-app.include_router(config.router, prefix="/api", tags=["config"])
-app.include_router(model_capabilities.router, tags=["model-capabilities"])
-app.include_router(usage_statistics.router, tags=["usage-statistics"])
-app.include_router(database.router, prefix="/api/system", tags=["database"])
-app.include_router(cache.router, tags=["cache"])
-app.include_router(operation_logs.router, prefix="/api/system", tags=["operation_logs"])
-app.include_router(logs.router, prefix="/api/system", tags=["logs"])
-# 新增：系统配置只读摘要
-from app.routers import system_config as system_config_router
-app.include_router(system_config_router.router, prefix="/api/system", tags=["system"])
-
-# 通知模块（REST + SSE）
-app.include_router(notifications_router.router, prefix="/api", tags=["notifications"])
-
-# 🔥 WebSocket 通知模块（替代 SSE + Redis PubSub）
-app.include_router(websocket_notifications_router.router, prefix="/api", tags=["websocket"])
-
-# 定时任务管理
-app.include_router(scheduler_router.router, tags=["scheduler"])
-
-app.include_router(sse.router, prefix="/api/stream", tags=["streaming"])
-app.include_router(sync_router.router)
-app.include_router(multi_source_sync.router)
-app.include_router(paper_router.router, prefix="/api", tags=["paper"])
-# app.include_router(tushare_init.router, prefix="/api", tags=["tushare-init"])  # 注释掉：依赖缺失的 Tushare 模块
-app.include_router(akshare_init.router, prefix="/api", tags=["akshare-init"])
-app.include_router(baostock_init.router, prefix="/api", tags=["baostock-init"])
-app.include_router(historical_data.router, tags=["historical-data"])
-# app.include_router(multi_period_sync.router, tags=["multi-period-sync"])  # 注释掉：依赖缺失的 Tushare 模块
-# app.include_router(financial_data.router, tags=["financial-data"])  # 注释掉：依赖缺失的 Tushare 模块
-app.include_router(news_data.router, tags=["news-data"])
-from app.routers import news_stats
-app.include_router(news_stats.router, prefix="/api", tags=["news-stats"])
-app.include_router(social_media.router, tags=["social-media"])
-app.include_router(internal_messages.router, tags=["internal-messages"])
+include_routers(app)
 
 
 @app.get("/")
@@ -10,7 +10,7 @@ from typing import Optional, Dict, Any
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from app.services.operation_log_service import log_operation
+from app.services.operation_log_service import enqueue_operation_log, log_operation
 from app.models.operation_log import ActionType
 
 logger = logging.getLogger("webapi")
@@ -260,8 +260,8 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
             if not success:
                 error_message = f"HTTP {response.status_code}"
 
-            # 记录操作日志
-            await log_operation(
+            # 放入批量写入队列（请求路径上不等待数据库写入）
+            enqueue_operation_log(
                 user_id=user_info.get("id", ""),
                 username=user_info.get("username", "unknown"),
                 action_type=action_type,
@@ -1,176 +1,241 @@
 """
 速率限制中间件
 防止API滥用，实现用户级和端点级速率限制
+
+两个中间件均为纯 ASGI 实现（不经过 BaseHTTPMiddleware 的请求/响应包装），
+速率判定由 app.core.api_rate_limiter 完成，多数请求在进程内直接判定。
 """
 
-from fastapi import Request, Response, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+import datetime
+import ipaddress
+import json
 import logging
-from typing import Callable, Dict, Optional
-from core.redis_client import get_redis_service, RedisKeys
+import warnings
+from functools import lru_cache
+from typing import Optional
+
+from app.core.api_rate_limiter import ApiRateLimiter, RateLimitRule, get_api_rate_limiter
+from app.core.config import settings
+from app.core.redis_client import get_redis_service, RedisKeys
+from app.services.auth_service import AuthService
 
 logger = logging.getLogger(__name__)
 
+_SKIP_PREFIXES = ("/api/health", "/docs", "/redoc", "/openapi.json")
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """速率限制中间件"""
-    
-    def __init__(self, app, default_rate_limit: int = 100):
-        super().__init__(app)
-        self.default_rate_limit = default_rate_limit
-        
-        # 不同端点的速率限制配置
-        self.endpoint_limits = {
-            "/api/analysis/single": 10,      # 单股分析：每分钟10次
-            "/api/analysis/batch": 5,        # 批量分析：每分钟5次
-            "/api/screening/filter": 20,     # 股票筛选：每分钟20次
-            "/api/auth/login": 5,            # 登录：每分钟5次
-            "/api/auth/register": 3,         # 注册：每分钟3次
-        }
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # 跳过健康检查和静态资源
-        if request.url.path.startswith(("/api/health", "/docs", "/redoc", "/openapi.json")):
-            return await call_next(request)
-        
-        # 获取用户ID（如果已认证）
-        user_id = getattr(request.state, "user_id", None)
-        if not user_id:
-            # 对于未认证用户，使用IP地址
-            user_id = f"ip:{request.client.host}" if request.client else "unknown"
-        
-        # 检查速率限制
+
+@lru_cache(maxsize=8)
+def _trusted_networks(raw: str):
+    """解析受信任代理列表，如 "127.0.0.1,10.0.0.0/8" """
+    networks = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.warning(f"⚠️ 忽略无效的受信任代理配置: {item}")
+    return tuple(networks)
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    networks = _trusted_networks(settings.RATE_LIMIT_TRUSTED_PROXIES)
+    if not networks:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _client_ip(scope) -> Optional[str]:
+    """客户端IP：仅当直连方是受信任代理时才采信 X-Forwarded-For
+
+    从右向左跳过受信任代理，第一个不受信任的地址即为真实客户端。
+    """
+    client = scope.get("client")
+    peer = client[0] if client else None
+    if peer is None or not _is_trusted_proxy(peer):
+        return peer
+    forwarded = _header(scope, b"x-forwarded-for")
+    if not forwarded:
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def _identity(scope) -> str:
+    """已认证用户使用用户ID，否则使用客户端IP
+
+    中间件先于路由依赖执行，此时 state 中通常还没有用户信息，
+    因此直接解析 Authorization 中的 Bearer JWT。
+    """
+    state = scope.get("state") or {}
+    user_id = state.get("user_id") if isinstance(state, dict) else getattr(state, "user_id", None)
+    if user_id:
+        return str(user_id)
+    authorization = _header(scope, b"authorization")
+    if authorization and authorization[:7].lower() == "bearer ":
+        token_data = AuthService.verify_token(authorization[7:].strip())
+        if token_data and token_data.sub:
+            return str(token_data.sub)
+    client_ip = _client_ip(scope)
+    return f"ip:{client_ip}" if client_ip else "unknown"
+
+
+async def _send_429(send, body: dict, retry_after: Optional[float] = None, headers: Optional[dict] = None) -> None:
+    payload = json.dumps({"detail": body}, ensure_ascii=False).encode("utf-8")
+    raw_headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(payload)).encode()),
+    ]
+    if retry_after is not None:
+        raw_headers.append((b"retry-after", str(max(1, int(retry_after + 0.999))).encode()))
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode(), str(value).encode()))
+    await send({"type": "http.response.start", "status": 429, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": payload})
+
+
+class RateLimitMiddleware:
+    """速率限制中间件（GCRA，突发容忍）"""
+
+    def __init__(self, app, limiter: Optional[ApiRateLimiter] = None, default_rate_limit: Optional[int] = None):
+        self.app = app
+        if default_rate_limit is not None:
+            warnings.warn(
+                "RateLimitMiddleware 的 default_rate_limit 参数已弃用，请使用 DEFAULT_RATE_LIMIT 配置或传入 limiter",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            if limiter is None:
+                base = get_api_rate_limiter()
+                limiter = ApiRateLimiter(
+                    rules=base.rules,
+                    default_rule=RateLimitRule(default_rate_limit),
+                    redis_getter=base._redis_getter,
+                    max_batch=base.max_batch,
+                    lease_seconds=base.lease_seconds,
+                )
+        self.limiter = limiter or get_api_rate_limiter()
+
+    async def __call__(self, scope, receive, send):
+        # 跳过非HTTP请求、健康检查和文档
+        if scope["type"] != "http" or scope["path"].startswith(_SKIP_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        user_id = _identity(scope)
         try:
-            await self.check_rate_limit(user_id, request.url.path)
-        except HTTPException:
-            raise
+            decision = await self.limiter.acquire(user_id, path)
         except Exception as exc:
+            # 限流引擎异常时放行请求
             logger.error(f"速率限制检查失败: {exc}")
-            # 如果Redis不可用，允许请求通过
-        
-        return await call_next(request)
-    
-    async def check_rate_limit(self, user_id: str, endpoint: str):
-        """检查速率限制"""
-        redis_service = get_redis_service()
-        
-        # 获取端点的速率限制
-        rate_limit = self.endpoint_limits.get(endpoint, self.default_rate_limit)
-        
-        # 构建Redis键
-        rate_key = RedisKeys.USER_RATE_LIMIT.format(
-            user_id=user_id,
-            endpoint=endpoint.replace("/", "_")
-        )
-        
-        # 获取当前计数
-        current_count = await redis_service.increment_with_ttl(rate_key, ttl=60)
-        
-        # 检查是否超过限制
-        if current_count > rate_limit:
+            await self.app(scope, receive, send)
+            return
+
+        if not decision.allowed:
             logger.warning(
-                f"速率限制触发 - 用户: {user_id}, "
-                f"端点: {endpoint}, "
-                f"当前计数: {current_count}, "
-                f"限制: {rate_limit}"
+                f"速率限制触发 - 用户: {user_id}, 端点: {path}, "
+                f"限制: {decision.limit}, 重试等待: {decision.retry_after:.2f}s"
             )
-            
-            raise HTTPException(
-                status_code=429,
-                detail={
+            await _send_429(
+                send,
+                {
                     "error": {
                         "code": "RATE_LIMIT_EXCEEDED",
-                        "message": f"请求过于频繁，请稍后重试",
-                        "rate_limit": rate_limit,
-                        "current_count": current_count,
-                        "reset_time": 60
+                        "message": "请求过于频繁，请稍后重试",
+                        "rate_limit": decision.limit,
+                        "reset_time": round(decision.retry_after, 2),
                     }
-                }
+                },
+                retry_after=decision.retry_after,
+                headers={"X-RateLimit-Limit": decision.limit},
             )
-        
-        logger.debug(
-            f"速率限制检查通过 - 用户: {user_id}, "
-            f"端点: {endpoint}, "
-            f"当前计数: {current_count}/{rate_limit}"
-        )
+            return
 
+        await self.app(scope, receive, send)
 
-class QuotaMiddleware(BaseHTTPMiddleware):
+
+class QuotaMiddleware:
     """每日配额中间件"""
-    
+
     def __init__(self, app, daily_quota: int = 1000):
-        super().__init__(app)
+        self.app = app
         self.daily_quota = daily_quota
-        
+
         # 需要计入配额的端点
         self.quota_endpoints = {
             "/api/analysis/single",
             "/api/analysis/batch",
             "/api/screening/filter"
         }
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # 只对需要配额的端点进行检查
-        if request.url.path not in self.quota_endpoints:
-            return await call_next(request)
-        
-        # 获取用户ID
-        user_id = getattr(request.state, "user_id", None)
-        if not user_id:
-            # 未认证用户不受配额限制
-            return await call_next(request)
-        
-        # 检查每日配额
+
+    async def __call__(self, scope, receive, send):
+        # 只对需要配额的端点进行检查（其余请求只做一次集合查找）
+        if scope["type"] != "http" or scope["path"] not in self.quota_endpoints:
+            await self.app(scope, receive, send)
+            return
+
+        # 未认证用户不受配额限制
+        user_id = _identity(scope)
+        if user_id.startswith("ip:") or user_id == "unknown":
+            await self.app(scope, receive, send)
+            return
+
         try:
-            await self.check_daily_quota(user_id)
-        except HTTPException:
-            raise
+            current_usage = await self.check_daily_quota(user_id)
         except Exception as exc:
             logger.error(f"配额检查失败: {exc}")
             # 如果Redis不可用，允许请求通过
-        
-        return await call_next(request)
-    
-    async def check_daily_quota(self, user_id: str):
-        """检查每日配额"""
-        import datetime
-        
-        redis_service = get_redis_service()
-        
-        # 获取今天的日期
-        today = datetime.date.today().isoformat()
-        
-        # 构建Redis键
-        quota_key = RedisKeys.USER_DAILY_QUOTA.format(
-            user_id=user_id,
-            date=today
-        )
-        
-        # 获取今日使用量
-        current_usage = await redis_service.increment_with_ttl(quota_key, ttl=86400)  # 24小时TTL
-        
-        # 检查是否超过配额
+            current_usage = 0
+
         if current_usage > self.daily_quota:
             logger.warning(
                 f"每日配额超限 - 用户: {user_id}, "
                 f"今日使用: {current_usage}, "
                 f"配额: {self.daily_quota}"
             )
-            
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": {
-                        "code": "DAILY_QUOTA_EXCEEDED",
-                        "message": "今日配额已用完，请明天再试",
-                        "daily_quota": self.daily_quota,
-                        "current_usage": current_usage,
-                        "reset_date": today
-                    }
+            await _send_429(send, {
+                "error": {
+                    "code": "DAILY_QUOTA_EXCEEDED",
+                    "message": "今日配额已用完，请明天再试",
+                    "daily_quota": self.daily_quota,
+                    "current_usage": current_usage,
+                    "reset_date": datetime.date.today().isoformat()
                 }
-            )
-        
+            })
+            return
+
+        await self.app(scope, receive, send)
+
+    async def check_daily_quota(self, user_id: str) -> int:
+        """递增并返回今日使用量"""
+        redis_service = get_redis_service()
+
+        # 构建Redis键
+        quota_key = RedisKeys.USER_DAILY_QUOTA.format(
+            user_id=user_id,
+            date=datetime.date.today().isoformat()
+        )
+
+        # 获取今日使用量（首次递增时设置24小时TTL）
+        current_usage = await redis_service.increment_with_ttl(quota_key, ttl=86400)
         logger.debug(
-            f"配额检查通过 - 用户: {user_id}, "
+            f"配额检查 - 用户: {user_id}, "
             f"今日使用: {current_usage}/{self.daily_quota}"
         )
+        return current_usage
@@ -54,6 +54,7 @@ class ScreeningRequest(BaseModel):
     order_by: Optional[List[Dict[str, str]]] = Field(None, description="排序条件")
     limit: int = Field(50, ge=1, le=500, description="返回数量限制")
     offset: int = Field(0, ge=0, description="偏移量")
+    cursor: Optional[str] = Field(None, description="分页游标（上一页返回的 next_cursor，优先于 offset）")
     
     # 优化选项
     use_database_optimization: bool = Field(True, description="是否使用数据库优化")
@@ -66,6 +67,8 @@ class ScreeningResponse(BaseModel):
     took_ms: Optional[int] = Field(None, description="耗时(毫秒)")
     optimization_used: Optional[str] = Field(None, description="使用的优化方式")
     source: Optional[str] = Field(None, description="数据源")
+    result_set_id: Optional[str] = Field(None, description="结果集ID（条件哈希+数据版本）")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，无下一页时为空")
 
 
 class FieldInfo(BaseModel):
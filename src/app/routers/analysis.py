@@ -16,6 +16,7 @@ from app.routers.auth_db import get_current_user
 from app.services.queue_service import get_queue_service, QueueService
 from app.services.analysis_service import get_analysis_service
 from app.services.simple_analysis_service import get_simple_analysis_service
+from app.services.analysis.executor import AnalysisRejectedError, get_analysis_executor
 from app.services.websocket_manager import get_websocket_manager
 from app.models.analysis import (
     SingleAnalysisRequest, BatchAnalysisRequest, AnalysisParameters,
@@ -90,6 +91,8 @@ async def submit_single_analysis(
             "data": result,
             "message": "分析任务已在后台启动"
         }
+    except AnalysisRejectedError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"❌ 提交单股分析任务失败: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -271,6 +274,9 @@ async def get_task_result(
             if mongo_result:
                 logger.info(f"✅ [RESULT] 从MongoDB找到结果: {task_id}")
 
+                from app.services.report_blob_store import get_report_blob_store
+                mongo_result = await get_report_blob_store().hydrate(db, mongo_result)
+
                 # 直接使用MongoDB中的数据结构（与web目录保持一致）
                 result_data = {
                     "analysis_id": mongo_result.get("analysis_id"),
@@ -817,6 +823,11 @@ async def submit_batch_analysis(
                 task_ids.append(task_id)
                 mapping.append({"symbol": symbol, "stock_code": symbol, "task_id": task_id})
                 logger.info(f"✅ [批量分析] 已创建任务: {task_id} - {symbol}")
+            except AnalysisRejectedError:
+                # 批次不会启动：归还已创建任务预留的执行名额
+                for created_id in task_ids:
+                    get_analysis_executor().release(created_id)
+                raise
             except Exception as create_error:
                 logger.error(f"❌ [批量分析] 创建任务失败: {symbol}, 错误: {create_error}", exc_info=True)
                 raise
@@ -867,6 +878,8 @@ async def submit_batch_analysis(
             },
             "message": f"批量分析任务已提交，共{len(task_ids)}个股票，正在并发执行"
         }
+    except AnalysisRejectedError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"❌ [批量分析] 提交失败: {e}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
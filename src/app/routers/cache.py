@@ -209,3 +209,74 @@ async def get_cache_backend_info(current_user: dict = Depends(get_current_user))
             detail=f"获取缓存后端信息失败: {str(e)}"
         )
 
+
+@router.get("/tool-stats")
+async def get_tool_cache_stats(current_user: dict = Depends(get_current_user)):
+    """
+    获取统一工具结果缓存的命中统计
+
+    Returns:
+        dict: 总命中/未命中次数、命中率及各工具明细
+    """
+    try:
+        from tradingagents.utils.tool_cache import get_tool_cache
+
+        return ok(
+            data=get_tool_cache().stats(),
+            message="获取工具缓存统计成功"
+        )
+
+    except Exception as e:
+        logger.error(f"获取工具缓存统计失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取工具缓存统计失败: {str(e)}"
+        )
+
+
+@router.get("/llm-stats")
+async def get_llm_cache_stats(current_user: dict = Depends(get_current_user)):
+    """
+    获取LLM响应缓存的命中统计
+
+    Returns:
+        dict: 命中/未命中/跳过（非确定性调用）次数、命中率、写入与淘汰次数
+    """
+    try:
+        from tradingagents.llm_adapters.response_cache import cache_enabled, get_llm_response_cache
+
+        return ok(
+            data={"enabled": cache_enabled(), **get_llm_response_cache().stats()},
+            message="获取LLM缓存统计成功"
+        )
+
+    except Exception as e:
+        logger.error(f"获取LLM缓存统计失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取LLM缓存统计失败: {str(e)}"
+        )
+
+
+@router.get("/redis-stats")
+async def get_redis_stats_route(current_user: dict = Depends(get_current_user)):
+    """
+    获取Redis操作耗时与连接池统计
+
+    Returns:
+        dict: 各操作的调用次数/平均耗时/最大耗时，异步与同步连接池的连接数
+    """
+    try:
+        from app.core.redis_client import get_redis_stats
+
+        return ok(
+            data=get_redis_stats(),
+            message="获取Redis统计成功"
+        )
+
+    except Exception as e:
+        logger.error(f"获取Redis统计失败: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取Redis统计失败: {str(e)}"
+        )
@@ -229,6 +229,7 @@ async def get_latest_news(
 async def search_news(
     query: str = Query(..., description="搜索关键词"),
     symbol: Optional[str] = Query(None, description="股票代码过滤"),
+    hours_back: Optional[int] = Query(None, description="只搜索最近N小时的新闻"),
     limit: int = Query(20, description="返回数量限制"),
     current_user: dict = Depends(get_current_user)
 ):
@@ -238,6 +239,7 @@ async def search_news(
     Args:
         query: 搜索关键词
         symbol: 股票代码过滤
+        hours_back: 只搜索最近N小时的新闻
         limit: 返回数量限制
         
     Returns:
@@ -250,7 +252,8 @@ async def search_news(
         news_list = await service.search_news(
             query_text=query,
             symbol=symbol,
-            limit=limit
+            limit=limit,
+            start_time=datetime.utcnow() - timedelta(hours=hours_back) if hours_back else None
         )
         
         return ok(data={
@@ -465,6 +468,32 @@ async def cleanup_old_news(
         )
 
 
+@router.post("/search-index/rebuild", response_model=dict)
+async def rebuild_search_index(
+    days_back: Optional[int] = Query(None, description="只索引最近N天的新闻（默认全部）"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    从数据库重建新闻全文索引
+    
+    Returns:
+        dict: 索引的新闻数量
+    """
+    try:
+        service = await get_news_data_service()
+        indexed_count = await service.rebuild_search_index(days_back=days_back)
+        
+        return ok(data={"indexed_count": indexed_count},
+            message=f"全文索引重建完成，共 {indexed_count} 条新闻"
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"重建全文索引失败: {str(e)}"
+        )
+
+
 @router.get("/health", response_model=dict)
 async def health_check():
     """健康检查"""
@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends
 from app.routers.auth_db import get_current_user
 from app.services.queue_service import get_queue_service, QueueService
+from app.services.analysis.executor import get_analysis_executor
 
 router = APIRouter()
 
 @router.get("/stats")
 async def queue_stats(user: dict = Depends(get_current_user), svc: QueueService = Depends(get_queue_service)):
     stats = await svc.stats()
-    return {"user": user["id"], **stats}
\ No newline at end of file
+    return {"user": user["id"], **stats}
+
+@router.get("/executor")
+async def executor_stats(user: dict = Depends(get_current_user)):
+    """分析执行器指标：运行中、排队中、被拒绝的分析任务数"""
+    return {"user": user["id"], **get_analysis_executor().stats()}
@@ -1,6 +1,7 @@
 """
 分析报告管理API路由
 """
+import asyncio
 import os
 import json
 from datetime import datetime, timedelta
@@ -13,6 +14,7 @@ from pydantic import BaseModel
 
 from .auth_db import get_current_user
 from ..core.database import get_mongo_db
+from ..services.report_blob_store import REPORT_LIST_PROJECTION, get_report_blob_store
 from ..utils.timezone import to_config_tz
 import logging
 
@@ -35,23 +37,12 @@ def get_stock_name(stock_code: str) -> str:
     try:
         # 从 MongoDB 获取股票名称
         from ..core.database import get_mongo_db_sync
-        from ..core.unified_config import UnifiedConfigManager
 
         db = get_mongo_db_sync()
         code6 = str(stock_code).zfill(6)
 
         # 🔥 按数据源优先级查询
-        config = UnifiedConfigManager()
-        data_source_configs = config.get_data_source_configs()
-
-        # 提取启用的数据源，按优先级排序
-        enabled_sources = [
-            ds.type.lower() for ds in data_source_configs
-            if ds.enabled and ds.type.lower() in ['tushare', 'akshare', 'baostock']
-        ]
-
-        if not enabled_sources:
-            enabled_sources = ['tushare', 'akshare', 'baostock']
+        enabled_sources = _enabled_name_sources()
 
         # 按数据源优先级查询
         stock_info = None
@@ -85,6 +76,64 @@ def get_stock_name(stock_code: str) -> str:
         return stock_code
 
 
+def _enabled_name_sources() -> List[str]:
+    """启用的股票基础信息数据源，按优先级排序"""
+    from ..core.unified_config import UnifiedConfigManager
+
+    data_source_configs = UnifiedConfigManager().get_data_source_configs()
+    enabled_sources = [
+        ds.type.lower() for ds in data_source_configs
+        if ds.enabled and ds.type.lower() in ['tushare', 'akshare', 'baostock']
+    ]
+    return enabled_sources or ['tushare', 'akshare', 'baostock']
+
+
+async def resolve_stock_names(db, stock_codes: List[str]) -> Dict[str, str]:
+    """
+    批量获取股票名称（异步）
+    缓存未命中的代码用一次 $in 查询 stock_basic_info，按数据源优先级选取名称；找不到时返回股票代码
+    """
+    names = {code: _stock_name_cache[code] for code in stock_codes if code in _stock_name_cache}
+    missing = [code for code in dict.fromkeys(stock_codes) if code and code not in names]
+    if not missing:
+        return names
+
+    try:
+        keys = {str(code).zfill(6): code for code in missing}
+        keys.update({str(code): code for code in missing})
+        try:
+            priority = {source: i for i, source in enumerate(_enabled_name_sources())}
+        except Exception:
+            priority = {}
+
+        best: Dict[str, tuple] = {}
+        cursor = db.stock_basic_info.find(
+            {"$or": [{"symbol": {"$in": list(keys)}}, {"code": {"$in": list(keys)}}]},
+            {"symbol": 1, "code": 1, "name": 1, "source": 1, "_id": 0}
+        )
+        async for info in cursor:
+            if not info.get("name"):
+                continue
+            code = keys.get(str(info.get("symbol"))) or keys.get(str(info.get("code")))
+            if code is None:
+                continue
+            # 启用的数据源按优先级，其次是无 source 的旧数据，最后是其他数据源
+            source = info.get("source")
+            rank = priority.get(source, len(priority) + (0 if source is None else 1))
+            if code not in best or rank < best[code][0]:
+                best[code] = (rank, info["name"])
+
+        for code in missing:
+            name = best[code][1] if code in best else code
+            _stock_name_cache[code] = name
+            names[code] = name
+    except Exception as e:
+        logger.warning(f"⚠️ 批量获取股票名称失败: {e}")
+        names.update({code: code for code in missing})
+
+    return names
+
+
 # 统一构建报告查询：支持 _id(ObjectId) / analysis_id / task_id 三种
 def _build_report_query(report_id: str) -> Dict[str, Any]:
     ors = [
@@ -163,21 +212,30 @@ async def get_reports_list(
 
         logger.info(f"📊 查询条件: {query}")
 
+        blob_store = get_report_blob_store()
+        await blob_store.ensure_indexes(db)
+
         # 计算总数
         total = await db.analysis_reports.count_documents(query)
 
-        # 分页查询
+        # 分页查询：只投影摘要字段，不读取报告正文
         skip = (page - 1) * page_size
-        cursor = db.analysis_reports.find(query).sort("created_at", -1).skip(skip).limit(page_size)
+        cursor = (
+            db.analysis_reports.find(query, REPORT_LIST_PROJECTION)
+            .sort("created_at", -1).skip(skip).limit(page_size)
+        )
+        docs = await cursor.to_list(length=page_size)
+
+        # 🔥 优先使用MongoDB中保存的股票名称，缺失的一次性批量查询
+        stock_names = await resolve_stock_names(
+            db, [doc.get("stock_symbol", "") for doc in docs if not doc.get("stock_name")]
+        )
 
         reports = []
-        async for doc in cursor:
+        for doc in docs:
             # 转换为前端需要的格式
             stock_code = doc.get("stock_symbol", "")
-            # 🔥 优先使用MongoDB中保存的股票名称，如果没有则查询
-            stock_name = doc.get("stock_name")
-            if not stock_name:
-                stock_name = get_stock_name(stock_code)
+            stock_name = doc.get("stock_name") or stock_names.get(stock_code, stock_code)
 
             # 🔥 获取市场类型，如果没有则根据股票代码推断
             market_type = doc.get("market_type")
@@ -212,7 +270,7 @@ async def get_reports_list(
                 "analysts": doc.get("analysts", []),
                 "research_depth": doc.get("research_depth", 1),
                 "summary": doc.get("summary", ""),
-                "file_size": len(str(doc.get("reports", {}))),  # 估算大小
+                "file_size": doc.get("reports_size", 0),  # 正文字节数
                 "source": doc.get("source", "unknown"),
                 "task_id": doc.get("task_id", "")
             }
@@ -248,7 +306,7 @@ async def get_report_detail(
 
         # 支持 ObjectId / analysis_id / task_id
         query = _build_report_query(report_id)
-        doc = await db.analysis_reports.find_one(query)
+        doc = await get_report_blob_store().hydrate(db, await db.analysis_reports.find_one(query))
 
         if not doc:
             # 兜底：从 analysis_tasks.result 中还原报告详情
@@ -371,6 +429,8 @@ async def get_report_module_content(
         if not doc:
             raise HTTPException(status_code=404, detail="报告不存在")
 
+        # 只加载请求的模块正文
+        doc = await get_report_blob_store().hydrate(db, doc, modules=[module])
         reports = doc.get("reports", {})
 
         if module not in reports:
@@ -407,11 +467,14 @@ async def delete_report(
 
         # 查询报告（支持多种ID）
         query = _build_report_query(report_id)
-        result = await db.analysis_reports.delete_one(query)
+        doc = await db.analysis_reports.find_one_and_delete(query, {"report_blob_ids": 1})
 
-        if result.deleted_count == 0:
+        if doc is None:
             raise HTTPException(status_code=404, detail="报告不存在")
 
+        # 清理不再被其他报告引用的正文
+        await get_report_blob_store().release(db, doc)
+
         logger.info(f"✅ 报告删除成功: {report_id}")
 
         return {
@@ -451,6 +514,9 @@ async def download_report(
         if not doc:
             raise HTTPException(status_code=404, detail="报告不存在")
 
+        doc = await get_report_blob_store().hydrate(db, doc)
+        for field in ("report_refs", "report_blob_ids"):
+            doc.pop(field, None)
         stock_symbol = doc.get("stock_symbol", "unknown")
         analysis_date = doc.get("analysis_date", datetime.now().strftime("%Y-%m-%d"))
 
@@ -521,7 +587,7 @@ async def download_report(
 
             try:
                 # 生成 Word 文档
-                docx_content = report_exporter.generate_docx_report(doc)
+                docx_content = await report_exporter.export_async(doc, "docx")
                 filename = f"{stock_symbol}_{analysis_date}_report.docx"
 
                 # 返回文件流
@@ -549,7 +615,7 @@ async def download_report(
 
             try:
                 # 生成 PDF 文档
-                pdf_content = report_exporter.generate_pdf_report(doc)
+                pdf_content = await report_exporter.export_async(doc, "pdf")
                 filename = f"{stock_symbol}_{analysis_date}_report.pdf"
 
                 # 返回文件流
@@ -573,3 +639,89 @@ async def download_report(
     except Exception as e:
         logger.error(f"❌ 下载报告失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+class BatchDownloadRequest(BaseModel):
+    """批量下载参数"""
+    report_ids: List[str]
+    format: str = "markdown"
+
+
+_EXPORT_EXTENSIONS = {"markdown": "md", "docx": "docx", "pdf": "pdf"}
+
+
+@router.post("/batch-download")
+async def batch_download_reports(
+    request: BatchDownloadRequest,
+    user: dict = Depends(get_current_user)
+):
+    """批量下载报告
+
+    多份报告并行渲染（Word/PDF 在渲染进程池中执行），按完成顺序写入 zip 并流式返回；
+    单份报告导出失败时在压缩包中写入对应的 _error.txt，不影响其他报告。
+    """
+    from app.core.config import settings
+    from app.utils.report_exporter import report_exporter
+    from app.utils.report_render_pool import ZipStreamWriter
+
+    export_format = request.format
+    if export_format not in _EXPORT_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"不支持的下载格式: {export_format}")
+    if export_format == "docx" and not report_exporter.pandoc_available:
+        raise HTTPException(status_code=400, detail="Word 导出功能不可用。请安装 pandoc: pip install pypandoc")
+    if export_format == "pdf" and not report_exporter.pdfkit_available:
+        raise HTTPException(status_code=400, detail="PDF 导出功能不可用。请安装 pdfkit 和 wkhtmltopdf")
+
+    report_ids = list(dict.fromkeys(request.report_ids))
+    if not report_ids:
+        raise HTTPException(status_code=400, detail="请选择要下载的报告")
+    if len(report_ids) > settings.REPORT_BATCH_EXPORT_MAX:
+        raise HTTPException(status_code=400, detail=f"单次最多下载 {settings.REPORT_BATCH_EXPORT_MAX} 份报告")
+
+    logger.info(f"📦 批量下载报告: {len(report_ids)} 份, 格式: {export_format}")
+
+    db = get_mongo_db()
+    query = {"$or": [cond for report_id in report_ids for cond in _build_report_query(report_id)["$or"]]}
+    docs = await db.analysis_reports.find(query).to_list(length=len(report_ids) * 3)
+    if not docs:
+        raise HTTPException(status_code=404, detail="报告不存在")
+
+    blob_store = get_report_blob_store()
+    extension = _EXPORT_EXTENSIONS[export_format]
+
+    async def render(doc: Dict[str, Any]):
+        stock_symbol = doc.get("stock_symbol", "unknown")
+        analysis_date = doc.get("analysis_date", "")
+        try:
+            doc = await blob_store.hydrate(db, doc)
+            content = await report_exporter.export_async(doc, export_format)
+            return f"{stock_symbol}_{analysis_date}_report.{extension}", content
+        except Exception as e:
+            logger.error(f"❌ 批量导出失败 {stock_symbol}_{analysis_date}: {e}")
+            return f"{stock_symbol}_{analysis_date}_error.txt", str(e).encode("utf-8")
+
+    async def generate():
+        writer = ZipStreamWriter()
+        for next_done in asyncio.as_completed([render(doc) for doc in docs]):
+            name, content = await next_done
+            yield writer.add(name, content)
+        yield writer.close()
+
+    filename = f"reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        generate(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.get("/export/stats")
+async def get_export_stats(user: dict = Depends(get_current_user)):
+    """导出渲染统计：各格式的渲染次数、缓存命中和耗时"""
+    from app.utils.report_render_pool import get_report_render_pool
+
+    return {
+        "success": True,
+        "data": get_report_render_pool().stats(),
+        "message": "导出统计获取成功"
+    }
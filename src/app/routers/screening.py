@@ -34,10 +34,13 @@ class ScreeningRequest(BaseModel):
     order_by: Optional[List[OrderByItem]] = None
     limit: int = Field(50, ge=1, le=500)
     offset: int = Field(0, ge=0)
+    cursor: Optional[str] = Field(None, description="分页游标（上一页返回的 next_cursor，优先于 offset）")
 
 class ScreeningResponse(BaseModel):
     total: int
     items: List[dict]
+    result_set_id: Optional[str] = None
+    next_cursor: Optional[str] = None
 
 # 服务实例
 svc = ScreeningService()
@@ -172,7 +175,8 @@ async def run_screening(req: ScreeningRequest, user: dict = Depends(get_current_
             limit=req.limit,
             offset=req.offset,
             order_by=[{"field": o.field, "direction": o.direction} for o in (req.order_by or [])],
-            use_database_optimization=True
+            use_database_optimization=True,
+            cursor=req.cursor
         )
 
         logger.info(f"[screening] 筛选完成: total={result.get('total')}, "
@@ -182,8 +186,15 @@ async def run_screening(req: ScreeningRequest, user: dict = Depends(get_current_
             sample = result['items'][:3]
             logger.info(f"[screening] 返回样例(前3条): {sample}")
 
-        return ScreeningResponse(total=result["total"], items=result["items"])
+        return ScreeningResponse(
+            total=result["total"],
+            items=result["items"],
+            result_set_id=result.get("result_set_id"),
+            next_cursor=result.get("next_cursor")
+        )
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"[screening] 处理失败: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -211,7 +222,8 @@ async def enhanced_screening(req: NewScreeningRequest, user: dict = Depends(get_
             limit=req.limit,
             offset=req.offset,
             order_by=req.order_by,
-            use_database_optimization=req.use_database_optimization
+            use_database_optimization=req.use_database_optimization,
+            cursor=req.cursor
         )
 
         logger.info(f"[enhanced_screening] 筛选完成: total={result.get('total')}, "
@@ -222,9 +234,13 @@ async def enhanced_screening(req: NewScreeningRequest, user: dict = Depends(get_
             items=result["items"],
             took_ms=result.get("took_ms"),
             optimization_used=result.get("optimization_used"),
-            source=result.get("source")
+            source=result.get("source"),
+            result_set_id=result.get("result_set_id"),
+            next_cursor=result.get("next_cursor")
         )
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"[enhanced_screening] 筛选失败: {e}")
         raise HTTPException(status_code=500, detail=f"增强筛选失败: {str(e)}")
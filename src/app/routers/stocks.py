@@ -212,6 +212,50 @@ async def get_quote(
     return ok(data)
 
 
+@router.get("/{code}/intraday", response_model=dict)
+async def get_intraday(
+    code: str,
+    trade_date: Optional[str] = Query(None, description="交易日 YYYYMMDD（默认当前交易日）"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    获取A股盘中行情轨迹与分钟K线
+
+    优先读取入库进程内的盘中环形缓冲区；缓冲区没有数据（其他交易日或其他进程）时，
+    读取收盘后落库的分钟K线（intraday_minute_bars）。
+    """
+    from app.services.intraday_ring_buffer import MINUTE_BARS_COLLECTION, get_intraday_buffer
+
+    code6 = _zfill_code(code)
+    buffer = get_intraday_buffer()
+    if trade_date in (None, buffer.trade_date):
+        series = buffer.series(code6)
+        if series["points"]:
+            return ok(data={
+                "code": code6,
+                "trade_date": buffer.trade_date,
+                "source": "buffer",
+                "points": series["points"],
+                "minute_bars": buffer.minute_bars(code6),
+            })
+
+    db = get_mongo_db()
+    query = {"code": code6}
+    if trade_date:
+        query["trade_date"] = trade_date
+    doc = await db[MINUTE_BARS_COLLECTION].find_one(query, {"_id": 0}, sort=[("trade_date", -1)])
+    if not doc:
+        return ok(data={"code": code6, "trade_date": trade_date, "source": None, "points": [], "minute_bars": []},
+                  message="暂无盘中数据")
+    return ok(data={
+        "code": code6,
+        "trade_date": doc.get("trade_date"),
+        "source": "minute_bars",
+        "points": [],
+        "minute_bars": doc.get("bars", []),
+    })
+
+
 @router.get("/{code}/fundamentals", response_model=dict)
 async def get_fundamentals(
     code: str,
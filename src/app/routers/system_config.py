@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import Any, Dict
+import asyncio
 import re
 import logging
 
@@ -282,3 +283,36 @@ async def validate_config():
             "data": None,
             "message": f"配置验证失败: {str(e)}"
         }
+
+
+@router.get("/startup-report", tags=["system"], summary="启动耗时报告（需管理员）")
+async def get_startup_report(
+    importtime: bool = Query(False, description="是否在子进程中运行 python -X importtime 分析冷启动导入耗时（约数秒）"),
+    module: str = Query("app.main", description="importtime 分析的入口模块（仅限 app.main、app.worker、tradingagents、tradingagents.graph.trading_graph）"),
+    top: int = Query(20, ge=1, le=200),
+    current_user: dict = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    返回本进程启动各阶段耗时（路由导入、数据库初始化、调度器等）及重型依赖加载情况。
+    importtime=true 时额外返回冷启动导入耗时分解（按顶层导入和按包汇总）。
+    访问控制：需管理员身份。
+    """
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+
+    from app.core.startup_profile import IMPORTTIME_ENTRY_MODULES, get_startup_profiler, run_importtime
+
+    if importtime and module not in IMPORTTIME_ENTRY_MODULES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的 importtime 入口模块: {module}，可选: {', '.join(IMPORTTIME_ENTRY_MODULES)}",
+        )
+
+    report = get_startup_profiler().report(top=top)
+    if importtime:
+        try:
+            report["importtime"] = await asyncio.to_thread(run_importtime, module, top)
+        except Exception as e:
+            logger.warning(f"importtime 分析失败: {e}")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"importtime 分析失败: {e}")
+    return report
@@ -153,3 +153,21 @@ async def delete_old_records(
         logger.error(f"删除旧记录失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+
+@router.post("/rollups/rebuild", summary="重建使用量预聚合")
+async def rebuild_usage_rollups(
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """从原始使用记录重建小时/日预聚合"""
+    try:
+        counts = await usage_statistics_service.rebuild_rollups()
+
+        return {
+            "success": True,
+            "message": "重建使用量预聚合成功",
+            "data": counts
+        }
+    except Exception as e:
+        logger.error(f"重建使用量预聚合失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,261 @@
+"""
+分析任务执行器
+
+统一的分析执行层，替代固定 3 线程的线程池：
+- 执行后端：thread（进程内线程池）或 process（进程池，绕开 GIL / 隔离崩溃）
+- 准入控制：本进程排队数、Redis 分析队列（AnalysisWorker 消费）积压、LLM 供应商并发上限
+- 指标：运行中、排队中、被拒绝、完成、失败数量，按供应商统计
+"""
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_THREAD = "thread"
+BACKEND_PROCESS = "process"
+
+# 提交时预留、但一直未进入 run() 的名额在此时间后自动回收
+RESERVATION_TTL_SECONDS = 600
+
+
+class AnalysisRejectedError(RuntimeError):
+    """执行器已满，拒绝接收新的分析任务"""
+
+
+def parse_provider_limits(raw: Optional[str]) -> Dict[str, int]:
+    """解析供应商并发上限配置，如 "dashscope:2,openai:4" """
+    limits: Dict[str, int] = {}
+    for item in (raw or "").split(","):
+        name, _, value = item.partition(":")
+        name = name.strip().lower()
+        if not name or not value.strip():
+            continue
+        try:
+            limits[name] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"⚠️ 忽略无效的供应商并发配置: {item}")
+    return limits
+
+
+class AnalysisExecutor:
+    """带准入控制和指标的分析任务执行器"""
+
+    def __init__(
+        self,
+        backend: str = BACKEND_THREAD,
+        max_workers: int = 3,
+        max_waiting: int = 20,
+        max_queue_depth: int = 0,
+        provider_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.backend = backend if backend in (BACKEND_THREAD, BACKEND_PROCESS) else BACKEND_THREAD
+        self.max_workers = max(1, max_workers)
+        self.max_waiting = max(0, max_waiting)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.provider_limits = {k.lower(): v for k, v in (provider_limits or {}).items()}
+
+        if self.backend == BACKEND_PROCESS:
+            # spawn：子进程不继承父进程的 Motor/Redis 连接和事件循环
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="analysis"
+            )
+
+        # 信号量在首次使用时创建，绑定到服务所在的事件循环
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._provider_slots: Dict[str, asyncio.Semaphore] = {}
+
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self._running_by_provider: Dict[str, int] = {}
+        self._waiting_by_provider: Dict[str, int] = {}
+        self._total_wait_seconds = 0.0
+        # 已通过准入、尚未进入 run() 的任务 -> 预留时间
+        self._reserved: Dict[str, float] = {}
+
+    def _global_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    def _provider_semaphore(self, provider: Optional[str]) -> Optional[asyncio.Semaphore]:
+        limit = self.provider_limits.get((provider or "").lower())
+        if not limit:
+            return None
+        key = provider.lower()
+        if key not in self._provider_slots:
+            self._provider_slots[key] = asyncio.Semaphore(limit)
+        return self._provider_slots[key]
+
+    async def _redis_queue_depth(self) -> int:
+        """Redis 分析队列中等待 AnalysisWorker 消费的任务数（不可用时返回 0）"""
+        try:
+            from app.services.queue_service import get_queue_service
+            stats = await get_queue_service().stats()
+            return int(stats.get("queued", 0)) + int(stats.get("processing", 0))
+        except Exception as e:
+            logger.debug(f"读取分析队列积压失败（忽略）: {e}")
+            return 0
+
+    def _reject(self, task_id: Optional[str], reason: str) -> None:
+        self.rejected += 1
+        logger.warning(f"🚫 [执行器] 拒绝分析任务 {task_id}: {reason}")
+        raise AnalysisRejectedError(f"系统繁忙，{reason}，请稍后重试")
+
+    def _expire_reservations(self) -> None:
+        deadline = time.monotonic() - RESERVATION_TTL_SECONDS
+        for key in [k for k, reserved_at in self._reserved.items() if reserved_at < deadline]:
+            logger.warning(f"⚠️ [执行器] 预留名额超时未使用，已回收: {key}")
+            del self._reserved[key]
+
+    async def admit(self, task_id: Optional[str] = None) -> str:
+        """
+        准入检查并为任务预留一个名额
+
+        提交接口在创建任务时调用，超限时直接抛出 AnalysisRejectedError（由路由返回 429）；
+        之后的 run(task_id=...) 使用已预留的名额，不再重复检查。名额在第一个 await 之前占用，
+        并发提交不会同时通过容量检查。
+
+        Returns:
+            预留凭据（task_id，未提供时生成一个）
+
+        Raises:
+            AnalysisRejectedError: 超出准入限制
+        """
+        key = task_id or f"anonymous-{uuid.uuid4().hex}"
+        if key in self._reserved:
+            return key
+
+        self._expire_reservations()
+        queued = self.waiting + len(self._reserved)
+        if self.running + queued >= self.max_workers + self.max_waiting:
+            self._reject(task_id, f"分析任务已满 (运行 {self.running}, 排队 {queued}, 排队上限 {self.max_waiting})")
+        self._reserved[key] = time.monotonic()
+
+        if self.max_queue_depth:
+            depth = await self._redis_queue_depth()
+            if depth >= self.max_queue_depth:
+                self._reserved.pop(key, None)
+                self._reject(task_id, f"分析队列积压过多 ({depth}/{self.max_queue_depth})")
+        return key
+
+    def release(self, task_id: str) -> None:
+        """释放未使用的预留名额（任务在进入 run() 前结束时调用；已被 run() 使用的名额忽略）"""
+        self._reserved.pop(task_id, None)
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        provider: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> Any:
+        """
+        在执行后端中运行阻塞的分析函数
+
+        process 后端要求 fn 及参数可被 pickle（模块级函数）。
+
+        Raises:
+            AnalysisRejectedError: 超出准入限制
+        """
+        key = await self.admit(task_id)
+        self._reserved.pop(key, None)
+
+        provider_key = (provider or "unknown").lower()
+        provider_slots = self._provider_semaphore(provider)
+        enqueued_at = time.monotonic()
+        self.waiting += 1
+        self._waiting_by_provider[provider_key] = self._waiting_by_provider.get(provider_key, 0) + 1
+        if self.running >= self.max_workers:
+            logger.info(f"⏳ [执行器] 分析任务排队中: {task_id} (运行 {self.running}, 排队 {self.waiting})")
+
+        acquired_provider = False
+        acquired_global = False
+        try:
+            if provider_slots is not None:
+                await provider_slots.acquire()
+                acquired_provider = True
+            await self._global_slots().acquire()
+            acquired_global = True
+        except BaseException:
+            if acquired_provider:
+                provider_slots.release()
+            raise
+        finally:
+            self.waiting -= 1
+            self._waiting_by_provider[provider_key] -= 1
+            if acquired_global:
+                self._total_wait_seconds += time.monotonic() - enqueued_at
+
+        self.running += 1
+        self._running_by_provider[provider_key] = self._running_by_provider.get(provider_key, 0) + 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._pool, fn, *args)
+            self.completed += 1
+            return result
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._running_by_provider[provider_key] -= 1
+            self._global_slots().release()
+            if provider_slots is not None:
+                provider_slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        started = self.completed + self.failed + self.running
+        return {
+            "backend": self.backend,
+            "max_workers": self.max_workers,
+            "max_waiting": self.max_waiting,
+            "running": self.running,
+            "waiting": self.waiting,
+            "reserved": len(self._reserved),
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_seconds": round(self._total_wait_seconds / started, 3) if started else 0.0,
+            "running_by_provider": {k: v for k, v in self._running_by_provider.items() if v},
+            "waiting_by_provider": {k: v for k, v in self._waiting_by_provider.items() if v},
+            "provider_limits": dict(self.provider_limits),
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+# 全局实例
+_analysis_executor: Optional[AnalysisExecutor] = None
+
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """获取分析任务执行器实例"""
+    global _analysis_executor
+    if _analysis_executor is None:
+        _analysis_executor = AnalysisExecutor(
+            backend=settings.ANALYSIS_EXECUTOR_BACKEND,
+            max_workers=settings.ANALYSIS_EXECUTOR_MAX_WORKERS,
+            max_waiting=settings.ANALYSIS_EXECUTOR_MAX_WAITING,
+            max_queue_depth=settings.ANALYSIS_EXECUTOR_MAX_QUEUE_DEPTH,
+            provider_limits=parse_provider_limits(settings.ANALYSIS_PROVIDER_CONCURRENCY),
+        )
+        logger.info(
+            f"🔧 [执行器] 初始化完成: backend={_analysis_executor.backend}, "
+            f"max_workers={_analysis_executor.max_workers}, max_waiting={_analysis_executor.max_waiting}"
+        )
+    return _analysis_executor
@@ -20,6 +20,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from pymongo import UpdateOne
 
 from app.core.database import get_mongo_db
+from app.services.screening.result_set import bump_data_version as bump_screening_data_version
 from app.core.config import settings
 
 from app.services.basics_sync import (
@@ -218,6 +219,7 @@ class BasicsSyncService:
 
             # Step 3: Upsert into MongoDB (batched bulk writes)
             ops: List[UpdateOne] = []
+            docs: List[Dict[str, Any]] = []
             now_iso = datetime.utcnow().isoformat()
             for _, row in stock_df.iterrows():  # type: ignore
                 name = row.get("name") or ""
@@ -317,6 +319,7 @@ class BasicsSyncService:
                 ops.append(
                     UpdateOne({"code": code, "source": "tushare"}, {"$set": doc}, upsert=True)
                 )
+                docs.append(doc)
 
             inserted = 0
             updated = 0
@@ -330,10 +333,13 @@ class BasicsSyncService:
                 if batch_inserted > 0 or batch_updated > 0:
                     inserted += batch_inserted
                     updated += batch_updated
+                    _refresh_market_snapshot(docs[i : i + BATCH])
                 else:
                     errors += 1
                     logger.error(f"Bulk write error on batch {i//BATCH}")
 
+            await bump_screening_data_version()
+
             stats.total = len(ops)
             stats.inserted = inserted
             stats.updated = updated
@@ -407,6 +413,15 @@ class BasicsSyncService:
             return code if code else ""
 
 
+def _refresh_market_snapshot(docs: List[Dict[str, Any]]) -> None:
+    """将写入的基础信息增量同步到筛选内存快照（失败不影响同步）"""
+    try:
+        from app.services.screening.market_snapshot import get_market_snapshot
+        get_market_snapshot().apply_basics(docs)
+    except Exception as e:
+        logger.warning(f"刷新筛选内存快照失败（忽略）: {e}")
+
+
 # Singleton accessor
 _basics_sync_service: Optional[BasicsSyncService] = None
 
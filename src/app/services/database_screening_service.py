@@ -7,7 +7,9 @@ import logging
 from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
+from app.core.config import settings
 from app.core.database import get_mongo_db
+from app.services.screening.market_snapshot import get_market_snapshot
 # from app.models.screening import ScreeningCondition  # 避免循环导入
 
 logger = logging.getLogger(__name__)
@@ -143,6 +145,12 @@ class DatabaseScreeningService:
                 source = enabled_sources[0] if enabled_sources else 'tushare'
                 logger.info(f"✅ [database_screening] 最终使用的数据源: {source}")
 
+            # 🔥 优先使用内存快照（向量化筛选、排序、计数、分页）
+            if settings.SCREENING_SNAPSHOT_ENABLED:
+                snapshot_result = await self._screen_with_snapshot(conditions, limit, offset, order_by, source)
+                if snapshot_result is not None:
+                    return snapshot_result
+
             # 构建查询条件（现在视图已包含实时行情数据，可以直接查询所有字段）
             query = await self._build_query(conditions)
 
@@ -188,6 +196,56 @@ class DatabaseScreeningService:
             logger.error(f"❌ 数据库筛选失败: {e}")
             raise Exception(f"数据库筛选失败: {str(e)}")
     
+    async def _screen_with_snapshot(
+        self,
+        conditions: List[Dict[str, Any]],
+        limit: int,
+        offset: int,
+        order_by: Optional[List[Dict[str, str]]],
+        source: str
+    ) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """
+        基于内存快照进行筛选
+
+        Returns:
+            (筛选结果, 总数量)；快照不可用时返回 None，由调用方回退到数据库查询
+        """
+        snapshot = get_market_snapshot()
+        try:
+            if not await snapshot.ensure_loaded():
+                return None
+
+            filters = []
+            for condition in conditions:
+                field = condition.get("field") if isinstance(condition, dict) else condition.field
+                operator = condition.get("operator") if isinstance(condition, dict) else condition.operator
+                value = condition.get("value") if isinstance(condition, dict) else condition.value
+
+                db_field = self.basic_fields.get(field)
+                if not db_field or operator not in self.operators:
+                    logger.warning(f"⚠️ [snapshot] 条件 {field} {operator} 不支持，跳过")
+                    continue
+                filters.append((db_field, operator, value))
+
+            docs, total_count = snapshot.query(
+                filters,
+                self._build_sort_conditions(order_by),
+                offset=offset,
+                limit=limit,
+                source=source,
+            )
+            results = [self._format_result(doc) for doc in docs]
+
+            logger.info(
+                f"✅ 内存快照筛选完成: 总数={total_count}, 返回={len(results)}, 数据源={source}, "
+                f"快照版本={snapshot.version}"
+            )
+            return results, total_count
+
+        except Exception as e:
+            logger.warning(f"⚠️ 内存快照筛选失败，回退到数据库查询: {e}")
+            return None
+
     async def _build_query(self, conditions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """构建MongoDB查询条件"""
         query = {}
@@ -3,6 +3,7 @@
 结合数据库优化和传统筛选方式，提供高效的股票筛选功能
 """
 
+import asyncio
 import logging
 import time
 from typing import Any, Dict, List, Optional, Tuple
@@ -10,7 +11,8 @@ from datetime import datetime
 
 from app.models.screening import ScreeningCondition, FieldType, BASIC_FIELDS_INFO
 from app.services.database_screening_service import get_database_screening_service
-from app.services.screening_service import ScreeningService, ScreeningParams
+from app.services.screening_service import ScreeningService, ScreeningParams, ALLOWED_FIELDS
+from app.services.screening.result_set import get_result_set_cache, decode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,7 @@ from app.services.enhanced_screening.utils import (
     convert_conditions_to_traditional_format as _convert_to_traditional_util,
 )
 from app.core.database import get_mongo_db
+from tradingagents.dataflows.realtime_metrics import get_pe_pb_with_fallback_many
 
 
 class EnhancedScreeningService:
@@ -27,6 +30,7 @@ class EnhancedScreeningService:
     def __init__(self):
         self.db_service = get_database_screening_service()
         self.traditional_service = ScreeningService()
+        self.result_sets = get_result_set_cache()
 
         # 支持数据库优化的字段
         self.db_supported_fields = set(BASIC_FIELDS_INFO.keys())
@@ -40,29 +44,38 @@ class EnhancedScreeningService:
         limit: int = 50,
         offset: int = 0,
         order_by: Optional[List[Dict[str, str]]] = None,
-        use_database_optimization: bool = True
+        use_database_optimization: bool = True,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         智能股票筛选
 
+        完整结果集只评估一次并缓存（见 app.services.screening.result_set），
+        后续分页（offset 或 cursor）直接读取缓存的结果集。
+
         Args:
             conditions: 筛选条件列表
             market: 市场
             date: 交易日期
             adj: 复权方式
             limit: 返回数量限制
-            offset: 偏移量
+            offset: 偏移量（提供 cursor 时忽略）
             order_by: 排序条件
             use_database_optimization: 是否使用数据库优化
+            cursor: 上一页返回的 next_cursor（keyset 分页）
 
         Returns:
             Dict: 筛选结果
         """
         start_time = time.time()
 
+        # 游标无效时直接抛出 ValueError，由路由返回 400
+        cursor_data = decode_cursor(cursor) if cursor else None
+
         try:
             # 分析筛选条件
             analysis = self._analyze_conditions(conditions)
+            max_rows = self.result_sets.max_rows
 
             # 决定使用哪种筛选方式
             if (use_database_optimization and
@@ -70,23 +83,47 @@ class EnhancedScreeningService:
                 not analysis["needs_technical_indicators"]):
 
                 # 使用数据库优化筛选
-                result = await self._screen_with_database(
-                    conditions, limit, offset, order_by
-                )
+                async def _evaluate():
+                    return await self._screen_with_database(conditions, max_rows, 0, order_by)
+
+                sort = get_database_screening_service()._build_sort_conditions(order_by)
                 optimization_used = "database"
                 source = "mongodb"
 
             else:
                 # 使用传统筛选方式
-                result = await self._screen_with_traditional_method(
-                    conditions, market, date, adj, limit, offset, order_by
-                )
+                async def _evaluate():
+                    result = await self._screen_with_traditional_method(
+                        conditions, market, date, adj, max_rows, 0, order_by
+                    )
+                    return result.get("items", []), result.get("total", 0)
+
+                sort = [
+                    (o.get("field"), -1 if str(o.get("direction", "desc")).lower() == "desc" else 1)
+                    for o in (order_by or []) if o.get("field") in ALLOWED_FIELDS
+                ]
                 optimization_used = "traditional"
                 source = "api"
 
-            # 提取 items/total
-            items = result[0] if isinstance(result, tuple) else result.get("items", [])
-            total = result[1] if isinstance(result, tuple) else result.get("total", 0)
+            # 获取（或计算）完整结果集
+            result_set, cache_hit = await self.result_sets.get_or_create(
+                {
+                    "optimization": optimization_used,
+                    "conditions": conditions,
+                    "market": market,
+                    "date": date,
+                    "adj": adj,
+                    "order_by": order_by,
+                },
+                sort,
+                _evaluate,
+            )
+            start = result_set.locate(cursor_data) if cursor_data else offset
+            page_items, next_cursor = result_set.page(start, limit)
+
+            # 复制当前页，避免富集修改缓存中的结果集
+            items = [dict(it) for it in page_items]
+            total = result_set.total
 
             # 若使用数据库优化路径，则从数据库行情表进行富集（避免请求时外部调用）
             if source == "mongodb" and items:
@@ -132,7 +169,10 @@ class EnhancedScreeningService:
                 "took_ms": took_ms,
                 "optimization_used": optimization_used,
                 "source": source,
-                "analysis": analysis
+                "analysis": analysis,
+                "result_set_id": result_set.result_set_id,
+                "next_cursor": next_cursor,
+                "cache_hit": cache_hit
             }
 
         except Exception as e:
@@ -211,7 +251,10 @@ class EnhancedScreeningService:
 
     async def _enrich_results_with_realtime_metrics(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        为筛选结果添加PE/PB（使用静态数据，避免性能问题）
+        为筛选结果添加实时PE/PB（动态计算失败时降级到 stock_basic_info 静态数据）
+
+        整页结果批量计算：market_quotes、stock_basic_info、stock_financial_data 各只查询一次，
+        使用进程级同步连接池，在线程中执行不阻塞事件循环。
 
         Args:
             items: 筛选结果列表
@@ -219,15 +262,28 @@ class EnhancedScreeningService:
         Returns:
             List[Dict]: 富集后的结果列表
         """
-        # 🔥 股票筛选场景：直接使用 stock_basic_info 中的静态 PE/PB
-        # 原因：批量计算动态 PE 会导致严重的性能问题（每个股票都要查询多个集合）
-        # 静态 PE 基于最近一个交易日的收盘价，对于筛选场景已经足够准确
-
-        logger.info(f"📊 [筛选结果富集] 使用静态PE/PB（避免性能问题），共 {len(items)} 只股票")
+        codes = [str(it.get("code")).zfill(6) for it in items if it.get("code")]
+        if not codes:
+            return items
 
-        # 注意：items 中的 PE/PB 已经来自 stock_basic_info，这里不需要额外处理
-        # 如果未来需要实时 PE，可以在单个股票详情页面单独计算
+        db = get_mongo_db()
+        metrics_map = await asyncio.to_thread(get_pe_pb_with_fallback_many, codes, db.client)
 
+        enriched = 0
+        for it in items:
+            if not it.get("code"):
+                continue
+            metrics = metrics_map.get(str(it.get("code")).zfill(6))
+            if not metrics:
+                continue
+            for field in ("pe", "pb", "pe_ttm", "pb_mrq"):
+                if metrics.get(field) is not None:
+                    it[field] = metrics[field]
+            it["pe_source"] = metrics.get("source", "unknown")
+            it["pe_is_realtime"] = metrics.get("is_realtime", False)
+            enriched += 1
+
+        logger.info(f"📊 [筛选结果富集] 批量获取PE/PB完成: {enriched}/{len(codes)} 只股票")
         return items
 
     async def get_field_info(self, field: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,586 @@
+"""
+本地中文全文索引
+
+新闻与社媒消息的全文检索。MongoDB $text 按空格/标点分词，中文句子几乎只能整体匹配，
+且检索时需要扫描大量文档。本模块维护一个本地倒排索引：
+- 分词：连续中文切分为二元组（bigram），英文单词与数字（如股票代码）整体作为词
+- 排序：BM25，标题中的词按更高权重计入词频
+- 过滤：股票代码、标签（如平台）、发布时间，均在索引内完成
+- 增量：新文档先写入内存缓冲，达到数量或时间阈值后落盘为不可变的段；段数过多时合并
+- 多进程：索引目录由多个 API worker 与 CLI 共享，清单（manifest.json）的读改写与段编号分配
+  在目录文件锁内完成；清单被其他进程更新后按 inode/mtime 变化重新加载
+- 存储：每个段包含词典（terms.json）、文档表（docs.json）和倒排表（postings.bin，
+  本机字节序的 uint32 [doc, tf] 对），倒排表在查询时通过 mmap 访问
+"""
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"([㐀-䶿一-鿿豈-﫿]+)|([a-z0-9]+)")
+
+TITLE_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_CONTENT_CHARS = 2000
+# 未登记到清单的段目录超过该时长才视为残留并删除
+ORPHAN_GRACE_SECONDS = 600
+
+# 文档表字段下标：[key, length, ts, symbols, tags, ref]
+_KEY, _LEN, _TS, _SYMBOLS, _TAGS, _REF = range(6)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """中文按二元组切分（单字保留为一元），英文/数字按单词切分"""
+    tokens: List[str] = []
+    for cjk, word in _TOKEN_RE.findall((text or "").lower()):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        elif len(word) > 1 or word.isdigit():
+            tokens.append(word)
+    return tokens
+
+
+def to_timestamp(value: Any) -> Optional[float]:
+    """datetime / ISO 字符串 -> 时间戳（无时区的时间按 UTC 处理，与 utcnow 写入一致）"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+class _MemorySegment:
+    """内存缓冲段（尚未落盘的文档）"""
+
+    def __init__(self):
+        self.docs: List[list] = []
+        self.terms: Dict[str, array] = {}
+        self.created_at = time.monotonic()
+
+    def add(self, doc: list, term_freqs: Dict[str, int]) -> int:
+        doc_no = len(self.docs)
+        self.docs.append(doc)
+        for term, tf in term_freqs.items():
+            plist = self.terms.get(term)
+            if plist is None:
+                plist = self.terms[term] = array("I")
+            plist.append(doc_no)
+            plist.append(tf)
+        return doc_no
+
+    def doc_freq(self, term: str) -> int:
+        plist = self.terms.get(term)
+        return len(plist) // 2 if plist is not None else 0
+
+    def postings(self, term: str) -> Sequence[int]:
+        return self.terms.get(term, ())
+
+    def iter_terms(self) -> Iterable[Tuple[str, Sequence[int]]]:
+        return self.terms.items()
+
+
+class _DiskSegment:
+    """磁盘上的不可变段，倒排表通过 mmap 访问"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.name = path.name
+        self.terms: Dict[str, List[int]] = json.loads((path / "terms.json").read_text(encoding="utf-8"))
+        self.docs: List[list] = json.loads((path / "docs.json").read_text(encoding="utf-8"))
+        self._file = open(path / "postings.bin", "rb")
+        self._mmap = None
+        self._raw = None
+        self._view = memoryview(array("I"))
+        if os.fstat(self._file.fileno()).st_size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._raw = memoryview(self._mmap)
+            self._view = self._raw.cast("I")
+
+    def doc_freq(self, term: str) -> int:
+        entry = self.terms.get(term)
+        return entry[1] if entry else 0
+
+    def postings(self, term: str) -> Sequence[int]:
+        entry = self.terms.get(term)
+        if not entry:
+            return ()
+        offset, count = entry
+        return self._view[offset * 2:(offset + count) * 2]
+
+    def iter_terms(self) -> Iterable[Tuple[str, Sequence[int]]]:
+        for term in self.terms:
+            yield term, self.postings(term)
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            if self._raw is not None:
+                self._raw.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            # 仍有查询持有倒排表切片，映射在其释放后由 GC 回收
+            logger.debug(f"[全文索引] 段 {self.name} 仍被引用，延迟释放映射")
+        self._file.close()
+
+    @staticmethod
+    def write(path: Path, docs: List[list], terms: Iterable[Tuple[str, Sequence[int]]]) -> None:
+        """写出新段（先写临时目录再原子替换）"""
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        data = array("I")
+        term_table: Dict[str, List[int]] = {}
+        for term, plist in terms:
+            if not plist:
+                continue
+            term_table[term] = [len(data) // 2, len(plist) // 2]
+            data.extend(plist)
+        with open(tmp / "postings.bin", "wb") as f:
+            data.tofile(f)
+        (tmp / "terms.json").write_text(json.dumps(term_table, ensure_ascii=False), encoding="utf-8")
+        (tmp / "docs.json").write_text(json.dumps(docs, ensure_ascii=False, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+class _DirectoryLock:
+    """索引目录的进程间互斥锁（POSIX flock / Windows msvcrt），同一实例可重入"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+        self._depth = 0
+
+    def __enter__(self):
+        if self._depth == 0:
+            self._file = open(self.path, "a+b")
+            if os.name == "nt":
+                import msvcrt
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue  # LK_LOCK 重试约 10 秒后仍未获得时抛错，继续等待
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._depth -= 1
+        if self._depth:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class FullTextIndex:
+    """基于段的本地倒排索引（线程安全）"""
+
+    def __init__(
+        self,
+        directory: str,
+        flush_docs: int = 500,
+        flush_interval: float = 30.0,
+        max_segments: int = 8,
+    ):
+        self.directory = Path(directory)
+        self.flush_docs = max(1, flush_docs)
+        self.flush_interval = flush_interval
+        self.max_segments = max(1, max_segments)
+
+        self._lock = threading.RLock()
+        self._dir_lock = _DirectoryLock(self.directory / ".lock")
+        self._loaded = False
+        self._manifest_sig: Optional[Tuple[int, int, int]] = None
+        self._segments: List[_DiskSegment] = []
+        self._buffer = _MemorySegment()
+        self._next_id = 1
+        # 文档 key -> (所在段, 段内编号)，同一 key 以最后写入的版本为准
+        self._live: Dict[str, Tuple[Any, int]] = {}
+        self._total_length = 0
+
+    # ---- 加载与持久化 -----------------------------------------------------
+
+    def _manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    def _manifest_signature(self) -> Optional[Tuple[int, int, int]]:
+        # 清单通过 os.replace 整体替换，inode 变化即说明被（任意进程）重写
+        try:
+            st = os.stat(self._manifest_path())
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self._manifest_path().read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ [全文索引] 读取索引清单失败，将重建: {self.directory} - {e}")
+            return {}
+
+    @contextmanager
+    def _locked(self):
+        """持有目录锁，并确保内存中的段列表与清单一致"""
+        with self._dir_lock:
+            if self._manifest_signature() != self._manifest_sig:
+                self._sync_segments(self._read_manifest())
+            yield
+
+    def _load(self) -> None:
+        """首次访问时加载；之后清单被其他进程修改时重新加载"""
+        if self._loaded and self._manifest_signature() == self._manifest_sig:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            if not self._loaded:
+                self._remove_orphans()
+                self._loaded = True
+                if self._live:
+                    logger.info(f"📚 [全文索引] 已加载 {self.directory.name}: {len(self._live)} 篇文档, {len(self._segments)} 个段")
+
+    def _sync_segments(self, manifest: Dict[str, Any]) -> None:
+        names = manifest.get("segments", [])
+        self._next_id = max(self._next_id, int(manifest.get("next_id", 1)))
+        current = {segment.name: segment for segment in self._segments}
+        segments = []
+        for name in names:
+            segment = current.pop(name, None)
+            if segment is None:
+                try:
+                    segment = _DiskSegment(self.directory / name)
+                except Exception as e:
+                    logger.warning(f"⚠️ [全文索引] 跳过损坏的索引段 {name}: {e}")
+                    continue
+            segments.append(segment)
+        # 已被其他进程合并或清空的段
+        for segment in current.values():
+            segment.close()
+        self._segments = segments
+        self._manifest_sig = self._manifest_signature()
+        self._rebuild_live()
+
+    def _remove_orphans(self) -> None:
+        """删除未登记的残留段（仅限超过宽限期的，避免误删其他进程刚写出的段）"""
+        names = {segment.name for segment in self._segments}
+        cutoff = time.time() - ORPHAN_GRACE_SECONDS
+        for path in self.directory.iterdir():
+            try:
+                if path.is_dir() and path.name not in names and path.stat().st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def _rebuild_live(self) -> None:
+        self._live = {}
+        self._total_length = 0
+        for segment in [*self._segments, self._buffer]:
+            for doc_no, doc in enumerate(segment.docs):
+                self._set_live(doc[_KEY], segment, doc_no, doc[_LEN])
+
+    def _set_live(self, key: str, segment: Any, doc_no: int, length: int) -> None:
+        previous = self._live.get(key)
+        if previous is not None:
+            old_segment, old_no = previous
+            self._total_length -= old_segment.docs[old_no][_LEN]
+        self._live[key] = (segment, doc_no)
+        self._total_length += length
+
+    def _is_live(self, key: str, segment: Any, doc_no: int) -> bool:
+        entry = self._live.get(key)
+        return entry is not None and entry[0] is segment and entry[1] == doc_no
+
+    def _write_manifest(self) -> None:
+        tmp = self._manifest_path().with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"segments": [s.name for s in self._segments], "next_id": self._next_id}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self._manifest_path())
+        self._manifest_sig = self._manifest_signature()
+
+    def _new_segment_path(self) -> Path:
+        """分配段目录（须持有目录锁，编号随清单一起写回）"""
+        while True:
+            path = self.directory / f"seg_{self._next_id:06d}"
+            self._next_id += 1
+            if not path.exists():
+                return path
+
+    def flush(self) -> None:
+        """将内存缓冲落盘为新段，必要时合并段"""
+        with self._lock:
+            self._load()
+            if not self._buffer.docs:
+                return
+            with self._locked():
+                path = self._new_segment_path()
+                _DiskSegment.write(path, self._buffer.docs, self._buffer.iter_terms())
+                self._segments.append(_DiskSegment(path))
+                self._buffer = _MemorySegment()
+                self._write_manifest()
+                self._rebuild_live()
+                if len(self._segments) > self.max_segments:
+                    self._merge()
+
+    def maybe_flush(self) -> None:
+        with self._lock:
+            buffer = self._buffer
+            if len(buffer.docs) >= self.flush_docs or (
+                buffer.docs and time.monotonic() - buffer.created_at >= self.flush_interval
+            ):
+                self.flush()
+
+    def _merge(self) -> None:
+        """合并所有段，只保留每个 key 的最新版本（须持有目录锁）"""
+        docs: List[list] = []
+        remap: Dict[Tuple[int, int], int] = {}
+        for segment in self._segments:
+            for doc_no, doc in enumerate(segment.docs):
+                if self._is_live(doc[_KEY], segment, doc_no):
+                    remap[(id(segment), doc_no)] = len(docs)
+                    docs.append(doc)
+
+        merged: Dict[str, array] = {}
+        for segment in self._segments:
+            seg_id = id(segment)
+            for term, plist in segment.iter_terms():
+                for i in range(0, len(plist), 2):
+                    new_no = remap.get((seg_id, plist[i]))
+                    if new_no is not None:
+                        target = merged.get(term)
+                        if target is None:
+                            target = merged[term] = array("I")
+                        target.append(new_no)
+                        target.append(plist[i + 1])
+            plist = None
+
+        path = self._new_segment_path()
+        _DiskSegment.write(path, docs, merged.items())
+        old_segments = self._segments
+        self._segments = [_DiskSegment(path)]
+        self._write_manifest()
+        self._rebuild_live()
+        for segment in old_segments:
+            segment.close()
+            shutil.rmtree(segment.path, ignore_errors=True)
+        logger.info(f"🧩 [全文索引] {self.directory.name} 合并 {len(old_segments)} 个段 -> 1 个段 ({len(docs)} 篇文档)")
+
+    def reset(self) -> None:
+        """清空索引（用于重建）"""
+        with self._lock:
+            self._load()
+            with self._locked():
+                for segment in self._segments:
+                    segment.close()
+                    shutil.rmtree(segment.path, ignore_errors=True)
+                self._segments = []
+                self._buffer = _MemorySegment()
+                self._write_manifest()
+                self._rebuild_live()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            self._loaded = False
+            self._manifest_sig = None
+
+    # ---- 写入 -------------------------------------------------------------
+
+    def add(
+        self,
+        key: str,
+        title: Optional[str],
+        content: Optional[str],
+        published_at: Any = None,
+        symbols: Optional[Iterable[str]] = None,
+        tags: Optional[Iterable[str]] = None,
+        ref: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """添加或更新一篇文档（相同 key 的旧版本失效）"""
+        term_freqs: Counter = Counter()
+        for token in tokenize(title):
+            term_freqs[token] += TITLE_WEIGHT
+        for token in tokenize((content or "")[:MAX_CONTENT_CHARS]):
+            term_freqs[token] += 1
+        if not term_freqs:
+            return
+        length = sum(term_freqs.values())
+        doc = [
+            key,
+            length,
+            to_timestamp(published_at),
+            sorted({str(s).upper() for s in (symbols or []) if s}),
+            sorted({str(t) for t in (tags or []) if t}),
+            ref or {},
+        ]
+        with self._lock:
+            self._load()
+            doc_no = self._buffer.add(doc, term_freqs)
+            self._set_live(key, self._buffer, doc_no, length)
+
+    # ---- 查询 -------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        symbols: Optional[Iterable[str]] = None,
+        tags: Optional[Iterable[str]] = None,
+        start_time: Any = None,
+        end_time: Any = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25 检索
+
+        Returns:
+            按相关性降序的结果：{"key", "score", "ref", "published_at"}
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        symbol_filter = {str(s).upper() for s in symbols} if symbols else None
+        tag_filter = set(tags) if tags else None
+        start_ts = to_timestamp(start_time)
+        end_ts = to_timestamp(end_time)
+
+        with self._lock:
+            self._load()
+            segments = [*self._segments, self._buffer]
+            n_docs = len(self._live)
+            if not n_docs:
+                return []
+            avg_len = self._total_length / n_docs or 1.0
+
+            accepted: Dict[Tuple[int, int], bool] = {}
+            scores: Dict[Tuple[int, int], float] = {}
+            owners: Dict[Tuple[int, int], list] = {}
+            for term in terms:
+                df = sum(segment.doc_freq(term) for segment in segments)
+                if not df:
+                    continue
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for segment in segments:
+                    plist = segment.postings(term)
+                    seg_id = id(segment)
+                    for i in range(0, len(plist), 2):
+                        doc_no = plist[i]
+                        slot = (seg_id, doc_no)
+                        ok = accepted.get(slot)
+                        if ok is None:
+                            doc = segment.docs[doc_no]
+                            ok = self._is_live(doc[_KEY], segment, doc_no) and self._match(
+                                doc, symbol_filter, tag_filter, start_ts, end_ts
+                            )
+                            accepted[slot] = ok
+                            if ok:
+                                owners[slot] = doc
+                        if not ok:
+                            continue
+                        tf = plist[i + 1]
+                        length = owners[slot][_LEN]
+                        norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+                        scores[slot] = scores.get(slot, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [
+                {
+                    "key": owners[slot][_KEY],
+                    "score": round(score, 4),
+                    "ref": owners[slot][_REF],
+                    "published_at": owners[slot][_TS],
+                }
+                for slot, score in top
+            ]
+
+    @staticmethod
+    def _match(doc: list, symbols, tags, start_ts, end_ts) -> bool:
+        if symbols is not None and not symbols.intersection(doc[_SYMBOLS]):
+            return False
+        if tags is not None and not tags.issubset(doc[_TAGS]):
+            return False
+        ts = doc[_TS]
+        if (start_ts is not None or end_ts is not None) and ts is None:
+            return False
+        if start_ts is not None and ts < start_ts:
+            return False
+        if end_ts is not None and ts > end_ts:
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._load()
+            return {
+                "documents": len(self._live),
+                "segments": len(self._segments),
+                "buffered": len(self._buffer.docs),
+                "directory": str(self.directory),
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._live)
+
+
+_indexes: Dict[str, FullTextIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_fulltext_index(name: str) -> FullTextIndex:
+    """获取指定名称的全文索引实例（news / social_media）"""
+    index = _indexes.get(name)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(name)
+            if index is None:
+                from app.core.config import settings
+                index = FullTextIndex(os.path.join(settings.FULLTEXT_INDEX_DIR, name))
+                _indexes[name] = index
+    return index
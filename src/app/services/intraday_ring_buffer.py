@@ -0,0 +1,252 @@
+"""
+盘中行情环形缓冲区
+
+market_quotes 每只股票只保留最新一笔快照，每次 run_once 都会覆盖，盘中轨迹（VWAP、
+日内高低点、成交量曲线）随之丢失。本模块在行情入库循环中记录每个采集时点的全市场行情：
+
+- 存储：固定宽度的 NumPy 矩阵（行 = 采集时点，列 = 股票），按行循环覆盖
+  close 使用 float32，累计成交量/成交额使用 float64（分钟增量需要足够精度）
+- 容量：按采集间隔和交易时段长度确定行数；采集过密时按最小间隔抽样，保证覆盖整个交易日
+- 读取：series() 返回单只股票的当日序列，minute_bars() 聚合为分钟K线（含 VWAP）
+- 收盘：roll_session() 将全部股票聚合为分钟K线，由入库服务写入 intraday_minute_bars 集合
+
+缓冲区位于入库任务所在进程内；其他进程通过收盘后落库的分钟K线读取。
+"""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A股连续竞价 4 小时，按 5 小时留出集合竞价与收盘缓冲
+SESSION_SECONDS = 5 * 3600
+MINUTE_BARS_COLLECTION = "intraday_minute_bars"
+_TZ = ZoneInfo(settings.TIMEZONE)
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class IntradayRingBuffer:
+    """全市场盘中行情环形缓冲区（线程安全）"""
+
+    def __init__(self, capacity: int, initial_symbols: int = 1024):
+        self.capacity = max(8, capacity)
+        # 采集间隔小于该值时抽样记录，保证容量覆盖整个交易时段
+        self.min_spacing = SESSION_SECONDS / self.capacity
+        self._lock = threading.Lock()
+        self._initial_symbols = max(16, initial_symbols)
+        self._allocate(self._initial_symbols)
+        self.trade_date: Optional[str] = None
+        self.finalized = False
+
+    def _allocate(self, columns: int) -> None:
+        self._codes: Dict[str, int] = {}
+        self._ts = np.zeros(self.capacity, dtype=np.int64)
+        self._close = np.full((self.capacity, columns), np.nan, dtype=np.float32)
+        self._volume = np.full((self.capacity, columns), np.nan, dtype=np.float64)
+        self._amount = np.full((self.capacity, columns), np.nan, dtype=np.float64)
+        self._ticks = 0
+
+    def _grow(self, needed: int) -> None:
+        columns = self._close.shape[1]
+        if needed <= columns:
+            return
+        new_columns = max(needed, columns * 2)
+        for name in ("_close", "_volume", "_amount"):
+            old = getattr(self, name)
+            grown = np.full((self.capacity, new_columns), np.nan, dtype=old.dtype)
+            grown[:, :columns] = old
+            setattr(self, name, grown)
+
+    def reset(self, trade_date: Optional[str] = None) -> None:
+        with self._lock:
+            self._allocate(self._initial_symbols)
+            self.trade_date = trade_date
+            self.finalized = False
+
+    # ---- 写入 -------------------------------------------------------------
+
+    def record_tick(self, quotes: Dict[str, Dict[str, Any]], trade_date: str, at: datetime) -> bool:
+        """
+        记录一个采集时点的全市场行情
+
+        Args:
+            quotes: {6位代码: {close, volume, amount, ...}}
+            trade_date: 交易日，变化时自动开始新的交易日
+            at: 采集时间
+
+        Returns:
+            是否写入（距上次记录过近时抽样跳过）
+        """
+        ts = int(at.timestamp())
+        if trade_date != self.trade_date:
+            self.reset(trade_date)
+        with self._lock:
+            if self._ticks:
+                last_ts = self._ts[(self._ticks - 1) % self.capacity]
+                if ts - last_ts < self.min_spacing:
+                    return False
+
+            for code in quotes:
+                if code not in self._codes:
+                    self._codes[code] = len(self._codes)
+            self._grow(len(self._codes))
+
+            row = self._ticks % self.capacity
+            self._close[row, :] = np.nan
+            self._volume[row, :] = np.nan
+            self._amount[row, :] = np.nan
+            if quotes:
+                cols = np.fromiter((self._codes[c] for c in quotes), dtype=np.int64, count=len(quotes))
+                values = list(quotes.values())
+                self._close[row, cols] = [_to_float(q.get("close")) for q in values]
+                self._volume[row, cols] = [_to_float(q.get("volume")) for q in values]
+                self._amount[row, cols] = [_to_float(q.get("amount")) for q in values]
+            self._ts[row] = ts
+            self._ticks += 1
+            self.finalized = False
+            return True
+
+    # ---- 读取 -------------------------------------------------------------
+
+    def _ordered_rows(self) -> np.ndarray:
+        if self._ticks <= self.capacity:
+            return np.arange(self._ticks)
+        start = self._ticks % self.capacity
+        return np.concatenate([np.arange(start, self.capacity), np.arange(0, start)])
+
+    def _column(self, code: str):
+        col = self._codes.get(code)
+        if col is None:
+            return None
+        rows = self._ordered_rows()
+        close = self._close[rows, col].astype(np.float64)
+        mask = ~np.isnan(close)
+        return (
+            self._ts[rows][mask],
+            close[mask],
+            self._volume[rows, col][mask],
+            self._amount[rows, col][mask],
+        )
+
+    def series(self, code: str) -> Dict[str, Any]:
+        """单只股票的当日序列：时间戳、价格、累计成交量、累计成交额"""
+        with self._lock:
+            data = self._column(code)
+        if data is None:
+            return {"code": code, "trade_date": self.trade_date, "points": []}
+        ts, close, volume, amount = data
+        points = [
+            {
+                "time": datetime.fromtimestamp(int(t), tz=_TZ).isoformat(),
+                "close": round(float(c), 4),
+                "volume": None if np.isnan(v) else float(v),
+                "amount": None if np.isnan(a) else float(a),
+            }
+            for t, c, v, a in zip(ts, close, volume, amount)
+        ]
+        return {"code": code, "trade_date": self.trade_date, "points": points}
+
+    @staticmethod
+    def _bars_from(ts, close, volume, amount) -> List[Dict[str, Any]]:
+        if not len(ts):
+            return []
+        minutes = ts // 60
+        starts = np.flatnonzero(np.r_[True, minutes[1:] != minutes[:-1]])
+        ends = np.r_[starts[1:], len(ts)] - 1
+
+        # 成交量/成交额为累计值，分钟增量 = 本分钟最后一笔 - 上一分钟最后一笔
+        # （首根K线为开盘以来的累计值）
+        cum_volume = np.nan_to_num(volume[ends])
+        cum_amount = np.nan_to_num(amount[ends])
+        bar_volume = np.diff(np.r_[0.0, cum_volume]).clip(min=0)
+        bar_amount = np.diff(np.r_[0.0, cum_amount]).clip(min=0)
+
+        highs = np.maximum.reduceat(close, starts)
+        lows = np.minimum.reduceat(close, starts)
+        bars = []
+        for i, (s, e) in enumerate(zip(starts, ends)):
+            vol = float(bar_volume[i])
+            amt = float(bar_amount[i])
+            bars.append({
+                "minute": datetime.fromtimestamp(int(minutes[s]) * 60, tz=_TZ).strftime("%H:%M"),
+                "open": round(float(close[s]), 4),
+                "high": round(float(highs[i]), 4),
+                "low": round(float(lows[i]), 4),
+                "close": round(float(close[e]), 4),
+                "volume": vol,
+                "amount": amt,
+                # 单位取决于数据源（成交量为股或手）
+                "vwap": round(amt / vol, 4) if vol > 0 else None,
+            })
+        return bars
+
+    def minute_bars(self, code: str) -> List[Dict[str, Any]]:
+        """单只股票的分钟K线"""
+        with self._lock:
+            data = self._column(code)
+        return self._bars_from(*data) if data is not None else []
+
+    def roll_session(self) -> Dict[str, List[Dict[str, Any]]]:
+        """将全部股票聚合为分钟K线（收盘后调用）"""
+        with self._lock:
+            codes = list(self._codes)
+            columns = {code: self._column(code) for code in codes}
+        return {code: self._bars_from(*data) for code, data in columns.items() if data is not None and len(data[0])}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            columns = self._close.shape[1]
+            return {
+                "trade_date": self.trade_date,
+                "capacity": self.capacity,
+                "min_spacing_seconds": round(self.min_spacing, 1),
+                "ticks": self._ticks,
+                "rows_in_use": min(self._ticks, self.capacity),
+                "symbols": len(self._codes),
+                "finalized": self.finalized,
+                "memory_mb": round(
+                    (self._close.nbytes + self._volume.nbytes + self._amount.nbytes + self._ts.nbytes) / 1024 / 1024, 2
+                ),
+                "columns": columns,
+            }
+
+    @property
+    def has_unfinalized_session(self) -> bool:
+        return bool(self._ticks) and not self.finalized
+
+
+def default_capacity() -> int:
+    """容量 = 交易时段 / 采集间隔（留少量余量），不超过配置上限"""
+    interval = max(1, settings.QUOTES_INGEST_INTERVAL_SECONDS)
+    needed = math.ceil(SESSION_SECONDS / interval) + 8
+    return max(8, min(settings.INTRADAY_BUFFER_MAX_TICKS, needed))
+
+
+_intraday_buffer: Optional[IntradayRingBuffer] = None
+
+
+def get_intraday_buffer() -> IntradayRingBuffer:
+    """获取盘中行情环形缓冲区实例"""
+    global _intraday_buffer
+    if _intraday_buffer is None:
+        _intraday_buffer = IntradayRingBuffer(capacity=default_capacity())
+        logger.info(
+            f"🔧 盘中行情缓冲区初始化: capacity={_intraday_buffer.capacity}, "
+            f"最小记录间隔={_intraday_buffer.min_spacing:.0f}s"
+        )
+    return _intraday_buffer
@@ -5,27 +5,144 @@
 
 import logging
 import os
+import shutil
+import threading
 import zipfile
+from bisect import bisect_left
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import re
 import json
 
 logger = logging.getLogger("webapi")
 
+# 日志行时间戳（YYYY-MM-DD HH:MM:SS，允许 ISO 格式的 T 分隔符）
+_TIME_RE = re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}')
+# 行首附近的时间戳（用于建立索引，按字节匹配）
+_LINE_TIME_RE = re.compile(rb'^[^\n]{0,40}?(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2})', re.M)
+
+_TAIL_CHUNK_SIZE = 64 * 1024
+_COPY_CHUNK_SIZE = 1024 * 1024
+_DEFAULT_INDEX_INTERVAL = 1024 * 1024
+
+
+def _normalize_time(value: Optional[str], end: bool = False) -> Optional[str]:
+    """将查询时间规范为 'YYYY-MM-DD HH:MM:SS' 前缀，便于与日志时间戳按字符串比较"""
+    if not value:
+        return None
+    text = str(value).strip().replace("T", " ")[:19]
+    if end and len(text) == 10:
+        text += " 23:59:59"
+    return text
+
+
+def _line_time(line: str) -> Optional[str]:
+    match = _TIME_RE.search(line, 0, 64)
+    return match.group().replace("T", " ") if match else None
+
+
+def _tail_lines(file_path: Path, lines: int, chunk_size: int = _TAIL_CHUNK_SIZE) -> List[str]:
+    """
+    从文件末尾反向分块读取最后 N 行，读取量与 N 成正比而不是与文件大小成正比
+    """
+    if lines <= 0:
+        return []
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        chunks: List[bytes] = []
+        newlines = 0
+        # 需要 N+1 个换行符才能保证得到 N 个完整行
+        while pos > 0 and newlines <= lines:
+            size = min(chunk_size, pos)
+            pos -= size
+            f.seek(pos)
+            chunk = f.read(size)
+            chunks.append(chunk)
+            newlines += chunk.count(b'\n')
+    data = b''.join(reversed(chunks))
+    result = data.splitlines()
+    if pos > 0 and result:
+        result = result[1:]  # 第一行可能不完整
+    return [line.decode('utf-8', errors='ignore') for line in result[-lines:]]
+
+
+class _LogTimeIndex:
+    """
+    日志文件的稀疏时间索引
+
+    每隔 interval 字节记录一个检查点（行首字节偏移、行号、时间戳），
+    时间范围查询据此直接定位到起始时间附近，不必从头扫描。
+    索引随文件增长增量扩展；文件被轮转（inode 变化或变小）时重建。
+    """
+
+    def __init__(self, inode: int, interval: int):
+        self.inode = inode
+        self.interval = interval
+        self.size = 0
+        self.total_lines = 0
+        self.times: List[str] = []
+        self.offsets: List[int] = []
+        self._next_checkpoint = 0
+        self._at_line_start = True
+
+    def extend(self, file_path: Path) -> None:
+        """从已索引位置继续扫描到文件末尾（按块计数换行，不逐行解析）"""
+        with open(file_path, 'rb') as f:
+            f.seek(self.size)
+            while True:
+                chunk = f.read(self.interval)
+                if not chunk:
+                    break
+                if self.size + len(chunk) > self._next_checkpoint:
+                    self._add_checkpoint(chunk)
+                self.total_lines += chunk.count(b'\n')
+                self.size += len(chunk)
+                self._at_line_start = chunk.endswith(b'\n')
+
+    def _add_checkpoint(self, chunk: bytes) -> None:
+        start = max(0, self._next_checkpoint - self.size)
+        if start > 0 or not self._at_line_start:
+            newline = chunk.find(b'\n', max(0, start - 1))
+            if newline < 0:
+                return
+            start = newline + 1
+        match = _LINE_TIME_RE.search(chunk, start)
+        if not match:
+            return
+        ts = match.group(1).decode('ascii').replace("T", " ")
+        if self.times and ts < self.times[-1]:
+            return
+        line_start = match.start()
+        self.times.append(ts)
+        self.offsets.append(self.size + line_start)
+        self._next_checkpoint = self.size + line_start + self.interval
+
+    def seek_offset(self, start_time: Optional[str]) -> int:
+        """返回时间戳早于 start_time 的最后一个检查点的偏移（之前的行都早于开始时间）"""
+        if not start_time:
+            return 0
+        i = bisect_left(self.times, start_time) - 1
+        return self.offsets[i] if i >= 0 else 0
+
 
 class LogExportService:
     """日志导出服务"""
 
-    def __init__(self, log_dir: str = "./logs"):
+    def __init__(self, log_dir: str = "./logs", index_interval: int = _DEFAULT_INDEX_INTERVAL):
         """
         初始化日志导出服务
 
         Args:
             log_dir: 日志文件目录
+            index_interval: 时间索引检查点间隔（字节）
         """
         self.log_dir = Path(log_dir)
+        self.index_interval = max(4096, index_interval)
+        self._indexes: Dict[str, _LogTimeIndex] = {}
+        self._index_lock = threading.Lock()
         logger.info(f"🔍 [LogExportService] 初始化日志导出服务")
         logger.info(f"🔍 [LogExportService] 配置的日志目录: {log_dir}")
         logger.info(f"🔍 [LogExportService] 解析后的日志目录: {self.log_dir}")
@@ -154,25 +271,29 @@ class LogExportService:
             raise FileNotFoundError(f"日志文件不存在: {filename}")
         
         try:
-            # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                all_lines = f.readlines()
-            
-            # 从末尾开始读取指定行数
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-            
-            # 应用过滤器
-            filtered_lines = []
+            start = _normalize_time(start_time)
+            end = _normalize_time(end_time, end=True)
+            index = self._get_index(file_path)
+
             stats = {
-                "total_lines": len(all_lines),
+                "total_lines": index.total_lines,
                 "filtered_lines": 0,
                 "error_count": 0,
                 "warning_count": 0,
                 "info_count": 0,
                 "debug_count": 0
             }
-            
-            for line in recent_lines:
+
+            if start or end:
+                # 时间范围查询：通过索引定位起点，返回范围内最后 N 条匹配行
+                candidates = self._iter_time_range(file_path, index, start, end)
+                filtered_lines = deque(maxlen=lines)
+            else:
+                # 只从末尾反向读取需要的行数
+                candidates = _tail_lines(file_path, lines)
+                filtered_lines = []
+
+            for line in candidates:
                 # 统计日志级别
                 if "ERROR" in line:
                     stats["error_count"] += 1
@@ -182,26 +303,11 @@ class LogExportService:
                     stats["info_count"] += 1
                 elif "DEBUG" in line:
                     stats["debug_count"] += 1
-                
-                # 应用过滤条件
-                if level and level.upper() not in line:
-                    continue
-                
-                if keyword and keyword.lower() not in line.lower():
-                    continue
-                
-                # 时间过滤（简单实现，假设日志格式为 YYYY-MM-DD HH:MM:SS）
-                if start_time or end_time:
-                    time_match = re.search(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', line)
-                    if time_match:
-                        log_time = time_match.group()
-                        if start_time and log_time < start_time:
-                            continue
-                        if end_time and log_time > end_time:
-                            continue
-                
-                filtered_lines.append(line.rstrip())
-            
+
+                if self._matches(line, level, keyword):
+                    filtered_lines.append(line.rstrip())
+
+            filtered_lines = list(filtered_lines)
             stats["filtered_lines"] = len(filtered_lines)
             
             return {
@@ -214,6 +320,95 @@ class LogExportService:
             logger.error(f"❌ 读取日志文件失败: {e}")
             raise
 
+    @staticmethod
+    def _matches(line: str, level: Optional[str], keyword: Optional[str]) -> bool:
+        if level and level.upper() not in line:
+            return False
+        if keyword and keyword.lower() not in line.lower():
+            return False
+        return True
+
+    def _get_index(self, file_path: Path) -> _LogTimeIndex:
+        """获取（必要时增量更新）日志文件的时间索引"""
+        stat = file_path.stat()
+        key = str(file_path.resolve())
+        with self._index_lock:
+            index = self._indexes.get(key)
+            if index is None or index.inode != stat.st_ino or stat.st_size < index.size:
+                index = _LogTimeIndex(stat.st_ino, self.index_interval)
+                self._indexes[key] = index
+            if stat.st_size > index.size:
+                index.extend(file_path)
+            return index
+
+    def _iter_time_range(
+        self,
+        file_path: Path,
+        index: _LogTimeIndex,
+        start: Optional[str],
+        end: Optional[str]
+    ) -> Iterator[str]:
+        """
+        流式读取时间范围内的日志行
+
+        没有时间戳的行（如异常堆栈）归属于上一条带时间戳的日志。
+        日志按时间顺序写入，遇到晚于结束时间的行即停止读取。
+        """
+        offset = index.seek_offset(start)
+        current: Optional[str] = None
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                line = raw.decode('utf-8', errors='ignore')
+                ts = _line_time(line)
+                if ts:
+                    current = ts
+                if end and current and current > end:
+                    break
+                if start and (current is None or current < start):
+                    continue
+                yield line
+
+    def iter_filtered_lines(
+        self,
+        file_path: Path,
+        level: Optional[str] = None,
+        keyword: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None
+    ) -> Iterator[str]:
+        """流式返回整个文件中满足过滤条件的行（用于导出，不在内存中拼装）"""
+        start = _normalize_time(start_time)
+        end = _normalize_time(end_time, end=True)
+        if start or end:
+            lines = self._iter_time_range(file_path, self._get_index(file_path), start, end)
+        else:
+            lines = self._iter_all_lines(file_path)
+        for line in lines:
+            if self._matches(line, level, keyword):
+                yield line.rstrip('\r\n')
+
+    @staticmethod
+    def _iter_all_lines(file_path: Path) -> Iterator[str]:
+        with open(file_path, 'rb') as f:
+            for raw in f:
+                yield raw.decode('utf-8', errors='ignore')
+
+    def _write_filtered(self, out, file_path: Path, level, start_time, end_time) -> int:
+        """将过滤结果分批写入二进制输出流，返回写入行数"""
+        written = 0
+        batch: List[str] = []
+        for line in self.iter_filtered_lines(file_path, level=level, start_time=start_time, end_time=end_time):
+            batch.append(line)
+            if len(batch) >= 1000:
+                out.write(('\n'.join(batch) + '\n').encode('utf-8'))
+                written += len(batch)
+                batch = []
+        if batch:
+            out.write(('\n'.join(batch) + '\n').encode('utf-8'))
+            written += len(batch)
+        return written
+
     def export_logs(
         self,
         filenames: Optional[List[str]] = None,
@@ -255,24 +450,12 @@ class LogExportService:
             if format == "zip":
                 export_path = export_dir / f"logs_export_{timestamp}.zip"
                 
-                # 创建ZIP文件
+                # 创建ZIP文件（过滤结果直接流式写入压缩条目，不生成临时文件）
                 with zipfile.ZipFile(export_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                     for file_path in files_to_export:
-                        # 如果有过滤条件，先过滤再添加
                         if level or start_time or end_time:
-                            filtered_data = self.read_log_file(
-                                file_path.name,
-                                lines=999999,  # 读取所有行
-                                level=level,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                            # 将过滤后的内容写入临时文件
-                            temp_file = export_dir / f"temp_{file_path.name}"
-                            with open(temp_file, 'w', encoding='utf-8') as f:
-                                f.write('\n'.join(filtered_data['lines']))
-                            zipf.write(temp_file, file_path.name)
-                            temp_file.unlink()  # 删除临时文件
+                            with zipf.open(file_path.name, 'w', force_zip64=True) as entry:
+                                self._write_filtered(entry, file_path, level, start_time, end_time)
                         else:
                             zipf.write(file_path, file_path.name)
                 
@@ -282,27 +465,19 @@ class LogExportService:
             elif format == "txt":
                 export_path = export_dir / f"logs_export_{timestamp}.txt"
                 
-                # 合并所有日志到一个文本文件
-                with open(export_path, 'w', encoding='utf-8') as outf:
+                # 合并所有日志到一个文本文件（分块复制 / 流式过滤）
+                with open(export_path, 'wb') as outf:
                     for file_path in files_to_export:
-                        outf.write(f"\n{'='*80}\n")
-                        outf.write(f"文件: {file_path.name}\n")
-                        outf.write(f"{'='*80}\n\n")
+                        header = f"\n{'='*80}\n文件: {file_path.name}\n{'='*80}\n\n"
+                        outf.write(header.encode('utf-8'))
                         
                         if level or start_time or end_time:
-                            filtered_data = self.read_log_file(
-                                file_path.name,
-                                lines=999999,
-                                level=level,
-                                start_time=start_time,
-                                end_time=end_time
-                            )
-                            outf.write('\n'.join(filtered_data['lines']))
+                            self._write_filtered(outf, file_path, level, start_time, end_time)
                         else:
-                            with open(file_path, 'r', encoding='utf-8', errors='ignore') as inf:
-                                outf.write(inf.read())
+                            with open(file_path, 'rb') as inf:
+                                shutil.copyfileobj(inf, outf, _COPY_CHUNK_SIZE)
                         
-                        outf.write('\n\n')
+                        outf.write(b'\n\n')
                 
                 logger.info(f"✅ 日志导出成功: {export_path}")
                 return str(export_path)
@@ -356,10 +531,8 @@ class LogExportService:
                     stats["error_files"] += 1
                     # 读取最近的错误
                     try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = f.readlines()
-                            error_lines = [line for line in lines[-100:] if "ERROR" in line]
-                            stats["recent_errors"].extend(error_lines[-10:])
+                        error_lines = [line for line in _tail_lines(file_path, 100) if "ERROR" in line]
+                        stats["recent_errors"].extend(error_lines[-10:])
                     except Exception:
                         pass
             
@@ -19,6 +19,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from pymongo import UpdateOne
 
 from app.core.database import get_mongo_db
+from app.services.screening.result_set import bump_data_version as bump_screening_data_version
 from app.services.basics_sync import add_financial_metrics as _add_financial_metrics_util
 
 
@@ -206,6 +207,7 @@ class MultiSourceBasicsSyncService:
 
             # Step 5: 处理和更新数据（分批处理）
             ops = []
+            docs = []
             inserted = updated = errors = 0
             batch_size = 500  # 🔥 每批处理 500 只股票，避免超时
             total_stocks = len(stock_df)
@@ -282,6 +284,7 @@ class MultiSourceBasicsSyncService:
 
                     # 🔥 使用 (code, source) 联合查询条件
                     ops.append(UpdateOne({"code": code, "source": data_source}, {"$set": doc}, upsert=True))
+                    docs.append(doc)
 
                 except Exception as e:
                     logger.error(f"Error processing stock {row.get('ts_code', 'unknown')}: {e}")
@@ -298,12 +301,16 @@ class MultiSourceBasicsSyncService:
                         if batch_inserted > 0 or batch_updated > 0:
                             inserted += batch_inserted
                             updated += batch_updated
+                            self._refresh_market_snapshot(docs)
                             logger.info(f"✅ 批量写入完成: 新增 {batch_inserted}, 更新 {batch_updated} | 累计: 新增 {inserted}, 更新 {updated}, 错误 {errors}")
                         else:
                             errors += len(ops)
                             logger.warning(f"⚠️ 批量写入失败，标记 {len(ops)} 条记录为错误")
 
                         ops = []  # 清空操作列表
+                        docs = []
+
+            await bump_screening_data_version()
 
             # Step 7: 更新统计信息
             stats.total = total_stocks  # 🔥 使用总股票数
@@ -333,6 +340,15 @@ class MultiSourceBasicsSyncService:
 
 
 
+    @staticmethod
+    def _refresh_market_snapshot(docs: List[Dict[str, Any]]) -> None:
+        """将写入的基础信息增量同步到筛选内存快照（失败不影响同步）"""
+        try:
+            from app.services.screening.market_snapshot import get_market_snapshot
+            get_market_snapshot().apply_basics(docs)
+        except Exception as e:
+            logger.warning(f"刷新筛选内存快照失败（忽略）: {e}")
+
     def _add_financial_metrics(self, doc: Dict, daily_metrics: Dict) -> None:
         """委托到 basics_sync.processing.add_financial_metrics"""
         return _add_financial_metrics_util(doc, daily_metrics)
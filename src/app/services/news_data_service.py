@@ -2,6 +2,7 @@
 新闻数据服务
 提供统一的新闻数据存储、查询和管理功能
 """
+import asyncio
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass
@@ -11,6 +12,8 @@ from pymongo.errors import BulkWriteError
 from bson import ObjectId
 
 from app.core.database import get_database
+from app.core.config import settings
+from app.services.fulltext_index import get_fulltext_index
 
 logger = logging.getLogger(__name__)
 
@@ -178,12 +181,14 @@ class NewsDataService:
             
             # 准备批量操作
             operations = []
+            standardized_list = []
 
             for i, news in enumerate(news_list):
                 # 标准化新闻数据
                 standardized_news = self._standardize_news_data(
                     news, data_source, market, now
                 )
+                standardized_list.append(standardized_news)
 
                 # 🔍 记录前3条数据的详细信息
                 if i < 3:
@@ -212,6 +217,7 @@ class NewsDataService:
             if operations:
                 result = await collection.bulk_write(operations)
                 saved_count = result.upserted_count + result.modified_count
+                await asyncio.to_thread(self._index_for_search, standardized_list)
                 
                 self.logger.info(f"💾 新闻数据保存完成: {saved_count}条记录 (数据源: {data_source})")
                 return saved_count
@@ -223,6 +229,8 @@ class NewsDataService:
             write_errors = e.details.get('writeErrors', [])
             error_count = len(write_errors)
             self.logger.warning(f"⚠️ 部分新闻数据保存失败: {error_count}条错误")
+            # 写入失败的文档在检索回表时会被过滤掉
+            await asyncio.to_thread(self._index_for_search, standardized_list)
 
             # 记录详细错误信息
             for i, error in enumerate(write_errors[:3], 1):  # 只记录前3个错误
@@ -281,9 +289,12 @@ class NewsDataService:
 
             self.logger.info(f"📝 开始标准化 {len(news_list)} 条新闻数据...")
 
+            standardized_list = []
+
             for i, news in enumerate(news_list, 1):
                 # 标准化新闻数据
                 standardized_news = self._standardize_news_data(news, data_source, market, now)
+                standardized_list.append(standardized_news)
 
                 # 记录前3条新闻的详细信息
                 if i <= 3:
@@ -313,6 +324,7 @@ class NewsDataService:
             if operations:
                 result = collection.bulk_write(operations)
                 saved_count = result.upserted_count + result.modified_count
+                self._index_for_search(standardized_list)
 
                 self.logger.info(f"💾 新闻数据保存完成: {saved_count}条记录 (数据源: {data_source})")
                 return saved_count
@@ -324,6 +336,7 @@ class NewsDataService:
             write_errors = e.details.get('writeErrors', [])
             error_count = len(write_errors)
             self.logger.warning(f"⚠️ 部分新闻数据保存失败: {error_count}条错误")
+            self._index_for_search(standardized_list)
 
             # 记录详细错误信息
             for i, error in enumerate(write_errors[:3], 1):  # 只记录前3个错误
@@ -708,19 +721,90 @@ class NewsDataService:
             self.logger.error(f"❌ 删除过期新闻失败: {e}")
             return 0
 
+    @staticmethod
+    def _search_ref(news: Dict[str, Any]) -> Dict[str, Any]:
+        """新闻在全文索引中的回表条件（与唯一索引 url+title+publish_time 一致）"""
+        publish_time = news.get("publish_time")
+        if isinstance(publish_time, datetime):
+            # MongoDB 只保存到毫秒
+            publish_time = publish_time.replace(microsecond=publish_time.microsecond // 1000 * 1000).isoformat()
+        return {"url": news.get("url"), "title": news.get("title"), "publish_time": publish_time}
+
+    def _index_for_search(self, news_list: List[Dict[str, Any]]) -> None:
+        """将已保存的新闻增量写入本地全文索引（失败不影响保存）"""
+        if not settings.FULLTEXT_INDEX_ENABLED or not news_list:
+            return
+        try:
+            index = get_fulltext_index("news")
+            for news in news_list:
+                ref = self._search_ref(news)
+                index.add(
+                    key=f"{ref['url']}|{ref['title']}|{ref['publish_time']}",
+                    title=news.get("title"),
+                    content=news.get("content") or news.get("summary"),
+                    published_at=news.get("publish_time"),
+                    symbols=news.get("symbols") or ([news["symbol"]] if news.get("symbol") else []),
+                    ref=ref,
+                )
+            index.maybe_flush()
+        except Exception as e:
+            self.logger.warning(f"⚠️ 更新新闻全文索引失败: {e}")
+
+    async def rebuild_search_index(self, days_back: Optional[int] = None, batch_size: int = 1000) -> int:
+        """
+        从 MongoDB 重建新闻全文索引
+
+        Args:
+            days_back: 只索引最近N天的新闻（None 表示全部）
+            batch_size: 每批读取数量
+
+        Returns:
+            索引的新闻数量
+        """
+        collection = self._get_collection()
+        query: Dict[str, Any] = {}
+        if days_back:
+            query["publish_time"] = {"$gte": datetime.utcnow() - timedelta(days=days_back)}
+
+        index = get_fulltext_index("news")
+        await asyncio.to_thread(index.reset)
+        projection = {"url": 1, "title": 1, "content": 1, "summary": 1, "publish_time": 1, "symbol": 1, "symbols": 1}
+        cursor = collection.find(query, projection).batch_size(batch_size)
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await asyncio.to_thread(self._index_for_search, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(self._index_for_search, batch)
+            count += len(batch)
+        await asyncio.to_thread(index.flush)
+        self.logger.info(f"📚 新闻全文索引重建完成: {count} 条")
+        return count
+
     async def search_news(
         self,
         query_text: str,
         symbol: str = None,
-        limit: int = 20
+        limit: int = 20,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
     ) -> List[Dict[str, Any]]:
         """
         全文搜索新闻
 
+        优先使用本地全文索引（中文二元组 + BM25）。本地索引结果不足 limit 条时，用 MongoDB $text
+        补足：其他进程（其他 API worker、CLI）刚保存的新闻在其落盘前不在本进程的索引中。
+
         Args:
             query_text: 搜索文本
             symbol: 股票代码过滤
             limit: 返回数量限制
+            start_time: 发布时间下限
+            end_time: 发布时间上限
 
         Returns:
             搜索结果列表
@@ -728,31 +812,117 @@ class NewsDataService:
         try:
             collection = self._get_collection()
 
-            # 构建查询条件
-            query = {"$text": {"$search": query_text}}
+            if not settings.FULLTEXT_INDEX_ENABLED:
+                return await self._search_with_text(collection, query_text, symbol, limit, start_time, end_time)
+
+            results = await self._search_with_index(
+                get_fulltext_index("news"), collection, query_text, symbol, limit, start_time, end_time
+            )
+            if len(results) < limit:
+                try:
+                    extra = await self._search_with_text(collection, query_text, symbol, limit, start_time, end_time)
+                except Exception as e:
+                    self.logger.warning(f"⚠️ $text 补充检索失败，仅返回本地索引结果: {e}")
+                    extra = []
+                seen = {str(doc.get("_id")) for doc in results}
+                results.extend(doc for doc in extra if str(doc.get("_id")) not in seen)
+                results = results[:limit]
+            return results
 
-            if symbol:
-                query["symbol"] = symbol
+        except Exception as e:
+            self.logger.error(f"❌ 全文搜索失败: {e}")
+            return []
 
-            # 执行搜索，按相关性排序
-            cursor = collection.find(
-                query,
-                {"score": {"$meta": "textScore"}}
-            ).sort([("score", {"$meta": "textScore"})])
+    async def _search_with_text(
+        self,
+        collection,
+        query_text: str,
+        symbol: Optional[str],
+        limit: int,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime]
+    ) -> List[Dict[str, Any]]:
+        """MongoDB $text 检索"""
+        query = {"$text": {"$search": query_text}}
 
-            cursor = cursor.limit(limit)
-            results = await cursor.to_list(length=None)
+        if symbol:
+            query["symbol"] = symbol
 
-            # 🔧 转换 ObjectId 为字符串，避免 JSON 序列化错误
-            results = convert_objectid_to_str(results)
+        if start_time or end_time:
+            time_query = {}
+            if start_time:
+                time_query["$gte"] = start_time
+            if end_time:
+                time_query["$lte"] = end_time
+            query["publish_time"] = time_query
 
-            self.logger.info(f"🔍 全文搜索返回 {len(results)} 条结果")
-            return results
+        # 执行搜索，按相关性排序
+        cursor = collection.find(
+            query,
+            {"score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})])
 
-        except Exception as e:
-            self.logger.error(f"❌ 全文搜索失败: {e}")
+        cursor = cursor.limit(limit)
+        results = await cursor.to_list(length=None)
+
+        # 🔧 转换 ObjectId 为字符串，避免 JSON 序列化错误
+        results = convert_objectid_to_str(results)
+
+        self.logger.info(f"🔍 全文搜索（$text）返回 {len(results)} 条结果")
+        return results
+
+    async def _search_with_index(
+        self,
+        index,
+        collection,
+        query_text: str,
+        symbol: Optional[str],
+        limit: int,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime]
+    ) -> List[Dict[str, Any]]:
+        """本地索引检索，再按 url+title+publish_time 回表获取完整新闻"""
+        # 多取一些，弥补已被删除（过期清理）的新闻
+        hits = await asyncio.to_thread(
+            index.search,
+            query_text,
+            symbols=[symbol] if symbol else None,
+            start_time=start_time,
+            end_time=end_time,
+            limit=limit * 2,
+        )
+        if not hits:
+            self.logger.info("🔍 全文搜索（本地索引）无结果")
             return []
 
+        conditions = []
+        for hit in hits:
+            ref = dict(hit["ref"])
+            if ref.get("publish_time"):
+                ref["publish_time"] = datetime.fromisoformat(ref["publish_time"])
+            conditions.append(ref)
+        docs = await collection.find({"$or": conditions}).to_list(length=None)
+
+        by_ref = {}
+        for doc in docs:
+            ref = self._search_ref(doc)
+            by_ref[(ref["url"], ref["title"], ref["publish_time"])] = doc
+
+        results = []
+        for hit in hits:
+            ref = hit["ref"]
+            doc = by_ref.get((ref.get("url"), ref.get("title"), ref.get("publish_time")))
+            if doc is None:
+                continue
+            doc["score"] = hit["score"]
+            results.append(doc)
+            if len(results) >= limit:
+                break
+
+        results = convert_objectid_to_str(results)
+        self.logger.info(f"🔍 全文搜索（本地索引）返回 {len(results)} 条结果")
+        return results
+
 
 # 全局服务实例
 _service_instance = None
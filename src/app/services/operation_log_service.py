@@ -2,11 +2,14 @@
 操作日志服务
 """
 
+import asyncio
 import logging
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from bson import ObjectId
 
+from app.core.config import settings
 from app.core.database import get_mongo_db
 from app.models.operation_log import (
     OperationLogCreate,
@@ -27,6 +30,33 @@ class OperationLogService:
     def __init__(self):
         self.collection_name = "operation_logs"
     
+    @staticmethod
+    def build_log_doc(
+        user_id: str,
+        username: str,
+        log_data: OperationLogCreate,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """构建日志文档"""
+        # 🔥 使用 naive datetime（不带时区信息），MongoDB 会按原样存储，不会转换为 UTC
+        current_time = now_tz().replace(tzinfo=None)  # 移除时区信息，保留本地时间值
+        return {
+            "user_id": user_id,
+            "username": username,
+            "action_type": log_data.action_type,
+            "action": log_data.action,
+            "details": log_data.details or {},
+            "success": log_data.success,
+            "error_message": log_data.error_message,
+            "duration_ms": log_data.duration_ms,
+            "ip_address": ip_address or log_data.ip_address,
+            "user_agent": user_agent or log_data.user_agent,
+            "session_id": log_data.session_id,
+            "timestamp": current_time,  # naive datetime，MongoDB 按原样存储
+            "created_at": current_time  # naive datetime，MongoDB 按原样存储
+        }
+
     async def create_log(
         self,
         user_id: str,
@@ -38,26 +68,8 @@ class OperationLogService:
         """创建操作日志"""
         try:
             db = get_mongo_db()
+            log_doc = self.build_log_doc(user_id, username, log_data, ip_address, user_agent)
 
-            # 构建日志文档
-            # 🔥 使用 naive datetime（不带时区信息），MongoDB 会按原样存储，不会转换为 UTC
-            current_time = now_tz().replace(tzinfo=None)  # 移除时区信息，保留本地时间值
-            log_doc = {
-                "user_id": user_id,
-                "username": username,
-                "action_type": log_data.action_type,
-                "action": log_data.action,
-                "details": log_data.details or {},
-                "success": log_data.success,
-                "error_message": log_data.error_message,
-                "duration_ms": log_data.duration_ms,
-                "ip_address": ip_address or log_data.ip_address,
-                "user_agent": user_agent or log_data.user_agent,
-                "session_id": log_data.session_id,
-                "timestamp": current_time,  # naive datetime，MongoDB 按原样存储
-                "created_at": current_time  # naive datetime，MongoDB 按原样存储
-            }
-            
             # 插入数据库
             result = await db[self.collection_name].insert_one(log_doc)
             
@@ -282,3 +294,182 @@ async def log_operation(
         session_id=session_id
     )
     return await service.create_log(user_id, username, log_data, ip_address, user_agent)
+
+
+class OperationLogBuffer:
+    """
+    操作日志写入缓冲区
+
+    中间件在请求路径上只把日志文档放入内存队列，由后台任务按数量或时间阈值
+    使用 insert_many 批量写入。队列满时不再排队，而是按（用户, 操作类型）汇总丢弃条数，
+    下次刷新时写入一条汇总日志；关闭时刷新剩余日志。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        collection_name: str = "operation_logs",
+    ):
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.collection_name = collection_name
+        self._queue: deque = deque()
+        self._overflow: Dict[Tuple[str, str], int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+        self.stats: Dict[str, int] = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "flushes": 0}
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, log_doc: Dict[str, Any]) -> bool:
+        """放入队列（不阻塞）；返回 False 表示因过载被汇总丢弃"""
+        if len(self._queue) >= self.max_size:
+            key = (log_doc.get("username", "unknown"), log_doc.get("action_type", ""))
+            self._overflow[key] = self._overflow.get(key, 0) + 1
+            self.stats["dropped"] += 1
+            return False
+        self._queue.append(log_doc)
+        self.stats["enqueued"] += 1
+        self._ensure_started()
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _ensure_started(self) -> None:
+        if self._closed or (self._task is not None and not self._task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ 操作日志批量写入失败: {e}")
+
+    def _overflow_docs(self) -> List[Dict[str, Any]]:
+        if not self._overflow:
+            return []
+        overflow, self._overflow = self._overflow, {}
+        current_time = now_tz().replace(tzinfo=None)
+        return [
+            {
+                "user_id": "",
+                "username": username,
+                "action_type": action_type,
+                "action": f"操作日志过载汇总：{count} 条记录未单独保存",
+                "details": {"dropped_count": count},
+                "success": True,
+                "error_message": None,
+                "duration_ms": None,
+                "ip_address": None,
+                "user_agent": None,
+                "session_id": None,
+                "timestamp": current_time,
+                "created_at": current_time,
+            }
+            for (username, action_type), count in overflow.items()
+        ]
+
+    async def flush(self) -> int:
+        """写入队列中的全部日志，返回写入条数"""
+        lock = self._flush_lock or asyncio.Lock()
+        written = 0
+        async with lock:
+            while self._queue or self._overflow:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                batch.extend(self._overflow_docs())
+                try:
+                    db = get_mongo_db()
+                    await db[self.collection_name].insert_many(batch, ordered=False)
+                    written += len(batch)
+                    self.stats["written"] += len(batch)
+                    self.stats["flushes"] += 1
+                except Exception as e:
+                    # 写入失败的日志丢弃并计数，避免数据库不可用时内存无限增长
+                    self.stats["failed"] += len(batch)
+                    logger.error(f"❌ 操作日志批量写入失败，丢弃 {len(batch)} 条: {e}")
+                    break
+        if written:
+            logger.debug(f"📝 操作日志批量写入: {written} 条")
+        return written
+
+    async def stop(self) -> None:
+        """停止后台任务并刷新剩余日志（应用关闭时调用）"""
+        self._closed = True
+        if self._task is not None:
+            if self._wakeup is not None:
+                self._wakeup.set()
+            try:
+                await asyncio.wait_for(self._task, timeout=self.flush_interval + 5)
+            except Exception:
+                self._task.cancel()
+            self._task = None
+        pending = len(self._queue)
+        await self.flush()
+        if pending:
+            logger.info(f"📝 关闭前已刷新 {pending} 条待写入操作日志")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._queue), "max_size": self.max_size}
+
+
+_operation_log_buffer: Optional[OperationLogBuffer] = None
+
+
+def get_operation_log_buffer() -> OperationLogBuffer:
+    """获取操作日志写入缓冲区实例"""
+    global _operation_log_buffer
+    if _operation_log_buffer is None:
+        _operation_log_buffer = OperationLogBuffer(
+            max_size=settings.OPERATION_LOG_BUFFER_MAX_SIZE,
+            batch_size=settings.OPERATION_LOG_FLUSH_BATCH_SIZE,
+            flush_interval=settings.OPERATION_LOG_FLUSH_INTERVAL_SECONDS,
+        )
+    return _operation_log_buffer
+
+
+def enqueue_operation_log(
+    user_id: str,
+    username: str,
+    action_type: str,
+    action: str,
+    details: Optional[Dict[str, Any]] = None,
+    success: bool = True,
+    error_message: Optional[str] = None,
+    duration_ms: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    session_id: Optional[str] = None
+) -> bool:
+    """记录操作日志（放入批量写入队列，不等待数据库）"""
+    log_data = OperationLogCreate(
+        action_type=action_type,
+        action=action,
+        details=details,
+        success=success,
+        error_message=error_message,
+        duration_ms=duration_ms,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        session_id=session_id
+    )
+    log_doc = OperationLogService.build_log_doc(user_id, username, log_data, ip_address, user_agent)
+    return get_operation_log_buffer().enqueue(log_doc)
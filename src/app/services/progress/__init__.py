@@ -10,3 +10,4 @@ from .log_handler import (
     unregister_analysis_tracker,
 )
 
+from .stream_relay import AnalysisStreamRelay
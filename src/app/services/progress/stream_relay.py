@@ -0,0 +1,122 @@
+"""
+LLM 流式输出转发
+
+分析在线程池中执行，图回调产生的 llm_stream 事件（已按节点合并限频）在这里转发：
+- 任务有 WebSocket 连接且主事件循环可用时，投递到主循环推送给客户端；
+  上一次推送未完成时，同一次 LLM 调用（run_id）的增量先合并，避免慢客户端堆积协程
+- 每个步骤的最新输出片段按 snapshot_interval 写入进度跟踪器（Redis/文件），
+  供轮询接口和断线重连的客户端读取
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisStreamRelay:
+    """分析任务的 LLM 流式事件转发器（作为 TokenStreamCoalescer 的 sink 使用）"""
+
+    def __init__(
+        self,
+        task_id: str,
+        progress_tracker: Optional[Any] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        ws_manager: Optional[Any] = None,
+        snapshot_interval: float = 2.0,
+        preview_chars: int = 2000,
+    ):
+        self.task_id = task_id
+        self.progress_tracker = progress_tracker
+        self.loop = loop
+        self.ws_manager = ws_manager
+        self.snapshot_interval = snapshot_interval
+        self.preview_chars = preview_chars
+        self._lock = threading.Lock()
+        # 步骤 -> 最新输出片段
+        self._previews: Dict[str, str] = {}
+        # LLM 调用 -> 已拼接的输出（同一步骤内并发的调用各自拼接）
+        self._run_texts: Dict[str, str] = {}
+        self._last_snapshot = 0.0
+        self._sending = False
+        # 推送进行中时积压的事件（按 LLM 调用合并）
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self.sent = 0
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        self._update_preview(event)
+        if self.loop is None or self.ws_manager is None or self.loop.is_closed():
+            return
+        if not self.ws_manager.has_connections(self.task_id):
+            return
+
+        with self._lock:
+            if self._sending:
+                self._merge_pending(event)
+                return
+            self._sending = True
+        self._submit(event)
+
+    def _submit(self, event: Dict[str, Any]) -> None:
+        try:
+            future = asyncio.run_coroutine_threadsafe(
+                self.ws_manager.send_progress_update(self.task_id, {**event, "task_id": self.task_id}),
+                self.loop,
+            )
+            future.add_done_callback(self._on_sent)
+        except Exception as e:
+            logger.debug(f"⚠️ [流式转发] 投递失败: {self.task_id} - {e}")
+            with self._lock:
+                self._sending = False
+
+    def _on_sent(self, future) -> None:
+        self.sent += 1
+        with self._lock:
+            if not self._pending:
+                self._sending = False
+                return
+            key = next(iter(self._pending))
+            event = self._pending.pop(key)
+        self._submit(event)
+
+    @staticmethod
+    def _run_key(event: Dict[str, Any]) -> str:
+        # 旧版事件没有 run_id 时退回按节点区分
+        return event.get("run_id") or event.get("node")
+
+    def _merge_pending(self, event: Dict[str, Any]) -> None:
+        key = self._run_key(event)
+        pending = self._pending.get(key)
+        # 同一次 LLM 调用的连续增量可直接拼接；新调用开始则保留最新一次
+        if pending and pending["offset"] + len(pending["delta"]) == event["offset"]:
+            pending["delta"] += event["delta"]
+            pending["seq"] = event["seq"]
+            pending["final"] = event["final"]
+        else:
+            self._pending[key] = dict(event)
+
+    def _update_preview(self, event: Dict[str, Any]) -> None:
+        if self.progress_tracker is None:
+            return
+        step = event.get("step") or event.get("node")
+        key = self._run_key(event)
+        with self._lock:
+            text = ("" if event.get("offset") == 0 else self._run_texts.get(key, "")) + event.get("delta", "")
+            text = text[-self.preview_chars:]
+            if event.get("final"):
+                self._run_texts.pop(key, None)
+            else:
+                self._run_texts[key] = text
+            self._previews[step] = text
+            now = time.monotonic()
+            if not event.get("final") and now - self._last_snapshot < self.snapshot_interval:
+                return
+            self._last_snapshot = now
+            previews = dict(self._previews)
+        try:
+            self.progress_tracker.update_progress({"streaming": previews})
+        except Exception as e:
+            logger.debug(f"⚠️ [流式转发] 保存输出快照失败: {self.task_id} - {e}")
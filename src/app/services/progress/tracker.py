@@ -88,8 +88,55 @@ class RedisProgressTracker:
 
         logger.info(f"📊 [Redis进度] 初始化完成: {task_id}, 步骤数: {len(self.analysis_steps)}")
 
+    @classmethod
+    def restore(cls, task_id: str, analysts: List[str], research_depth: str, llm_provider: str) -> "RedisProgressTracker":
+        """
+        从已保存的进度重建跟踪器（进程池子进程接管父进程创建的任务时使用）
+
+        与直接构造不同，不会把已有进度重置为 0%；没有保存的进度时等同于新建。
+        """
+        saved = get_progress_by_id(task_id)
+        if not saved:
+            return cls(task_id, analysts, research_depth, llm_provider)
+
+        tracker = cls.__new__(cls)
+        tracker.task_id = task_id
+        tracker.analysts = analysts
+        tracker.research_depth = research_depth
+        tracker.llm_provider = llm_provider
+        tracker.redis_client = None
+        tracker.use_redis = tracker._init_redis()
+        tracker.analysis_steps = tracker._generate_dynamic_steps()
+
+        saved_steps = saved.get('steps') or []
+        if len(saved_steps) == len(tracker.analysis_steps):
+            for step, saved_step in zip(tracker.analysis_steps, saved_steps):
+                step.status = saved_step.get('status', step.status)
+                step.start_time = saved_step.get('start_time')
+                step.end_time = saved_step.get('end_time')
+
+        now = time.time()
+        tracker.progress_data = {
+            'task_id': task_id,
+            'status': saved.get('status') or 'running',
+            'progress_percentage': saved.get('progress_percentage', 0.0),
+            'current_step': saved.get('current_step') or 0,
+            'total_steps': len(tracker.analysis_steps),
+            'current_step_name': saved.get('current_step_name', '初始化'),
+            'current_step_description': '',
+            'last_message': saved.get('last_message', ''),
+            'start_time': saved.get('start_time') or now,
+            'last_update': now,
+            'elapsed_time': saved.get('elapsed_time', 0.0),
+            'remaining_time': saved.get('remaining_time', 0.0),
+            'estimated_total_time': saved.get('estimated_total_time') or tracker._get_base_total_time(),
+            'steps': [asdict(step) for step in tracker.analysis_steps],
+        }
+        logger.info(f"📊 [Redis进度] 从已保存进度恢复: {task_id}, 进度: {tracker.progress_data['progress_percentage']}%")
+        return tracker
+
     def _init_redis(self) -> bool:
-        """初始化Redis连接"""
+        """获取进程级共享的Redis客户端（同一连接池）"""
         try:
             # 检查REDIS_ENABLED环境变量
             redis_enabled = os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
@@ -97,34 +144,12 @@ class RedisProgressTracker:
                 logger.info(f"📊 [Redis进度] Redis未启用，使用文件存储")
                 return False
 
-            import redis
-
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-
-            # 创建Redis连接
-            if redis_password:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    password=redis_password,
-                    db=redis_db,
-                    decode_responses=True
-                )
-            else:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True
-                )
-
-            # 测试连接
-            self.redis_client.ping()
-            logger.info(f"📊 [Redis进度] Redis连接成功: {redis_host}:{redis_port}")
+            from tradingagents.utils.redis_pool import get_sync_redis
+
+            self.redis_client = get_sync_redis()
+            if self.redis_client is None:
+                logger.warning(f"📊 [Redis进度] Redis不可用，使用文件存储")
+                return False
             return True
         except Exception as e:
             logger.warning(f"📊 [Redis进度] Redis连接失败，使用文件存储: {e}")
@@ -408,9 +433,11 @@ class RedisProgressTracker:
             progress_copy = self.to_dict()
             serialized = json.dumps(progress_copy)
             if self.use_redis and self.redis_client:
-                key = f"progress:{self.task_id}"
-                self.redis_client.set(key, serialized)
-                self.redis_client.expire(key, 3600)
+                from tradingagents.utils.redis_pool import redis_timer
+
+                # SET 带过期时间，一次往返
+                with redis_timer("progress_save"):
+                    self.redis_client.set(f"progress:{self.task_id}", serialized, ex=3600)
             else:
                 os.makedirs("./data/progress", exist_ok=True)
                 with open(f"./data/progress/{self.task_id}.json", 'w', encoding='utf-8') as f:
@@ -464,7 +491,10 @@ class RedisProgressTracker:
                 'estimated_total_time': self.progress_data.get('estimated_total_time', 0),
                 'progress_percentage': self.progress_data.get('progress_percentage', 0),
                 'status': self.progress_data.get('status', 'pending'),
-                'current_step': self.progress_data.get('current_step')
+                'current_step': self.progress_data.get('current_step'),
+                'current_step_name': self.progress_data.get('current_step_name'),
+                'last_message': self.progress_data.get('last_message'),
+                'streaming': self.progress_data.get('streaming'),
             }
         except Exception as e:
             logger.error(f"[RedisProgress] to_dict failed: {self.task_id} - {e}")
@@ -483,33 +513,15 @@ def get_progress_by_id(task_id: str) -> Optional[Dict[str, Any]]:
         # 如果Redis启用，先尝试Redis
         if redis_enabled:
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
+                from tradingagents.utils.redis_pool import get_sync_redis, redis_timer
+
+                redis_client = get_sync_redis()
+                if redis_client is None:
+                    raise RuntimeError("Redis不可用")
 
                 key = f"progress:{task_id}"
-                data = redis_client.get(key)
+                with redis_timer("progress_get"):
+                    data = redis_client.get(key)
                 if data:
                     progress_data = json.loads(data)
                     progress_data = RedisProgressTracker._calculate_static_time_estimates(progress_data)
@@ -1,17 +1,24 @@
+import asyncio
 import logging
+import time
 from datetime import datetime, time as dtime, timedelta
-from typing import Dict, Optional, Tuple, List
+from typing import Any, Dict, Optional, Tuple, List
 from zoneinfo import ZoneInfo
 from collections import deque
 
 from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from app.core.config import settings
 from app.core.database import get_mongo_db
 from app.services.data_sources.manager import DataSourceManager
+from app.services.screening.result_set import bump_data_version as bump_screening_data_version
 
 logger = logging.getLogger(__name__)
 
+# 参与变化判断的行情字段（updated_at 不参与）
+QUOTE_FIELDS = ("close", "pct_chg", "amount", "volume", "open", "high", "low", "pre_close", "trade_date")
+
 
 class QuotesIngestionService:
     """
@@ -22,6 +29,7 @@ class QuotesIngestionService:
     - 接口轮换：Tushare → AKShare东方财富 → AKShare新浪财经（避免单一接口被限流）
     - 智能限流：Tushare免费用户每小时最多2次，付费用户自动切换到高频模式（5秒）
     - 休市时间：跳过任务，保持上次收盘数据；必要时执行一次性兜底补数
+    - 增量写入：与上次写入的快照比较，只写入行情发生变化的股票，分批并发无序写入
     - 字段：code(6位)、close、pct_chg、amount、open、high、low、pre_close、trade_date、updated_at
     """
 
@@ -44,6 +52,11 @@ class QuotesIngestionService:
         self._rotation_sources = ["tushare", "akshare_eastmoney", "akshare_sina"]
         self._rotation_index = 0  # 当前轮换索引
 
+        # 增量写入：上次成功写入的行情快照 {code6: 字段值元组}
+        self._last_written: Dict[str, Tuple] = {}
+        self._last_full_write: Optional[float] = None
+        self.last_upsert_stats: Dict[str, Any] = {}
+
     @staticmethod
     def _normalize_stock_code(code: str) -> str:
         """
@@ -98,7 +111,8 @@ class QuotesIngestionService:
         success: bool,
         source: Optional[str] = None,
         records_count: int = 0,
-        error_msg: Optional[str] = None
+        error_msg: Optional[str] = None,
+        upsert_stats: Optional[Dict[str, Any]] = None
     ) -> None:
         """
         记录同步状态
@@ -108,6 +122,7 @@ class QuotesIngestionService:
             source: 数据源名称
             records_count: 记录数量
             error_msg: 错误信息
+            upsert_stats: 本次写入统计（变化行数、写入耗时等）
         """
         try:
             db = get_mongo_db()
@@ -126,6 +141,9 @@ class QuotesIngestionService:
                 "error_message": error_msg,
                 "updated_at": now,
             }
+            if upsert_stats:
+                status_doc["changed_count"] = upsert_stats.get("changed", 0)
+                status_doc["write_latency_ms"] = upsert_stats.get("write_ms", 0)
 
             await status_coll.update_one(
                 {"job": "quotes_ingestion"},
@@ -364,11 +382,28 @@ class QuotesIngestionService:
         except Exception:
             return True
 
-    async def _bulk_upsert(self, quotes_map: Dict[str, Dict], trade_date: str, source: Optional[str] = None) -> None:
+    async def _bulk_upsert(self, quotes_map: Dict[str, Dict], trade_date: str, source: Optional[str] = None) -> Dict[str, Any]:
+        """
+        增量写入行情：只为字段发生变化的股票生成 UpdateOne，并按批次并发无序写入
+
+        Returns:
+            本次写入统计：received/changed/skipped/chunks/matched/upserted/modified/errors/write_ms
+        """
         db = get_mongo_db()
         coll = db[self.collection_name]
-        ops = []
         updated_at = datetime.now(self.tz)
+
+        full_rewrite_seconds = settings.QUOTES_FULL_REWRITE_SECONDS
+        now_mono = time.monotonic()
+        full_write = (
+            full_rewrite_seconds <= 0
+            or self._last_full_write is None
+            or now_mono - self._last_full_write >= full_rewrite_seconds
+        )
+
+        changed: Dict[str, Dict] = {}
+        signatures: Dict[str, Tuple] = {}
+        received = 0
         for code, q in quotes_map.items():
             if not code:
                 continue
@@ -376,39 +411,163 @@ class QuotesIngestionService:
             code6 = self._normalize_stock_code(code)
             if not code6:
                 continue
+            received += 1
 
             # 🔥 日志：记录写入的成交量值
             volume = q.get("volume")
             if code6 in ["300750", "000001", "600000"]:  # 只记录几个示例股票
                 logger.info(f"📊 [写入market_quotes] {code6} - volume={volume}, amount={q.get('amount')}, source={source}")
 
-            ops.append(
+            doc = {
+                "code": code6,
+                "symbol": code6,  # 添加 symbol 字段，与 code 保持一致
+                "close": q.get("close"),
+                "pct_chg": q.get("pct_chg"),
+                "amount": q.get("amount"),
+                "volume": volume,
+                "open": q.get("open"),
+                "high": q.get("high"),
+                "low": q.get("low"),
+                "pre_close": q.get("pre_close"),
+                "trade_date": trade_date,
+                "updated_at": updated_at,
+            }
+            signature = tuple(doc[f] for f in QUOTE_FIELDS)
+            if not full_write and self._last_written.get(code6) == signature:
+                continue
+            changed[code6] = doc
+            signatures[code6] = signature
+
+        stats: Dict[str, Any] = {
+            "source": source,
+            "full_write": full_write,
+            "received": received,
+            "changed": len(changed),
+            "skipped": received - len(changed),
+            "chunks": 0,
+            "matched": 0,
+            "upserted": 0,
+            "modified": 0,
+            "errors": 0,
+            "write_ms": 0.0,
+        }
+        self.last_upsert_stats = stats
+        if not changed:
+            logger.info(f"无可写入的数据，跳过（收到 {received} 条，均无变化）")
+            return stats
+
+        codes = list(changed)
+        chunk_size = max(1, settings.QUOTES_UPSERT_CHUNK_SIZE)
+        chunks = [codes[i:i + chunk_size] for i in range(0, len(codes), chunk_size)]
+        semaphore = asyncio.Semaphore(max(1, settings.QUOTES_UPSERT_CONCURRENCY))
+        failed_codes: set = set()
+
+        async def _write_chunk(chunk_codes: List[str]) -> None:
+            ops = [UpdateOne({"code": c}, {"$set": changed[c]}, upsert=True) for c in chunk_codes]
+            async with semaphore:
+                try:
+                    result = await coll.bulk_write(ops, ordered=False)
+                    stats["matched"] += result.matched_count
+                    stats["upserted"] += len(result.upserted_ids) if result.upserted_ids else 0
+                    stats["modified"] += result.modified_count
+                except BulkWriteError as e:
+                    details = e.details or {}
+                    stats["matched"] += details.get("nMatched", 0)
+                    stats["upserted"] += details.get("nUpserted", 0)
+                    stats["modified"] += details.get("nModified", 0)
+                    errors = details.get("writeErrors", [])
+                    stats["errors"] += len(errors)
+                    failed_codes.update(chunk_codes[err["index"]] for err in errors if "index" in err)
+                except Exception as e:
+                    logger.error(f"❌ 行情批次写入失败（{len(chunk_codes)} 条）: {e}")
+                    stats["errors"] += len(chunk_codes)
+                    failed_codes.update(chunk_codes)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_write_chunk(chunk) for chunk in chunks))
+        stats["write_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        stats["chunks"] = len(chunks)
+
+        # 只记录成功写入的股票，失败的下次重新写入
+        for code6 in codes:
+            if code6 in failed_codes:
+                self._last_written.pop(code6, None)
+                changed.pop(code6, None)
+            else:
+                self._last_written[code6] = signatures[code6]
+        if full_write and not failed_codes:
+            self._last_full_write = now_mono
+
+        logger.info(
+            f"✅ 行情入库完成 source={source}, 变化={stats['changed']}/{received}, "
+            f"批次={stats['chunks']}, 耗时={stats['write_ms']}ms, matched={stats['matched']}, "
+            f"upserted={stats['upserted']}, modified={stats['modified']}, errors={stats['errors']}"
+            f"{'（全量写入）' if full_write else ''}"
+        )
+        if changed:
+            self._refresh_market_snapshot(changed)
+            await bump_screening_data_version()
+        return stats
+
+    def _record_intraday_tick(self, quotes_map: Dict[str, Dict], trade_date: str) -> None:
+        """将本次采集的全市场行情记录到盘中环形缓冲区（失败不影响入库）"""
+        if not settings.INTRADAY_BUFFER_ENABLED:
+            return
+        try:
+            from app.services.intraday_ring_buffer import get_intraday_buffer
+            quotes = {}
+            for code, q in quotes_map.items():
+                code6 = self._normalize_stock_code(code)
+                if code6:
+                    quotes[code6] = q
+            get_intraday_buffer().record_tick(quotes, str(trade_date), datetime.now(self.tz))
+        except Exception as e:
+            logger.warning(f"记录盘中行情失败（忽略）: {e}")
+
+    async def finalize_intraday_session(self) -> int:
+        """
+        收盘后将盘中缓冲区聚合为分钟K线写入 intraday_minute_bars（每个交易日执行一次）
+
+        Returns:
+            写入的股票数量
+        """
+        if not settings.INTRADAY_BUFFER_ENABLED:
+            return 0
+        from app.services.intraday_ring_buffer import MINUTE_BARS_COLLECTION, get_intraday_buffer
+
+        buffer = get_intraday_buffer()
+        if not buffer.has_unfinalized_session:
+            return 0
+        try:
+            bars_by_code = buffer.roll_session()
+            coll = get_mongo_db()[MINUTE_BARS_COLLECTION]
+            now = datetime.now(self.tz)
+            ops = [
                 UpdateOne(
-                    {"code": code6},
-                    {"$set": {
-                        "code": code6,
-                        "symbol": code6,  # 添加 symbol 字段，与 code 保持一致
-                        "close": q.get("close"),
-                        "pct_chg": q.get("pct_chg"),
-                        "amount": q.get("amount"),
-                        "volume": volume,
-                        "open": q.get("open"),
-                        "high": q.get("high"),
-                        "low": q.get("low"),
-                        "pre_close": q.get("pre_close"),
-                        "trade_date": trade_date,
-                        "updated_at": updated_at,
-                    }},
+                    {"code": code, "trade_date": buffer.trade_date},
+                    {"$set": {"code": code, "trade_date": buffer.trade_date, "bars": bars, "updated_at": now}},
                     upsert=True,
                 )
-            )
-        if not ops:
-            logger.info("无可写入的数据，跳过")
-            return
-        result = await coll.bulk_write(ops, ordered=False)
-        logger.info(
-            f"✅ 行情入库完成 source={source}, matched={result.matched_count}, upserted={len(result.upserted_ids) if result.upserted_ids else 0}, modified={result.modified_count}"
-        )
+                for code, bars in bars_by_code.items()
+            ]
+            chunk_size = max(1, settings.QUOTES_UPSERT_CHUNK_SIZE)
+            for i in range(0, len(ops), chunk_size):
+                await coll.bulk_write(ops[i:i + chunk_size], ordered=False)
+            buffer.finalized = True
+            logger.info(f"📊 盘中行情已聚合为分钟K线: trade_date={buffer.trade_date}, 股票数={len(ops)}")
+            return len(ops)
+        except Exception as e:
+            logger.error(f"❌ 写入分钟K线失败: {e}")
+            return 0
+
+    @staticmethod
+    def _refresh_market_snapshot(written: Dict[str, Dict]) -> None:
+        """将本次写入的行情增量同步到筛选内存快照（失败不影响入库）"""
+        try:
+            from app.services.screening.market_snapshot import get_market_snapshot
+            get_market_snapshot().apply_quotes(written)
+        except Exception as e:
+            logger.warning(f"刷新筛选内存快照失败（忽略）: {e}")
 
     async def backfill_from_historical_data(self) -> None:
         """
@@ -605,6 +764,7 @@ class QuotesIngestionService:
         """
         # 非交易时段处理
         if not self._is_trading_time():
+            await self.finalize_intraday_session()
             if settings.QUOTES_BACKFILL_ON_OFFHOURS:
                 await self.backfill_last_close_snapshot_if_needed()
             else:
@@ -652,14 +812,16 @@ class QuotesIngestionService:
                 trade_date = datetime.now(self.tz).strftime("%Y%m%d")
 
             # 入库
-            await self._bulk_upsert(quotes_map, trade_date, source_name)
+            upsert_stats = await self._bulk_upsert(quotes_map, trade_date, source_name)
+            self._record_intraday_tick(quotes_map, trade_date)
 
             # 记录成功状态
             await self._record_sync_status(
                 success=True,
                 source=source_name,
                 records_count=len(quotes_map),
-                error_msg=None
+                error_msg=None,
+                upsert_stats=upsert_stats
             )
 
         except Exception as e:
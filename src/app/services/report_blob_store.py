@@ -0,0 +1,210 @@
+"""
+分析报告正文存储
+
+analysis_reports 中每个模块的报告正文（市场分析、基本面、辩论记录等）动辄数十 KB，
+过去与摘要字段存放在同一个文档里，报告列表分页时也要把全部正文读出来。
+本模块把较大的正文单独存入 report_blobs 集合：
+
+- 内容寻址：_id 为正文的 sha256，相同内容只存一份（重复分析、重试不会重复写入）
+- zlib 压缩：Markdown 正文压缩率通常在 3~5 倍
+- analysis_reports 只保留 report_refs（模块 -> blob id）、report_blob_ids、report_modules、reports_size
+  等摘要字段，小于阈值的正文仍内联在 reports 中
+- 详情、模块内容、下载等路由按需调用 hydrate 还原 reports；没有 report_refs 的旧文档原样返回
+
+不依赖 app.core.config，Streamlit（web/）可以直接使用 hydrate_sync 读取 API 写入的报告。
+"""
+
+import hashlib
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPORT_BLOBS_COLLECTION = "report_blobs"
+
+# 报告列表只需要的摘要字段（不含 reports / report_refs 等正文相关字段）
+REPORT_LIST_PROJECTION = {
+    "analysis_id": 1,
+    "task_id": 1,
+    "stock_symbol": 1,
+    "stock_name": 1,
+    "market_type": 1,
+    "model_info": 1,
+    "status": 1,
+    "created_at": 1,
+    "analysis_date": 1,
+    "analysts": 1,
+    "research_depth": 1,
+    "summary": 1,
+    "source": 1,
+    # 旧报告没有 reports_size 时由服务端计算内联正文大小（MongoDB 4.4+），正文本身不返回
+    "reports_size": {"$ifNull": ["$reports_size", {"$bsonSize": {"$ifNull": ["$reports", {}]}}]},
+}
+
+# 报告列表的筛选/排序字段索引
+REPORT_LIST_INDEXES = [
+    [("created_at", -1)],
+    [("stock_symbol", 1), ("created_at", -1)],
+    [("market_type", 1), ("created_at", -1)],
+    [("analysis_date", -1), ("created_at", -1)],
+    [("analysis_id", 1)],
+    [("task_id", 1)],
+    [("report_blob_ids", 1)],
+]
+
+
+def encode_content(content: Any) -> Tuple[str, bytes, str, int]:
+    """正文 -> (blob id, 压缩数据, 类型, 原始字节数)；非字符串内容按 JSON 存储"""
+    if isinstance(content, str):
+        kind, raw = "text", content.encode("utf-8")
+    else:
+        kind, raw = "json", json.dumps(content, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    digest = hashlib.sha256(kind.encode("ascii") + b"\0" + raw).hexdigest()
+    return digest, zlib.compress(raw, 6), kind, len(raw)
+
+
+def decode_content(blob: Dict[str, Any]) -> Any:
+    raw = zlib.decompress(bytes(blob["data"])).decode("utf-8")
+    return raw if blob.get("kind", "text") == "text" else json.loads(raw)
+
+
+def content_size(content: Any) -> int:
+    if isinstance(content, str):
+        return len(content.encode("utf-8"))
+    return len(json.dumps(content, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _merge_blobs(doc: Dict[str, Any], blobs: Iterable[Dict[str, Any]], modules: Optional[Iterable[str]]) -> Dict[str, Any]:
+    refs = doc.get("report_refs") or {}
+    by_id = {blob["_id"]: blob for blob in blobs}
+    reports = dict(doc.get("reports") or {})
+    for module, ref in refs.items():
+        if modules is not None and module not in modules:
+            continue
+        blob = by_id.get(ref.get("blob"))
+        if blob is None:
+            logger.warning(f"⚠️ 报告正文缺失: {doc.get('analysis_id')}/{module} ({ref.get('blob')})")
+            continue
+        reports[module] = decode_content(blob)
+    doc["reports"] = reports
+    return doc
+
+
+def _wanted_ids(doc: Dict[str, Any], modules: Optional[Iterable[str]]) -> List[str]:
+    refs = doc.get("report_refs") or {}
+    return sorted({ref["blob"] for module, ref in refs.items() if modules is None or module in modules})
+
+
+def hydrate_sync(db, doc: Optional[Dict[str, Any]], modules: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+    """同步版 hydrate（pymongo，供 Streamlit 使用）"""
+    if not doc or not doc.get("report_refs"):
+        return doc
+    modules = set(modules) if modules is not None else None
+    ids = _wanted_ids(doc, modules)
+    blobs = db[REPORT_BLOBS_COLLECTION].find({"_id": {"$in": ids}}) if ids else []
+    return _merge_blobs(doc, blobs, modules)
+
+
+class ReportBlobStore:
+    """报告正文的外部存储（Motor 异步接口）"""
+
+    def __init__(self, min_bytes: int = 2048, enabled: bool = True):
+        # 小于 min_bytes 的正文仍内联保存，避免为短文本多一次查询
+        self.min_bytes = min_bytes
+        self.enabled = enabled
+        self._indexed_dbs: set = set()
+
+    async def externalize(self, db, reports: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        拆分报告正文，返回需要合并到 analysis_reports 文档中的字段
+
+        Returns:
+            reports: 内联保存的小正文
+            report_refs: {模块: {"blob": sha256, "size": 原始字节数}}
+            report_blob_ids / report_modules / reports_size: 摘要字段
+        """
+        reports = reports or {}
+        inline: Dict[str, Any] = {}
+        refs: Dict[str, Dict[str, Any]] = {}
+        total = 0
+        now = datetime.utcnow()
+
+        for module, content in reports.items():
+            size = content_size(content)
+            total += size
+            if not self.enabled or size < self.min_bytes:
+                inline[module] = content
+                continue
+            blob_id, data, kind, raw_size = encode_content(content)
+            # 内容寻址：已存在的正文不会被覆盖
+            await db[REPORT_BLOBS_COLLECTION].update_one(
+                {"_id": blob_id},
+                {"$setOnInsert": {
+                    "data": data,
+                    "kind": kind,
+                    "size": raw_size,
+                    "compressed_size": len(data),
+                    "created_at": now,
+                }},
+                upsert=True,
+            )
+            refs[module] = {"blob": blob_id, "size": raw_size}
+
+        if refs:
+            logger.debug(f"📦 报告正文外部存储: {len(refs)} 个模块，内联 {len(inline)} 个")
+        return {
+            "reports": inline,
+            "report_refs": refs,
+            "report_blob_ids": sorted({ref["blob"] for ref in refs.values()}),
+            "report_modules": list(reports.keys()),
+            "reports_size": total,
+        }
+
+    async def hydrate(self, db, doc: Optional[Dict[str, Any]], modules: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """按需加载正文并还原 doc["reports"]；modules 指定时只加载这些模块（一次 $in 查询）"""
+        if not doc or not doc.get("report_refs"):
+            return doc
+        modules = set(modules) if modules is not None else None
+        ids = _wanted_ids(doc, modules)
+        blobs = await db[REPORT_BLOBS_COLLECTION].find({"_id": {"$in": ids}}).to_list(length=None) if ids else []
+        return _merge_blobs(doc, blobs, modules)
+
+    async def release(self, db, doc: Optional[Dict[str, Any]]) -> int:
+        """报告删除后清理不再被任何报告引用的正文，返回删除数量"""
+        removed = 0
+        for blob_id in (doc or {}).get("report_blob_ids") or []:
+            if await db.analysis_reports.count_documents({"report_blob_ids": blob_id}, limit=1):
+                continue
+            result = await db[REPORT_BLOBS_COLLECTION].delete_one({"_id": blob_id})
+            removed += result.deleted_count
+        return removed
+
+    async def ensure_indexes(self, db) -> None:
+        """为报告列表的筛选/排序字段建立索引（每个数据库只执行一次）"""
+        key = id(db)
+        if key in self._indexed_dbs:
+            return
+        self._indexed_dbs.add(key)
+        for keys in REPORT_LIST_INDEXES:
+            try:
+                await db.analysis_reports.create_index(keys, background=True)
+            except Exception as e:
+                logger.warning(f"⚠️ 创建 analysis_reports 索引失败 {keys}: {e}")
+
+
+_report_blob_store: Optional[ReportBlobStore] = None
+
+
+def get_report_blob_store() -> ReportBlobStore:
+    """获取报告正文存储（单例）"""
+    global _report_blob_store
+    if _report_blob_store is None:
+        from app.core.config import settings
+        _report_blob_store = ReportBlobStore(
+            min_bytes=settings.REPORT_BLOB_MIN_BYTES,
+            enabled=settings.REPORT_BLOB_ENABLED,
+        )
+    return _report_blob_store
@@ -0,0 +1,342 @@
+"""
+筛选用的内存行情快照（列式存储）
+
+将 stock_basic_info、market_quotes 和 stock_financial_data（每个 code+数据源 的最新一期）
+加载为 pandas 列式表，筛选、排序、计数、分页均在内存中向量化完成，
+避免每次请求都执行 count_documents + find().sort().skip().limit() + $in 富集查询。
+
+- 全量加载：首次使用或超过 SCREENING_SNAPSHOT_MAX_AGE_SECONDS 后重新加载
+- 增量更新：QuotesIngestionService._bulk_upsert 和基础信息同步写库后调用 apply_quotes / apply_basics
+- 行为与视图 stock_screening_view 保持一致（行 = stock_basic_info 的 (code, source)）
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import operator as _operator
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# 基础信息字段（来自 stock_basic_info）
+BASIC_COLUMNS: Tuple[str, ...] = (
+    "code", "source", "name", "industry", "area", "market", "sse", "list_date",
+    "total_mv", "circ_mv", "pe", "pb", "pe_ttm", "pb_mrq",
+    "turnover_rate", "volume_ratio", "updated_at",
+)
+
+# 实时行情字段（来自 market_quotes）
+QUOTE_COLUMNS: Tuple[str, ...] = (
+    "close", "open", "high", "low", "pre_close", "pct_chg", "amount", "volume", "trade_date",
+)
+
+# 财务指标字段（来自 stock_financial_data 最新一期）
+FINANCIAL_COLUMNS: Tuple[str, ...] = (
+    "roe", "roa", "netprofit_margin", "gross_margin", "report_period",
+)
+
+# 需要强制转换为数值类型的列（缺失值 -> NaN，便于向量化比较）
+NUMERIC_COLUMNS = frozenset({
+    "total_mv", "circ_mv", "pe", "pb", "pe_ttm", "pb_mrq", "turnover_rate", "volume_ratio",
+    "close", "open", "high", "low", "pre_close", "pct_chg", "amount", "volume",
+    "roe", "roa", "netprofit_margin", "gross_margin",
+})
+
+
+_COMPARE_OPS = {
+    ">": _operator.gt,
+    "<": _operator.lt,
+    ">=": _operator.ge,
+    "<=": _operator.le,
+}
+
+
+def _to_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        if col in NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def _empty_frame(columns: Sequence[str]) -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype="float64" if c in NUMERIC_COLUMNS else "object") for c in columns})
+
+
+class MarketSnapshot:
+    """stock_screening_view 的内存列式副本"""
+
+    def __init__(self, max_age_seconds: Optional[int] = None) -> None:
+        self.max_age_seconds = (
+            max_age_seconds if max_age_seconds is not None else settings.SCREENING_SNAPSHOT_MAX_AGE_SECONDS
+        )
+        self._basics: Optional[pd.DataFrame] = None       # index: (code, source)
+        self._quotes: Optional[pd.DataFrame] = None       # index: code
+        self._financials: Optional[pd.DataFrame] = None   # index: (code, data_source)
+        self._frame: Optional[pd.DataFrame] = None        # 关联后的视图（惰性重建）
+        self._loaded_at: float = 0.0
+        self._lock = asyncio.Lock()
+        # 数据版本号：每次全量加载或增量更新后递增，可用于结果集缓存失效
+        self.version: int = 0
+
+    # ---- 状态 ----
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._basics is not None
+
+    def is_fresh(self) -> bool:
+        if not self.is_loaded:
+            return False
+        return (time.monotonic() - self._loaded_at) < self.max_age_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.is_loaded,
+            "rows": 0 if self._basics is None else len(self._basics),
+            "quotes": 0 if self._quotes is None else len(self._quotes),
+            "financials": 0 if self._financials is None else len(self._financials),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self.is_loaded else None,
+            "version": self.version,
+        }
+
+    # ---- 加载 ----
+
+    async def ensure_loaded(self, db=None) -> bool:
+        """快照未加载或已过期时执行全量加载，返回快照是否可用"""
+        if self.is_fresh():
+            return True
+        async with self._lock:
+            if self.is_fresh():
+                return True
+            try:
+                await self.load(db)
+                return True
+            except Exception as e:
+                logger.warning(f"⚠️ 加载筛选内存快照失败: {e}")
+                return self.is_loaded
+
+    async def load(self, db=None) -> None:
+        """从 MongoDB 全量加载三张表"""
+        if db is None:
+            from app.core.database import get_mongo_db
+            db = get_mongo_db()
+
+        started = time.perf_counter()
+
+        basics_projection = {"_id": 0, **{c: 1 for c in BASIC_COLUMNS}}
+        basics_docs = await db["stock_basic_info"].find({}, basics_projection).to_list(length=None)
+
+        quotes_projection = {"_id": 0, "code": 1, "updated_at": 1, **{c: 1 for c in QUOTE_COLUMNS}}
+        quote_docs = await db["market_quotes"].find({}, quotes_projection).to_list(length=None)
+
+        # 每个 (code, data_source) 取最新一期财务数据，与视图中的 $lookup 保持一致
+        pipeline = [
+            {"$sort": {"code": 1, "data_source": 1, "report_period": -1}},
+            {"$group": {
+                "_id": {"code": "$code", "data_source": "$data_source"},
+                "updated_at": {"$first": "$updated_at"},
+                **{c: {"$first": f"${c}"} for c in FINANCIAL_COLUMNS},
+            }},
+        ]
+        financial_docs = await db["stock_financial_data"].aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+
+        self._basics = self._build_basics(basics_docs)
+        self._quotes = self._build_quotes(quote_docs)
+        self._financials = self._build_financials(financial_docs)
+        self._frame = None
+        self._loaded_at = time.monotonic()
+        self.version += 1
+
+        logger.info(
+            f"✅ 筛选内存快照加载完成: basics={len(self._basics)}, quotes={len(self._quotes)}, "
+            f"financials={len(self._financials)}, 耗时={(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+    @staticmethod
+    def _build_basics(docs: List[Dict[str, Any]]) -> pd.DataFrame:
+        df = pd.DataFrame(docs, columns=list(BASIC_COLUMNS)) if docs else _empty_frame(BASIC_COLUMNS)
+        df = _to_numeric_columns(df)
+        df = df.dropna(subset=["code"]).drop_duplicates(subset=["code", "source"], keep="last")
+        return df.set_index(["code", "source"], drop=False)
+
+    @staticmethod
+    def _build_quotes(docs: List[Dict[str, Any]]) -> pd.DataFrame:
+        columns = ["code", *QUOTE_COLUMNS, "updated_at"]
+        df = pd.DataFrame(docs, columns=columns) if docs else _empty_frame(columns)
+        df = _to_numeric_columns(df)
+        df = df.rename(columns={"updated_at": "quote_updated_at"})
+        df = df.dropna(subset=["code"]).drop_duplicates(subset=["code"], keep="last")
+        return df.set_index("code")
+
+    @staticmethod
+    def _build_financials(docs: List[Dict[str, Any]]) -> pd.DataFrame:
+        rows = []
+        for doc in docs:
+            key = doc.get("_id") or {}
+            row = {c: doc.get(c) for c in FINANCIAL_COLUMNS}
+            row["code"] = key.get("code")
+            row["data_source"] = key.get("data_source")
+            row["financial_updated_at"] = doc.get("updated_at")
+            rows.append(row)
+        columns = ["code", "data_source", *FINANCIAL_COLUMNS, "financial_updated_at"]
+        df = pd.DataFrame(rows, columns=columns) if rows else _empty_frame(columns)
+        df = _to_numeric_columns(df)
+        df = df.dropna(subset=["code"])
+        return df.set_index(["code", "data_source"])
+
+    # ---- 增量更新 ----
+
+    def apply_quotes(self, quotes: Dict[str, Dict[str, Any]]) -> None:
+        """
+        增量写入行情（与 market_quotes 的 $set 语义一致：整行覆盖）
+
+        Args:
+            quotes: {6位代码: {close, pct_chg, amount, volume, ..., trade_date, updated_at}}
+        """
+        if not self.is_loaded or not quotes:
+            return
+        rows = [{"code": code, **{c: q.get(c) for c in QUOTE_COLUMNS}, "quote_updated_at": q.get("updated_at")}
+                for code, q in quotes.items() if code]
+        incoming = _to_numeric_columns(pd.DataFrame(rows)).drop_duplicates(subset=["code"], keep="last")
+        incoming = incoming.set_index("code")
+        self._quotes = pd.concat([self._quotes.drop(incoming.index, errors="ignore"), incoming])
+        self._frame = None
+        self.version += 1
+
+    def apply_basics(self, docs: Iterable[Dict[str, Any]]) -> None:
+        """
+        增量写入基础信息（与 stock_basic_info 的 $set 语义一致：只覆盖提供的字段）
+
+        Args:
+            docs: 基础信息文档列表，必须包含 code 和 source
+        """
+        if not self.is_loaded:
+            return
+        rows = [{c: doc[c] for c in BASIC_COLUMNS if c in doc} for doc in docs if doc.get("code")]
+        if not rows:
+            return
+        incoming = _to_numeric_columns(pd.DataFrame(rows))
+        incoming = incoming.drop_duplicates(subset=["code", "source"], keep="last")
+        incoming = incoming.set_index(["code", "source"], drop=False)
+        merged = incoming.combine_first(self._basics)
+        self._basics = merged.reindex(columns=list(BASIC_COLUMNS))
+        self._frame = None
+        self.version += 1
+
+    # ---- 查询 ----
+
+    def _get_frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            basics = self._basics.reset_index(drop=True)
+            frame = basics.join(self._quotes, on="code")
+            frame = frame.join(self._financials, on=["code", "source"])
+            self._frame = frame
+        return self._frame
+
+    def query(
+        self,
+        filters: List[Tuple[str, str, Any]],
+        sort: List[Tuple[str, int]],
+        offset: int = 0,
+        limit: int = 50,
+        source: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        向量化筛选
+
+        Args:
+            filters: [(字段, 操作符, 值)]，操作符与 DatabaseScreeningService.operators 一致
+            sort: [(字段, 1|-1)]
+            offset: 偏移量
+            limit: 返回数量
+            source: 数据源（stock_basic_info.source）
+
+        Returns:
+            (视图格式的文档列表, 总数量)
+        """
+        frame = self._get_frame()
+        mask = np.ones(len(frame), dtype=bool)
+        if source:
+            mask &= (frame["source"] == source).to_numpy()
+        for field, operator, value in filters:
+            if field not in frame.columns:
+                mask &= False
+                continue
+            mask &= self._condition_mask(frame[field], operator, value)
+
+        matched = frame[mask]
+        total = len(matched)
+
+        sort = [(f, d) for f, d in sort if f in matched.columns]
+        if sort and total:
+            matched = matched.sort_values(
+                by=[f for f, _ in sort],
+                ascending=[d > 0 for _, d in sort],
+                # MongoDB 中 null 排序时视为最小值
+                na_position="first" if sort[0][1] > 0 else "last",
+                kind="stable",
+            )
+
+        page = matched.iloc[offset: offset + limit]
+        page = page.astype(object).where(page.notna(), None)
+        return page.to_dict("records"), total
+
+    @staticmethod
+    def _condition_mask(column: pd.Series, operator: str, value: Any) -> np.ndarray:
+        """单个条件的布尔掩码（缺失值与 MongoDB 语义一致：比较运算不匹配，$ne/$nin 匹配）"""
+        if operator == "between":
+            if isinstance(value, (list, tuple)) and len(value) == 2:
+                return MarketSnapshot._compare(column, ">=", value[0]) & MarketSnapshot._compare(column, "<=", value[1])
+            return np.ones(len(column), dtype=bool)
+        if operator == "contains":
+            pattern = str(value)
+            try:
+                re.compile(pattern)
+            except re.error:
+                pattern = re.escape(pattern)
+            return column.astype("string").str.contains(pattern, case=False, regex=True, na=False).to_numpy(dtype=bool)
+        if operator == "in":
+            return column.isin(value if isinstance(value, (list, tuple, set)) else [value]).to_numpy()
+        if operator == "not_in":
+            return (~column.isin(value if isinstance(value, (list, tuple, set)) else [value])).to_numpy()
+        if operator == "==":
+            return (column == value).to_numpy()
+        if operator == "!=":
+            return (column != value).to_numpy()
+        if operator in (">", "<", ">=", "<="):
+            return MarketSnapshot._compare(column, operator, value)
+        raise ValueError(f"不支持的操作符: {operator}")
+
+    @staticmethod
+    def _compare(column: pd.Series, operator: str, value: Any) -> np.ndarray:
+        """大小比较；缺失值和类型不可比较的元素均视为不匹配"""
+        op = _COMPARE_OPS[operator]
+        try:
+            return (op(column, value) & column.notna()).to_numpy(dtype=bool)
+        except TypeError:
+            def _cmp(v: Any) -> bool:
+                try:
+                    return v is not None and not pd.isna(v) and bool(op(v, value))
+                except TypeError:
+                    return False
+            return column.map(_cmp).to_numpy(dtype=bool)
+
+
+# 全局快照实例
+_market_snapshot: Optional[MarketSnapshot] = None
+
+
+def get_market_snapshot() -> MarketSnapshot:
+    """获取筛选内存快照实例"""
+    global _market_snapshot
+    if _market_snapshot is None:
+        _market_snapshot = MarketSnapshot()
+    return _market_snapshot
@@ -0,0 +1,306 @@
+"""
+筛选结果集缓存与游标分页
+
+一次筛选只评估一次：完整的有序结果集按「规范化条件哈希 + 数据版本」缓存到 Redis（带 TTL），
+之后每一页都从结果集中读取，不再对每页重新执行 count/sort/skip/limit 或逐股计算指标。
+
+- 结果集句柄（result_set_id）= sha1(规范化条件) + 数据版本
+- 数据版本：行情/基础信息写库后递增（Redis 计数器 screening:data_version），版本变化即产生新结果集
+- 游标（cursor）：记录结果集句柄、位置及最后一行的排序键（keyset）。
+  结果集过期被重新计算后，按排序键定位续读位置，避免重复或遗漏
+- Redis 不可用时退化为进程内缓存
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import functools
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.redis_client import RedisKeys
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "screening:data_version"
+
+# 评估函数：返回完整的有序结果 (items, total)
+Evaluator = Callable[[], Awaitable[Tuple[List[Dict[str, Any]], int]]]
+
+
+def _get_redis():
+    """获取已初始化的 Redis 客户端，未初始化时返回 None"""
+    try:
+        from app.core.database import get_redis_client
+        return get_redis_client()
+    except Exception:
+        return None
+
+
+def normalize_conditions(payload: Any) -> Any:
+    """规范化筛选条件：枚举取值、pydantic 转 dict、字典键排序、去除 None"""
+    if hasattr(payload, "model_dump"):
+        payload = payload.model_dump(exclude_none=True)
+    if isinstance(payload, dict):
+        return {k: normalize_conditions(v) for k, v in sorted(payload.items()) if v is not None}
+    if isinstance(payload, (list, tuple)):
+        return [normalize_conditions(v) for v in payload]
+    if hasattr(payload, "value") and not isinstance(payload, (int, float, str)):
+        return payload.value
+    if isinstance(payload, float) and payload.is_integer():
+        return int(payload)
+    return payload
+
+
+def conditions_hash(payload: Any) -> str:
+    """规范化条件的稳定哈希"""
+    normalized = normalize_conditions(payload)
+    raw = json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+async def get_data_version() -> str:
+    """当前筛选数据版本（Redis 不可用时使用本进程快照版本）"""
+    redis = _get_redis()
+    if redis is not None:
+        try:
+            value = await redis.get(DATA_VERSION_KEY)
+            return str(value or 0)
+        except Exception as e:
+            logger.debug(f"读取筛选数据版本失败: {e}")
+    from app.services.screening.market_snapshot import get_market_snapshot
+    return f"local-{get_market_snapshot().version}"
+
+
+async def bump_data_version() -> None:
+    """行情/基础信息写库后调用，使已缓存的结果集失效（失败忽略）"""
+    redis = _get_redis()
+    if redis is None:
+        return
+    try:
+        await redis.incr(DATA_VERSION_KEY)
+    except Exception as e:
+        logger.debug(f"更新筛选数据版本失败（忽略）: {e}")
+
+
+def _compare_values(a: Any, b: Any) -> int:
+    """与 MongoDB 排序一致：None 视为最小值；不可比较时按字符串比较"""
+    if a is None and b is None:
+        return 0
+    if a is None:
+        return -1
+    if b is None:
+        return 1
+    try:
+        return (a > b) - (a < b)
+    except TypeError:
+        return (str(a) > str(b)) - (str(a) < str(b))
+
+
+def _sort_key_of(item: Dict[str, Any], sort: List[Tuple[str, int]]) -> List[Any]:
+    return [item.get(field) for field, _ in sort] + [item.get("code")]
+
+
+def _compare_keys(a: List[Any], b: List[Any], sort: List[Tuple[str, int]]) -> int:
+    directions = [direction for _, direction in sort] + [1]  # code 升序作为最终排序键
+    for va, vb, direction in zip(a, b, directions):
+        c = _compare_values(va, vb)
+        if c:
+            return c if direction > 0 else -c
+    return 0
+
+
+def encode_cursor(result_set_id: str, position: int, key: List[Any]) -> str:
+    raw = json.dumps({"h": result_set_id, "i": position, "k": key}, ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if not isinstance(data, dict) or "h" not in data or "i" not in data:
+            raise ValueError("missing fields")
+        return data
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {e}")
+
+
+class ScreeningResultSet:
+    """已物化的有序筛选结果"""
+
+    def __init__(
+        self,
+        result_set_id: str,
+        items: List[Dict[str, Any]],
+        total: int,
+        sort: List[Tuple[str, int]],
+        data_version: str,
+        created_at: Optional[float] = None,
+    ) -> None:
+        self.result_set_id = result_set_id
+        self.items = items
+        self.total = total
+        self.sort = sort
+        self.data_version = data_version
+        self.created_at = created_at or time.time()
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "id": self.result_set_id,
+            "items": self.items,
+            "total": self.total,
+            "sort": self.sort,
+            "data_version": self.data_version,
+            "created_at": self.created_at,
+        }, ensure_ascii=False, default=str)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "ScreeningResultSet":
+        data = json.loads(raw)
+        return cls(
+            result_set_id=data["id"],
+            items=data["items"],
+            total=data["total"],
+            sort=[(f, int(d)) for f, d in data.get("sort", [])],
+            data_version=str(data.get("data_version")),
+            created_at=data.get("created_at"),
+        )
+
+    def locate(self, cursor: Dict[str, Any]) -> int:
+        """根据游标确定起始位置：同一结果集直接用位置，否则按排序键（keyset）定位"""
+        position = int(cursor.get("i") or 0)
+        key = cursor.get("k")
+        if cursor.get("h") == self.result_set_id or not key:
+            return max(0, min(position, len(self.items)))
+        for idx, item in enumerate(self.items):
+            if _compare_keys(_sort_key_of(item, self.sort), key, self.sort) > 0:
+                return idx
+        return len(self.items)
+
+    def page(self, start: int, limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """返回 [start, start+limit) 的数据及下一页游标（无下一页时为 None）"""
+        end = min(start + limit, len(self.items))
+        items = self.items[start:end]
+        next_cursor = None
+        if end < len(self.items) and items:
+            next_cursor = encode_cursor(self.result_set_id, end, _sort_key_of(items[-1], self.sort))
+        return items, next_cursor
+
+
+class ScreeningResultSetCache:
+    """筛选结果集缓存（Redis 优先，进程内兜底），同一进程内相同条件的并发评估只执行一次"""
+
+    def __init__(self, ttl: Optional[int] = None, max_rows: Optional[int] = None) -> None:
+        self.ttl = ttl if ttl is not None else settings.SCREENING_CACHE_TTL
+        self.max_rows = max_rows if max_rows is not None else settings.SCREENING_RESULT_SET_MAX_ROWS
+        self._local: Dict[str, Tuple[float, str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _redis_key(result_set_id: str) -> str:
+        return RedisKeys.SCREENING_CACHE.format(cache_key=f"rs:{result_set_id}")
+
+    async def get(self, result_set_id: str) -> Optional[ScreeningResultSet]:
+        raw = None
+        redis = _get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(self._redis_key(result_set_id))
+            except Exception as e:
+                logger.debug(f"读取筛选结果集失败: {e}")
+        if raw is None:
+            entry = self._local.get(result_set_id)
+            if entry and entry[0] > time.monotonic():
+                raw = entry[1]
+            elif entry:
+                self._local.pop(result_set_id, None)
+        return ScreeningResultSet.from_json(raw) if raw else None
+
+    async def _put(self, result_set: ScreeningResultSet) -> None:
+        raw = result_set.to_json()
+        redis = _get_redis()
+        if redis is not None:
+            try:
+                await redis.set(self._redis_key(result_set.result_set_id), raw, ex=self.ttl)
+                return
+            except Exception as e:
+                logger.debug(f"写入筛选结果集失败，使用进程内缓存: {e}")
+        self._evict_local()
+        self._local[result_set.result_set_id] = (time.monotonic() + self.ttl, raw)
+
+    def _evict_local(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._local.items() if expires <= now]:
+            self._local.pop(key, None)
+
+    async def get_or_create(
+        self,
+        payload: Any,
+        sort: List[Tuple[str, int]],
+        evaluator: Evaluator,
+    ) -> Tuple[ScreeningResultSet, bool]:
+        """
+        获取或计算结果集
+
+        Args:
+            payload: 决定结果的全部参数（条件、排序、市场、日期等，不含分页参数）
+            sort: 结果集的排序键 [(字段, 1|-1)]，用于游标定位
+            evaluator: 评估函数，返回完整有序结果
+
+        Returns:
+            (结果集, 是否命中缓存)
+        """
+        data_version = await get_data_version()
+        result_set_id = f"{conditions_hash(payload)[:20]}-{data_version}"
+
+        cached = await self.get(result_set_id)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+
+        inflight = self._inflight.get(result_set_id)
+        if inflight is not None:
+            return await asyncio.shield(inflight), True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[result_set_id] = future
+        try:
+            items, total = await evaluator()
+            items = list(items[: self.max_rows])
+            items.sort(key=functools.cmp_to_key(
+                lambda a, b: _compare_keys(_sort_key_of(a, sort), _sort_key_of(b, sort), sort)
+            ))
+            result_set = ScreeningResultSet(result_set_id, items, total, sort, data_version)
+            await self._put(result_set)
+            future.set_result(result_set)
+            return result_set, False
+        except BaseException as e:
+            future.set_exception(e)
+            # 避免无人等待时出现 "Future exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(result_set_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "local_entries": len(self._local)}
+
+
+# 全局实例
+_result_set_cache: Optional[ScreeningResultSetCache] = None
+
+
+def get_result_set_cache() -> ScreeningResultSetCache:
+    """获取筛选结果集缓存实例"""
+    global _result_set_cache
+    if _result_set_cache is None:
+        _result_set_cache = ScreeningResultSetCache()
+    return _result_set_cache
@@ -7,7 +7,7 @@ import asyncio
 import uuid
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
 from pathlib import Path
 import sys
 
@@ -19,7 +19,11 @@ sys.path.insert(0, str(project_root))
 from tradingagents.utils.logging_init import init_logging
 init_logging()
 
-from tradingagents.graph.trading_graph import TradingAgentsGraph
+# TradingAgentsGraph 在创建实例时才导入（会加载 LangGraph、LLM 适配器和数据源），
+# 只查询任务和报告的进程无需承担这部分启动开销
+if TYPE_CHECKING:
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.graph.graph_pool import TradingGraphPool
 from tradingagents.default_config import DEFAULT_CONFIG
 from app.models.analysis import (
     AnalysisTask, AnalysisStatus, SingleAnalysisRequest, AnalysisParameters
@@ -27,11 +31,13 @@ from app.models.analysis import (
 from app.models.user import PyObjectId
 from app.models.notification import NotificationCreate
 from bson import ObjectId
+from app.core.config import settings
 from app.core.database import get_mongo_db
 from app.services.config_service import ConfigService
 from app.services.memory_state_manager import get_memory_state_manager, TaskStatus
 from app.services.redis_progress_tracker import RedisProgressTracker, get_progress_by_id
 from app.services.progress_log_handler import register_analysis_tracker, unregister_analysis_tracker
+from app.services.analysis.executor import BACKEND_PROCESS, get_analysis_executor
 
 # 股票基础信息获取（用于补充显示名称）
 try:
@@ -593,19 +599,20 @@ class SimpleAnalysisService:
 
     def __init__(self):
         self._trading_graph_cache = {}
+        self._graph_pool = TradingGraphPool(max_idle_per_key=settings.TRADING_GRAPH_POOL_MAX_IDLE)
         self.memory_manager = get_memory_state_manager()
 
         # 进度跟踪器缓存
         self._progress_trackers: Dict[str, RedisProgressTracker] = {}
 
-        # 🔧 创建共享的线程池，支持并发执行多个分析任务
-        # 默认最多同时执行3个分析任务（可根据服务器资源调整）
-        import concurrent.futures
-        self._thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+        # 🔧 统一的分析执行器（线程池/进程池），带排队准入控制和供应商并发限制
+        self._executor = get_analysis_executor()
+        # 主事件循环（分析线程推送 LLM 流式输出时使用）
+        self._main_loop: Optional[asyncio.AbstractEventLoop] = None
 
         logger.info(f"🔧 [服务初始化] SimpleAnalysisService 实例ID: {id(self)}")
         logger.info(f"🔧 [服务初始化] 内存管理器实例ID: {id(self.memory_manager)}")
-        logger.info(f"🔧 [服务初始化] 线程池最大并发数: 3")
+        logger.info(f"🔧 [服务初始化] 执行器: {self._executor.backend}, 最大并发数: {self._executor.max_workers}")
 
         # 设置 WebSocket 管理器
         # 简单的股票名称缓存，减少重复查询
@@ -704,29 +711,40 @@ class SimpleAnalysisService:
             logger.warning(f"⚠️ 生成新的用户ID: {new_object_id}")
             return PyObjectId(new_object_id)
 
-    def _get_trading_graph(self, config: Dict[str, Any]) -> TradingAgentsGraph:
-        """获取或创建TradingAgents实例
+    def _get_trading_graph(self, config: Dict[str, Any]) -> "TradingAgentsGraph":
+        """获取TradingAgents实例
 
-        ⚠️ 注意：为了避免并发执行时的数据混淆，每次都创建新实例
-        虽然这会增加一些初始化开销，但可以确保线程安全
-
-        TradingAgentsGraph 实例包含可变状态（self.ticker, self.curr_state等），
-        如果多个线程共享同一个实例，会导致数据混淆。
+        启用实例池时从池中独占借出实例（复用已编译的图、LLM客户端和记忆库句柄），
+        使用完毕后必须调用 _release_trading_graph 归还；借出时会重置 ticker、curr_state
+        等单次运行状态，因此并发任务之间不会共享可变状态。
         """
-        # 🔧 [并发安全] 每次都创建新实例，避免多线程共享状态
-        # 不再使用缓存，因为 TradingAgentsGraph 有可变的实例变量
-        logger.info(f"🔧 创建新的TradingAgents实例（并发安全模式）...")
+        selected_analysts = config.get("selected_analysts", ["market", "fundamentals"])
+        debug = config.get("debug", False)
+
+        if settings.TRADING_GRAPH_POOL_ENABLED:
+            return self._graph_pool.acquire(selected_analysts, debug, config)
 
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+        logger.info(f"🔧 创建新的TradingAgents实例（并发安全模式）...")
         trading_graph = TradingAgentsGraph(
-            selected_analysts=config.get("selected_analysts", ["market", "fundamentals"]),
-            debug=config.get("debug", False),
+            selected_analysts=selected_analysts,
+            debug=debug,
             config=config
         )
-
         logger.info(f"✅ TradingAgents实例创建成功（实例ID: {id(trading_graph)}）")
 
         return trading_graph
 
+    def _release_trading_graph(self, trading_graph: Optional["TradingAgentsGraph"]) -> None:
+        """归还TradingAgents实例到实例池"""
+        if trading_graph is None or not settings.TRADING_GRAPH_POOL_ENABLED:
+            return
+        try:
+            self._graph_pool.release(trading_graph)
+        except Exception as e:
+            logger.warning(f"⚠️ 归还TradingAgents实例失败: {e}")
+
     async def create_analysis_task(
         self,
         user_id: str,
@@ -742,6 +760,9 @@ class SimpleAnalysisService:
             if not stock_code:
                 raise ValueError("股票代码不能为空")
 
+            # 准入检查并预留执行名额；超限时抛出 AnalysisRejectedError，由路由返回 429
+            await self._executor.admit(task_id)
+
             logger.info(f"📝 创建分析任务: {task_id} - {stock_code}")
             logger.info(f"🔍 内存管理器实例ID: {id(self.memory_manager)}")
 
@@ -897,6 +918,8 @@ class SimpleAnalysisService:
             logger.info(f"📈 历史数据: {'有' if validation_result.has_historical_data else '无'}")
             logger.info(f"📋 基本信息: {'有' if validation_result.has_basic_info else '无'}")
 
+            llm_provider = await self._resolve_llm_provider(request)
+
             # 在线程池中创建Redis进度跟踪器（避免阻塞事件循环）
             def create_progress_tracker():
                 """在线程中创建进度跟踪器"""
@@ -905,7 +928,7 @@ class SimpleAnalysisService:
                     task_id=task_id,
                     analysts=request.parameters.selected_analysts or ["market", "fundamentals"],
                     research_depth=request.parameters.research_depth or "标准",
-                    llm_provider="dashscope"
+                    llm_provider=llm_provider or "unknown"
                 )
                 logger.info(f"✅ [线程] 进度跟踪器创建完成: {task_id}")
                 return tracker
@@ -959,7 +982,7 @@ class SimpleAnalysisService:
             await self._update_task_status(task_id, AnalysisStatus.PROCESSING, 20)
 
             # 执行实际的分析
-            result = await self._execute_analysis_sync(task_id, user_id, request, progress_tracker)
+            result = await self._execute_analysis_sync(task_id, user_id, request, progress_tracker, llm_provider)
 
             # 标记进度跟踪器完成（在线程中执行）
             await asyncio.to_thread(progress_tracker.mark_completed)
@@ -1053,6 +1076,9 @@ class SimpleAnalysisService:
             # 同步更新MongoDB状态为失败
             await self._update_task_status(task_id, AnalysisStatus.FAILED, 0, user_friendly_error)
         finally:
+            # 任务未进入执行器（如股票代码验证失败）时归还提交时预留的名额
+            self._executor.release(task_id)
+
             # 清理进度跟踪器缓存
             if task_id in self._progress_trackers:
                 del self._progress_trackers[task_id]
@@ -1060,27 +1086,79 @@ class SimpleAnalysisService:
             # 从日志监控中注销
             unregister_analysis_tracker(task_id)
 
+    async def _resolve_llm_provider(self, request: SingleAnalysisRequest) -> Optional[str]:
+        """根据快速分析模型解析 LLM 供应商（用于进度跟踪和供应商并发限制）"""
+        try:
+            quick_model = getattr(request.parameters, "quick_analysis_model", None) if request.parameters else None
+            if quick_model:
+                return await get_provider_by_model_name(quick_model)
+        except Exception as e:
+            logger.debug(f"解析模型供应商失败（不限制供应商并发）: {e}")
+        return None
+
+    async def _mirror_process_progress(self, task_id: str, run_task: "asyncio.Future", interval: float = 2.0) -> None:
+        """
+        进程池后端：子进程的内存状态对 API 不可见，由父进程轮询 Redis/文件 中的进度
+        并同步到内存任务状态
+        """
+        last = None
+        while not run_task.done():
+            await asyncio.wait({run_task}, timeout=interval)
+            progress = await asyncio.to_thread(get_progress_by_id, task_id)
+            if not progress or progress.get("status") != "running":
+                continue
+            snapshot = (int(progress.get("progress_percentage") or 0), progress.get("last_message") or "")
+            if snapshot == last:
+                continue
+            last = snapshot
+            await self.memory_manager.update_task_status(
+                task_id=task_id,
+                status=TaskStatus.RUNNING,
+                progress=snapshot[0],
+                message=snapshot[1],
+                current_step=progress.get("current_step_name"),
+            )
+
     async def _execute_analysis_sync(
         self,
         task_id: str,
         user_id: str,
         request: SingleAnalysisRequest,
-        progress_tracker: Optional[RedisProgressTracker] = None
+        progress_tracker: Optional[RedisProgressTracker] = None,
+        provider: Optional[str] = None
     ) -> Dict[str, Any]:
-        """同步执行分析（在共享线程池中运行）"""
-        # 🔧 使用共享线程池，支持多个任务并发执行
-        # 不再每次创建新的线程池，避免串行执行
-        loop = asyncio.get_event_loop()
-        logger.info(f"🚀 [线程池] 提交分析任务到共享线程池: {task_id} - {request.stock_code}")
-        result = await loop.run_in_executor(
-            self._thread_pool,  # 使用共享线程池
-            self._run_analysis_sync,
-            task_id,
-            user_id,
-            request,
-            progress_tracker
-        )
-        logger.info(f"✅ [线程池] 分析任务执行完成: {task_id}")
+        """同步执行分析（由分析执行器调度，使用提交时预留的名额）"""
+        logger.info(f"🚀 [执行器] 提交分析任务: {task_id} - {request.stock_code} (供应商: {provider})")
+        # 记录主事件循环，分析线程中的 LLM 流式输出经此推送到 WebSocket
+        self._main_loop = asyncio.get_running_loop()
+        if self._executor.backend == BACKEND_PROCESS:
+            # 进程池：子进程从已保存的进度重建跟踪器（进度通过 Redis/文件 和 MongoDB 同步），
+            # 父进程把进度同步到内存任务状态
+            run_task = asyncio.ensure_future(self._executor.run(
+                _run_analysis_in_process,
+                task_id,
+                user_id,
+                request.model_dump(mode="json"),
+                provider,
+                provider=provider,
+                task_id=task_id,
+            ))
+            mirror_task = asyncio.create_task(self._mirror_process_progress(task_id, run_task))
+            try:
+                result = await run_task
+            finally:
+                mirror_task.cancel()
+        else:
+            result = await self._executor.run(
+                self._run_analysis_sync,
+                task_id,
+                user_id,
+                request,
+                progress_tracker,
+                provider=provider,
+                task_id=task_id,
+            )
+        logger.info(f"✅ [执行器] 分析任务执行完成: {task_id}")
         return result
 
     def _run_analysis_sync(
@@ -1091,6 +1169,7 @@ class SimpleAnalysisService:
         progress_tracker: Optional[RedisProgressTracker] = None
     ) -> Dict[str, Any]:
         """同步执行分析的具体实现"""
+        trading_graph = None
         try:
             # 在线程中重新初始化日志系统
             from tradingagents.utils.logging_init import init_logging, get_logger
@@ -1392,6 +1471,7 @@ class SimpleAnalysisService:
                 "🔥 激进风险评估": 81.75,    # 78% + 3.75%
                 "🛡️ 保守风险评估": 85.5,    # 78% + 7.5%
                 "⚖️ 中性风险评估": 89.25,   # 78% + 11.25%
+                "⚡ 风险并发讨论": 89.25,   # 三位风险分析师并发发言，一轮结束即完成三项评估
                 "🎯 风险经理": 93,           # 78% + 15%
                 # 最终阶段 (93% → 100%)
                 "📊 生成报告": 97,           # 93% + 4%
@@ -1498,12 +1578,23 @@ class SimpleAnalysisService:
 
             logger.info(f"🚀 准备调用 trading_graph.propagate，progress_callback={graph_progress_callback}")
 
-            # 执行实际分析，传递进度回调和task_id
+            # LLM 流式输出：推送到 WebSocket 并定期保存输出快照
+            from app.services.progress.stream_relay import AnalysisStreamRelay
+            from app.services.websocket_manager import get_websocket_manager
+            stream_relay = AnalysisStreamRelay(
+                task_id,
+                progress_tracker=progress_tracker,
+                loop=self._main_loop,
+                ws_manager=get_websocket_manager(),
+            )
+
+            # 执行实际分析，传递进度回调、task_id 和流式输出回调
             state, decision = trading_graph.propagate(
                 request.stock_code,
                 analysis_date,
                 progress_callback=graph_progress_callback,
-                task_id=task_id
+                task_id=task_id,
+                token_callback=stream_relay,
             )
 
             logger.info(f"✅ trading_graph.propagate 执行完成")
@@ -1845,6 +1936,8 @@ class SimpleAnalysisService:
 
             # 抛出包含友好错误信息的异常
             raise Exception(user_friendly_error) from e
+        finally:
+            self._release_trading_graph(trading_graph)
 
     async def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """获取任务状态"""
@@ -2621,6 +2714,10 @@ class SimpleAnalysisService:
                 "performance_metrics": result.get("performance_metrics", {})
             }
 
+            # 较大的报告正文压缩后存入 report_blobs，文档中只保留引用和摘要字段
+            from app.services.report_blob_store import get_report_blob_store
+            document.update(await get_report_blob_store().externalize(db, reports))
+
             # 保存到analysis_reports集合（与web目录保持一致）
             result_insert = await db.analysis_reports.insert_one(document)
 
@@ -2894,6 +2991,22 @@ class SimpleAnalysisService:
 # 重复的 get_task_status 方法已删除，使用第469行的内存版本
 
 
+def _run_analysis_in_process(
+    task_id: str, user_id: str, request_data: Dict[str, Any], llm_provider: Optional[str] = None
+) -> Dict[str, Any]:
+    """进程池执行入口（模块级函数，可被 pickle）"""
+    request = SingleAnalysisRequest(**request_data)
+    params = request.parameters
+    # 父进程已创建跟踪器并推进了进度，这里从保存的状态恢复而不是重新初始化
+    progress_tracker = RedisProgressTracker.restore(
+        task_id=task_id,
+        analysts=(params.selected_analysts if params else None) or ["market", "fundamentals"],
+        research_depth=(params.research_depth if params else None) or "标准",
+        llm_provider=llm_provider or "unknown"
+    )
+    return get_simple_analysis_service()._run_analysis_sync(task_id, user_id, request, progress_tracker)
+
+
 # 全局服务实例
 _analysis_service = None
 
@@ -2,6 +2,7 @@
 社媒消息数据服务
 提供统一的社媒消息存储、查询和分析功能
 """
+import asyncio
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
@@ -10,6 +11,8 @@ from pymongo import ReplaceOne
 from pymongo.errors import BulkWriteError
 
 from app.core.database import get_database
+from app.core.config import settings
+from app.services.fulltext_index import get_fulltext_index
 
 logger = logging.getLogger(__name__)
 
@@ -115,6 +118,7 @@ class SocialMediaService:
             result = await collection.bulk_write(operations, ordered=False)
             
             saved_count = result.upserted_count + result.modified_count
+            await asyncio.to_thread(self._index_for_search, messages)
             self.logger.info(f"✅ 社媒消息批量保存完成: {saved_count}/{len(messages)}")
             
             return {
@@ -126,6 +130,7 @@ class SocialMediaService:
             
         except BulkWriteError as e:
             self.logger.error(f"❌ 社媒消息批量保存部分失败: {e.details}")
+            await asyncio.to_thread(self._index_for_search, messages)
             return {
                 "saved": e.details.get("nUpserted", 0) + e.details.get("nModified", 0),
                 "failed": len(e.details.get("writeErrors", [])),
@@ -229,6 +234,29 @@ class SocialMediaService:
         )
         return await self.query_social_media_messages(params)
     
+    def _index_for_search(self, messages: List[Dict[str, Any]]) -> None:
+        """将社媒消息增量写入本地全文索引（失败不影响保存）"""
+        if not settings.FULLTEXT_INDEX_ENABLED or not messages:
+            return
+        try:
+            index = get_fulltext_index("social_media")
+            for message in messages:
+                platform = message.get("platform")
+                message_id = message.get("message_id")
+                hashtags = " ".join(message.get("hashtags") or [])
+                index.add(
+                    key=f"{platform}:{message_id}",
+                    title=hashtags,
+                    content=message.get("content"),
+                    published_at=message.get("publish_time"),
+                    symbols=[message["symbol"]] if message.get("symbol") else [],
+                    tags=[f"platform:{platform}"] if platform else [],
+                    ref={"message_id": message_id, "platform": platform},
+                )
+            index.maybe_flush()
+        except Exception as e:
+            self.logger.warning(f"⚠️ 更新社媒消息全文索引失败: {e}")
+
     async def search_messages(
         self, 
         query: str, 
@@ -236,36 +264,77 @@ class SocialMediaService:
         platform: str = None,
         limit: int = 50
     ) -> List[Dict[str, Any]]:
-        """全文搜索社媒消息"""
+        """全文搜索社媒消息（优先使用本地全文索引，结果不足 limit 条时用 $text 补足其他进程刚写入的消息）"""
         try:
             collection = await self._get_collection()
-            
-            # 构建搜索条件
-            search_query = {
-                "$text": {"$search": query}
-            }
-            
-            if symbol:
-                search_query["symbol"] = symbol
-            
-            if platform:
-                search_query["platform"] = platform
-            
-            # 执行搜索
-            cursor = collection.find(
-                search_query,
-                {"score": {"$meta": "textScore"}}
-            ).sort([("score", {"$meta": "textScore"})])
-            
-            messages = await cursor.limit(limit).to_list(length=limit)
-            
-            self.logger.debug(f"🔍 搜索到 {len(messages)} 条相关消息")
+
+            if not settings.FULLTEXT_INDEX_ENABLED:
+                return await self._search_with_text(collection, query, symbol, platform, limit)
+
+            index = get_fulltext_index("social_media")
+            hits = await asyncio.to_thread(
+                index.search,
+                query,
+                symbols=[symbol] if symbol else None,
+                tags=[f"platform:{platform}"] if platform else None,
+                limit=limit * 2,
+            )
+            messages = []
+            if hits:
+                docs = await collection.find({"$or": [hit["ref"] for hit in hits]}).to_list(length=None)
+                by_ref = {(d.get("platform"), d.get("message_id")): d for d in docs}
+                for hit in hits:
+                    doc = by_ref.get((hit["ref"].get("platform"), hit["ref"].get("message_id")))
+                    if doc is not None:
+                        doc["score"] = hit["score"]
+                        messages.append(doc)
+                messages = messages[:limit]
+                self.logger.debug(f"🔍 本地索引搜索到 {len(messages)} 条相关消息")
+
+            if len(messages) < limit:
+                try:
+                    extra = await self._search_with_text(collection, query, symbol, platform, limit)
+                except Exception as e:
+                    self.logger.warning(f"⚠️ $text 补充检索失败，仅返回本地索引结果: {e}")
+                    extra = []
+                seen = {(m.get("platform"), m.get("message_id")) for m in messages}
+                messages.extend(m for m in extra if (m.get("platform"), m.get("message_id")) not in seen)
+                messages = messages[:limit]
             return messages
-            
+
         except Exception as e:
             self.logger.error(f"❌ 社媒消息搜索失败: {e}")
             return []
-    
+
+    async def _search_with_text(
+        self,
+        collection,
+        query: str,
+        symbol: Optional[str],
+        platform: Optional[str],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """MongoDB $text 检索"""
+        search_query = {
+            "$text": {"$search": query}
+        }
+
+        if symbol:
+            search_query["symbol"] = symbol
+
+        if platform:
+            search_query["platform"] = platform
+
+        cursor = collection.find(
+            search_query,
+            {"score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})])
+
+        messages = await cursor.limit(limit).to_list(length=limit)
+
+        self.logger.debug(f"🔍 $text 搜索到 {len(messages)} 条相关消息")
+        return messages
+
     async def get_social_media_statistics(
         self, 
         symbol: str = None,
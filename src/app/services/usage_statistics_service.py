@@ -10,6 +10,12 @@ from collections import defaultdict
 
 from app.core.database import get_mongo_db
 from app.models.config import UsageRecord, UsageStatistics
+from tradingagents.config.usage_rollups import (
+    ROLLUP_COLLECTION,
+    plan_segments,
+    rollup_rebuild_pipeline,
+    rollup_updates,
+)
 
 logger = logging.getLogger("app.services.usage_statistics_service")
 
@@ -20,6 +26,8 @@ class UsageStatisticsService:
     def __init__(self):
         # 使用 tradingagents 的集合名称
         self.collection_name = "token_usage"
+        self.rollup_collection_name = ROLLUP_COLLECTION
+        self._rollups_ready = False
     
     async def add_usage_record(self, record: UsageRecord) -> bool:
         """添加使用记录"""
@@ -29,6 +37,7 @@ class UsageStatisticsService:
 
             record_dict = record.model_dump(exclude={"id"})
             result = await collection.insert_one(record_dict)
+            await self._apply_rollups(db, record_dict)
 
             logger.info(f"✅ 添加使用记录成功: {record.provider}/{record.model_name}")
             return True
@@ -76,6 +85,110 @@ class UsageStatisticsService:
             logger.error(f"❌ 获取使用记录失败: {e}")
             return []
     
+    async def _apply_rollups(self, db, record_dict: Dict[str, Any]) -> None:
+        """累加小时/日预聚合（失败只记录日志，原始记录仍可用于重建）"""
+        try:
+            rollups = db[self.rollup_collection_name]
+            for flt, update in rollup_updates(record_dict):
+                await rollups.update_one(flt, update, upsert=True)
+        except Exception as e:
+            logger.warning(f"⚠️ 更新使用量预聚合失败: {e}")
+
+    async def rebuild_rollups(self) -> Dict[str, int]:
+        """从原始记录重建全部预聚合（首次启用或数据修复时使用）"""
+        from pymongo import ReplaceOne
+
+        db = get_mongo_db()
+        raw = db[self.collection_name]
+        rollups = db[self.rollup_collection_name]
+        counts = {}
+        for granularity in ("hour", "day"):
+            ops = []
+            async for row in raw.aggregate(rollup_rebuild_pipeline(granularity), allowDiskUse=True):
+                key = {"granularity": granularity, **row["_id"]}
+                doc = {**key, **{k: row[k] for k in ("requests", "input_tokens", "output_tokens", "cost")}}
+                ops.append(ReplaceOne(key, doc, upsert=True))
+            if ops:
+                await rollups.bulk_write(ops, ordered=False)
+            counts[granularity] = len(ops)
+        await rollups.update_one(
+            {"_id": "__meta__"},
+            {"$set": {"rebuilt_at": datetime.now().isoformat()}},
+            upsert=True,
+        )
+        self._rollups_ready = True
+        logger.info(f"✅ 使用量预聚合重建完成: 小时桶 {counts['hour']} 个, 日桶 {counts['day']} 个")
+        return counts
+
+    async def _ensure_rollups(self, db) -> None:
+        """预聚合首次使用前从原始记录构建一次"""
+        if self._rollups_ready:
+            return
+        if await db[self.rollup_collection_name].find_one({"_id": "__meta__"}):
+            self._rollups_ready = True
+            return
+        await self.rebuild_rollups()
+
+    @staticmethod
+    def _raw_to_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+        timestamp = str(doc.get("timestamp") or "").replace(" ", "T")
+        return {
+            "provider": doc.get("provider", "unknown"),
+            "model_name": doc.get("model_name", "unknown"),
+            "currency": doc.get("currency", "CNY"),
+            "date": timestamp[:10],
+            "requests": 1,
+            "input_tokens": doc.get("input_tokens", 0),
+            "output_tokens": doc.get("output_tokens", 0),
+            "cost": doc.get("cost", 0.0),
+        }
+
+    async def _collect_rows(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        provider: Optional[str],
+        model_name: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """读取区间内的统计行：整点/整日部分读预聚合，首尾不足一小时的部分读原始记录"""
+        db = get_mongo_db()
+        await self._ensure_rollups(db)
+        filters: Dict[str, Any] = {}
+        if provider:
+            filters["provider"] = provider
+        if model_name:
+            filters["model_name"] = model_name
+
+        plan = plan_segments(start_date, end_date)
+        rows: List[Dict[str, Any]] = []
+
+        raw = db[self.collection_name]
+        for i, (lo, hi) in enumerate(plan["raw"]):
+            # 最后一段包含结束时间（与原查询的 $lte 一致）
+            upper = "$lte" if i == len(plan["raw"]) - 1 else "$lt"
+            query = {"timestamp": {"$gte": lo, upper: hi}, **filters}
+            projection = {k: 1 for k in ("timestamp", "provider", "model_name", "currency",
+                                         "input_tokens", "output_tokens", "cost")}
+            async for doc in raw.find(query, projection):
+                rows.append(self._raw_to_row(doc))
+
+        rollups = db[self.rollup_collection_name]
+        for granularity in ("hour", "day"):
+            for lo, hi in plan[granularity]:
+                query = {"granularity": granularity, "bucket": {"$gte": lo, "$lt": hi}, **filters}
+                async for doc in rollups.find(query):
+                    rows.append({
+                        "provider": doc.get("provider", "unknown"),
+                        "model_name": doc.get("model_name", "unknown"),
+                        "currency": doc.get("currency", "CNY"),
+                        "date": doc["bucket"][:10],
+                        "requests": doc.get("requests", 0),
+                        "input_tokens": doc.get("input_tokens", 0),
+                        "output_tokens": doc.get("output_tokens", 0),
+                        "cost": doc.get("cost", 0.0),
+                    })
+        return rows
+
     async def get_usage_statistics(
         self,
         days: int = 7,
@@ -84,95 +197,55 @@ class UsageStatisticsService:
     ) -> UsageStatistics:
         """获取使用统计"""
         try:
-            db = get_mongo_db()
-            collection = db[self.collection_name]
-            
             # 计算时间范围
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
-            
-            # 构建查询条件
-            query = {
-                "timestamp": {
-                    "$gte": start_date.isoformat(),
-                    "$lte": end_date.isoformat()
-                }
-            }
-            if provider:
-                query["provider"] = provider
-            if model_name:
-                query["model_name"] = model_name
-            
-            # 获取所有记录
-            cursor = collection.find(query)
-            records = []
-            async for doc in cursor:
-                records.append(doc)
-            
+
+            rows = await self._collect_rows(start_date, end_date, provider, model_name)
+
             # 统计数据
             stats = UsageStatistics()
-            stats.total_requests = len(records)
 
             # 按货币统计成本
             cost_by_currency = defaultdict(float)
 
-            by_provider = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
-            by_model = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
-            by_date = defaultdict(lambda: {
-                "requests": 0,
-                "input_tokens": 0,
-                "output_tokens": 0,
-                "cost": 0.0,
-                "cost_by_currency": defaultdict(float)
-            })
+            def bucket():
+                return {
+                    "requests": 0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                    "cost": 0.0,
+                    "cost_by_currency": defaultdict(float)
+                }
 
-            for record in records:
-                cost = record.get("cost", 0.0)
-                currency = record.get("currency", "CNY")
+            by_provider = defaultdict(bucket)
+            by_model = defaultdict(bucket)
+            by_date = defaultdict(bucket)
+
+            for row in rows:
+                cost = row["cost"]
+                currency = row["currency"]
 
                 # 总计
-                stats.total_input_tokens += record.get("input_tokens", 0)
-                stats.total_output_tokens += record.get("output_tokens", 0)
+                stats.total_requests += row["requests"]
+                stats.total_input_tokens += row["input_tokens"]
+                stats.total_output_tokens += row["output_tokens"]
                 stats.total_cost += cost  # 保留向后兼容
                 cost_by_currency[currency] += cost
 
-                # 按供应商统计
-                provider_key = record.get("provider", "unknown")
-                by_provider[provider_key]["requests"] += 1
-                by_provider[provider_key]["input_tokens"] += record.get("input_tokens", 0)
-                by_provider[provider_key]["output_tokens"] += record.get("output_tokens", 0)
-                by_provider[provider_key]["cost"] += cost
-                by_provider[provider_key]["cost_by_currency"][currency] += cost
-
-                # 按模型统计
-                model_key = f"{record.get('provider', 'unknown')}/{record.get('model_name', 'unknown')}"
-                by_model[model_key]["requests"] += 1
-                by_model[model_key]["input_tokens"] += record.get("input_tokens", 0)
-                by_model[model_key]["output_tokens"] += record.get("output_tokens", 0)
-                by_model[model_key]["cost"] += cost
-                by_model[model_key]["cost_by_currency"][currency] += cost
-
-                # 按日期统计
-                timestamp = record.get("timestamp", "")
-                if timestamp:
-                    date_key = timestamp[:10]  # YYYY-MM-DD
-                    by_date[date_key]["requests"] += 1
-                    by_date[date_key]["input_tokens"] += record.get("input_tokens", 0)
-                    by_date[date_key]["output_tokens"] += record.get("output_tokens", 0)
-                    by_date[date_key]["cost"] += cost
-                    by_date[date_key]["cost_by_currency"][currency] += cost
+                # 按供应商、模型、日期统计
+                keys = [
+                    (by_provider, row["provider"]),
+                    (by_model, f"{row['provider']}/{row['model_name']}"),
+                ]
+                if row["date"]:
+                    keys.append((by_date, row["date"]))
+                for target, key in keys:
+                    target[key]["requests"] += row["requests"]
+                    target[key]["input_tokens"] += row["input_tokens"]
+                    target[key]["output_tokens"] += row["output_tokens"]
+                    target[key]["cost"] += cost
+                    target[key]["cost_by_currency"][currency] += cost
 
             # 转换 defaultdict 为普通 dict（包括嵌套的 cost_by_currency）
             stats.cost_by_currency = dict(cost_by_currency)
@@ -180,7 +253,7 @@ class UsageStatisticsService:
             stats.by_model = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in by_model.items()}
             stats.by_date = {k: {**v, "cost_by_currency": dict(v["cost_by_currency"])} for k, v in by_date.items()}
             
-            logger.info(f"✅ 获取使用统计成功: {stats.total_requests} 条记录")
+            logger.info(f"✅ 获取使用统计成功: {stats.total_requests} 条记录（{len(rows)} 个统计行）")
             return stats
         except Exception as e:
             logger.error(f"❌ 获取使用统计失败: {e}")
@@ -225,6 +298,11 @@ class UsageStatisticsService:
             })
             
             deleted_count = result.deleted_count
+            # 同步删除过期的预聚合
+            await db[self.rollup_collection_name].delete_many({
+                "granularity": {"$in": ["hour", "day"]},
+                "bucket": {"$lt": cutoff_date.strftime("%Y-%m-%d")}
+            })
             logger.info(f"✅ 删除旧记录成功: {deleted_count} 条")
             return deleted_count
         except Exception as e:
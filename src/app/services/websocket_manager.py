@@ -69,6 +69,10 @@ class WebSocketManager:
         async with self._lock:
             return len(self.active_connections.get(task_id, set()))
     
+    def has_connections(self, task_id: str) -> bool:
+        """指定任务是否有活跃连接（无锁读取，供分析线程快速判断是否需要推送）"""
+        return bool(self.active_connections.get(task_id))
+
     async def get_total_connections(self) -> int:
         """获取总连接数"""
         async with self._lock:
@@ -10,10 +10,9 @@ PDF 导出需要额外工具:
 """
 
 import logging
-import os
-import tempfile
-from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any
+
+from app.utils.report_render_pool import get_report_render_pool, render_pandoc, render_pdfkit
 
 logger = logging.getLogger(__name__)
 
@@ -281,100 +280,40 @@ pre, code {
 </style>
 """
     
-    def generate_docx_report(self, report_doc: Dict[str, Any]) -> bytes:
-        """生成 Word 文档格式报告"""
-        logger.info("📄 开始生成 Word 文档...")
-
+    def _docx_job(self, report_doc: Dict[str, Any]) -> tuple:
+        """Word 渲染任务参数：(格式, 渲染函数, *参数)"""
         if not self.pandoc_available:
             raise Exception("Pandoc 不可用，无法生成 Word 文档。请安装 pandoc 或使用 Markdown 格式导出。")
 
         # 生成 Markdown 内容
         md_content = self.generate_markdown_report(report_doc)
 
-        try:
-            # 创建临时文件
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp_file:
-                output_file = tmp_file.name
-
-            logger.info(f"📁 临时文件路径: {output_file}")
-
-            # Pandoc 参数
-            extra_args = [
-                '--from=markdown-yaml_metadata_block',  # 禁用 YAML 元数据块解析
-                '--standalone',  # 生成独立文档
-                '--wrap=preserve',  # 保留换行
-                '--columns=120',  # 设置列宽
-                '-M', 'lang=zh-CN',  # 🔥 明确指定语言为简体中文
-                '-M', 'dir=ltr',  # 🔥 明确指定文本方向为从左到右
-            ]
-
-            # 清理内容
-            cleaned_content = self._clean_markdown_for_pandoc(md_content)
-
-            # 转换为 Word
-            pypandoc.convert_text(
-                cleaned_content,
-                'docx',
-                format='markdown',
-                outputfile=output_file,
-                extra_args=extra_args
-            )
+        # Pandoc 参数
+        extra_args = [
+            '--from=markdown-yaml_metadata_block',  # 禁用 YAML 元数据块解析
+            '--standalone',  # 生成独立文档
+            '--wrap=preserve',  # 保留换行
+            '--columns=120',  # 设置列宽
+            '-M', 'lang=zh-CN',  # 🔥 明确指定语言为简体中文
+            '-M', 'dir=ltr',  # 🔥 明确指定文本方向为从左到右
+        ]
+
+        # 清理内容；转换后修复文本方向
+        cleaned_content = self._clean_markdown_for_pandoc(md_content)
+        return ("docx", render_pandoc, cleaned_content, "docx", extra_args, (None,), True)
 
-            logger.info("✅ pypandoc 转换完成")
-
-            # 🔥 后处理：修复 Word 文档中的文本方向
-            try:
-                from docx import Document
-                doc = Document(output_file)
-
-                # 修复所有段落的文本方向
-                for paragraph in doc.paragraphs:
-                    # 设置段落为从左到右
-                    if paragraph._element.pPr is not None:
-                        # 移除可能的竖排设置
-                        for child in list(paragraph._element.pPr):
-                            if 'textDirection' in child.tag or 'bidi' in child.tag:
-                                paragraph._element.pPr.remove(child)
-
-                # 修复表格中的文本方向
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for paragraph in cell.paragraphs:
-                                if paragraph._element.pPr is not None:
-                                    for child in list(paragraph._element.pPr):
-                                        if 'textDirection' in child.tag or 'bidi' in child.tag:
-                                            paragraph._element.pPr.remove(child)
-
-                # 保存修复后的文档
-                doc.save(output_file)
-                logger.info("✅ Word 文档文本方向修复完成")
-            except ImportError:
-                logger.warning("⚠️ python-docx 未安装，跳过文本方向修复")
-            except Exception as e:
-                logger.warning(f"⚠️ Word 文档文本方向修复失败: {e}")
-
-            # 读取生成的文件
-            with open(output_file, 'rb') as f:
-                docx_content = f.read()
-
-            logger.info(f"✅ Word 文档生成成功，大小: {len(docx_content)} 字节")
-
-            # 清理临时文件
-            os.unlink(output_file)
-
-            return docx_content
-            
+    def generate_docx_report(self, report_doc: Dict[str, Any]) -> bytes:
+        """生成 Word 文档格式报告"""
+        logger.info("📄 开始生成 Word 文档...")
+        job = self._docx_job(report_doc)
+        try:
+            docx_content = get_report_render_pool().render(*job)
         except Exception as e:
             logger.error(f"❌ Word 文档生成失败: {e}", exc_info=True)
-            # 清理临时文件
-            try:
-                if 'output_file' in locals() and os.path.exists(output_file):
-                    os.unlink(output_file)
-            except:
-                pass
             raise Exception(f"生成 Word 文档失败: {e}")
-    
+        logger.info(f"✅ Word 文档生成成功，大小: {len(docx_content)} 字节")
+        return docx_content
+
     def _markdown_to_html(self, md_content: str) -> str:
         """将 Markdown 转换为 HTML"""
         import markdown
@@ -609,33 +548,8 @@ pre, code {
 """
         return html_template
 
-    def _generate_pdf_with_pdfkit(self, html_content: str) -> bytes:
-        """使用 pdfkit 生成 PDF"""
-        import pdfkit
-
-        logger.info("🔧 使用 pdfkit + wkhtmltopdf 生成 PDF...")
-
-        # 配置选项
-        options = {
-            'encoding': 'UTF-8',
-            'enable-local-file-access': None,
-            'page-size': 'A4',
-            'margin-top': '20mm',
-            'margin-right': '20mm',
-            'margin-bottom': '20mm',
-            'margin-left': '20mm',
-        }
-
-        # 生成 PDF
-        pdf_bytes = pdfkit.from_string(html_content, False, options=options)
-
-        logger.info(f"✅ pdfkit PDF 生成成功，大小: {len(pdf_bytes)} 字节")
-        return pdf_bytes
-
-    def generate_pdf_report(self, report_doc: Dict[str, Any]) -> bytes:
-        """生成 PDF 格式报告（使用 pdfkit + wkhtmltopdf）"""
-        logger.info("📊 开始生成 PDF 文档...")
-
+    def _pdf_job(self, report_doc: Dict[str, Any]) -> tuple:
+        """PDF 渲染任务参数（pdfkit + wkhtmltopdf）"""
         # 检查 pdfkit 是否可用
         if not self.pdfkit_available:
             error_msg = (
@@ -652,16 +566,48 @@ pre, code {
 
         # 生成 Markdown 内容
         md_content = self.generate_markdown_report(report_doc)
+        html_content = self._markdown_to_html(md_content)
+
+        # 配置选项
+        options = {
+            'encoding': 'UTF-8',
+            'enable-local-file-access': None,
+            'page-size': 'A4',
+            'margin-top': '20mm',
+            'margin-right': '20mm',
+            'margin-bottom': '20mm',
+            'margin-left': '20mm',
+        }
+        return ("pdf", render_pdfkit, html_content, options)
 
-        # 使用 pdfkit 生成 PDF
+    def generate_pdf_report(self, report_doc: Dict[str, Any]) -> bytes:
+        """生成 PDF 格式报告（使用 pdfkit + wkhtmltopdf）"""
+        logger.info("📊 开始生成 PDF 文档...")
+        job = self._pdf_job(report_doc)
         try:
-            html_content = self._markdown_to_html(md_content)
-            return self._generate_pdf_with_pdfkit(html_content)
+            pdf_bytes = get_report_render_pool().render(*job)
         except Exception as e:
             error_msg = f"PDF 生成失败: {e}"
             logger.error(f"❌ {error_msg}")
             raise Exception(error_msg)
+        logger.info(f"✅ pdfkit PDF 生成成功，大小: {len(pdf_bytes)} 字节")
+        return pdf_bytes
 
+    async def export_async(self, report_doc: Dict[str, Any], format_type: str) -> bytes:
+        """
+        按格式导出报告（markdown / docx / pdf）
+
+        Word/PDF 在渲染进程池中执行，等待期间不占用事件循环
+        """
+        if format_type == "markdown":
+            return self.generate_markdown_report(report_doc).encode("utf-8")
+        if format_type == "docx":
+            job = self._docx_job(report_doc)
+        elif format_type == "pdf":
+            job = self._pdf_job(report_doc)
+        else:
+            raise ValueError(f"不支持的导出格式: {format_type}")
+        return await get_report_render_pool().render_async(*job)
 
 # 创建全局导出器实例
 report_exporter = ReportExporter()
@@ -0,0 +1,39 @@
+"""
+报告导出渲染池（后端入口）
+
+渲染池实现位于 tradingagents.utils.report_render_pool（web 端不加载 app 配置即可使用）。
+本模块按 app 配置创建同一个渲染池单例，并保留原有导出以兼容旧的导入路径。
+"""
+
+from app.core.config import settings
+from tradingagents.utils.report_render_pool import (
+    ReportRenderPool,
+    ZipStreamWriter,
+    get_report_render_pool as _get_report_render_pool,
+    render_pandoc,
+    render_pdfkit,
+    shutdown_report_render_pool,
+)
+
+__all__ = [
+    "ReportRenderPool",
+    "ZipStreamWriter",
+    "get_report_render_pool",
+    "render_pandoc",
+    "render_pdfkit",
+    "shutdown_report_render_pool",
+]
+
+
+def _pool_from_settings() -> ReportRenderPool:
+    return ReportRenderPool(
+        max_workers=settings.REPORT_EXPORT_WORKERS,
+        cache_dir=settings.REPORT_EXPORT_CACHE_DIR or None,
+        cache_max_bytes=settings.REPORT_EXPORT_CACHE_MAX_MB * 1024 * 1024,
+        timeout=settings.REPORT_EXPORT_TIMEOUT,
+    )
+
+
+def get_report_render_pool() -> ReportRenderPool:
+    """获取报告渲染池（单例，按 app 配置创建）"""
+    return _get_report_render_pool(_pool_from_settings)
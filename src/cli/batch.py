@@ -0,0 +1,313 @@
+"""
+CLI 批量分析
+
+从股票列表文件和日期区间生成 (股票, 日期) 任务，通过有界并发执行器运行：
+- 全局并发上限，另可按 LLM 提供商 / 数据源单独限制并发；同一股票的不同日期依次执行，
+  不会同时写同一股票的结果与状态日志
+- 每完成一个任务立即向结果文件追加一行 JSON（JSON Lines）；该文件同时是断点，
+  用同一输出文件重新运行时跳过已成功的任务，失败的任务会重新执行
+- 中断（Ctrl+C）时不再启动新任务，已在运行的分析无法取消，等待其完成并照常写入结果
+- 每个任务完成后回调进度（吞吐量、预计剩余时间）
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger("cli")
+
+# 市场ID与 cli.main 中的市场选择一致：1=美股, 2=A股, 3=港股
+MARKET_DATA_SOURCES = {"1": "yahoo_finance", "2": "china_stock", "3": "yahoo_finance"}
+
+
+def detect_market(symbol: str) -> str:
+    """按代码格式推断市场ID"""
+    if re.fullmatch(r"\d{6}", symbol):
+        return "2"
+    if re.fullmatch(r"\d{4,5}\.HK", symbol, re.IGNORECASE):
+        return "3"
+    return "1"
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    symbol: str
+    trade_date: str
+    market_id: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.symbol}|{self.trade_date}"
+
+    @property
+    def data_source(self) -> str:
+        return MARKET_DATA_SOURCES.get(self.market_id, "yahoo_finance")
+
+
+def load_symbols(path: Path) -> List[Tuple[str, str]]:
+    """
+    读取股票列表文件
+
+    每行一个代码，可用逗号或空白附加市场ID（如 `0700.HK,3`）；空行和 # 开头的行被忽略，重复代码只保留一次。
+    """
+    symbols: Dict[str, str] = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = re.split(r"[,\s]+", line)
+        symbol = parts[0].upper()
+        market_id = parts[1] if len(parts) > 1 and parts[1] in MARKET_DATA_SOURCES else detect_market(symbol)
+        symbols.setdefault(symbol, market_id)
+    return list(symbols.items())
+
+
+def trade_dates(start: str, end: Optional[str] = None, include_weekends: bool = False) -> List[str]:
+    """生成 [start, end] 区间内的日期（默认跳过周末）"""
+    first = datetime.date.fromisoformat(start)
+    last = datetime.date.fromisoformat(end) if end else first
+    if last < first:
+        raise ValueError(f"结束日期 {last} 早于开始日期 {first}")
+    dates = []
+    day = first
+    while day <= last:
+        if include_weekends or day.weekday() < 5:
+            dates.append(day.isoformat())
+        day += datetime.timedelta(days=1)
+    return dates
+
+
+def build_jobs(symbols: Sequence[Tuple[str, str]], dates: Sequence[str]) -> List[BatchJob]:
+    """按股票展开任务（同一股票的日期相邻，便于复用数据缓存；执行时同一股票的任务依次运行）"""
+    return [BatchJob(symbol, trade_date, market_id) for symbol, market_id in symbols for trade_date in dates]
+
+
+def parse_limits(values: Optional[Iterable[str]]) -> Dict[str, int]:
+    """解析 `name=N` 形式的并发上限（name 为 LLM 提供商或数据源，如 deepseek、china_stock）"""
+    limits: Dict[str, int] = {}
+    for value in values or []:
+        name, sep, number = value.partition("=")
+        if not sep or not name.strip() or not number.strip().isdigit() or int(number) < 1:
+            raise ValueError(f"无效的并发限制: {value}（格式: 名称=正整数）")
+        limits[name.strip().lower()] = int(number)
+    return limits
+
+
+class ProviderLimiter:
+    """按提供商限制并发"""
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+
+    @asynccontextmanager
+    async def hold(self, providers: Iterable[str]):
+        acquired = []
+        try:
+            # 按固定顺序获取，避免两个任务交叉持有对方等待的许可
+            for name in sorted({p.lower() for p in providers}):
+                semaphore = self._semaphores.get(name)
+                if semaphore is not None:
+                    await semaphore.acquire()
+                    acquired.append(semaphore)
+            yield
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+
+class BatchResultLog:
+    """JSON Lines 结果文件（兼作断点）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        # 中断后仍在运行的任务在工作线程中写入结果
+        self._lock = threading.Lock()
+
+    def completed(self) -> Set[str]:
+        """已成功完成的任务键；中断时写了一半的末行会被忽略"""
+        done: Set[str] = set()
+        if not self.path.exists():
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("status") == "success":
+                    done.add(f"{record.get('symbol')}|{record.get('trade_date')}")
+        return done
+
+    def append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._append(record)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a+b")
+            # 上次中断在行中间时先补换行，避免新记录接在残行后面
+            if self._file.tell() > 0:
+                self._file.seek(-1, os.SEEK_END)
+                if self._file.read(1) != b"\n":
+                    self._file.write(b"\n")
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        self._file.write(line.encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+@dataclass
+class BatchProgress:
+    total: int
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def finished(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.skipped - self.finished
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def throughput(self) -> float:
+        """每分钟完成的任务数"""
+        elapsed = self.elapsed
+        return self.finished / elapsed * 60 if elapsed > 0 else 0.0
+
+    def eta_seconds(self) -> Optional[float]:
+        if not self.finished:
+            return None
+        return self.remaining / self.finished * self.elapsed
+
+    def describe(self) -> str:
+        eta = self.eta_seconds()
+        eta_text = str(datetime.timedelta(seconds=int(eta))) if eta is not None else "--"
+        return (
+            f"{self.skipped + self.finished}/{self.total} "
+            f"(成功 {self.succeeded}, 失败 {self.failed}, 跳过 {self.skipped}) | "
+            f"{self.throughput():.2f} 个/分钟 | 预计剩余 {eta_text}"
+        )
+
+
+JobRunner = Callable[[BatchJob], Dict[str, Any]]
+ProgressCallback = Callable[[BatchProgress, Dict[str, Any]], None]
+InterruptCallback = Callable[[List[BatchJob]], None]
+
+
+class BatchRunner:
+    """
+    有界并发批量执行器
+
+    run_job 是阻塞函数（执行一次完整分析并返回要写入结果的字段），在线程池中运行；
+    providers_of 返回任务占用的提供商名称，用于按提供商限流。
+    运行被取消（Ctrl+C）时，on_interrupt 收到仍在运行的任务列表，run 等待它们完成并写入结果后返回。
+    """
+
+    def __init__(
+        self,
+        run_job: JobRunner,
+        result_log: BatchResultLog,
+        workers: int = 2,
+        provider_limits: Optional[Dict[str, int]] = None,
+        providers_of: Optional[Callable[[BatchJob], Iterable[str]]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        on_interrupt: Optional[InterruptCallback] = None,
+    ):
+        self.run_job = run_job
+        self.result_log = result_log
+        self.workers = max(1, workers)
+        self.provider_limits = provider_limits or {}
+        self.providers_of = providers_of or (lambda job: [job.data_source])
+        self.on_progress = on_progress
+        self.on_interrupt = on_interrupt
+
+    async def run(self, jobs: Sequence[BatchJob]) -> BatchProgress:
+        done = self.result_log.completed()
+        pending = [job for job in jobs if job.key not in done]
+        progress = BatchProgress(total=len(jobs), skipped=len(jobs) - len(pending))
+        if progress.skipped:
+            logger.info(f"⏭️ 断点续跑：跳过 {progress.skipped} 个已完成任务")
+
+        slots = asyncio.Semaphore(self.workers)
+        limiter = ProviderLimiter(self.provider_limits)
+        symbol_locks: Dict[str, asyncio.Lock] = {}
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch-analysis")
+        progress_lock = threading.Lock()
+        interrupted: List[BatchJob] = []
+
+        def complete(record: Dict[str, Any], started: float, future) -> None:
+            error = future.exception()
+            if error is None:
+                record.update(status="success", **(future.result() or {}))
+            else:
+                logger.error(f"❌ 批量分析失败 {record['symbol']} {record['trade_date']}: {error}")
+                record.update(status="failed", error=str(error))
+            record["duration_seconds"] = round(time.monotonic() - started, 2)
+            record["finished_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+
+            self.result_log.append(record)
+            with progress_lock:
+                if record["status"] == "success":
+                    progress.succeeded += 1
+                else:
+                    progress.failed += 1
+                if self.on_progress:
+                    self.on_progress(progress, record)
+
+        async def run_one(job: BatchJob) -> None:
+            # 同一股票依次执行；先取提供商许可再占全局槽位：等待受限提供商的任务不挡住其他任务
+            symbol_lock = symbol_locks.setdefault(job.symbol, asyncio.Lock())
+            async with symbol_lock, limiter.hold(self.providers_of(job)), slots:
+                started = time.monotonic()
+                record: Dict[str, Any] = {"symbol": job.symbol, "trade_date": job.trade_date, "market_id": job.market_id}
+                future = executor.submit(self.run_job, job)
+                try:
+                    await asyncio.wrap_future(future)
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        # 已在线程中运行的分析无法取消：完成后在工作线程中写入结果
+                        interrupted.append(job)
+                        future.add_done_callback(lambda f: complete(record, started, f))
+                    raise
+                except Exception:
+                    pass  # 失败在 complete 中记录
+            complete(record, started, future)
+
+        try:
+            await asyncio.gather(*(run_one(job) for job in pending))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            if interrupted:
+                logger.warning(f"⏸️ 批量分析已中断，等待 {len(interrupted)} 个进行中的任务完成并写入结果")
+                if self.on_interrupt:
+                    self.on_interrupt(list(interrupted))
+                executor.shutdown(wait=True)
+            self.result_log.close()
+        return progress
@@ -1025,90 +1025,68 @@ def check_api_keys(llm_provider: str) -> bool:
 
     return True
 
-def run_analysis(predefined_config: Optional[dict] = None):
-    import time
-    start_time = time.time()  # 记录开始时间
-    
-    # First get all user selections
-    if predefined_config:
-        logger.info("Starting analysis with predefined configuration (Non-Interactive Mode)")
-        
-        # Map market_id to full market object if possible
-        markets = {
-            "1": {
-                "name": "美股",
-                "name_en": "US Stock",
-                "data_source": "yahoo_finance",
-                "format": "Direct input",
-                "pattern": r'^[A-Z]{1,5}$',
-                "default": "",
-                "examples": []
-            },
-            "2": {
-                "name": "A股",
-                "name_en": "China A-Share",
-                "data_source": "china_stock",
-                "format": "6 digits",
-                "pattern": r'^\d{6}$',
-                "default": "",
-                "examples": []
-            },
-            "3": {
-                "name": "港股",
-                "name_en": "Hong Kong Stock",
-                "data_source": "yahoo_finance",
-                "format": "XXXX.HK",
-                "pattern": r'^\d{4,5}\.HK$',
-                "default": "",
-                "examples": []
-            }
-        }
-        
-        market_id = predefined_config.get("market_id", "2")
-        market_info = markets.get(market_id, markets["2"])
-        
-        # Default values for missing fields
-        selections = {
-            "ticker": predefined_config.get("ticker", ""),
-            "market": market_info,
-            "analysis_date": predefined_config.get("analysis_date", datetime.datetime.now().strftime("%Y-%m-%d")),
-            # Use enum values for analysts
-            "analysts": predefined_config.get("analysts", [AnalystType.MARKET, AnalystType.NEWS, AnalystType.FUNDAMENTALS, AnalystType.SOCIAL]),
-            "research_depth": int(predefined_config.get("research_depth", 3)), # Default to 3
-            "llm_provider": predefined_config.get("llm_provider", "deepseek v3"), # Default to DeepSeek
-            "backend_url": predefined_config.get("backend_url", "https://api.deepseek.com"), # Default DeepSeek API
-            "shallow_thinker": "deepseek-chat", # Default
-            "deep_thinker": "deepseek-chat",   # Default
+def build_predefined_selections(predefined_config: dict) -> dict:
+    """根据命令行参数构建分析选项（非交互模式，缺省项使用默认值）"""
+    # Map market_id to full market object if possible
+    markets = {
+        "1": {
+            "name": "美股",
+            "name_en": "US Stock",
+            "data_source": "yahoo_finance",
+            "format": "Direct input",
+            "pattern": r'^[A-Z]{1,5}$',
+            "default": "",
+            "examples": []
+        },
+        "2": {
+            "name": "A股",
+            "name_en": "China A-Share",
+            "data_source": "china_stock",
+            "format": "6 digits",
+            "pattern": r'^\d{6}$',
+            "default": "",
+            "examples": []
+        },
+        "3": {
+            "name": "港股",
+            "name_en": "Hong Kong Stock",
+            "data_source": "yahoo_finance",
+            "format": "XXXX.HK",
+            "pattern": r'^\d{4,5}\.HK$',
+            "default": "",
+            "examples": []
         }
-        
-        # Handle backend URL for different providers if not explicitly set
-        if not predefined_config.get("backend_url"):
-            if "deepseek" in selections["llm_provider"]:
-                selections["backend_url"] = "https://api.deepseek.com"
-            elif "dashscope" in selections["llm_provider"]:
-                selections["backend_url"] = "https://dashscope.aliyuncs.com/api/v1"
+    }
 
-        
-        # Validate essential fields
-        if not selections["ticker"]:
-            ui.show_error("❌ Non-interactive mode requires a ticker symbol (--ticker)")
-            return
-            
-    else:
-        selections = get_user_selections()
+    market_id = predefined_config.get("market_id", "2")
+    market_info = markets.get(market_id, markets["2"])
+
+    # Default values for missing fields
+    selections = {
+        "ticker": predefined_config.get("ticker", ""),
+        "market": market_info,
+        "analysis_date": predefined_config.get("analysis_date", datetime.datetime.now().strftime("%Y-%m-%d")),
+        # Use enum values for analysts
+        "analysts": predefined_config.get("analysts", [AnalystType.MARKET, AnalystType.NEWS, AnalystType.FUNDAMENTALS, AnalystType.SOCIAL]),
+        "research_depth": int(predefined_config.get("research_depth", 3)), # Default to 3
+        "llm_provider": predefined_config.get("llm_provider", "deepseek v3"), # Default to DeepSeek
+        "backend_url": predefined_config.get("backend_url", "https://api.deepseek.com"), # Default DeepSeek API
+        "shallow_thinker": "deepseek-chat", # Default
+        "deep_thinker": "deepseek-chat",   # Default
+    }
 
-    # Check API keys before proceeding
-    if not check_api_keys(selections["llm_provider"]):
-        ui.show_error("分析终止 | Analysis terminated")
-        return
+    # Handle backend URL for different providers if not explicitly set
+    if not predefined_config.get("backend_url"):
+        if "deepseek" in selections["llm_provider"]:
+            selections["backend_url"] = "https://api.deepseek.com"
+        elif "dashscope" in selections["llm_provider"]:
+            selections["backend_url"] = "https://dashscope.aliyuncs.com/api/v1"
+
+    return selections
 
-    # 显示分析开始信息
-    ui.show_step_header(1, "准备分析环境 | Preparing Analysis Environment")
-    ui.show_progress(f"正在分析股票: {selections['ticker']}")
-    ui.show_progress(f"分析日期: {selections['analysis_date']}")
-    ui.show_progress(f"选择的分析师: {', '.join(analyst.value for analyst in selections['analysts'])}")
 
-    # Create config with selected research depth
+def build_analysis_config(selections: dict) -> dict:
+    """根据分析选项生成 TradingAgentsGraph 配置"""
     config = DEFAULT_CONFIG.copy()
     config["max_debate_rounds"] = selections["research_depth"]
     config["max_risk_discuss_rounds"] = selections["research_depth"]
@@ -1135,6 +1113,39 @@ def run_analysis(predefined_config: Optional[dict] = None):
         config["llm_provider"] = "google"
     else:
         config["llm_provider"] = selected_llm_provider_name
+    return config
+
+
+def run_analysis(predefined_config: Optional[dict] = None):
+    import time
+    start_time = time.time()  # 记录开始时间
+    
+    # First get all user selections
+    if predefined_config:
+        logger.info("Starting analysis with predefined configuration (Non-Interactive Mode)")
+        
+        selections = build_predefined_selections(predefined_config)
+
+        # Validate essential fields
+        if not selections["ticker"]:
+            ui.show_error("❌ Non-interactive mode requires a ticker symbol (--ticker)")
+            return
+            
+    else:
+        selections = get_user_selections()
+
+    # Check API keys before proceeding
+    if not check_api_keys(selections["llm_provider"]):
+        ui.show_error("分析终止 | Analysis terminated")
+        return
+
+    # 显示分析开始信息
+    ui.show_step_header(1, "准备分析环境 | Preparing Analysis Environment")
+    ui.show_progress(f"正在分析股票: {selections['ticker']}")
+    ui.show_progress(f"分析日期: {selections['analysis_date']}")
+    ui.show_progress(f"选择的分析师: {', '.join(analyst.value for analyst in selections['analysts'])}")
+
+    config = build_analysis_config(selections)
 
     # Initialize the graph
     ui.show_progress("正在初始化分析系统...")
@@ -1719,6 +1730,114 @@ def analyze(
     run_analysis(predefined_config)
 
 
+@app.command(
+    name="batch",
+    help="批量分析多只股票（可断点续跑）| Batch analysis with resume"
+)
+def batch(
+    symbols_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="股票列表文件，每行一个代码，可附加市场ID（如 0700.HK,3）| Symbol list file"),
+    start: str = typer.Option(..., "--start", "-s", help="开始日期 (YYYY-MM-DD) | Start date"),
+    end: Optional[str] = typer.Option(None, "--end", "-e", help="结束日期，默认与开始日期相同 | End date"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="结果文件 (JSON Lines)，同时作为断点 | Result file, also the checkpoint"),
+    workers: int = typer.Option(2, "--workers", "-w", min=1, help="并发分析数 | Concurrent analyses"),
+    limits: Optional[List[str]] = typer.Option(None, "--limit", "-L", help="按提供商限制并发，如 deepseek=1、china_stock=2 | Per-provider cap"),
+    depth: int = typer.Option(1, "--depth", "-l", min=1, max=5, help="研究深度 (1-5) | Research depth"),
+    provider: Optional[str] = typer.Option(None, "--provider", "-p", help="LLM提供商 | LLM provider"),
+    analysts: Optional[List[str]] = typer.Option(None, "--analysts", "-a", help="指定分析师 (market/news/fundamentals/social) | Specific analysts"),
+    include_weekends: bool = typer.Option(False, "--include-weekends", help="包含周末日期 | Include weekends"),
+):
+    """
+    无界面批量分析：股票列表 × 日期区间，结果逐条写入 JSON Lines；
+    中断后用同一输出文件重新运行即可从断点继续（已成功的任务被跳过）
+    """
+    import asyncio
+    from cli.batch import BatchResultLog, BatchRunner, build_jobs, load_symbols, parse_limits, trade_dates
+    from tradingagents.graph.graph_pool import TradingGraphPool
+
+    try:
+        symbols = load_symbols(symbols_file)
+        dates = trade_dates(start, end, include_weekends=include_weekends)
+        provider_limits = parse_limits(limits)
+    except ValueError as e:
+        ui.show_error(f"参数错误 | Invalid argument: {e}")
+        raise typer.Exit(code=2)
+
+    jobs = build_jobs(symbols, dates)
+    if not jobs:
+        ui.show_warning("没有需要分析的任务 | Nothing to analyze")
+        return
+
+    predefined_config = {"research_depth": depth}
+    if provider:
+        predefined_config["llm_provider"] = provider
+    if analysts:
+        selected = [ua for ua in AnalystType if ua.value in analysts]
+        if not selected:
+            ui.show_error(f"无效的分析师: {', '.join(analysts)}")
+            raise typer.Exit(code=2)
+        predefined_config["analysts"] = selected
+    selections = build_predefined_selections(predefined_config)
+    if not check_api_keys(selections["llm_provider"]):
+        ui.show_error("分析终止 | Analysis terminated")
+        raise typer.Exit(code=1)
+
+    config = build_analysis_config(selections)
+    selected_analysts = [analyst.value for analyst in selections["analysts"]]
+    # 独立的图实例池，空闲上限与并发数一致，每个 worker 完成后都能把实例留给下一个任务
+    graph_pool = TradingGraphPool(max_idle_per_key=workers, max_keys=1)
+
+    def run_job(job):
+        # 池中实例独占借出，并发任务各用一个实例，完成后复用
+        with graph_pool.lease(selected_analysts, False, config) as graph:
+            final_state, decision = graph.propagate(job.symbol, job.trade_date)
+        return {"decision": decision, "final_trade_decision": final_state.get("final_trade_decision")}
+
+    def on_progress(progress, record):
+        mark = "✅" if record["status"] == "success" else "❌"
+        decision = record.get("decision")
+        detail = decision.get("action", "") if isinstance(decision, dict) else record.get("error", "")
+        console.print(
+            f"{mark} {record['symbol']} {record['trade_date']} {detail} "
+            f"[dim]({record['duration_seconds']:.0f}s)[/dim] | {progress.describe()}"
+        )
+
+    def on_interrupt(running_jobs):
+        names = ", ".join(f"{job.symbol} {job.trade_date}" for job in running_jobs)
+        ui.show_warning(
+            f"⏳ 已中断，等待 {len(running_jobs)} 个进行中的分析完成并保存结果: {names} | "
+            f"Interrupted, waiting for in-flight analyses to finish"
+        )
+
+    if output is None:
+        output = Path(config["results_dir"]) / "batch" / f"{symbols_file.stem}_{dates[0]}_{dates[-1]}.jsonl"
+
+    ui.show_step_header(1, "批量分析 | Batch Analysis")
+    ui.show_progress(f"股票 {len(symbols)} 只 × 日期 {len(dates)} 个 = {len(jobs)} 个任务，并发 {workers}")
+    if provider_limits:
+        ui.show_progress(f"提供商并发限制: {', '.join(f'{k}={v}' for k, v in provider_limits.items())}")
+    ui.show_progress(f"结果文件: {output}")
+
+    runner = BatchRunner(
+        run_job,
+        BatchResultLog(output),
+        workers=workers,
+        provider_limits=provider_limits,
+        providers_of=lambda job: [config["llm_provider"], job.data_source],
+        on_progress=on_progress,
+        on_interrupt=on_interrupt,
+    )
+    try:
+        progress = asyncio.run(runner.run(jobs))
+    except KeyboardInterrupt:
+        ui.show_warning(f"已中断，已完成的任务已保存，重新运行同一命令即可继续 | Interrupted, rerun to resume: {output}")
+        raise typer.Exit(code=130)
+
+    ui.show_success(f"🎉 批量分析结束: {progress.describe()}")
+    if progress.failed:
+        ui.show_warning(f"{progress.failed} 个任务失败，重新运行同一命令将重试失败任务")
+        raise typer.Exit(code=1)
+
+
 @app.command(
     name="config",
     help="配置设置 | Configuration settings"
@@ -2086,6 +2205,11 @@ def help_chinese():
         "股票分析 | Stock Analysis",
         "启动交互式多智能体股票分析工具"
     )
+    commands_table.add_row(
+        "batch",
+        "批量分析 | Batch Analysis",
+        "多只股票 × 日期区间并发分析，结果写入 JSON Lines，可断点续跑"
+    )
     commands_table.add_row(
         "config",
         "配置设置 | Configuration",
@@ -2136,7 +2260,7 @@ def main():
             # 只在退出码为2（typer的未知命令错误）时提供智能建议
             if e.code == 2 and len(sys.argv) > 1:
                 unknown_command = sys.argv[1]
-                available_commands = ['analyze', 'config', 'version', 'data-config', 'examples', 'test', 'help']
+                available_commands = ['analyze', 'batch', 'config', 'version', 'data-config', 'examples', 'test', 'help']
                 
                 # 使用difflib找到最相似的命令
                 suggestions = get_close_matches(unknown_command, available_commands, n=3, cutoff=0.6)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+分析流程端到端性能基准
+
+先联网录制一次 LLM 与数据调用，之后离线、确定性地回放整个 TradingAgentsGraph，
+输出每个节点的耗时、LLM 耗时、工具耗时和序列化开销，并可与基线报告比较以发现性能回退。
+
+    # 录制（需要 API 密钥和网络）
+    python scripts/benchmark_pipeline.py --record --ticker AAPL --date 2024-05-10
+
+    # 离线回放 5 次，保存为基线
+    python scripts/benchmark_pipeline.py --ticker AAPL --date 2024-05-10 -n 5 --output baseline.json
+
+    # 与基线比较，任一节点耗时增长超过 20% 时以非零状态退出
+    python scripts/benchmark_pipeline.py --ticker AAPL --date 2024-05-10 -n 5 --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.utils.pipeline_benchmark import compare_reports, format_report, run_pipeline_benchmark
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="TradingAgents 分析流程性能基准（LLM 录制/回放）")
+    parser.add_argument("--ticker", required=True, help="股票代码")
+    parser.add_argument("--date", required=True, help="交易日期 YYYY-MM-DD")
+    parser.add_argument("--fixtures", default="./results/llm_fixtures", help="夹具目录")
+    parser.add_argument("--record", action="store_true", help="联网运行并录制夹具（覆盖已有夹具）")
+    parser.add_argument("-n", "--iterations", type=int, default=3, help="回放次数，取中位数")
+    parser.add_argument("--analysts", default="market,social,news,fundamentals", help="启用的分析师，逗号分隔")
+    parser.add_argument("--latency", type=float, default=0.0, help="回放时每次调用的固定延迟（秒）")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="回放延迟 = 录制耗时 × 该倍数（叠加固定延迟）")
+    parser.add_argument("--output", help="报告保存路径（JSON）")
+    parser.add_argument("--baseline", help="基线报告（JSON），用于检测性能回退")
+    parser.add_argument("--threshold", type=float, default=0.2, help="回退阈值，默认 20%%")
+    parser.add_argument("--provider", help="录制时使用的 LLM 提供商（默认取配置）")
+    parser.add_argument("--deep-model", help="录制时使用的深度思考模型")
+    parser.add_argument("--quick-model", help="录制时使用的快速思考模型")
+    args = parser.parse_args()
+
+    config = {}
+    if args.provider:
+        config["llm_provider"] = args.provider
+    if args.deep_model:
+        config["deep_think_llm"] = args.deep_model
+    if args.quick_model:
+        config["quick_think_llm"] = args.quick_model
+
+    report = run_pipeline_benchmark(
+        args.ticker,
+        args.date,
+        args.fixtures,
+        mode="record" if args.record else "replay",
+        iterations=args.iterations,
+        selected_analysts=[a.strip() for a in args.analysts.split(",") if a.strip()],
+        config=config,
+        latency=args.latency,
+        latency_scale=args.latency_scale,
+    )
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 报告已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, threshold=args.threshold)
+        if regressions:
+            print(f"❌ 发现 {len(regressions)} 项性能回退:")
+            for item in regressions:
+                print(f"   {item['node']}.{item['metric']}: {item['baseline_ms']:.1f}ms → {item['current_ms']:.1f}ms")
+            return 1
+        print("✅ 未发现性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+启动耗时报告
+
+在干净的子进程中以 `python -X importtime` 导入入口模块，输出按顶层导入和按包汇总的耗时，
+用于定位拖慢 API 冷启动和 uvicorn worker 启动的依赖。
+
+    # 分析 API 入口
+    python scripts/startup_report.py
+
+    # 模拟只提供报告查询的 worker（不导入数据相关路由）
+    API_DISABLED_ROUTER_GROUPS=market_data,data_sync,paper python scripts/startup_report.py
+
+    # 分析单个模块，输出 JSON
+    python scripts/startup_report.py --module tradingagents.dataflows.providers.china.baostock --json
+
+运行中服务的启动阶段耗时可通过 GET /api/system/startup-report 查看（需管理员）。
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.startup_profile import format_importtime, run_importtime
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="启动耗时报告（python -X importtime 分解）")
+    parser.add_argument("--module", default="app.main", help="入口模块，默认 app.main")
+    parser.add_argument("--top", type=int, default=30, help="显示前 N 项")
+    parser.add_argument("--timeout", type=float, default=120.0, help="子进程超时（秒）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+
+    result = run_importtime(args.module, top=args.top, timeout=args.timeout)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(format_importtime(result))
+    return 0 if result["returncode"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -164,6 +164,115 @@ def test_get_pe_pb_with_fallback_to_static(monkeypatch):
     assert result["source"] == "daily_basic"
 
 
+
+class _BatchCollection:
+    def __init__(self, docs, calls, name):
+        self._docs = docs
+        self._calls = calls
+        self._name = name
+
+    def find(self, query, projection=None):
+        self._calls.append(("find", self._name))
+        codes = query["code"]["$in"]
+        return [d for d in self._docs if d["code"] in codes]
+
+    def aggregate(self, pipeline):
+        self._calls.append(("aggregate", self._name))
+        codes = pipeline[0]["$match"]["code"]["$in"]
+        latest = {}
+        for d in sorted(self._docs, key=lambda d: d["report_period"], reverse=True):
+            if d["code"] in codes and d["code"] not in latest:
+                latest[d["code"]] = {"_id": d["code"], "total_equity": d.get("total_equity")}
+        return list(latest.values())
+
+
+class _BatchClient:
+    def __init__(self, data):
+        self.calls = []
+        self._data = data
+
+    def __getitem__(self, name):
+        return self
+
+    def __getattr__(self, name):
+        return _BatchCollection(self._data.get(name, []), self.calls, name)
+
+
+def _batch_client():
+    return _BatchClient({
+        "market_quotes": [
+            {"code": "000001", "close": 11.0, "pre_close": 10.0},
+            {"code": "600000", "close": 8.0, "pre_close": 8.0},
+        ],
+        "stock_basic_info": [
+            {"code": "000001", "source": "akshare", "pe": 9.0},
+            {"code": "000001", "source": "tushare", "pe_ttm": 10.0, "pe": 10.0, "pb": 1.0, "total_share": 100000},
+            {"code": "600000", "source": "akshare", "pe": 5.0, "pb": 0.5},
+        ],
+        "stock_financial_data": [
+            {"code": "000001", "report_period": "20231231", "total_equity": 1e10},
+            {"code": "000001", "report_period": "20240930", "total_equity": 2e10},
+        ],
+    })
+
+
+def test_calculate_realtime_pe_pb_many_batches_queries():
+    from tradingagents.dataflows.realtime_metrics import calculate_realtime_pe_pb_many
+
+    client = _batch_client()
+    result = calculate_realtime_pe_pb_many(["000001", "600000", "1"], client)
+
+    # 每个集合只查询一次
+    assert sorted(client.calls) == [
+        ("aggregate", "stock_financial_data"),
+        ("find", "market_quotes"),
+        ("find", "stock_basic_info"),
+    ]
+    # 昨日市值 100 亿，TTM 净利润 10 亿，实时市值 110 亿
+    assert result["000001"]["pe_ttm"] == 11.0
+    assert result["000001"]["pb"] == 0.55  # 使用最新一期净资产 200 亿
+    assert result["600000"] is None  # 无 Tushare 基础信息
+    assert len(result) == 2
+
+
+def test_get_pe_pb_with_fallback_many_uses_static_basics():
+    from tradingagents.dataflows.realtime_metrics import get_pe_pb_with_fallback_many
+
+    client = _batch_client()
+    result = get_pe_pb_with_fallback_many(["000001", "600000", "300750"], client)
+
+    assert result["000001"]["is_realtime"] is True
+    assert result["600000"]["source"] == "daily_basic"
+    assert result["600000"]["pe"] == 5.0
+    assert result["300750"] == {}
+    assert len(client.calls) == 3
+
+
+def test_screening_enrichment_fetches_pe_pb_in_one_batch(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    import app.services.enhanced_screening_service as mod
+
+    client = _batch_client()
+    monkeypatch.setattr(mod, "get_mongo_db", lambda: SimpleNamespace(client=client))
+    service = mod.EnhancedScreeningService.__new__(mod.EnhancedScreeningService)
+    items = [
+        {"code": "000001", "pe": 99.0},
+        {"code": "600000", "pe": None},
+        {"code": "300750", "pe": 30.0},
+        {"name": "无代码"},
+    ]
+
+    enriched = asyncio.run(service._enrich_results_with_realtime_metrics(items))
+
+    assert len(client.calls) == 3
+    assert enriched[0]["pe_ttm"] == 11.0 and enriched[0]["pe_is_realtime"] is True
+    assert enriched[1]["pe"] == 5.0 and enriched[1]["pe_source"] == "daily_basic"
+    # 没有可用数据时保留原值
+    assert enriched[2] == {"code": "300750", "pe": 30.0}
+    assert enriched[3] == {"name": "无代码"}
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
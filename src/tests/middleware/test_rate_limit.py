@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.api_rate_limiter import ApiRateLimiter, RateLimitRule, parse_rate_limit_rules
+from app.core.config import settings
+from app.middleware.rate_limit import QuotaMiddleware, RateLimitMiddleware, _identity
+from app.services.auth_service import AuthService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeGcraRedis:
+    """按脚本语义模拟 Redis 中的 GCRA 状态"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.tat = {}
+        self.calls = []
+
+    def register_script(self, source):
+        async def script(keys, args):
+            interval, burst, requested, refund = args
+            self.calls.append((requested, refund))
+            now = self.clock() * 1000
+            tat = max(self.tat.get(keys[0], now) - refund * interval, now)
+            granted = min(requested, max(int((now + burst * interval - tat) // interval), 0))
+            if granted or refund:
+                self.tat[keys[0]] = tat + granted * interval
+            if granted:
+                return [granted, 0]
+            return [0, int(tat - burst * interval + interval - now)]
+
+        return script
+
+
+def test_parse_rate_limit_rules():
+    rules = parse_rate_limit_rules("/api/a=10/30:3, /api/b=5,bad")
+    assert rules["/api/a"] == RateLimitRule(10, 30.0, 3)
+    assert rules["/api/b"].capacity == 5 and rules["/api/b"].period == 60.0
+    assert "bad" not in rules
+
+
+def test_batches_permits_locally_and_caches_denials():
+    clock = FakeClock()
+    redis = FakeGcraRedis(clock)
+    limiter = ApiRateLimiter(
+        rules={"/api/x": RateLimitRule(limit=600, period=60, burst=40)},
+        redis_getter=lambda: redis,
+        max_batch=8,
+        clock=clock,
+    )
+
+    async def burst(n):
+        return [await limiter.acquire("u1", "/api/x") for _ in range(n)]
+
+    decisions = asyncio.run(burst(45))
+    assert sum(d.allowed for d in decisions) == 40
+    assert len(redis.calls) < 15  # 大部分请求在本地判定
+    assert max(requested for requested, _ in redis.calls) == 4  # 领取量不超过突发容量的 1/10
+
+    # 被拒绝后在 retry_after 内直接本地拒绝
+    calls = len(redis.calls)
+    denied = asyncio.run(limiter.acquire("u1", "/api/x"))
+    assert not denied.allowed and denied.source == "denied_cache"
+    assert len(redis.calls) == calls
+
+    # 按速率恢复（10次/秒）
+    clock.now += 1.0
+    assert sum(d.allowed for d in asyncio.run(burst(12))) == 10
+
+
+def test_unused_permits_are_refunded_after_lease():
+    clock = FakeClock()
+    redis = FakeGcraRedis(clock)
+    limiter = ApiRateLimiter(
+        rules={"/api/x": RateLimitRule(limit=100, period=60, burst=100)},
+        redis_getter=lambda: redis,
+        clock=clock,
+    )
+
+    async def run():
+        for _ in range(4):
+            await limiter.acquire("u1", "/api/x")
+        clock.now += 5
+        await limiter.acquire("u1", "/api/x")
+
+    asyncio.run(run())
+    requested, refund = redis.calls[-1]
+    assert refund > 0 and requested < redis.calls[-2][0]
+
+
+def test_middleware_returns_429_and_falls_back_without_redis():
+    clock = FakeClock()
+    limiter = ApiRateLimiter(
+        rules={"/api/x": RateLimitRule(limit=2, period=60)},
+        redis_getter=lambda: None,
+        clock=clock,
+    )
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.get("/api/x")
+    async def x():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert [client.get("/api/x").status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get("/api/x")
+    assert response.json()["detail"]["error"]["code"] == "RATE_LIMIT_EXCEEDED"
+    assert int(response.headers["retry-after"]) >= 1
+    assert limiter.get_stats()["fallback"] == 2
+
+
+def test_middleware_accepts_deprecated_default_rate_limit():
+    app = FastAPI()
+
+    @app.get("/api/other")
+    async def other():
+        return {"ok": True}
+
+    with pytest.warns(DeprecationWarning):
+        middleware = RateLimitMiddleware(app, default_rate_limit=2)
+    assert middleware.limiter.rule_for("/api/other").limit == 2
+    assert middleware.limiter.rule_for("/api/auth/login").limit == 5
+
+
+def _scope(peer, headers=()):
+    return {"type": "http", "client": (peer, 1234), "headers": [(k, v) for k, v in headers]}
+
+
+def test_identity_resolves_bearer_jwt_before_routing():
+    token = AuthService.create_access_token(sub="alice")
+    assert _identity(_scope("10.0.0.5", [(b"authorization", f"Bearer {token}".encode())])) == "alice"
+    assert _identity(_scope("10.0.0.5", [(b"authorization", b"Bearer broken")])) == "ip:10.0.0.5"
+
+
+def test_identity_trusts_forwarded_for_only_from_configured_proxies(monkeypatch):
+    forwarded = [(b"x-forwarded-for", b"1.2.3.4, 10.0.0.7")]
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "")
+    assert _identity(_scope("10.0.0.5", forwarded)) == "ip:10.0.0.5"
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "10.0.0.0/8")
+    assert _identity(_scope("10.0.0.5", forwarded)) == "ip:1.2.3.4"
+    # 直连方不受信任时忽略伪造的头
+    assert _identity(_scope("8.8.8.8", forwarded)) == "ip:8.8.8.8"
+
+
+def test_quota_middleware_counts_authenticated_users(monkeypatch):
+    usage = {}
+
+    async def fake_check(self, user_id):
+        usage[user_id] = usage.get(user_id, 0) + 1
+        return usage[user_id]
+
+    monkeypatch.setattr(QuotaMiddleware, "check_daily_quota", fake_check)
+    app = FastAPI()
+    app.add_middleware(QuotaMiddleware, daily_quota=1)
+
+    @app.post("/api/analysis/single")
+    async def single():
+        return {"ok": True}
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {AuthService.create_access_token(sub='bob')}"}
+    assert [client.post("/api/analysis/single", headers=headers).status_code for _ in range(2)] == [200, 429]
+    assert client.post("/api/analysis/single").status_code == 200
+    assert usage == {"bob": 2}
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+
+import pytest
+
+
+def test_executor_queues_and_rejects_beyond_limits():
+    from app.services.analysis.executor import AnalysisExecutor, AnalysisRejectedError
+
+    async def _run():
+        executor = AnalysisExecutor(max_workers=1, max_waiting=1)
+        gate = threading.Event()
+
+        first = asyncio.create_task(executor.run(gate.wait, task_id="t1"))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(executor.run(lambda: "ok", task_id="t2"))
+        await asyncio.sleep(0.05)
+
+        stats = executor.stats()
+        assert stats["running"] == 1 and stats["waiting"] == 1
+
+        with pytest.raises(AnalysisRejectedError):
+            await executor.run(lambda: "rejected", task_id="t3")
+
+        gate.set()
+        assert await first is True
+        assert await second == "ok"
+
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+        assert stats["running"] == 0 and stats["waiting"] == 0
+        executor.shutdown()
+
+    asyncio.run(_run())
+
+
+def test_executor_limits_provider_concurrency():
+    from app.services.analysis.executor import AnalysisExecutor, parse_provider_limits
+
+    assert parse_provider_limits("dashscope:2, OpenAI:4,bad,x:y") == {"dashscope": 2, "openai": 4}
+
+    async def _run():
+        executor = AnalysisExecutor(max_workers=4, max_waiting=10, provider_limits={"dashscope": 1})
+        active = {"now": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def _work():
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            threading.Event().wait(0.05)
+            with lock:
+                active["now"] -= 1
+
+        await asyncio.gather(*(executor.run(_work, provider="DashScope") for _ in range(3)))
+        assert active["peak"] == 1
+        assert executor.stats()["completed"] == 3
+        executor.shutdown()
+
+    asyncio.run(_run())
+
+
+def test_executor_reserves_slot_before_queue_depth_check():
+    from app.services.analysis.executor import AnalysisExecutor, AnalysisRejectedError
+
+    async def _run():
+        executor = AnalysisExecutor(max_workers=1, max_waiting=1, max_queue_depth=100)
+
+        async def _slow_depth():
+            await asyncio.sleep(0.02)
+            return 0
+
+        executor._redis_queue_depth = _slow_depth
+
+        # 并发提交：检查和占位之间没有 await，只有两个能通过
+        results = await asyncio.gather(
+            *(executor.admit(f"t{i}") for i in range(4)), return_exceptions=True
+        )
+        admitted = [r for r in results if isinstance(r, str)]
+        assert admitted == ["t0", "t1"]
+        assert sum(isinstance(r, AnalysisRejectedError) for r in results) == 2
+        assert executor.stats()["reserved"] == 2
+
+        # 已预留的任务直接使用名额；未使用的名额可归还
+        assert await executor.run(lambda: "ok", task_id="t0") == "ok"
+        executor.release("t1")
+        assert executor.stats()["reserved"] == 0
+        assert await executor.admit("t2") == "t2"
+        executor.shutdown()
+
+    asyncio.run(_run())
+
+
+def test_process_tracker_restores_saved_progress(tmp_path, monkeypatch):
+    from app.services.progress.tracker import RedisProgressTracker, get_progress_by_id
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("REDIS_ENABLED", "false")
+
+    parent = RedisProgressTracker("task-1", ["market", "fundamentals"], "标准", "deepseek")
+    parent.update_progress({"progress_percentage": 20, "last_message": "🔧 检查环境配置"})
+
+    child = RedisProgressTracker.restore("task-1", ["market", "fundamentals"], "标准", "deepseek")
+    saved = get_progress_by_id("task-1")
+    assert saved["progress_percentage"] == 20
+    assert saved["last_message"] == "🔧 检查环境配置"
+    assert saved["llm_provider"] == "deepseek"
+
+    assert child.progress_data["start_time"] == parent.progress_data["start_time"]
+    assert [s.status for s in child.analysis_steps] == [s.status for s in parent.analysis_steps]
+    child.update_progress({"progress_percentage": 30})
+    assert get_progress_by_id("task-1")["progress_percentage"] == 30
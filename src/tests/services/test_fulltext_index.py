@@ -0,0 +1,120 @@
+from datetime import datetime
+
+
+def test_tokenize_uses_cjk_bigrams_and_words():
+    from app.services.fulltext_index import tokenize
+
+    assert tokenize("平安银行 发布 2024 年报, Q3 EPS") == ["平安", "安银", "银行", "发布", "2024", "年报", "q3", "eps"]
+
+
+def test_bm25_ranking_filters_and_persistence(tmp_path):
+    from app.services.fulltext_index import FullTextIndex
+
+    index = FullTextIndex(str(tmp_path), flush_docs=2, max_segments=2)
+    index.add("a", "平安银行发布年报，净利润增长", "平安银行年报显示……", datetime(2024, 1, 2), ["000001"])
+    index.add("b", "银行板块集体走强", "多家银行股上涨，平安银行领涨", datetime(2024, 1, 3), ["000001", "600036"])
+    index.add("c", "贵州茅台提价", "茅台宣布出厂价上调", datetime(2024, 1, 4), ["600519"])
+    index.maybe_flush()
+
+    hits = index.search("平安银行年报")
+    assert [h["key"] for h in hits] == ["a", "b"]
+    assert hits[0]["score"] > hits[1]["score"]
+
+    assert [h["key"] for h in index.search("银行", symbols=["600036"])] == ["b"]
+    assert [h["key"] for h in index.search("银行", start_time=datetime(2024, 1, 3))] == ["b"]
+    assert index.search("不存在的词") == []
+
+    # 更新同一 key：旧版本失效
+    index.add("c", "贵州茅台提价", "茅台宣布出厂价上调，平安银行无关", datetime(2024, 1, 4), ["600519"])
+    index.flush()
+    index.add("d", "招商银行分红", "招商银行宣布分红", datetime(2024, 1, 5), ["600036"])
+    index.flush()
+    assert index.stats()["segments"] <= 2
+    assert len(index) == 4
+
+    index.close()
+    reopened = FullTextIndex(str(tmp_path))
+    assert len(reopened) == 4
+    assert [h["key"] for h in reopened.search("茅台")] == ["c"]
+    assert reopened.search("分红")[0]["key"] == "d"
+    reopened.close()
+
+
+def test_shared_directory_across_processes(tmp_path):
+    import os
+    import time
+
+    from app.services.fulltext_index import ORPHAN_GRACE_SECONDS, FullTextIndex
+
+    # 两个实例模拟共享索引目录的两个进程
+    worker_a = FullTextIndex(str(tmp_path), max_segments=2)
+    worker_b = FullTextIndex(str(tmp_path), max_segments=2)
+    assert len(worker_a) == 0 and len(worker_b) == 0
+
+    worker_a.add("a", "平安银行发布年报", "", datetime(2024, 1, 2), ["000001"])
+    worker_a.flush()
+    worker_b.add("b", "招商银行分红", "", datetime(2024, 1, 3), ["600036"])
+    worker_b.flush()
+    # b 落盘前已载入 a 的段：段编号不冲突，清单同时包含两者
+    assert len({s.name for s in worker_b._segments}) == 2
+    assert [h["key"] for h in worker_a.search("分红")] == ["b"]
+
+    # 触发合并后，另一实例按新清单重新加载
+    worker_a.add("c", "贵州茅台提价", "", datetime(2024, 1, 4), ["600519"])
+    worker_a.flush()
+    assert worker_a.stats()["segments"] == 1
+    assert sorted(h["key"] for h in worker_b.search("银行 茅台")) == ["a", "b", "c"]
+
+    # 未登记的段：宽限期内保留，过期后清理
+    fresh = tmp_path / "seg_999998"
+    stale = tmp_path / "seg_999999"
+    fresh.mkdir()
+    stale.mkdir()
+    old = time.time() - ORPHAN_GRACE_SECONDS - 60
+    os.utime(stale, (old, old))
+    reopened = FullTextIndex(str(tmp_path))
+    assert len(reopened) == 3
+    assert fresh.exists() and not stale.exists()
+
+    for index in (worker_a, worker_b, reopened):
+        index.close()
+
+
+def test_news_search_supplements_local_index_with_text_search(monkeypatch, tmp_path):
+    import asyncio
+
+    from app.services import news_data_service as module
+    from app.services.fulltext_index import FullTextIndex
+
+    index = FullTextIndex(str(tmp_path))
+    index.add("u1|银行年报|", "银行年报", "", None, ["000001"], ref={"url": "u1", "title": "银行年报", "publish_time": None})
+    monkeypatch.setattr(module, "get_fulltext_index", lambda name: index)
+    monkeypatch.setattr(module.settings, "FULLTEXT_INDEX_ENABLED", True)
+
+    local_doc = {"_id": "1", "url": "u1", "title": "银行年报", "publish_time": None}
+    other_process_doc = {"_id": "2", "url": "u2", "title": "银行分红", "publish_time": None}
+
+    class _Cursor:
+        def __init__(self, docs):
+            self.docs = docs
+
+        def sort(self, *args):
+            return self
+
+        def limit(self, n):
+            return self
+
+        async def to_list(self, length=None):
+            return list(self.docs)
+
+    class _Collection:
+        def find(self, query, projection=None):
+            return _Cursor([other_process_doc, local_doc] if "$text" in query else [local_doc])
+
+    service = module.NewsDataService.__new__(module.NewsDataService)
+    service.logger = module.logger
+    service._get_collection = lambda: _Collection()
+
+    results = asyncio.run(service.search_news("银行", limit=5))
+    assert [doc["_id"] for doc in results] == ["1", "2"]
+    index.close()
@@ -0,0 +1,58 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+
+TZ = ZoneInfo("Asia/Shanghai")
+
+
+def _at(hh, mm, ss=0):
+    return datetime(2025, 1, 2, hh, mm, ss, tzinfo=TZ)
+
+
+def test_ring_buffer_series_and_minute_bars():
+    from app.services.intraday_ring_buffer import IntradayRingBuffer
+
+    buf = IntradayRingBuffer(capacity=600)  # 最小记录间隔 30 秒
+    ticks = [
+        (_at(9, 30, 0), 10.0, 100, 1000.0),
+        (_at(9, 30, 40), 10.4, 150, 1520.0),
+        (_at(9, 31, 10), 10.2, 180, 1826.0),
+        (_at(9, 31, 20), 10.3, 190, 1929.0),  # 距上次不足 30 秒，抽样跳过
+        (_at(9, 32, 0), 10.1, 200, 2028.0),
+    ]
+    written = [
+        buf.record_tick({"000001": {"close": c, "volume": v, "amount": a}, "600000": {"close": 5.0}}, "20250102", t)
+        for t, c, v, a in ticks
+    ]
+    assert written == [True, True, True, False, True]
+
+    points = buf.series("000001")["points"]
+    assert [p["close"] for p in points] == [10.0, 10.4, 10.2, 10.1]
+    assert points[0]["time"].startswith("2025-01-02T09:30:00")
+
+    bars = buf.minute_bars("000001")
+    assert [b["minute"] for b in bars] == ["09:30", "09:31", "09:32"]
+    assert bars[0] == {"minute": "09:30", "open": 10.0, "high": 10.4, "low": 10.0, "close": 10.4,
+                       "volume": 150.0, "amount": 1520.0, "vwap": round(1520 / 150, 4)}
+    assert bars[1]["volume"] == 30.0 and bars[1]["vwap"] == 10.2
+
+    assert set(buf.roll_session()) == {"000001", "600000"}
+    assert buf.has_unfinalized_session
+
+    # 新交易日自动重置
+    buf.record_tick({"000001": {"close": 11.0}}, "20250103", _at(9, 30))
+    assert buf.trade_date == "20250103"
+    assert [p["close"] for p in buf.series("000001")["points"]] == [11.0]
+
+
+def test_ring_buffer_wraps_and_keeps_latest_ticks():
+    from app.services.intraday_ring_buffer import IntradayRingBuffer
+
+    buf = IntradayRingBuffer(capacity=8, initial_symbols=16)
+    for i in range(12):
+        codes = {f"{n:06d}": {"close": float(i)} for n in range(i + 1)}  # 股票数逐步增长，触发扩容
+        buf.record_tick(codes, "20250102", datetime.fromtimestamp(1_735_781_400 + i * 3600, tz=TZ))
+
+    assert [p["close"] for p in buf.series("000000")["points"]] == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0]
+    assert [p["close"] for p in buf.series("000011")["points"]] == [11.0]
+    assert buf.stats()["symbols"] == 12
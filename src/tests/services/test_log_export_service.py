@@ -0,0 +1,69 @@
+import zipfile
+from datetime import datetime, timedelta
+
+
+def _write_log(path, count=3000):
+    base = datetime(2024, 1, 1, 0, 0, 0)
+    lines = []
+    for i in range(count):
+        ts = (base + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S")
+        level = "ERROR" if i % 10 == 0 else "INFO"
+        lines.append(f"{ts},000 | webapi | {level} | module:func:1 | 消息 {i}")
+        if i % 10 == 0:
+            lines.append("Traceback (most recent call last):")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return lines
+
+
+def _service(tmp_path):
+    from app.services.log_export_service import LogExportService
+    return LogExportService(log_dir=str(tmp_path), index_interval=4096)
+
+
+def test_tail_reader_matches_full_read(tmp_path):
+    from app.services.log_export_service import _tail_lines
+
+    lines = _write_log(tmp_path / "webapi.log")
+    assert _tail_lines(tmp_path / "webapi.log", 25, chunk_size=100) == lines[-25:]
+    assert _tail_lines(tmp_path / "webapi.log", 10 ** 6, chunk_size=4096) == lines
+
+    result = _service(tmp_path).read_log_file("webapi.log", lines=50, level="ERROR")
+    assert result["stats"]["total_lines"] == len(lines)
+    assert result["lines"] == [l for l in lines[-50:] if "ERROR" in l]
+
+
+def test_time_range_query_seeks_with_index(tmp_path):
+    lines = _write_log(tmp_path / "webapi.log")
+    service = _service(tmp_path)
+
+    result = service.read_log_file(
+        "webapi.log", lines=1000, start_time="2024-01-01T00:40:00", end_time="2024-01-01 00:40:09"
+    )
+    assert result["lines"][0].startswith("2024-01-01 00:40:00")
+    assert result["lines"][1] == "Traceback (most recent call last):"
+    assert result["lines"][-1].startswith("2024-01-01 00:40:09")
+    assert result["stats"]["filtered_lines"] == 11
+
+    index = service._get_index(tmp_path / "webapi.log")
+    assert len(index.offsets) > 10
+    assert 0 < index.seek_offset("2024-01-01 00:40:00") < (tmp_path / "webapi.log").stat().st_size
+
+    # 文件追加后索引增量扩展
+    with open(tmp_path / "webapi.log", "a", encoding="utf-8") as f:
+        f.write("2024-01-02 00:00:00,000 | webapi | INFO | m:f:1 | 新行\n")
+    result = service.read_log_file("webapi.log", lines=5, start_time="2024-01-02")
+    assert result["lines"] == ["2024-01-02 00:00:00,000 | webapi | INFO | m:f:1 | 新行"]
+    assert result["stats"]["total_lines"] == len(lines) + 1
+
+
+def test_export_streams_filtered_lines_into_zip(tmp_path, monkeypatch):
+    (tmp_path / "logs").mkdir()
+    lines = _write_log(tmp_path / "logs" / "webapi.log")
+    monkeypatch.chdir(tmp_path)
+    service = _service(tmp_path / "logs")
+
+    export_path = service.export_logs(level="ERROR", end_time="2024-01-01 00:00:59", format="zip")
+    with zipfile.ZipFile(export_path) as zf:
+        content = zf.read("webapi.log").decode("utf-8").splitlines()
+    assert content == [l for l in lines if "ERROR" in l and l < "2024-01-01 00:01:00"]
+    assert len(content) == 6
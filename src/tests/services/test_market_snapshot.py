@@ -0,0 +1,111 @@
+import asyncio
+from typing import Any, Dict, List
+
+
+class FakeCursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self._docs = docs
+
+    async def to_list(self, length=None):
+        return list(self._docs)
+
+
+class FakeColl:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(self._docs)
+
+    def aggregate(self, pipeline, **kwargs):
+        return FakeCursor(self._docs)
+
+
+class FakeDB:
+    def __init__(self, collections: Dict[str, List[Dict[str, Any]]]):
+        self._collections = collections
+
+    def __getitem__(self, name: str):
+        return FakeColl(self._collections.get(name, []))
+
+
+def _fake_db():
+    return FakeDB({
+        "stock_basic_info": [
+            {"code": "000001", "source": "tushare", "name": "平安银行", "industry": "银行", "total_mv": 2000.0, "pe": 5.1},
+            {"code": "600000", "source": "tushare", "name": "浦发银行", "industry": "银行", "total_mv": 2500.0, "pe": 4.8},
+            {"code": "300750", "source": "tushare", "name": "宁德时代", "industry": "电池", "total_mv": 9000.0, "pe": None},
+            {"code": "000001", "source": "akshare", "name": "平安银行", "industry": "银行", "total_mv": 2001.0, "pe": 5.2},
+        ],
+        "market_quotes": [
+            {"code": "000001", "close": 10.5, "pct_chg": 1.2, "amount": 1.23e8},
+            {"code": "600000", "close": 9.9, "pct_chg": -0.5, "amount": 8.76e7},
+        ],
+        "stock_financial_data": [
+            {"_id": {"code": "000001", "data_source": "tushare"}, "roe": 11.0, "report_period": "20240930"},
+        ],
+    })
+
+
+def test_snapshot_query_filters_sorts_and_pages():
+    from app.services.screening.market_snapshot import MarketSnapshot
+
+    async def _run():
+        snap = MarketSnapshot(max_age_seconds=600)
+        await snap.load(_fake_db())
+
+        docs, total = snap.query([("industry", "==", "银行")], [("total_mv", -1)], source="tushare")
+        assert total == 2
+        assert [d["code"] for d in docs] == ["600000", "000001"]
+        assert docs[1]["roe"] == 11.0
+        assert docs[1]["close"] == 10.5
+
+        # 缺失值不参与比较运算（与 MongoDB 语义一致）
+        docs, total = snap.query([("pe", "<", 100)], [("total_mv", -1)], source="tushare")
+        assert total == 2
+
+        docs, total = snap.query([("name", "contains", "宁德")], [], source="tushare")
+        assert [d["code"] for d in docs] == ["300750"]
+        assert docs[0]["close"] is None
+
+        docs, total = snap.query([], [("total_mv", -1)], offset=1, limit=1, source="tushare")
+        assert total == 3
+        assert docs[0]["code"] == "600000"
+
+    asyncio.run(_run())
+
+
+def test_snapshot_incremental_updates():
+    from app.services.screening.market_snapshot import MarketSnapshot
+
+    async def _run():
+        snap = MarketSnapshot(max_age_seconds=600)
+        await snap.load(_fake_db())
+        version = snap.version
+
+        snap.apply_quotes({"300750": {"close": 200.0, "pct_chg": 3.5, "amount": 5e9}})
+        docs, total = snap.query([("pct_chg", ">", 1.0)], [("pct_chg", -1)], source="tushare")
+        assert [d["code"] for d in docs] == ["300750", "000001"]
+        assert snap.version > version
+
+        snap.apply_basics([{"code": "300750", "source": "tushare", "pe": 25.0}])
+        docs, total = snap.query([("pe", "between", [20, 30])], [], source="tushare")
+        assert total == 1
+        assert docs[0]["name"] == "宁德时代"
+        assert docs[0]["close"] == 200.0
+
+        snap.apply_basics([{"code": "688981", "source": "tushare", "name": "中芯国际", "total_mv": 4000.0}])
+        docs, total = snap.query([], [("total_mv", -1)], source="tushare")
+        assert total == 4
+
+    asyncio.run(_run())
+
+
+def test_snapshot_ignores_updates_before_load():
+    from app.services.screening.market_snapshot import MarketSnapshot
+
+    snap = MarketSnapshot(max_age_seconds=600)
+    snap.apply_quotes({"000001": {"close": 1.0}})
+    snap.apply_basics([{"code": "000001", "source": "tushare"}])
+    assert not snap.is_loaded
+    assert snap.version == 0
@@ -0,0 +1,68 @@
+import asyncio
+
+
+class FakeCollection:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def insert_many(self, docs, ordered=True):
+        if self.fail:
+            raise RuntimeError("mongo down")
+        self.batches.append(list(docs))
+
+
+def _patch_db(monkeypatch, collection):
+    import app.services.operation_log_service as svc
+
+    monkeypatch.setattr(svc, "get_mongo_db", lambda: {"operation_logs": collection})
+    return svc
+
+
+def _doc(i, user="admin"):
+    return {"username": user, "action_type": "stock_analysis", "action": f"op-{i}"}
+
+
+def test_buffer_flushes_by_size_and_on_stop(monkeypatch):
+    collection = FakeCollection()
+    svc = _patch_db(monkeypatch, collection)
+    buffer = svc.OperationLogBuffer(max_size=100, batch_size=3, flush_interval=10)
+
+    async def run():
+        for i in range(3):
+            assert buffer.enqueue(_doc(i))
+        await asyncio.sleep(0.05)  # 达到批量阈值，后台任务立即写入
+        assert [len(b) for b in collection.batches] == [3]
+        buffer.enqueue(_doc(3))
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert [len(b) for b in collection.batches] == [3, 1]
+    assert buffer.get_stats()["written"] == 4 and len(buffer) == 0
+
+
+def test_overflow_is_aggregated_into_summary(monkeypatch):
+    collection = FakeCollection()
+    svc = _patch_db(monkeypatch, collection)
+    buffer = svc.OperationLogBuffer(max_size=2, batch_size=100, flush_interval=10)
+
+    async def run():
+        results = [buffer.enqueue(_doc(i)) for i in range(5)]
+        await buffer.stop()
+        return results
+
+    assert asyncio.run(run()) == [True, True, False, False, False]
+    docs = collection.batches[0]
+    assert len(docs) == 3
+    assert docs[-1]["details"] == {"dropped_count": 3}
+    assert buffer.get_stats()["dropped"] == 3
+
+
+def test_failed_batches_are_counted_not_retained(monkeypatch):
+    svc = _patch_db(monkeypatch, FakeCollection(fail=True))
+    buffer = svc.OperationLogBuffer(max_size=10, batch_size=2, flush_interval=10)
+    for i in range(2):
+        buffer.enqueue(_doc(i))
+
+    assert asyncio.run(buffer.flush()) == 0
+    assert buffer.get_stats()["failed"] == 2 and len(buffer) == 0
@@ -133,3 +133,66 @@ def test_quotes_ingestion_run_once_writes_bulk(monkeypatch):
     import asyncio
     asyncio.run(_run())
 
+
+
+def test_bulk_upsert_writes_only_changed_quotes_in_chunks(monkeypatch):
+    from pymongo.errors import BulkWriteError
+    from app.services.quotes_ingestion_service import QuotesIngestionService
+    import app.services.quotes_ingestion_service as qis_mod
+
+    class _FakeResult:
+        def __init__(self, n):
+            self.matched_count = n
+            self.modified_count = n
+            self.upserted_ids = {}
+
+    class _FakeColl:
+        def __init__(self):
+            self.calls = []
+            self.fail_code = None
+
+        async def bulk_write(self, ops, ordered=False):
+            codes = [op._filter["code"] for op in ops]
+            self.calls.append(codes)
+            if self.fail_code in codes:
+                raise BulkWriteError({"writeErrors": [{"index": codes.index(self.fail_code), "errmsg": "x"}],
+                                      "nMatched": len(codes) - 1, "nModified": len(codes) - 1})
+            return _FakeResult(len(ops))
+
+    coll = _FakeColl()
+    monkeypatch.setattr(qis_mod, "get_mongo_db", lambda: {"market_quotes": coll}, raising=True)
+    monkeypatch.setattr(qis_mod.settings, "QUOTES_UPSERT_CHUNK_SIZE", 2, raising=False)
+    monkeypatch.setattr(qis_mod.settings, "QUOTES_FULL_REWRITE_SECONDS", 3600, raising=False)
+    monkeypatch.setattr(QuotesIngestionService, "_refresh_market_snapshot", staticmethod(lambda written: None))
+
+    async def _noop():
+        return None
+
+    monkeypatch.setattr(qis_mod, "bump_screening_data_version", _noop, raising=True)
+
+    quotes = {f"00000{i}": {"close": 10.0 + i, "pct_chg": 0.1} for i in range(1, 6)}
+
+    async def _run():
+        svc = QuotesIngestionService()
+        stats = await svc._bulk_upsert(quotes, "20250102", "fake")
+        assert stats["changed"] == 5 and stats["chunks"] == 3 and stats["full_write"]
+        assert sorted(c for call in coll.calls for c in call) == sorted(quotes)
+
+        # 只有一只股票变化 -> 只写一条；写入失败的股票下一次重试
+        coll.calls.clear()
+        coll.fail_code = "000002"
+        quotes["000002"] = {"close": 99.0, "pct_chg": 5.0}
+        stats = await svc._bulk_upsert(quotes, "20250102", "fake")
+        assert coll.calls == [["000002"]]
+        assert stats["changed"] == 1 and stats["skipped"] == 4 and stats["errors"] == 1
+
+        coll.calls.clear()
+        coll.fail_code = None
+        stats = await svc._bulk_upsert(quotes, "20250102", "fake")
+        assert coll.calls == [["000002"]] and stats["errors"] == 0
+
+        coll.calls.clear()
+        stats = await svc._bulk_upsert(quotes, "20250102", "fake")
+        assert coll.calls == [] and stats["changed"] == 0
+
+    asyncio.run(_run())
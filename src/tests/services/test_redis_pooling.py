@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def redis_pool(monkeypatch):
+    import tradingagents.utils.redis_pool as redis_pool
+
+    redis_pool.reset_sync_redis()
+    redis_pool.get_redis_op_stats().reset()
+    monkeypatch.setenv("REDIS_ENABLED", "true")
+    yield redis_pool
+    redis_pool.reset_sync_redis()
+
+
+def test_sync_client_is_shared_and_failures_cool_down(monkeypatch, redis_pool):
+    import redis
+
+    pools = []
+    state = {"fail": True}
+
+    class FakePool:
+        def __init__(self, **kwargs):
+            self.max_connections = kwargs["max_connections"]
+            self._created_connections = 0
+            self._available_connections = []
+            self._in_use_connections = set()
+            pools.append(self)
+
+        def disconnect(self):
+            pass
+
+    class FakeRedis:
+        def __init__(self, connection_pool):
+            self.connection_pool = connection_pool
+
+        def ping(self):
+            if state["fail"]:
+                raise ConnectionError("down")
+            return True
+
+    monkeypatch.setattr(redis, "ConnectionPool", FakePool)
+    monkeypatch.setattr(redis, "Redis", FakeRedis)
+
+    assert redis_pool.get_sync_redis() is None
+    assert redis_pool.get_sync_redis() is None
+    assert len(pools) == 1  # 冷却期内不重试
+
+    redis_pool._failed_at = None
+    state["fail"] = False
+    first = redis_pool.get_sync_redis()
+    assert first is not None and redis_pool.get_sync_redis() is first
+    assert len(pools) == 2
+    assert redis_pool.get_sync_pool_stats()["max_connections"] == 20
+    assert redis_pool.get_redis_op_stats().snapshot()["ping"]["errors"] == 1
+
+    monkeypatch.setenv("REDIS_ENABLED", "false")
+    assert redis_pool.get_sync_redis() is None
+
+
+def test_increment_with_ttl_uses_registered_script(monkeypatch, redis_pool):
+    import app.core.redis_client as redis_client
+
+    class FakeAsyncRedis:
+        def __init__(self):
+            self.counts, self.ttls, self.registered = {}, {}, 0
+
+        def register_script(self, source):
+            self.registered += 1
+            assert "INCR" in source and "EXPIRE" in source
+
+            async def script(keys, args):
+                key = keys[0]
+                self.counts[key] = self.counts.get(key, 0) + 1
+                if self.counts[key] == 1:
+                    self.ttls[key] = args[0]
+                return self.counts[key]
+
+            return script
+
+    fake = FakeAsyncRedis()
+    monkeypatch.setattr(redis_client, "redis_client", fake)
+    service = redis_client.RedisService()
+
+    async def run():
+        return [await service.increment_with_ttl("rate:k", ttl=60) for _ in range(3)]
+
+    assert asyncio.run(run()) == [1, 2, 3]
+    assert fake.registered == 1
+    assert fake.ttls == {"rate:k": 60}
+    assert redis_pool.get_redis_op_stats().snapshot()["incr_with_ttl"]["count"] == 3
@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.report_blob_store import REPORT_LIST_PROJECTION, ReportBlobStore, hydrate_sync
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.docs:
+                yield doc
+        return gen()
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.queries = []
+
+    def _match(self, doc, query):
+        for key, cond in query.items():
+            if key == "$or":
+                if not any(self._match(doc, q) for q in cond):
+                    return False
+            elif isinstance(cond, dict) and "$in" in cond:
+                if doc.get(key) not in cond["$in"]:
+                    return False
+            elif isinstance(doc.get(key), list):
+                if cond not in doc[key]:
+                    return False
+            elif doc.get(key) != cond:
+                return False
+        return True
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return FakeCursor([d for d in self.docs.values() if self._match(d, query)])
+
+    async def update_one(self, query, update, upsert=False):
+        if query["_id"] not in self.docs:
+            self.docs[query["_id"]] = {"_id": query["_id"], **update["$setOnInsert"]}
+
+    async def count_documents(self, query, limit=0):
+        return len([d for d in self.docs.values() if self._match(d, query)])
+
+    async def delete_one(self, query):
+        return SimpleNamespace(deleted_count=1 if self.docs.pop(query["_id"], None) else 0)
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def test_externalize_dedups_and_hydrates_on_demand():
+    db = FakeDB()
+    store = ReportBlobStore(min_bytes=100)
+    reports = {
+        "market_report": "市场分析" * 200,
+        "final_trade_decision": "买入",
+        "investment_debate_state": {"history": "多空辩论" * 100},
+    }
+
+    async def run():
+        fields = await store.externalize(db, reports)
+        await store.externalize(db, reports)  # 重复保存同样的正文
+        return fields
+
+    fields = asyncio.run(run())
+    assert fields["reports"] == {"final_trade_decision": "买入"}
+    assert set(fields["report_refs"]) == {"market_report", "investment_debate_state"}
+    assert len(db.report_blobs.docs) == 2
+    assert fields["reports_size"] > 2400 and "reports" not in REPORT_LIST_PROJECTION
+
+    blob = db.report_blobs.docs[fields["report_refs"]["market_report"]["blob"]]
+    assert blob["compressed_size"] < blob["size"]
+
+    doc = {"analysis_id": "a1", **fields}
+    partial = asyncio.run(store.hydrate(db, dict(doc), modules=["market_report"]))
+    assert set(partial["reports"]) == {"market_report", "final_trade_decision"}
+    assert hydrate_sync(db, dict(doc))["reports"] == reports
+
+
+def test_release_keeps_blobs_shared_by_other_reports():
+    db = FakeDB()
+    store = ReportBlobStore(min_bytes=10)
+
+    async def run():
+        shared = await store.externalize(db, {"market_report": "共享正文" * 10})
+        own = await store.externalize(db, {"market_report": "共享正文" * 10, "news_report": "独有正文" * 10})
+        db.analysis_reports.docs = {"r1": {"_id": "r1", **shared}}
+        return await store.release(db, own)
+
+    assert asyncio.run(run()) == 1
+    assert len(db.report_blobs.docs) == 1
+
+
+def test_resolve_stock_names_uses_one_lookup(monkeypatch):
+    from app.routers import reports as reports_router
+
+    monkeypatch.setattr(reports_router, "_stock_name_cache", {"600519": "贵州茅台"})
+    monkeypatch.setattr(reports_router, "_enabled_name_sources", lambda: ["akshare", "tushare"])
+    db = FakeDB()
+    db.stock_basic_info.docs = {
+        1: {"symbol": "000001", "name": "平安银行(旧)", "source": "baostock"},
+        2: {"symbol": "000001", "name": "平安银行", "source": "akshare"},
+        3: {"code": "300750", "name": "宁德时代"},
+    }
+
+    names = asyncio.run(reports_router.resolve_stock_names(db, ["600519", "000001", "300750", "AAPL"]))
+
+    assert names == {"600519": "贵州茅台", "000001": "平安银行", "300750": "宁德时代", "AAPL": "AAPL"}
+    assert len(db.stock_basic_info.queries) == 1
@@ -0,0 +1,108 @@
+import asyncio
+import io
+import zipfile
+from concurrent.futures import Future
+
+import pytest
+
+from tradingagents.utils.report_render_pool import ReportRenderPool, ZipStreamWriter
+
+CALLS = []
+
+
+def fake_render(content, to):
+    CALLS.append(content)
+    return f"{to}:{content}".encode("utf-8")
+
+
+def test_render_pool_caches_by_content(tmp_path):
+    CALLS.clear()
+    pool = ReportRenderPool(max_workers=0, cache_dir=str(tmp_path / "cache"))
+
+    assert pool.render("docx", fake_render, "# 报告", "docx") == "docx:# 报告".encode("utf-8")
+    assert asyncio.run(pool.render_async("docx", fake_render, "# 报告", "docx")) == "docx:# 报告".encode("utf-8")
+    pool.render("docx", fake_render, "# 另一份", "docx")
+
+    assert CALLS == ["# 报告", "# 另一份"]
+    stats = pool.stats()["formats"]["docx"]
+    assert stats["renders"] == 2 and stats["cache_hits"] == 1 and stats["avg_seconds"] is not None
+
+    # 新实例复用磁盘缓存
+    again = ReportRenderPool(max_workers=0, cache_dir=str(tmp_path / "cache"))
+    again.render("docx", fake_render, "# 报告", "docx")
+    assert len(CALLS) == 2
+
+
+def test_render_async_timeout_keeps_shared_render(tmp_path):
+    pool = ReportRenderPool(max_workers=0, cache_dir=str(tmp_path), timeout=0.05)
+    pending = Future()
+    pool._start = lambda func, args: pending
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.render_async("pdf", fake_render, "# 慢报告", "pdf")
+        assert not pending.cancelled()
+
+        follower = asyncio.ensure_future(pool.render_async("pdf", fake_render, "# 慢报告", "pdf"))
+        await asyncio.sleep(0.01)
+        pending.set_result(b"%PDF")
+        return await follower
+
+    assert asyncio.run(run()) == b"%PDF"
+
+
+def test_render_pool_evicts_oldest_entries(tmp_path):
+    pool = ReportRenderPool(max_workers=0, cache_dir=str(tmp_path), cache_max_bytes=40)
+    for i in range(5):
+        pool.render("pdf", fake_render, f"{i}" * 10, "pdf")
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= 40
+
+
+def test_render_pool_cache_key_ignores_volatile_content(tmp_path):
+    CALLS.clear()
+    pool = ReportRenderPool(max_workers=0, cache_dir=str(tmp_path))
+    pool.render("docx", fake_render, "# 报告 10:00:01", "docx", cache_key="# 报告")
+    assert pool.render("docx", fake_render, "# 报告 10:00:02", "docx", cache_key="# 报告") == "docx:# 报告 10:00:01".encode()
+    pool.render("pdf", fake_render, "# 报告 10:00:03", "pdf", cache_key="# 报告")
+    assert CALLS == ["# 报告 10:00:01", "# 报告 10:00:03"]
+
+
+def test_render_pool_ignores_temp_files_in_progress(tmp_path):
+    partial = tmp_path / ".tmp-writing"
+    partial.write_bytes(b"x" * 100)
+    pool = ReportRenderPool(max_workers=0, cache_dir=str(tmp_path), cache_max_bytes=40)
+    for i in range(3):
+        pool.render("pdf", fake_render, f"{i}" * 10, "pdf")
+    # 其他进程正在写入的临时文件既不计入大小，也不会被淘汰
+    assert partial.exists()
+    assert pool.stats()["cache_bytes"] <= 40
+
+
+def test_app_entry_shares_the_render_pool_singleton():
+    from app.utils import report_render_pool as app_pool
+    from tradingagents.utils import report_render_pool as core_pool
+
+    core_pool.shutdown_report_render_pool()
+    try:
+        assert app_pool.get_report_render_pool() is core_pool.get_report_render_pool()
+    finally:
+        core_pool.shutdown_report_render_pool()
+
+
+def test_zip_stream_writer_dedups_names():
+    writer = ZipStreamWriter()
+    chunks = [
+        writer.add("000001_2026-10-01_report.pdf", b"%PDF-1"),
+        writer.add("000001_2026-10-01_report.pdf", b"%PDF-2"),
+        writer.add("AAPL_2026-10-02_report.md", "# 苹果".encode("utf-8")),
+        writer.close(),
+    ]
+    assert all(chunks[:3])
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == [
+        "000001_2026-10-01_report.pdf", "000001_2026-10-01_report_1.pdf", "AAPL_2026-10-02_report.md",
+    ]
+    assert archive.read("000001_2026-10-01_report_1.pdf") == b"%PDF-2"
+    assert archive.getinfo("000001_2026-10-01_report.pdf").compress_type == zipfile.ZIP_STORED
+    assert archive.read("AAPL_2026-10-02_report.md").decode("utf-8") == "# 苹果"
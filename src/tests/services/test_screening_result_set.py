@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+
+def _rows(n):
+    return [{"code": str(i).zfill(6), "total_mv": float(n - i)} for i in range(n)]
+
+
+def test_result_set_paging_evaluates_once():
+    from app.services.screening.result_set import ScreeningResultSetCache, decode_cursor
+
+    calls = {"n": 0}
+
+    async def _evaluate():
+        calls["n"] += 1
+        rows = _rows(2000)
+        return rows, len(rows)
+
+    async def _run():
+        cache = ScreeningResultSetCache(ttl=60, max_rows=5000)
+        payload = {"conditions": [{"field": "pe", "operator": "<", "value": 30}], "order_by": None}
+        sort = [("total_mv", -1)]
+
+        seen = []
+        cursor = None
+        while True:
+            rs, _ = await cache.get_or_create(payload, sort, _evaluate)
+            start = rs.locate(decode_cursor(cursor)) if cursor else 0
+            items, cursor = rs.page(start, 100)
+            seen.extend(it["code"] for it in items)
+            if not cursor:
+                break
+
+        assert calls["n"] == 1
+        assert len(seen) == 2000
+        assert len(set(seen)) == 2000
+        assert seen[0] == "000000"
+        assert cache.hits == 19 and cache.misses == 1
+
+    asyncio.run(_run())
+
+
+def test_conditions_hash_is_order_insensitive_for_keys():
+    from app.services.screening.result_set import conditions_hash
+
+    a = {"conditions": [{"field": "pe", "operator": "<", "value": 30.0}], "market": "CN"}
+    b = {"market": "CN", "conditions": [{"value": 30, "operator": "<", "field": "pe"}]}
+    assert conditions_hash(a) == conditions_hash(b)
+    assert conditions_hash(a) != conditions_hash({**a, "market": "HK"})
+
+
+def test_keyset_cursor_resumes_on_recomputed_result_set():
+    from app.services.screening.result_set import ScreeningResultSet, decode_cursor
+
+    sort = [("total_mv", -1)]
+    old = ScreeningResultSet("old-1", _rows(10), 10, sort, "1")
+    _, cursor = old.page(0, 4)
+
+    # 数据版本变化后重新计算（新增一行排在最前面），按排序键续读，不重复不遗漏
+    rows = [{"code": "999999", "total_mv": 100.0}] + _rows(10)
+    new = ScreeningResultSet("new-2", rows, 11, sort, "2")
+    start = new.locate(decode_cursor(cursor))
+    items, _ = new.page(start, 3)
+    assert [it["code"] for it in items] == ["000004", "000005", "000006"]
+
+
+def test_invalid_cursor_raises_value_error():
+    from app.services.screening.result_set import decode_cursor
+
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,70 @@
+import sys
+import types
+
+from app.core.startup_profile import StartupProfiler, parse_importtime, run_importtime
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _io
+import time:       400 |        500 | site
+import time:       300 |        300 |       pandas.core
+import time:      1000 |       1300 |     pandas
+import time:       200 |       1500 |   app.services.data_sources
+import time:        50 |         50 |   app.core.config
+import time:        20 |       1570 | app.services.quotes_ingestion_service
+"""
+
+
+def test_parse_importtime_breaks_down_entry_module():
+    result = parse_importtime(IMPORTTIME_OUTPUT, module="app.services.quotes_ingestion_service")
+
+    # 解释器启动（site 等）不计入
+    assert result["total_ms"] == 1.6
+    assert result["module_count"] == 5
+    assert [item["module"] for item in result["top_level"]] == ["app.services.data_sources", "app.core.config"]
+    assert result["by_package"][0] == {"package": "pandas", "self_ms": 1.3, "modules": 2}
+
+
+def test_profiler_records_phases_and_heavy_modules():
+    profiler = StartupProfiler()
+    with profiler.phase("路由 app.routers.fake", group="core"):
+        sys.modules["_startup_profile_fake"] = types.ModuleType("_startup_profile_fake")
+    profiler.record("数据库初始化", 0.5)
+    profiler.mark_ready()
+    sys.modules.pop("_startup_profile_fake")
+
+    report = profiler.report(top=1)
+    assert report["phases"][0]["group"] == "core" and report["phases"][0]["modules_loaded"] >= 1
+    assert [p["name"] for p in report["slowest_phases"]] == ["数据库初始化"]
+    assert report["ready_seconds"] is not None and "akshare" in report["heavy_modules"]
+
+
+def test_provider_import_does_not_load_other_data_sources():
+    # 冷启动子进程：导入单个 A 股提供器不应加载 yfinance、openai 或 LLM 图
+    result = run_importtime("tradingagents.dataflows.providers.china.baostock", top=200)
+
+    assert result["returncode"] == 0, result.get("error")
+    packages = {item["package"] for item in result["by_package"]}
+    assert "pandas" in packages
+    assert not packages & {"yfinance", "openai", "langgraph", "akshare"}
+
+
+def test_startup_report_rejects_modules_outside_allowlist(monkeypatch):
+    import asyncio
+
+    import pytest
+    from fastapi import HTTPException
+
+    import app.core.startup_profile as startup_profile
+    from app.routers.system_config import get_startup_report
+
+    calls = []
+    monkeypatch.setattr(startup_profile, "run_importtime", lambda module, top: calls.append(module) or {"module": module})
+    admin = {"is_admin": True}
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(get_startup_report(importtime=True, module="os; import shutil", top=5, current_user=admin))
+    assert excinfo.value.status_code == 400 and calls == []
+
+    report = asyncio.run(get_startup_report(importtime=True, module="tradingagents", top=5, current_user=admin))
+    assert report["importtime"] == {"module": "tradingagents"} and calls == ["tradingagents"]
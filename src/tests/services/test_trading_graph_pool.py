@@ -0,0 +1,59 @@
+import threading
+
+
+class FakeGraph:
+    def __init__(self, analysts, debug, config):
+        self.config = config
+        self.ticker = None
+        self.curr_state = None
+        self.log_states_dict = {}
+
+    def reset_run_state(self):
+        self.ticker = None
+        self.curr_state = None
+        self.log_states_dict = {}
+
+
+def _pool(**kwargs):
+    from tradingagents.graph.graph_pool import TradingGraphPool
+    return TradingGraphPool(factory=FakeGraph, **kwargs)
+
+
+def test_pool_reuses_instance_and_resets_run_state():
+    pool = _pool()
+    config = {"llm_provider": "dashscope", "quick_think_llm": "qwen-turbo"}
+
+    graph = pool.acquire(["market"], False, config)
+    graph.ticker = "000001"
+    graph.log_states_dict["2025-01-01"] = {"x": 1}
+    pool.release(graph)
+
+    again = pool.acquire(["market"], False, dict(config))
+    assert again is graph
+    assert again.ticker is None and again.log_states_dict == {}
+    assert pool.stats()["created"] == 1 and pool.stats()["reused"] == 1
+
+    # 分析师组合或配置不同 -> 不同实例
+    other = pool.acquire(["market", "news"], False, config)
+    assert other is not graph
+
+
+def test_concurrent_leases_never_share_instance():
+    pool = _pool(max_idle_per_key=2)
+    config = {"llm_provider": "dashscope"}
+    leased = []
+    barrier = threading.Barrier(4)
+
+    def _worker():
+        with pool.lease(["market"], False, config) as graph:
+            leased.append(id(graph))
+            barrier.wait()
+
+    threads = [threading.Thread(target=_worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(leased)) == 4
+    assert pool.stats()["idle"] == 2
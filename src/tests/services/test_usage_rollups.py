@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from tradingagents.config.usage_rollups import plan_segments
+
+NOW = datetime(2024, 3, 10, 14, 25, 0)
+
+
+def _match(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            for op, arg in cond.items():
+                if value is None:
+                    return False
+                if op == "$gte" and not value >= arg:
+                    return False
+                if op == "$lt" and not value < arg:
+                    return False
+                if op == "$lte" and not value <= arg:
+                    return False
+                if op == "$in" and value not in arg:
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._it = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.find_calls = 0
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def find_one(self, query):
+        return next((d for d in self.docs if _match(d, query)), None)
+
+    def find(self, query, projection=None):
+        self.find_calls += 1
+        return FakeCursor([d for d in self.docs if _match(d, query)])
+
+    async def update_one(self, flt, update, upsert=False):
+        doc = await self.find_one(flt)
+        if doc is None:
+            doc = dict(flt)
+            self.docs.append(doc)
+        for key, value in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + value
+        doc.update(update.get("$set", {}))
+
+
+def _service(monkeypatch):
+    import app.services.usage_statistics_service as svc
+
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return NOW
+
+    db = {"token_usage": FakeCollection(), "token_usage_rollups": FakeCollection()}
+    monkeypatch.setattr(svc, "get_mongo_db", lambda: db)
+    monkeypatch.setattr(svc, "datetime", FixedDatetime)
+    service = svc.UsageStatisticsService()
+    service._rollups_ready = True
+    return svc, service, db
+
+
+def test_plan_segments_covers_window_without_gaps():
+    start = datetime(2024, 3, 3, 14, 25)
+    plan = plan_segments(start, NOW)
+    assert plan["raw"] == [(start.isoformat(), "2024-03-03T15:00:00"), ("2024-03-10T14:00:00", NOW.isoformat())]
+    assert plan["hour"] == [("2024-03-03T15", "2024-03-04T00"), ("2024-03-10T00", "2024-03-10T14")]
+    assert plan["day"] == [("2024-03-04", "2024-03-10")]
+
+    short = plan_segments(NOW - timedelta(minutes=10), NOW)
+    assert short == {"raw": [((NOW - timedelta(minutes=10)).isoformat(), NOW.isoformat())], "hour": [], "day": []}
+
+
+def test_statistics_from_rollups_match_raw_records(monkeypatch):
+    svc, service, db = _service(monkeypatch)
+
+    async def run():
+        for i in range(60):
+            ts = NOW - timedelta(hours=i * 3, minutes=7)
+            await service.add_usage_record(svc.UsageRecord(
+                timestamp=ts.isoformat(),
+                provider="dashscope" if i % 2 else "deepseek",
+                model_name="qwen-plus" if i % 2 else "deepseek-chat",
+                input_tokens=100 + i,
+                output_tokens=50,
+                cost=0.01 * i,
+                currency="CNY" if i % 5 else "USD",
+                session_id=f"s{i}",
+                user_id="u1",
+            ))
+        return await service.get_usage_statistics(days=7)
+
+    stats = asyncio.run(run())
+
+    start = (NOW - timedelta(days=7)).isoformat()
+    raw = [d for d in db["token_usage"].docs if start <= d["timestamp"] <= NOW.isoformat()]
+    assert stats.total_requests == len(raw)
+    assert stats.total_input_tokens == sum(d["input_tokens"] for d in raw)
+    assert abs(stats.cost_by_currency["USD"] - sum(d["cost"] for d in raw if d["currency"] == "USD")) < 1e-9
+    assert stats.by_provider["deepseek"]["requests"] == sum(1 for d in raw if d["provider"] == "deepseek")
+    day = (NOW - timedelta(days=2)).strftime("%Y-%m-%d")
+    assert stats.by_date[day]["requests"] == sum(1 for d in raw if d["timestamp"].startswith(day))
+
+    # 原始记录只读取首尾不足一小时的两段
+    assert db["token_usage"].find_calls == 2
@@ -0,0 +1,123 @@
+import json
+from datetime import date, datetime
+
+from web.utils.analysis_catalog import AnalysisCatalog
+
+
+def _write_result(results_dir, analysis_id, symbol, day, analysts, summary):
+    entry = {
+        "analysis_id": analysis_id,
+        "timestamp": datetime(2026, 10, day, 10).timestamp(),
+        "stock_symbol": symbol,
+        "analysts": analysts,
+        "research_depth": 2,
+        "status": "completed",
+        "summary": summary,
+        "full_data": {"market_report": f"{symbol} 市场分析正文"},
+    }
+    path = results_dir / f"analysis_{analysis_id}.json"
+    path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def _make_catalog(tmp_path):
+    results_dir = tmp_path / "web_results"
+    detailed_dir = tmp_path / "detailed"
+    results_dir.mkdir()
+    reports_dir = detailed_dir / "000001" / "2026-10-03" / "reports"
+    reports_dir.mkdir(parents=True)
+    (reports_dir / "final_trade_decision.md").write_text("# 决策\n**买入** 平安银行", encoding="utf-8")
+    (reports_dir / "market_report.md").write_text("技术面分析", encoding="utf-8")
+
+    _write_result(results_dir, "a1", "AAPL", 1, ["market_analyst"], "苹果 看多")
+    _write_result(results_dir, "a2", "600519", 2, ["news_analyst", "market_analyst"], "茅台 中性")
+    (results_dir / "favorites.json").write_text(json.dumps(["a2"]), encoding="utf-8")
+    (results_dir / "tags.json").write_text(json.dumps({"a1": ["美股", "科技"]}, ensure_ascii=False), encoding="utf-8")
+
+    catalog = AnalysisCatalog(tmp_path / "catalog.sqlite3", results_dir, detailed_dir=detailed_dir)
+    return catalog, results_dir
+
+
+def test_catalog_indexes_files_and_filters(tmp_path):
+    catalog, _ = _make_catalog(tmp_path)
+    assert catalog.sync_files(force=True) == 3
+
+    results, total = catalog.query("file_system", limit=2)
+    assert total == 3 and [r["stock_symbol"] for r in results] == ["000001", "600519"]
+    assert "reports" not in results[0] and results[0]["summary"].startswith("决策")
+
+    assert [r["analysis_id"] for r in catalog.query("file_system", analyst_type="market_analyst")[0]] == ["a2", "a1"]
+    assert [r["analysis_id"] for r in catalog.query("file_system", stock_symbol="aap")[0]] == ["a1"]
+    assert [r["analysis_id"] for r in catalog.query("file_system", search_text="茅台")[0]] == ["a2"]
+    assert [r["analysis_id"] for r in catalog.query("file_system", start_date=date(2026, 10, 2),
+                                                    end_date=date(2026, 10, 2))[0]] == ["a2"]
+
+    # 旧收藏/标签文件已导入
+    favorites = catalog.query("file_system", favorites_only=True)[0]
+    assert [r["analysis_id"] for r in favorites] == ["a2"] and favorites[0]["is_favorite"]
+    tagged = catalog.query("file_system", tags_filter=["科技"])[0]
+    assert [r["analysis_id"] for r in tagged] == ["a1"] and tagged[0]["tags"] == ["美股", "科技"]
+
+
+def test_catalog_sync_is_incremental_and_content_is_lazy(tmp_path):
+    catalog, results_dir = _make_catalog(tmp_path)
+    catalog.sync_files(force=True)
+    assert catalog.sync_files(force=True) == 0
+
+    dir_id = f"000001_2026-10-03_{int(datetime(2026, 10, 3).timestamp())}"
+    results = {r["analysis_id"]: r for r in catalog.query("file_system")[0]}
+    assert catalog.load_content(results["a1"])["full_data"]["market_report"] == "AAPL 市场分析正文"
+    reports = catalog.load_content(results[dir_id])
+    assert set(reports["reports"]) == {"final_trade_decision", "market_report"}
+
+    (results_dir / "analysis_a1.json").unlink()
+    _write_result(results_dir, "a3", "TSLA", 4, ["market_analyst"], "特斯拉")
+    assert catalog.sync_files(force=True) == 1
+    assert [r["analysis_id"] for r in catalog.query("file_system")[0]] == ["a3", dir_id, "a2"]
+
+    assert catalog.toggle_favorite("a3") is True
+    catalog.add_tag("a3", "新能源")
+    assert catalog.tags_map()["a3"] == ["新能源"] and "a3" in catalog.favorite_ids()
+
+
+class FakeReportManager:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+        self.fail = False
+
+    def get_report_summaries(self, since=None):
+        self.calls.append(since)
+        if self.fail:
+            return None
+        # 与 MongoDB 的 $gte 一致：类型不同的时间字段不匹配
+        return [dict(d) for d in self.docs
+                if since is None or (isinstance(d["timestamp"], datetime) and d["timestamp"] >= since)]
+
+
+def test_mongodb_sync_reconciles_updates_and_deletes(tmp_path):
+    catalog, _ = _make_catalog(tmp_path)
+    docs = [
+        {"analysis_id": "m1", "timestamp": datetime(2026, 10, 1, 9), "stock_symbol": "AAPL", "summary": "旧摘要"},
+        {"analysis_id": "m2", "timestamp": datetime(2026, 10, 2, 9), "stock_symbol": "TSLA", "summary": "特斯拉"},
+        {"analysis_id": "bad", "timestamp": "不是时间", "stock_symbol": "MSFT"},
+    ]
+    manager = FakeReportManager(docs)
+    assert catalog.sync_mongodb(manager, force=True) == 3
+    assert [r["analysis_id"] for r in catalog.query("mongodb")[0]] == ["m2", "m1"]
+
+    # 增量同步只拉取最新时间之后的报告
+    catalog.sync_interval = 0
+    catalog.sync_mongodb(manager)
+    assert manager.calls[-1] == datetime(2026, 10, 2, 9)
+
+    # 全量对账反映修改和删除；查询失败时不改动目录
+    docs[0]["summary"] = "新摘要"
+    del docs[1]
+    manager.fail = True
+    assert catalog.sync_mongodb(manager, force=True) == 0
+    assert len(catalog.query("mongodb")[0]) == 2
+    manager.fail = False
+    catalog.sync_mongodb(manager, force=True)
+    results = catalog.query("mongodb")[0]
+    assert [(r["analysis_id"], r["summary"]) for r in results] == [("m1", "新摘要")]
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import threading
+import time
+
+from cli.batch import BatchResultLog, BatchRunner, build_jobs, load_symbols, parse_limits, trade_dates
+
+
+def _read(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_symbols_dates_and_limits(tmp_path):
+    symbols_file = tmp_path / "symbols.txt"
+    symbols_file.write_text("# 自选\n000001\naapl\n0700.hk,3\n000001  # 重复\n", encoding="utf-8")
+
+    assert load_symbols(symbols_file) == [("000001", "2"), ("AAPL", "1"), ("0700.HK", "3")]
+    # 2026-10-02 周五，10-03/04 为周末
+    assert trade_dates("2026-10-02", "2026-10-05") == ["2026-10-02", "2026-10-05"]
+    assert len(trade_dates("2026-10-02", "2026-10-05", include_weekends=True)) == 4
+    assert parse_limits(["DeepSeek=1", "china_stock=2"]) == {"deepseek": 1, "china_stock": 2}
+
+
+def test_batch_runner_resumes_and_caps_providers(tmp_path):
+    jobs = build_jobs([("000001", "2"), ("600519", "2"), ("AAPL", "1")], ["2026-10-01", "2026-10-02"])
+    output = tmp_path / "batch.jsonl"
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def run_job(job):
+        with lock:
+            active[job.data_source] = active.get(job.data_source, 0) + 1
+            peak[job.data_source] = max(peak.get(job.data_source, 0), active[job.data_source])
+        time.sleep(0.02)
+        with lock:
+            active[job.data_source] -= 1
+        if job.symbol == "600519" and job.trade_date == "2026-10-02":
+            raise RuntimeError("数据源超时")
+        return {"decision": {"action": "买入"}}
+
+    runner = BatchRunner(run_job, BatchResultLog(output), workers=4, provider_limits={"china_stock": 1})
+    progress = asyncio.run(runner.run(jobs))
+    assert (progress.succeeded, progress.failed, progress.remaining) == (5, 1, 0)
+    assert peak["china_stock"] == 1
+    records = _read(output)
+    assert len(records) == 6 and sum(r["status"] == "failed" for r in records) == 1
+
+    # 模拟中断时写了一半的末行；续跑只重试失败任务
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"symbol": "AAPL", "trade_da')
+    calls = []
+    rerun = BatchRunner(lambda job: calls.append(job.key) or {}, BatchResultLog(output), workers=2)
+    progress = asyncio.run(rerun.run(jobs))
+    assert calls == ["600519|2026-10-02"]
+    assert (progress.skipped, progress.succeeded) == (5, 1)
+    assert BatchResultLog(output).completed() == {job.key for job in jobs}
+    last = json.loads(output.read_text(encoding="utf-8").splitlines()[-1])
+    assert (last["symbol"], last["status"]) == ("600519", "success")
+
+
+def test_batch_runner_serializes_dates_of_one_symbol(tmp_path):
+    jobs = build_jobs([("000001", "2"), ("AAPL", "1")], ["2026-10-01", "2026-10-02", "2026-10-05"])
+    running = {}
+    overlaps = []
+    lock = threading.Lock()
+
+    def run_job(job):
+        with lock:
+            if running.get(job.symbol):
+                overlaps.append(job.key)
+            running[job.symbol] = True
+        time.sleep(0.02)
+        with lock:
+            running[job.symbol] = False
+        return {}
+
+    progress = asyncio.run(BatchRunner(run_job, BatchResultLog(tmp_path / "b.jsonl"), workers=4).run(jobs))
+    assert progress.succeeded == 6 and overlaps == []
+
+
+def test_interrupted_batch_records_in_flight_jobs(tmp_path):
+    jobs = build_jobs([("000001", "2"), ("AAPL", "1"), ("MSFT", "1")], ["2026-10-01"])
+    output = tmp_path / "batch.jsonl"
+    started = threading.Event()
+    calls = []
+    notified = []
+
+    def run_job(job):
+        calls.append(job.key)
+        started.set()
+        time.sleep(0.1)
+        return {"decision": {"action": "持有"}}
+
+    async def interrupt():
+        runner = BatchRunner(run_job, BatchResultLog(output), workers=2, on_interrupt=notified.extend)
+        task = asyncio.ensure_future(runner.run(jobs))
+        await asyncio.to_thread(started.wait)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(interrupt())
+    # 进行中的两个任务完成后写入结果，排队中的任务不再启动
+    assert len(calls) == 2 and sorted(job.key for job in notified) == sorted(calls)
+    records = _read(output)
+    assert sorted(f"{r['symbol']}|{r['trade_date']}" for r in records) == sorted(calls)
+    assert all(r["status"] == "success" for r in records)
@@ -0,0 +1,103 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from tradingagents.graph.debate import (
+    DIGEST_MARKER,
+    HistoryDigest,
+    create_concurrent_risk_round,
+    merge_debate_outputs,
+)
+
+
+def _debator(name, tracker):
+    def node(state):
+        rs = state["risk_debate_state"]
+        with tracker["lock"]:
+            tracker["active"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["active"])
+        time.sleep(0.05)
+        with tracker["lock"]:
+            tracker["active"] -= 1
+        argument = f"{name} Analyst: round after {rs['count']}"
+        return {"risk_debate_state": {
+            **rs,
+            "history": rs["history"] + "\n" + argument,
+            f"{name.lower()}_history": rs.get(f"{name.lower()}_history", "") + "\n" + argument,
+            "latest_speaker": name,
+            f"current_{name.lower()}_response": argument,
+            "count": rs["count"] + 1,
+        }}
+
+    return node
+
+
+def test_concurrent_round_merges_all_speakers_in_order():
+    tracker = {"lock": threading.Lock(), "active": 0, "peak": 0}
+    round_node = create_concurrent_risk_round([_debator(n, tracker) for n in ("Risky", "Safe", "Neutral")])
+    state = {"risk_debate_state": {
+        "history": "", "risky_history": "", "safe_history": "", "neutral_history": "",
+        "latest_speaker": "", "current_risky_response": "", "current_safe_response": "",
+        "current_neutral_response": "", "count": 0,
+    }}
+
+    result = round_node(state)["risk_debate_state"]
+    assert tracker["peak"] == 3
+    assert result["count"] == 3
+    assert result["history"].split("\n")[1:] == [
+        "Risky Analyst: round after 0", "Safe Analyst: round after 0", "Neutral Analyst: round after 0",
+    ]
+    assert result["current_safe_response"] == "Safe Analyst: round after 0"
+    assert result["latest_speaker"] == "Neutral"
+
+    second = round_node({"risk_debate_state": result})["risk_debate_state"]
+    assert second["count"] == 6 and second["risky_history"].count("Risky Analyst") == 2
+
+
+def test_merge_takes_last_changed_scalar():
+    before = {"history": "x", "speaker": "", "n": 1, "count": 2}
+    merged = merge_debate_outputs(before, [
+        {"history": "x1", "speaker": "A", "n": 5, "count": 3},
+        {"history": "x2", "speaker": "B", "count": 3},
+    ])
+    assert merged == {"history": "x12", "speaker": "B", "n": 5, "count": 4}
+
+
+def test_history_digest_keeps_recent_turns():
+    prompts = []
+
+    class FakeLLM:
+        def invoke(self, prompt):
+            prompts.append(prompt)
+            return SimpleNamespace(content="多头认为估值偏低；空头担心需求下滑。")
+
+    digest = HistoryDigest(FakeLLM(), max_tokens=200, keep_recent_tokens=60)
+    history = "\n".join(f"Speaker {i}: " + "argument " * 20 for i in range(10))
+    compressed = digest.compress(history)
+
+    assert compressed.startswith(DIGEST_MARKER)
+    assert compressed.endswith(history.split("\n")[-1])
+    assert "Speaker 0" in prompts[0] and "Speaker 9" not in prompts[0]
+    assert digest.compress("short") == "short"
+
+
+def test_concurrent_round_propagates_runnable_config_to_debators():
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.runnables import RunnableLambda
+
+    class Recorder(BaseCallbackHandler):
+        def __init__(self):
+            self.names = []
+
+        def on_chain_start(self, serialized, inputs, **kwargs):
+            self.names.append(kwargs.get("name"))
+
+    def speaker(name):
+        speak = RunnableLambda(lambda rs: {**rs, "history": rs["history"] + f"\n{name}"}, name=name)
+        return lambda state: {"risk_debate_state": speak.invoke(state["risk_debate_state"])}
+
+    round_node = RunnableLambda(create_concurrent_risk_round([speaker(n) for n in ("Risky", "Safe", "Neutral")]))
+    recorder = Recorder()
+    round_node.invoke({"risk_debate_state": {"history": "", "count": 0}}, config={"callbacks": [recorder]})
+
+    assert {"Risky", "Safe", "Neutral"} <= set(recorder.names)
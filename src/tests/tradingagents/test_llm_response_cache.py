@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+@pytest.fixture
+def llm_cache(monkeypatch):
+    import importlib
+
+    import tradingagents.llm_adapters.response_cache as response_cache
+
+    config_manager = importlib.import_module("tradingagents.config.config_manager")
+
+    tracked = []
+    monkeypatch.setattr(config_manager.token_tracker, "track_usage", lambda **kw: tracked.append(kw))
+    monkeypatch.setattr(response_cache, "_llm_cache", response_cache.LLMResponseCache(backend="local"))
+    monkeypatch.setenv("TA_LLM_CACHE_ENABLED", "true")
+    monkeypatch.delenv("TA_LLM_CACHE_FORCE", raising=False)
+    monkeypatch.setattr(response_cache, "tracked", tracked, raising=False)
+    return response_cache
+
+
+def _result(text):
+    return ChatResult(
+        generations=[ChatGeneration(message=AIMessage(content=text))],
+        llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}},
+    )
+
+
+def test_deterministic_calls_hit_cache_and_record_zero_cost(llm_cache):
+    cache = llm_cache.get_llm_response_cache()
+    llm = SimpleNamespace(model_name="qwen-plus", temperature=0)
+    messages = [SystemMessage(content="提取交易信号"), HumanMessage(content="最终决策：买入")]
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return _result(f"BUY #{len(calls)}")
+
+    first = cache.generate(llm, "dashscope", messages, None, {}, generate)
+    second = cache.generate(llm, "dashscope", list(messages), None, {"session_id": "s1"}, generate)
+    assert len(calls) == 1
+    assert second.generations[0].message.content == first.generations[0].message.content == "BUY #1"
+    assert second.llm_output["cache_hit"] is True
+    assert llm_cache.tracked == [{
+        "provider": "dashscope", "model_name": "qwen-plus", "input_tokens": 120, "output_tokens": 30,
+        "session_id": "s1", "analysis_type": "stock_analysis", "cached": True,
+    }]
+
+    # 绑定的工具或采样参数不同则不命中
+    tools = [{"type": "function", "function": {"name": "get_stock_market_data_unified", "parameters": {}}}]
+    cache.generate(llm, "dashscope", messages, None, {"tools": tools}, generate)
+    cache.generate(llm, "dashscope", messages, None, {"max_tokens": 100}, generate)
+    assert len(calls) == 3
+
+
+def test_non_zero_temperature_bypasses_unless_forced(llm_cache, monkeypatch):
+    cache = llm_cache.get_llm_response_cache()
+    llm = SimpleNamespace(model_name="deepseek-chat", temperature=0.7)
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return _result("answer")
+
+    for _ in range(2):
+        cache.generate(llm, "deepseek", [HumanMessage(content="q")], None, {}, generate)
+    assert len(calls) == 2 and cache.stats()["bypassed"] == 2
+
+    monkeypatch.setenv("TA_LLM_CACHE_FORCE", "true")
+    for _ in range(2):
+        cache.generate(llm, "deepseek", [HumanMessage(content="q")], None, {}, generate)
+    assert len(calls) == 3
+
+    monkeypatch.setenv("TA_LLM_CACHE_ENABLED", "false")
+    cache.generate(llm, "deepseek", [HumanMessage(content="q")], None, {}, generate)
+    assert len(calls) == 4
+
+
+def test_local_store_evicts_least_recently_used(llm_cache):
+    cache = llm_cache.LLMResponseCache(max_entries=2, backend="local")
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1} and cache.get("c") == {"v": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_openai_compatible_adapter_uses_cache(llm_cache, monkeypatch):
+    from langchain_openai import ChatOpenAI
+    from tradingagents.llm_adapters.openai_compatible_base import ChatDeepSeekOpenAI
+
+    calls = []
+
+    def fake_generate(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(messages[-1].content)
+        return _result("看多")
+
+    monkeypatch.setattr(ChatOpenAI, "_generate", fake_generate)
+    llm = ChatDeepSeekOpenAI(api_key="sk-test-key-for-cache", temperature=0)
+    assert llm.invoke("总结报告").content == "看多"
+    assert llm.invoke("总结报告").content == "看多"
+    assert calls == ["总结报告"]
@@ -0,0 +1,144 @@
+import time
+from typing import TypedDict
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.graph import END, StateGraph
+
+from tradingagents.llm_adapters.record_replay import (
+    FixtureMissError,
+    FixtureStore,
+    create_recording_llm,
+    create_replay_llm,
+    llm_class_name,
+)
+
+
+class FakeChatDashScopeOpenAI(BaseChatModel):
+    calls: int = 0
+    model_name: str = "qwen-plus"
+    temperature: float = 0.1
+
+    @property
+    def _llm_type(self):
+        return "fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=tools, **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if kwargs.get("tools") and messages[-1].type == "human":
+            name = kwargs["tools"][0]["function"]["name"]
+            message = AIMessage(content="", tool_calls=[{"name": name, "args": {"ticker": "AAPL", "start_date": "2024-05-01", "end_date": "2024-05-10"}, "id": f"call_{self.calls}"}])
+        else:
+            message = AIMessage(content=f"answer {self.calls} at 2024-05-10 10:00:0{self.calls}")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _tool():
+    from tradingagents.agents.utils.agent_utils import Toolkit
+    return Toolkit.get_stock_market_data_unified
+
+
+def test_record_then_replay_llm_with_tool_calls(tmp_path):
+    inner = FakeChatDashScopeOpenAI()
+    recorder = create_recording_llm(inner, FixtureStore(str(tmp_path)), "qwen-plus")
+    prompt = [HumanMessage(content="分析 AAPL，时间 2024-05-10 09:30:00")]
+    recorded_call = recorder.bind_tools([_tool()]).invoke(prompt)
+    recorded_text = recorder.invoke([HumanMessage(content="总结")])
+
+    replay = create_replay_llm(FixtureStore(str(tmp_path)), "qwen-plus", "FakeChatDashScopeOpenAI", latency=0.05)
+    assert replay.source_class == "FakeChatDashScopeOpenAI" and llm_class_name(replay) == "FakeChatDashScopeOpenAI"
+    assert "DashScope" not in replay.__class__.__name__
+    start = time.perf_counter()
+    # 时间戳不同也能命中同一条录制
+    replayed_call = replay.bind_tools([_tool()]).invoke([HumanMessage(content="分析 AAPL，时间 2024-05-11 15:00:00")])
+    assert time.perf_counter() - start >= 0.05
+    assert replayed_call.tool_calls == recorded_call.tool_calls
+    assert replay.invoke([HumanMessage(content="总结")]).content == recorded_text.content
+    assert inner.calls == 2
+
+    with pytest.raises(FixtureMissError):
+        replay.invoke([HumanMessage(content="未录制的请求")])
+
+
+def test_stubbed_tools_and_profiler_on_graph(tmp_path, monkeypatch):
+    from tradingagents.utils.pipeline_benchmark import profile_graph_run, stub_data_providers
+
+    tool = _tool()
+    fetches = []
+
+    def fake_fetch(ticker, start_date="", end_date=""):
+        fetches.append(ticker)
+        time.sleep(0.02)
+        return f"{ticker} 行情数据"
+
+    monkeypatch.setattr(tool, "func", fake_fetch)
+
+    class State(TypedDict):
+        messages: list
+        report: str
+
+    def build(llm):
+        def analyst(state):
+            result = llm.bind_tools([tool]).invoke(state["messages"])
+            call = result.tool_calls[0]
+            data = tool.invoke(call["args"])
+            summary = llm.invoke(state["messages"] + [result, ToolMessage(content=data, tool_call_id=call["id"])])
+            return {"report": summary.content}
+
+        def judge(state):
+            return {"report": state["report"] + " ✔"}
+
+        workflow = StateGraph(State)
+        workflow.add_node("Market Analyst", analyst)
+        workflow.add_node("Judge", judge)
+        workflow.set_entry_point("Market Analyst")
+        workflow.add_edge("Market Analyst", "Judge")
+        workflow.add_edge("Judge", END)
+        return workflow.compile()
+
+    state = {"messages": [HumanMessage(content="分析 AAPL")], "report": ""}
+    with stub_data_providers(FixtureStore(str(tmp_path)), "record"):
+        recorder = create_recording_llm(FakeChatDashScopeOpenAI(), FixtureStore(str(tmp_path)), "m")
+        recorded, _ = profile_graph_run(build(recorder), state)
+    assert fetches == ["AAPL"]
+
+    with stub_data_providers(FixtureStore(str(tmp_path)), "replay", latency=0.01):
+        replay = create_replay_llm(FixtureStore(str(tmp_path)), "m", "FakeChatDashScopeOpenAI", latency=0.01)
+        final, profiler = profile_graph_run(build(replay), state)
+    assert tool.func is fake_fetch
+    assert fetches == ["AAPL"]
+    assert final["report"] == recorded["report"]
+
+    market = profiler.nodes["Market Analyst"]
+    assert market["calls"] == 1 and market["llm_calls"] == 2 and market["tool_calls"] == 1
+    assert market["llm_ms"] >= 20 and market["tool_ms"] >= 10
+    assert market["wall_ms"] >= market["llm_ms"] + market["tool_ms"]
+    assert profiler.nodes["Judge"]["serialization_ms"] > 0
+
+
+def test_fundamentals_analyst_records_and_replays_dashscope_llm(tmp_path):
+    from types import SimpleNamespace
+
+    from tradingagents.agents.analysts.fundamentals_analyst import create_fundamentals_analyst
+    from tradingagents.agents.utils.agent_utils import Toolkit
+
+    toolkit = SimpleNamespace(config={"online_tools": False}, get_stock_fundamentals_unified=Toolkit.get_stock_fundamentals_unified)
+    state = {"messages": [HumanMessage(content="AAPL")], "trade_date": "2024-05-10", "company_of_interest": "AAPL"}
+
+    inner = FakeChatDashScopeOpenAI()
+    recorder = create_recording_llm(inner, FixtureStore(str(tmp_path)), "qwen-plus")
+    assert (recorder.model_name, recorder.temperature) == ("qwen-plus", 0.1)
+    recorded = create_fundamentals_analyst(recorder, toolkit)(state)
+    assert inner.calls == 1
+
+    # 回放不会走“按类名重建 DashScope 客户端”的分支，也不访问真实 LLM
+    replay = create_replay_llm(FixtureStore(str(tmp_path)), "qwen-plus", "FakeChatDashScopeOpenAI", temperature=0.1)
+    replayed = create_fundamentals_analyst(replay, toolkit)(state)
+    assert inner.calls == 1
+    assert replayed["messages"][0].tool_calls[0]["name"] == "get_stock_fundamentals_unified"
+    assert [c["args"] for c in replayed["messages"][0].tool_calls] == [c["args"] for c in recorded["messages"][0].tool_calls]
@@ -0,0 +1,131 @@
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeLLM:
+    def __init__(self, delay=0.05, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, messages):
+        report = messages[1][1]
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if self.fail_on and self.fail_on in report:
+            raise RuntimeError("llm error")
+        return SimpleNamespace(content=f"lesson for {report.split('Analysis/Decision: ')[1][:12]}")
+
+
+class FakeMemory:
+    embed_calls = 0
+
+    def __init__(self):
+        self.added = []
+
+    def get_embedding(self, text):
+        FakeMemory.embed_calls += 1
+        return [0.1, 0.2]
+
+    def add_situations(self, pairs, embeddings=None):
+        assert embeddings is not None
+        self.added.append((pairs, embeddings))
+
+
+def _state(tag):
+    return {
+        "market_report": f"market {tag}",
+        "sentiment_report": "s",
+        "news_report": "n",
+        "fundamentals_report": "f",
+        "investment_debate_state": {"bull_history": f"bull-{tag}", "bear_history": f"bear-{tag}", "judge_decision": f"judge-{tag}"},
+        "trader_investment_plan": f"trader-{tag}",
+        "risk_debate_state": {"judge_decision": f"risk-{tag}"},
+    }
+
+
+def _memories():
+    return {name: FakeMemory() for name in ("bull", "bear", "trader", "invest_judge", "risk_manager")}
+
+
+def test_reflect_all_runs_components_concurrently_and_embeds_once():
+    from tradingagents.graph.reflection import Reflector
+
+    FakeMemory.embed_calls = 0
+    llm = FakeLLM(fail_on="bear-")
+    memories = _memories()
+    reflections = Reflector(llm).reflect_all(_state("A"), 0.05, memories)
+
+    assert llm.peak == 5
+    assert set(reflections) == {"bull", "trader", "invest_judge", "risk_manager"}
+    assert FakeMemory.embed_calls == 1
+    assert memories["bear"].added == []
+    assert memories["trader"].added[0][0][0][1] == reflections["trader"]
+
+
+def test_reflect_batch_bounds_workers_and_reports_progress():
+    from tradingagents.graph.reflection import Reflector
+
+    llm = FakeLLM(delay=0.01)
+    progress = []
+    items = [((f"T{i}", "2024-01-02"), _state(str(i)), 0.01 * i) for i in range(6)]
+    results = Reflector(llm).reflect_batch(
+        items, _memories(), max_workers=2, component_workers=5,
+        progress_callback=lambda done, total, key, err: progress.append((done, total)),
+    )
+
+    assert [r["key"] for r in results] == [key for key, _, _ in items]
+    assert all(len(r["reflections"]) == 5 and r["error"] is None for r in results)
+    assert llm.peak <= 10
+    assert progress[-1] == (6, 6)
+
+
+def _final_state(tag):
+    return {
+        "company_of_interest": "AAPL",
+        "trade_date": tag,
+        "market_report": f"market {tag}",
+        "sentiment_report": "s",
+        "news_report": "n",
+        "fundamentals_report": "f",
+        "investment_debate_state": {
+            "bull_history": f"bull-{tag}", "bear_history": f"bear-{tag}", "history": "",
+            "current_response": "", "judge_decision": f"judge-{tag}",
+        },
+        "trader_investment_plan": f"trader-{tag}",
+        "risk_debate_state": {
+            "risky_history": "", "safe_history": "", "neutral_history": "", "history": "",
+            "judge_decision": f"risk-{tag}",
+        },
+        "investment_plan": "plan",
+        "final_trade_decision": "BUY",
+    }
+
+
+def test_batch_reflection_reads_older_dates_after_reused_instance_logs_newer_one(tmp_path, monkeypatch):
+    from tradingagents.graph.reflection import Reflector
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    monkeypatch.chdir(tmp_path)
+    graph = TradingAgentsGraph.__new__(TradingAgentsGraph)
+    graph.reflector = Reflector(FakeLLM(delay=0))
+    for name, memory in _memories().items():
+        setattr(graph, f"{name}_memory", memory)
+
+    for date in ("2024-01-02", "2024-01-03"):
+        # 实例池复用实例时会清空 log_states_dict
+        graph.ticker, graph.log_states_dict = "AAPL", {}
+        graph._log_state(date, _final_state(date))
+
+    results = graph.reflect_and_remember_batch([("AAPL", "2024-01-02", 0.02), ("AAPL", "2024-01-09", 0.01)])
+
+    assert results[0]["key"] == ("AAPL", "2024-01-02") and results[0]["error"] is None
+    assert graph.bull_memory.added[0][0][0][0].startswith("market 2024-01-02")
+    assert results[1]["error"] == "state log not found"
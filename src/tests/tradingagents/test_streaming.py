@@ -0,0 +1,212 @@
+import asyncio
+import time
+from typing import TypedDict
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph import END, StateGraph
+
+from tradingagents.graph.streaming import TokenStreamCoalescer, create_token_stream_handler
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    tokens: list = []
+
+    @property
+    def _llm_type(self):
+        return "fake-stream"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self.tokens)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        for token in self.tokens:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def test_coalescer_merges_tokens_and_bounds_rate():
+    events = []
+    coalescer = TokenStreamCoalescer(events.append, min_chars=10, interval=0.05, max_pending_chars=50)
+    for _ in range(30):
+        coalescer.add("run", "Market Analyst", "ab")
+    # 未到间隔时只有超过 max_pending_chars 才输出
+    assert [e["delta"] for e in events] == ["ab" * 25]
+
+    time.sleep(0.06)
+    coalescer.add("run", "Market Analyst", "cd")
+    coalescer.finish("run")
+    assert [e["offset"] for e in events] == [0, 50, 62]
+    assert "".join(e["delta"] for e in events) == "ab" * 30 + "cd"
+    assert events[-1]["final"] is True and events[-1]["delta"] == ""
+    assert events[0]["step"] == "📊 市场分析师"
+    assert [e["seq"] for e in events] == [0, 1, 2]
+
+
+def test_handler_streams_graph_node_output():
+    class State(TypedDict):
+        report: str
+
+    llm = FakeStreamingChatModel(tokens=[f"t{i} " for i in range(40)])
+
+    def analyst(state):
+        return {"report": llm.invoke([HumanMessage(content="分析 AAPL")]).content}
+
+    workflow = StateGraph(State)
+    workflow.add_node("Market Analyst", analyst)
+    workflow.set_entry_point("Market Analyst")
+    workflow.add_edge("Market Analyst", END)
+    graph = workflow.compile()
+
+    events = []
+    handler, coalescer = create_token_stream_handler(events.append, {"llm_stream_min_chars": 1, "llm_stream_interval": 10})
+    final = graph.invoke({"report": ""}, config={"callbacks": [handler]})
+
+    assert final["report"] == "".join(llm.tokens)
+    # 逐 token 回调被合并：间隔内不输出，结束时一次性输出
+    assert len(events) == 1 and events[0]["final"] is True
+    assert events[0]["node"] == "Market Analyst" and events[0]["delta"] == final["report"]
+    assert coalescer.emitted == 1
+
+
+def test_relay_merges_pending_events_and_snapshots_preview():
+    from app.services.progress.stream_relay import AnalysisStreamRelay
+
+    class Tracker:
+        def __init__(self):
+            self.updates = []
+
+        def update_progress(self, data):
+            self.updates.append(data)
+
+    class Manager:
+        def __init__(self):
+            self.sent = []
+
+        def has_connections(self, task_id):
+            return True
+
+        async def send_progress_update(self, task_id, message):
+            await asyncio.sleep(0.01)
+            self.sent.append(message)
+
+    async def run():
+        tracker, manager = Tracker(), Manager()
+        relay = AnalysisStreamRelay("t1", tracker, asyncio.get_running_loop(), manager, snapshot_interval=60)
+
+        def produce():
+            offset = 0
+            for i in range(5):
+                delta = f"片段{i};"
+                relay({"type": "llm_stream", "node": "Trader", "step": "💼 交易员决策", "delta": delta,
+                       "offset": offset, "seq": i, "final": i == 4})
+                offset += len(delta)
+
+        await asyncio.to_thread(produce)
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if relay._sending is False:
+                break
+        return tracker, manager
+
+    tracker, manager = asyncio.run(run())
+    # 推送中的增量被合并，拼接后内容完整
+    assert len(manager.sent) < 5
+    assert "".join(m["delta"] for m in manager.sent) == "".join(f"片段{i};" for i in range(5))
+    assert manager.sent[-1]["final"] is True and manager.sent[0]["task_id"] == "t1"
+    # 首个片段和结束片段写入快照，中间片段被限频
+    assert len(tracker.updates) == 2
+    assert tracker.updates[-1]["streaming"]["💼 交易员决策"] == "".join(f"片段{i};" for i in range(5))
+
+
+def test_response_cache_stream_replays_hit(monkeypatch):
+    import importlib
+    from types import SimpleNamespace
+
+    import tradingagents.llm_adapters.response_cache as response_cache
+
+    config_manager = importlib.import_module("tradingagents.config.config_manager")
+    monkeypatch.setattr(config_manager.token_tracker, "track_usage", lambda **kw: None)
+    monkeypatch.setattr(response_cache, "_llm_cache", response_cache.LLMResponseCache(backend="local"))
+    monkeypatch.setenv("TA_LLM_CACHE_ENABLED", "true")
+
+    cache = response_cache.get_llm_response_cache()
+    llm = SimpleNamespace(model_name="qwen-plus", temperature=0)
+    messages = [HumanMessage(content="最终决策")]
+    calls = []
+
+    def stream():
+        calls.append(1)
+        for token in ["买", "入"]:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    first = list(cache.stream(llm, "dashscope", messages, None, {}, stream))
+    second = list(cache.stream(llm, "dashscope", messages, None, {}, stream))
+    assert len(first) == 2 and len(second) == 1
+    assert second[0].text == "买入" and calls == [1]
+
+
+def test_concurrent_risk_round_streams_each_analyst_separately():
+    from tradingagents.graph.debate import create_concurrent_risk_round
+
+    class State(TypedDict):
+        risk_debate_state: dict
+
+    def debator(name):
+        llm = FakeStreamingChatModel(tokens=[f"{name}{i} " for i in range(20)])
+
+        def node(state):
+            text = llm.invoke([HumanMessage(content=name)]).content
+            return {"risk_debate_state": {**state["risk_debate_state"], "history": text}}
+
+        return node
+
+    roles = ["Risky Analyst", "Safe Analyst", "Neutral Analyst"]
+    workflow = StateGraph(State)
+    workflow.add_node(
+        "Risk Debate Round",
+        create_concurrent_risk_round([debator(n) for n in ("R", "S", "N")], roles=roles),
+    )
+    workflow.set_entry_point("Risk Debate Round")
+    workflow.add_edge("Risk Debate Round", END)
+
+    events = []
+    handler, _ = create_token_stream_handler(events.append, {"llm_stream_min_chars": 1, "llm_stream_interval": 0})
+    workflow.compile().invoke({"risk_debate_state": {"history": "", "count": 0}}, config={"callbacks": [handler]})
+
+    by_run = {}
+    for event in events:
+        by_run.setdefault(event["run_id"], []).append(event)
+    assert len(by_run) == 3
+    texts = {}
+    for run_events in by_run.values():
+        assert len({e["node"] for e in run_events}) == 1
+        texts[run_events[0]["node"]] = "".join(e["delta"] for e in run_events)
+    assert set(texts) == set(roles)
+    assert texts["Safe Analyst"] == "".join(f"S{i} " for i in range(20))
+    assert {e["step"] for e in events} == {"🔥 激进风险评估", "🛡️ 保守风险评估", "⚖️ 中性风险评估"}
+
+
+def test_relay_keeps_concurrent_runs_of_one_step_apart():
+    from app.services.progress.stream_relay import AnalysisStreamRelay
+
+    class Tracker:
+        def __init__(self):
+            self.updates = []
+
+        def update_progress(self, data):
+            self.updates.append(data)
+
+    relay = AnalysisStreamRelay("t1", Tracker(), snapshot_interval=0)
+    offsets = {"a": 0, "b": 0}
+    for i in range(3):
+        for run in ("a", "b"):
+            delta = f"{run}{i};"
+            event = {"type": "llm_stream", "node": "Risk Debate Round", "step": "⚡ 风险并发讨论", "run_id": run,
+                     "delta": delta, "offset": offsets[run], "seq": i, "final": False}
+            relay._update_preview(event)
+            relay._merge_pending(event)
+            offsets[run] += len(delta)
+
+    assert relay._previews["⚡ 风险并发讨论"] == "b0;b1;b2;"
+    assert {key: e["delta"] for key, e in relay._pending.items()} == {"a": "a0;a1;a2;", "b": "b0;b1;b2;"}
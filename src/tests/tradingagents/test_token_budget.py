@@ -0,0 +1,99 @@
+from tradingagents.utils.token_budget import (
+    budgeted_tool,
+    compact_report,
+    compact_table,
+    dedupe_by_title,
+    estimate_tokens,
+    tool_token_budget,
+)
+
+
+def _long_report(rows: int = 200) -> str:
+    table = "\n".join(f"| 2024-01-{i % 28 + 1:02d} | {10 + i * 0.1:.2f} | {1000 + i} |" for i in range(rows))
+    return (
+        "# 000001 股票分析\n\n"
+        "## 历史行情\n| 日期 | 收盘 | 成交量 |\n|---|---|---|\n" + table + "\n\n"
+        "## 技术指标\n" + "MA5 高于 MA20，短期趋势向上，成交量温和放大。\n" * 50 +
+        "\n## 风险提示\n数据仅供参考。\n"
+    )
+
+
+def test_compact_report_keeps_short_reports_untouched():
+    text = "# 报告\n\n短内容"
+    assert compact_report(text, budget=1000) is text
+
+
+def test_compact_report_marks_omissions_and_fits_budget():
+    text = _long_report()
+    budget = 800
+    assert estimate_tokens(text) > budget
+
+    result = compact_report(text, budget=budget, label="market")
+    body = result.split("\n\n> ℹ️")[0]
+    assert estimate_tokens(body) <= budget * 1.1
+    assert "省略" in body
+    assert "报告已按 token 预算压缩" in result
+    # 章节标题保留
+    for heading in ("## 历史行情", "## 技术指标", "## 风险提示"):
+        assert heading in result
+
+
+def test_compact_table_keeps_latest_rows():
+    rows = [{"date": f"2024-01-{i:02d}", "close": 10.0 + i} for i in range(1, 31)]
+    table = compact_table(rows, ["date", "close"], budget=60, headers=["日期", "收盘"])
+    lines = table.splitlines()
+    assert lines[0] == "| 日期 | 收盘 |"
+    assert "| 2024-01-30 | 40.00 |" in lines
+    assert "| 2024-01-01 | 11.00 |" not in lines
+    assert lines[-1].startswith("（共 30 行")
+
+
+def test_dedupe_by_title_ignores_punctuation_and_spaces():
+    items = [{"t": "平安银行发布年报"}, {"t": "平安银行 发布年报！"}, {"t": "其他新闻"}]
+    assert dedupe_by_title(items, title=lambda n: n["t"]) == [items[0], items[2]]
+
+
+def test_budgeted_tool_compacts_dict_field():
+    @budgeted_tool("sentiment", model=lambda: "gpt-4", field="content")
+    def sentiment() -> dict:
+        return {"success": True, "content": _long_report()}
+
+    result = sentiment()
+    assert result["success"] is True
+    assert "报告已按 token 预算压缩" in result["content"]
+    assert tool_token_budget("sentiment", "gpt-4") == 800
+    assert tool_token_budget("fundamentals", "qwen-plus") == 12000
+
+
+def test_market_data_report_includes_compact_indicator_table():
+    import numpy as np
+    import pandas as pd
+    from tradingagents.dataflows.data_source_manager import DataSourceManager
+
+    n = 40
+    data = pd.DataFrame({
+        "date": pd.date_range("2026-08-01", periods=n).strftime("%Y-%m-%d"),
+        "open": np.linspace(10, 12, n),
+        "high": np.linspace(10.5, 12.5, n),
+        "low": np.linspace(9.5, 11.5, n),
+        "close": np.linspace(10, 12, n),
+        "volume": np.full(n, 1e6),
+    })
+    manager = DataSourceManager.__new__(DataSourceManager)
+    report = manager._format_stock_data_response(data, "000001", "平安银行", "2026-08-01", "2026-09-09")
+
+    assert "近期行情表最多展示最近20个交易日" in report
+    assert "价格统计" not in report
+    table = report.split("📋 近期行情与指标:\n", 1)[1].splitlines()
+    assert table[0] == "| 日期 | 开盘 | 最高 | 最低 | 收盘 | 成交量 | MA5 | MA20 | DIF | DEA | RSI6 | RSI12 |"
+    assert table[-1].startswith("| 2026-09-09 | 12.00 |") and "| 1000000 |" in table[-1]
+    assert len(table) == 22  # 表头 + 分隔线 + 最近 20 个交易日
+
+    # 在工具内调用时按当前模型的预算裁剪：小上下文模型只保留最近几行
+    def table_rows():
+        report = manager._format_stock_data_response(data, "000001", "平安银行", "2026-08-01", "2026-09-09")
+        return report.split("📋 近期行情与指标:\n", 1)[1].splitlines()
+
+    small = budgeted_tool("market", model=lambda: "ernie-speed")(table_rows)()
+    assert small[-1].startswith("（共 20 行，按预算展示最近")
+    assert small[-2].startswith("| 2026-09-09 |") and len(small) < 22
@@ -0,0 +1,114 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def local_tool_cache(monkeypatch):
+    import tradingagents.utils.tool_cache as tool_cache
+
+    monkeypatch.setattr(tool_cache.ToolResultCache, "_redis", staticmethod(lambda: None))
+    monkeypatch.setattr(tool_cache, "_tool_cache", tool_cache.ToolResultCache())
+    monkeypatch.delenv("TA_TOOL_CACHE_ENABLED", raising=False)
+    yield tool_cache
+
+
+def test_cached_tool_normalizes_arguments_and_skips_errors(local_tool_cache):
+    calls = []
+
+    @local_tool_cache.cached_tool(tool_name="market")
+    def market(ticker: str, start_date: str = None, end_date: str = None) -> dict:
+        calls.append(ticker)
+        if ticker == "BAD":
+            return {"status": "error", "report": "失败"}
+        return {"report": f"# {ticker}", "status": "success"}
+
+    assert market("aapl", "2024-01-02", "20240102") == {"report": "# aapl", "status": "success"}
+    assert market(ticker="AAPL ", start_date="2024-01-02", end_date="2024-01-02")["report"] == "# aapl"
+    assert len(calls) == 1
+
+    market("BAD", "2024-01-02", "2024-01-02")
+    market("BAD", "2024-01-02", "2024-01-02")
+    assert calls.count("BAD") == 2
+
+    stats = local_tool_cache.get_tool_cache().stats()
+    assert stats["tools"]["market"]["hits"] == 1
+    assert stats["tools"]["market"]["uncached"] == 2
+
+
+def test_cached_tool_skips_partial_failures(local_tool_cache):
+    calls = []
+
+    @local_tool_cache.cached_tool(tool_name="news")
+    def news(ticker: str, curr_date: str = None) -> dict:
+        calls.append(ticker)
+        if ticker == "000001":
+            local_tool_cache.report_tool_failure("Google新闻: timeout")
+            return {"report": "## 东方财富新闻\n正常内容", "status": "success"}
+        sections = ["## 东方财富新闻\n正常内容"] * 20 + ["## Google新闻\n获取失败: timeout"]
+        return {"report": "\n".join(sections), "status": "success"}
+
+    for _ in range(2):
+        news("000001", "2024-01-02")
+        news("600519", "2024-01-02")
+    assert calls == ["000001", "600519"] * 2
+    assert local_tool_cache.get_tool_cache().stats()["tools"]["news"]["uncached"] == 4
+
+    # 报告失败只影响当前调用
+    local_tool_cache.report_tool_failure("不在缓存工具调用中")
+    assert local_tool_cache._is_cacheable("正常报告")
+
+
+def test_cached_tool_context_is_part_of_key(local_tool_cache):
+    depth = {"value": "标准"}
+    calls = []
+
+    @local_tool_cache.cached_tool(tool_name="fundamentals", context=lambda: {"research_depth": depth["value"]})
+    def fundamentals(ticker: str, curr_date: str = None) -> str:
+        calls.append(depth["value"])
+        return f"{ticker}-{depth['value']}"
+
+    fundamentals("000001", "2024-01-02")
+    depth["value"] = "深度"
+    assert fundamentals("000001", "2024-01-02") == "000001-深度"
+    assert calls == ["标准", "深度"]
+
+
+def test_concurrent_identical_calls_share_one_computation(local_tool_cache):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    @local_tool_cache.cached_tool(tool_name="news")
+    def news(ticker: str, curr_date: str) -> str:
+        calls.append(ticker)
+        started.set()
+        release.wait(2)
+        return f"news of {ticker}"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(news("000001", "2024-01-02")))
+    leader.start()
+    started.wait(2)
+    followers = [threading.Thread(target=lambda: results.append(news("000001", "2024-01-02"))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    release.set()
+    for t in [leader, *followers]:
+        t.join()
+
+    assert calls == ["000001"]
+    assert results == ["news of 000001"] * 4
+
+
+def test_market_aware_ttl(local_tool_cache):
+    ttl = local_tool_cache.market_aware_ttl
+    tz = local_tool_cache.get_zoneinfo()
+    trading = datetime(2024, 1, 3, 10, 0, tzinfo=tz)  # 周三上午
+    evening = datetime(2024, 1, 3, 20, 0, tzinfo=tz)
+
+    assert ttl("2024-01-02", "000001", now=trading) == 86400
+    assert ttl("2024-01-03", "000001", now=trading) == 300
+    assert ttl("2024-01-03", "000001", now=evening) == 3600
+    assert ttl("2024-01-03", "AAPL", now=datetime(2024, 1, 3, 22, 0, tzinfo=tz)) == 300
@@ -13,6 +13,7 @@ from tradingagents.tools.unified_news_tool import create_unified_news_tool
 from tradingagents.utils.stock_utils import StockUtils
 # 导入Google工具调用处理器
 from tradingagents.agents.utils.google_tool_handler import GoogleToolCallHandler
+from tradingagents.llm_adapters.record_replay import llm_class_name
 
 logger = get_logger("analysts.news")
 
@@ -207,11 +208,12 @@ def create_news_analyst(llm, toolkit):
         
         # 🚨 DashScope/DeepSeek/Zhipu预处理：强制获取新闻数据
         pre_fetched_news = None
-        if ('DashScope' in llm.__class__.__name__ 
-            or 'DeepSeek' in llm.__class__.__name__
-            or 'Zhipu' in llm.__class__.__name__
+        llm_class = llm_class_name(llm)
+        if ('DashScope' in llm_class
+            or 'DeepSeek' in llm_class
+            or 'Zhipu' in llm_class
             ):
-            logger.warning(f"[新闻分析师] 🚨 检测到{llm.__class__.__name__}模型，启动预处理强制新闻获取...")
+            logger.warning(f"[新闻分析师] 🚨 检测到{llm_class}模型，启动预处理强制新闻获取...")
             try:
                 # 强制预先获取新闻数据
                 logger.info(f"[新闻分析师] 🔧 预处理：强制调用统一新闻工具...")
@@ -20,6 +20,8 @@ from langchain_core.messages import HumanMessage
 # 导入统一日志系统和工具日志装饰器
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_tool_call, log_analysis_step
+from tradingagents.utils.tool_cache import cached_tool, report_tool_failure
+from tradingagents.utils.token_budget import budgeted_tool
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -744,6 +746,8 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_fundamentals_unified", log_args=True)
+    @budgeted_tool("fundamentals", model=lambda: Toolkit._config.get("quick_think_llm"))
+    @cached_tool(tool_name="get_stock_fundamentals_unified", context=lambda: {"research_depth": Toolkit._config.get("research_depth")})
     def get_stock_fundamentals_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD"] = None,
@@ -928,6 +932,7 @@ class Toolkit:
                 except Exception as e:
                     logger.error(f"❌ [基本面工具调试] A股价格数据获取失败: {e}")
                     result_data.append(f"## A股当前价格信息\n获取失败: {e}")
+                    report_tool_failure(f"A股价格数据: {e}")
                     current_price_data = ""
 
                 try:
@@ -947,6 +952,7 @@ class Toolkit:
                 except Exception as e:
                     logger.error(f"❌ [基本面工具调试] A股基本面数据获取失败: {e}")
                     result_data.append(f"## A股基本面财务数据\n获取失败: {e}")
+                    report_tool_failure(f"A股基本面数据: {e}")
 
                 # 🔥 [基本面补全] 补充最新的财报新闻
                 try:
@@ -1048,6 +1054,7 @@ class Toolkit:
 
                 # 备用方案：基础港股信息
                 if not hk_data_success:
+                    report_tool_failure("港股主要数据源不可用")
                     try:
                         from tradingagents.dataflows.interface import get_hk_stock_info_unified
                         hk_info = get_hk_stock_info_unified(ticker)
@@ -1208,6 +1215,8 @@ class Toolkit:
                     logger.warning(f"⚠️ [美股5/5] 估值数据获取失败: {e}")
                 
                 # 汇总美股数据
+                if 0 < len(us_data_parts) < 5:
+                    report_tool_failure(f"美股基本面模块 {len(us_data_parts)}/5")
                 if us_data_parts:
                     us_combined = f"""## 美股基本面数据 ({ticker})
 
@@ -1221,6 +1230,7 @@ class Toolkit:
                     logger.info(f"✅ [统一基本面工具] 美股数据获取成功: {len(us_data_parts)}/5 模块")
                 else:
                     result_data.append(f"## 美股基本面数据\n获取失败: 所有AKShare接口均不可用")
+                    report_tool_failure("美股所有数据源不可用")
                     logger.error(f"❌ [统一基本面工具] 美股所有数据源都失败")
 
             # 组合所有数据
@@ -1287,6 +1297,8 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_market_data_unified", log_args=True)
+    @budgeted_tool("market", model=lambda: Toolkit._config.get("quick_think_llm"))
+    @cached_tool(tool_name="get_stock_market_data_unified", context=lambda: {"research_depth": Toolkit._config.get("research_depth")})
     def get_stock_market_data_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD。注意：系统会自动扩展到配置的回溯天数（通常为365天），你只需要传递分析日期即可"],
@@ -1346,6 +1358,7 @@ class Toolkit:
                 except Exception as e:
                     logger.error(f"❌ [市场工具调试] A股数据获取失败: {e}")
                     result_data.append(f"## A股市场数据\n获取失败: {e}")
+                    report_tool_failure(f"A股市场数据: {e}")
 
             elif is_hk:
                 # 港股：使用AKShare数据源
@@ -1363,6 +1376,7 @@ class Toolkit:
                 except Exception as e:
                     logger.error(f"❌ [市场工具调试] 港股数据获取失败: {e}")
                     result_data.append(f"## 港股市场数据\n获取失败: {e}")
+                    report_tool_failure(f"港股市场数据: {e}")
 
             else:
                 # 美股：优先使用FINNHUB API数据源
@@ -1374,6 +1388,7 @@ class Toolkit:
                     result_data.append(f"## 美股市场数据\n{us_data}")
                 except Exception as e:
                     result_data.append(f"## 美股市场数据\n获取失败: {e}")
+                    report_tool_failure(f"美股市场数据: {e}")
 
             # 组合所有数据
             combined_result = f"""# {ticker} 市场数据分析
@@ -1408,6 +1423,8 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_news_unified", log_args=True)
+    @budgeted_tool("news", model=lambda: Toolkit._config.get("quick_think_llm"))
+    @cached_tool(tool_name="get_stock_news_unified")
     def get_stock_news_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         curr_date: Annotated[str, "当前日期，格式：YYYY-MM-DD"]
@@ -1484,6 +1501,7 @@ class Toolkit:
                 except Exception as em_e:
                     logger.error(f"❌ [统一新闻工具] 东方财富新闻获取失败: {em_e}")
                     result_data.append(f"## 东方财富新闻\n获取失败: {em_e}")
+                    report_tool_failure(f"东方财富新闻: {em_e}")
 
                 # 2. 获取Google新闻作为补充
                 try:
@@ -1506,6 +1524,7 @@ class Toolkit:
                 except Exception as google_e:
                     logger.error(f"❌ [统一新闻工具] Google新闻获取失败: {google_e}")
                     result_data.append(f"## Google新闻\n获取失败: {google_e}")
+                    report_tool_failure(f"Google新闻: {google_e}")
 
             else:
                 # 美股：使用Finnhub新闻
@@ -1517,6 +1536,7 @@ class Toolkit:
                     result_data.append(f"## 美股新闻\n{news_data}")
                 except Exception as e:
                     result_data.append(f"## 美股新闻\n获取失败: {e}")
+                    report_tool_failure(f"美股新闻: {e}")
 
             # 组合所有数据
             combined_result = f"""# {ticker} 新闻分析
@@ -1542,6 +1562,8 @@ class Toolkit:
     @staticmethod
     @tool
     @log_tool_call(tool_name="get_stock_sentiment_unified", log_args=True)
+    @budgeted_tool("sentiment", model=lambda: Toolkit._config.get("quick_think_llm"), field="content")
+    @cached_tool(tool_name="get_stock_sentiment_unified")
     def get_stock_sentiment_unified(
         ticker: Annotated[str, "股票代码（支持A股、港股、美股）"],
         curr_date: Annotated[str, "当前日期，格式：YYYY-MM-DD"]
@@ -12,6 +12,8 @@ import logging
 from typing import Any, Dict, List, Optional, Tuple
 from langchain_core.messages import HumanMessage, ToolMessage, AIMessage
 
+from tradingagents.llm_adapters.record_replay import llm_class_name
+
 logger = logging.getLogger(__name__)
 
 class GoogleToolCallHandler:
@@ -20,7 +22,8 @@ class GoogleToolCallHandler:
     @staticmethod
     def is_google_model(llm) -> bool:
         """检查是否为Google模型"""
-        return 'Google' in llm.__class__.__name__ or 'ChatGoogleOpenAI' in llm.__class__.__name__
+        llm_class = llm_class_name(llm)
+        return 'Google' in llm_class or 'ChatGoogleOpenAI' in llm_class
     
     @staticmethod
     def handle_google_tool_calls(
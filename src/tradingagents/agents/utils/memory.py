@@ -111,6 +111,16 @@ class ChromaDBManager:
             return collection
 
 
+_collection_locks: Dict[str, threading.Lock] = {}
+_collection_locks_guard = threading.Lock()
+
+
+def _collection_lock(name: str) -> threading.Lock:
+    """同名集合共享一把写入锁（多个图实例可能指向同一集合）"""
+    with _collection_locks_guard:
+        return _collection_locks.setdefault(name, threading.Lock())
+
+
 class FinancialSituationMemory:
     def __init__(self, name, config):
         self.config = config
@@ -324,6 +334,7 @@ class FinancialSituationMemory:
         # 使用单例ChromaDB管理器
         self.chroma_manager = ChromaDBManager()
         self.situation_collection = self.chroma_manager.get_or_create_collection(name)
+        self._add_lock = _collection_lock(name)
 
     def _smart_text_truncation(self, text, max_length=8192):
         """智能文本截断，保持语义完整性和缓存兼容性"""
@@ -571,31 +582,33 @@ class FinancialSituationMemory:
         """获取最后处理的文本信息"""
         return getattr(self, '_last_text_info', None)
 
-    def add_situations(self, situations_and_advice):
-        """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)"""
+    def add_situations(self, situations_and_advice, embeddings=None):
+        """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)
+
+        embeddings: 可选，与 situations_and_advice 一一对应的预先计算的向量（多个记忆库共享同一情境时避免重复向量化）
+        """
 
         situations = []
         advice = []
-        ids = []
-        embeddings = []
 
         if self.situation_collection is None:
             return
 
-        offset = self.situation_collection.count()
-
-        for i, (situation, recommendation) in enumerate(situations_and_advice):
+        for situation, recommendation in situations_and_advice:
             situations.append(situation)
             advice.append(recommendation)
-            ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
-
-        self.situation_collection.add(
-            documents=situations,
-            metadatas=[{"recommendation": rec} for rec in advice],
-            embeddings=embeddings,
-            ids=ids,
-        )
+        if embeddings is None:
+            embeddings = [self.get_embedding(situation) for situation in situations]
+
+        # 按 count() 分配ID，并发写入同一集合时需要串行化
+        with self._add_lock:
+            offset = self.situation_collection.count()
+            self.situation_collection.add(
+                documents=situations,
+                metadatas=[{"recommendation": rec} for rec in advice],
+                embeddings=list(embeddings),
+                ids=[str(offset + i) for i in range(len(situations))],
+            )
 
     def get_memories(self, current_situation, n_matches=1):
         """Find matching recommendations using embeddings with smart truncation handling"""
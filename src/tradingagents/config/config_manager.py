@@ -385,10 +385,13 @@ class ConfigManager:
             logger.error(f"保存使用记录失败: {e}")
     
     def add_usage_record(self, provider: str, model_name: str, input_tokens: int,
-                        output_tokens: int, session_id: str, analysis_type: str = "stock_analysis"):
-        """添加使用记录"""
+                        output_tokens: int, session_id: str, analysis_type: str = "stock_analysis",
+                        cached: bool = False):
+        """添加使用记录（cached=True 表示命中LLM响应缓存，成本记为0）"""
         # 计算成本和货币单位
         cost, currency = self.calculate_cost(provider, model_name, input_tokens, output_tokens)
+        if cached:
+            cost = 0.0
 
         record = UsageRecord(
             timestamp=datetime.now(ZoneInfo(get_timezone_name())).isoformat(),
@@ -399,7 +402,8 @@ class ConfigManager:
             cost=cost,
             currency=currency,
             session_id=session_id,
-            analysis_type=analysis_type
+            analysis_type=analysis_type,
+            cached=cached
         )
 
         # 🔍 详细日志：记录保存位置
@@ -696,8 +700,9 @@ class TokenTracker:
         self.config_manager = config_manager
 
     def track_usage(self, provider: str, model_name: str, input_tokens: int,
-                   output_tokens: int, session_id: str = None, analysis_type: str = "stock_analysis"):
-        """跟踪Token使用"""
+                   output_tokens: int, session_id: str = None, analysis_type: str = "stock_analysis",
+                   cached: bool = False):
+        """跟踪Token使用（cached=True 表示命中LLM响应缓存，以0成本记录）"""
         if session_id is None:
             session_id = f"session_{datetime.now(ZoneInfo(get_timezone_name())).strftime('%Y%m%d_%H%M%S')}"
 
@@ -715,7 +720,8 @@ class TokenTracker:
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             session_id=session_id,
-            analysis_type=analysis_type
+            analysis_type=analysis_type,
+            cached=cached
         )
 
         # 检查成本警告
@@ -130,6 +130,7 @@ class MongoDBStorage:
 
             # 插入记录
             result = self.collection.insert_one(record_dict)
+            self._apply_rollups(record_dict)
 
             if result.inserted_id:
                 logger.info(f"✅ [MongoDB存储] 记录已保存: ID={result.inserted_id}, {record.provider}/{record.model_name}, ¥{record.cost:.4f}")
@@ -144,6 +145,17 @@ class MongoDBStorage:
             logger.error(f"   堆栈: {traceback.format_exc()}")
             return False
     
+    def _apply_rollups(self, record_dict: Dict[str, Any]) -> None:
+        """累加小时/日预聚合，供统计面板读取"""
+        try:
+            from .usage_rollups import ROLLUP_COLLECTION, rollup_updates
+
+            rollups = self.db[ROLLUP_COLLECTION]
+            for flt, update in rollup_updates(record_dict):
+                rollups.update_one(flt, update, upsert=True)
+        except Exception as e:
+            logger.warning(f"⚠️ [MongoDB存储] 更新使用量预聚合失败: {e}")
+
     def load_usage_records(self, limit: int = 10000, days: int = None) -> List[UsageRecord]:
         """从MongoDB加载使用记录"""
         if not self._connected:
@@ -20,6 +20,7 @@ class UsageRecord:
     currency: str = "CNY"  # 货币单位
     session_id: str = ""  # 会话ID
     analysis_type: str = "stock_analysis"  # 分析类型
+    cached: bool = False  # 是否命中LLM响应缓存（成本为0）
 
 
 @dataclass
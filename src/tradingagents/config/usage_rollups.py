@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Token 使用量预聚合（rollup）
+
+token_usage 原始记录按小时和按天累加到 token_usage_rollups 集合，
+维度为 供应商 / 模型 / 用户 / 分析类型 / 货币。写入原始记录时同时 $inc 对应的两个桶，
+统计查询读取预聚合文档，只有当前未完结的小时才读取原始记录。
+
+时间桶直接取记录 timestamp（本地时间 ISO 字符串）的前缀：
+小时桶 "YYYY-MM-DDTHH"，日桶 "YYYY-MM-DD"，与原始记录按字符串比较的时间范围一致。
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+ROLLUP_COLLECTION = "token_usage_rollups"
+DIMENSIONS = ("provider", "model_name", "user_id", "analysis_type", "currency")
+METRICS = ("requests", "input_tokens", "output_tokens", "cost")
+
+
+def hour_bucket(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H")
+    return str(value or "").replace(" ", "T")[:13]
+
+
+def day_bucket(value: Any) -> str:
+    return hour_bucket(value)[:10]
+
+
+def rollup_dimensions(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "provider": record.get("provider") or "unknown",
+        "model_name": record.get("model_name") or "unknown",
+        "user_id": str(record.get("user_id") or ""),
+        "analysis_type": record.get("analysis_type") or "stock_analysis",
+        "currency": record.get("currency") or "CNY",
+    }
+
+
+def rollup_updates(record: Dict[str, Any]) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """一条原始记录对应的 (过滤条件, 更新) 列表：小时桶 + 日桶"""
+    timestamp = record.get("timestamp")
+    if not timestamp:
+        return []
+    dims = rollup_dimensions(record)
+    inc = {
+        "requests": 1,
+        "input_tokens": int(record.get("input_tokens") or 0),
+        "output_tokens": int(record.get("output_tokens") or 0),
+        "cost": float(record.get("cost") or 0.0),
+    }
+    return [
+        ({"granularity": "hour", "bucket": hour_bucket(timestamp), **dims}, {"$inc": inc}),
+        ({"granularity": "day", "bucket": day_bucket(timestamp), **dims}, {"$inc": inc}),
+    ]
+
+
+def rollup_rebuild_pipeline(granularity: str, match: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """从原始记录重建某一粒度预聚合的聚合管道"""
+    length = 13 if granularity == "hour" else 10
+    return [
+        {"$match": match or {}},
+        {"$match": {"timestamp": {"$type": "string"}}},
+        {"$group": {
+            "_id": {
+                "bucket": {"$substrCP": [
+                    {"$replaceAll": {"input": "$timestamp", "find": " ", "replacement": "T"}}, 0, length
+                ]},
+                "provider": {"$ifNull": ["$provider", "unknown"]},
+                "model_name": {"$ifNull": ["$model_name", "unknown"]},
+                "user_id": {"$toString": {"$ifNull": ["$user_id", ""]}},
+                "analysis_type": {"$ifNull": ["$analysis_type", "stock_analysis"]},
+                "currency": {"$ifNull": ["$currency", "CNY"]},
+            },
+            "requests": {"$sum": 1},
+            "input_tokens": {"$sum": {"$ifNull": ["$input_tokens", 0]}},
+            "output_tokens": {"$sum": {"$ifNull": ["$output_tokens", 0]}},
+            "cost": {"$sum": {"$ifNull": ["$cost", 0]}},
+        }},
+    ]
+
+
+def plan_segments(start: datetime, end: datetime) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    将查询区间拆分为：原始记录区间、小时桶区间、日桶区间（均为左闭右开）
+
+    首尾不足一小时的部分读原始记录，整点到整日之间读小时桶，中间的整日读日桶。
+    """
+    first_hour = start.replace(minute=0, second=0, microsecond=0)
+    if first_hour < start:
+        first_hour += timedelta(hours=1)
+    last_hour = end.replace(minute=0, second=0, microsecond=0)
+
+    plan: Dict[str, List[Tuple[str, str]]] = {"raw": [], "hour": [], "day": []}
+    if first_hour >= last_hour:
+        plan["raw"].append((start.isoformat(), end.isoformat()))
+        return plan
+
+    if start < first_hour:
+        plan["raw"].append((start.isoformat(), first_hour.isoformat()))
+    plan["raw"].append((last_hour.isoformat(), end.isoformat()))
+
+    first_day = first_hour.replace(hour=0)
+    if first_day < first_hour:
+        first_day += timedelta(days=1)
+    last_day = last_hour.replace(hour=0)
+    if first_day < last_day:
+        if first_hour < first_day:
+            plan["hour"].append((hour_bucket(first_hour), hour_bucket(first_day)))
+        plan["day"].append((day_bucket(first_day), day_bucket(last_day)))
+        if last_day < last_hour:
+            plan["hour"].append((hour_bucket(last_day), hour_bucket(last_hour)))
+    else:
+        plan["hour"].append((hour_bucket(first_hour), hour_bucket(last_hour)))
+    return plan
@@ -755,24 +755,10 @@ class DataSourceManager:
 
             logger.info(f"✅ [技术指标] 技术指标计算完成")
 
-            # 🔧 只保留最后3-5天的数据用于展示（减少token消耗）
-            display_rows = min(5, len(data))
-            display_data = data.tail(display_rows)
+            # 近期行情表最多展示最近20个交易日，实际行数按当前模型的市场工具预算裁剪
+            table_data = data.tail(20)
             latest_data = data.iloc[-1]
 
-            # 🔍 [调试日志] 打印最近5天的原始数据和技术指标
-            logger.info(f"🔍 [技术指标详情] ===== 最近{display_rows}个交易日数据 =====")
-            for i, (idx, row) in enumerate(display_data.iterrows(), 1):
-                logger.info(f"🔍 [技术指标详情] 第{i}天 ({row.get('date', 'N/A')}):")
-                logger.info(f"   价格: 开={row.get('open', 0):.2f}, 高={row.get('high', 0):.2f}, 低={row.get('low', 0):.2f}, 收={row.get('close', 0):.2f}")
-                logger.info(f"   MA: MA5={row.get('ma5', 0):.2f}, MA10={row.get('ma10', 0):.2f}, MA20={row.get('ma20', 0):.2f}, MA60={row.get('ma60', 0):.2f}")
-                logger.info(f"   MACD: DIF={row.get('macd_dif', 0):.4f}, DEA={row.get('macd_dea', 0):.4f}, MACD={row.get('macd', 0):.4f}")
-                logger.info(f"   RSI: RSI6={row.get('rsi6', 0):.2f}, RSI12={row.get('rsi12', 0):.2f}, RSI24={row.get('rsi24', 0):.2f} (同花顺风格)")
-                logger.info(f"   RSI14: {row.get('rsi14', 0):.2f} (国际标准)")
-                logger.info(f"   BOLL: 上={row.get('boll_upper', 0):.2f}, 中={row.get('boll_mid', 0):.2f}, 下={row.get('boll_lower', 0):.2f}")
-
-            logger.info(f"🔍 [技术指标详情] ===== 数据详情结束 =====")
-
             # 计算最新价格和涨跌幅
             latest_price = latest_data.get('close', 0)
             prev_close = data.iloc[-2].get('close', latest_price) if len(data) > 1 else latest_price
@@ -782,7 +768,7 @@ class DataSourceManager:
             # 格式化数据报告
             result = f"📊 {stock_name}({symbol}) - 技术分析数据\n"
             result += f"数据期间: {start_date} 至 {end_date}\n"
-            result += f"数据条数: {original_data_count}条 (展示最近{display_rows}个交易日)\n\n"
+            result += f"数据条数: {original_data_count}条 (近期行情表最多展示最近{len(table_data)}个交易日)\n\n"
 
             result += f"💰 最新价格: ¥{latest_price:.2f}\n"
             result += f"📈 涨跌额: {change:+.2f} ({change_pct:+.2f}%)\n\n"
@@ -892,15 +878,24 @@ class DataSourceManager:
             else:
                 result += " (中性区域)\n\n"
 
-            # 价格统计
-            result += f"📊 价格统计 (最近{display_rows}个交易日):\n"
-            result += f"   最高价: ¥{display_data['high'].max():.2f}\n"
-            result += f"   最低价: ¥{display_data['low'].min():.2f}\n"
-            result += f"   平均价: ¥{display_data['close'].mean():.2f}\n"
-
-            # 防御性获取成交量数据
-            volume_value = self._get_volume_safely(display_data)
-            result += f"   平均成交量: {volume_value:,.0f}股\n"
+            # 近期行情与指标：紧凑表格，在市场工具预算内尽量多保留最近的交易日
+            from tradingagents.utils.token_budget import active_model, compact_table, tool_token_budget
+            volume_column = next((col for col in ('volume', 'vol') if col in table_data.columns), None)
+            recent_rows = [
+                {
+                    **row,
+                    'date': str(row.get('date', ''))[:10],
+                    'volume': f"{row[volume_column]:.0f}" if volume_column and pd.notna(row[volume_column]) else None,
+                }
+                for row in table_data.to_dict('records')
+            ]
+            result += "📋 近期行情与指标:\n"
+            result += compact_table(
+                recent_rows,
+                ['date', 'open', 'high', 'low', 'close', 'volume', 'ma5', 'ma20', 'macd_dif', 'macd_dea', 'rsi6', 'rsi12'],
+                budget=tool_token_budget("market", active_model()) // 4,
+                headers=['日期', '开盘', '最高', '最低', '收盘', '成交量', 'MA5', 'MA20', 'DIF', 'DEA', 'RSI6', 'RSI12'],
+            ) + "\n"
 
             return result
 
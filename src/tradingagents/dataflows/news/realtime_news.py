@@ -865,6 +865,13 @@ class RealtimeNewsAggregator:
             logger.warning(f"[新闻报告] 未获取到 {ticker} 的实时新闻数据")
             return f"未获取到{ticker}的实时新闻数据。"
 
+        # 多个新闻源经常转载同一条新闻，按标题去重
+        from tradingagents.utils.token_budget import dedupe_by_title
+        deduped = dedupe_by_title(news_items, title=lambda n: n.title)
+        if len(deduped) < len(news_items):
+            logger.info(f"[新闻报告] {ticker} 去除重复新闻 {len(news_items) - len(deduped)} 条")
+        news_items = deduped
+
         # 按紧急程度分组
         high_urgency = [n for n in news_items if n.urgency == 'high']
         medium_urgency = [n for n in news_items if n.urgency == 'medium']
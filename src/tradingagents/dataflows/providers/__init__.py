@@ -2,98 +2,45 @@
 统一数据源提供器包
 按市场分类组织数据提供器
 """
-from .base_provider import BaseStockDataProvider
-
-# 导入中国市场提供器（新路径）
-try:
-    from .china import (
-        AKShareProvider,
-        TushareProvider,
-        BaostockProvider as BaoStockProvider,
-        AKSHARE_AVAILABLE,
-        TUSHARE_AVAILABLE,
-        BAOSTOCK_AVAILABLE
-    )
-except ImportError:
-    # 向后兼容：尝试从旧路径导入
-    try:
-        from .tushare_provider import TushareProvider
-    except ImportError:
-        TushareProvider = None
-
-    try:
-        from .akshare_provider import AKShareProvider
-    except ImportError:
-        AKShareProvider = None
-
-    try:
-        from .baostock_provider import BaoStockProvider
-    except ImportError:
-        BaoStockProvider = None
-
-    AKSHARE_AVAILABLE = AKShareProvider is not None
-    TUSHARE_AVAILABLE = TushareProvider is not None
-    BAOSTOCK_AVAILABLE = BaoStockProvider is not None
-
-# 导入港股提供器
-try:
-    from .hk import (
-        ImprovedHKStockProvider,
-        get_improved_hk_provider,
-        HK_PROVIDER_AVAILABLE
-    )
-except ImportError:
-    ImprovedHKStockProvider = None
-    get_improved_hk_provider = None
-    HK_PROVIDER_AVAILABLE = False
-
-# 导入美股提供器
-try:
-    from .us import (
-        YFinanceUtils,
-        OptimizedUSDataProvider,
-        get_data_in_range,
-        YFINANCE_AVAILABLE,
-        OPTIMIZED_US_AVAILABLE,
-        FINNHUB_AVAILABLE
-    )
-except ImportError:
-    # 向后兼容：尝试从旧路径导入
-    try:
-        from ..yfin_utils import YFinanceUtils
-    except ImportError:
-        YFinanceUtils = None
-
-    try:
-        from ..optimized_us_data import OptimizedUSDataProvider
-    except ImportError:
-        OptimizedUSDataProvider = None
-
-    try:
-        from ..finnhub_utils import get_data_in_range
-    except ImportError:
-        get_data_in_range = None
-
-    YFINANCE_AVAILABLE = YFinanceUtils is not None
-    OPTIMIZED_US_AVAILABLE = OptimizedUSDataProvider is not None
-    FINNHUB_AVAILABLE = get_data_in_range is not None
-
-# 其他提供器（预留）
-try:
-    from .yahoo_provider import YahooProvider
-except ImportError:
-    YahooProvider = None
-
-try:
-    from .finnhub_provider import FinnhubProvider
-except ImportError:
-    FinnhubProvider = None
-
-# TDXProvider 已移除
-# try:
-#     from .tdx_provider import TDXProvider
-# except ImportError:
-#     TDXProvider = None
+from tradingagents.utils.lazy_import import lazy_exports
+
+# 各提供器在首次访问时才导入：导入某个子模块（如 china.baostock）
+# 不会连带加载 akshare、yfinance 等其他数据源的 SDK
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        # 基类
+        'BaseStockDataProvider': ['.base_provider'],
+
+        # 中国市场（新路径优先，旧路径兜底）
+        'TushareProvider': ['.china', '.tushare_provider'],
+        'AKShareProvider': ['.china', '.akshare_provider'],
+        'BaoStockProvider': [('.china', 'BaostockProvider'), '.baostock_provider'],
+
+        # 港股
+        'ImprovedHKStockProvider': ['.hk'],
+        'get_improved_hk_provider': ['.hk'],
+
+        # 美股（新路径优先，旧路径兜底）
+        'YFinanceUtils': ['.us', '..yfin_utils'],
+        'OptimizedUSDataProvider': ['.us', '..optimized_us_data'],
+        'get_data_in_range': ['.us', '..finnhub_utils'],
+
+        # 其他提供器（预留）
+        'YahooProvider': ['.yahoo_provider'],
+        'FinnhubProvider': ['.finnhub_provider'],
+        # TDXProvider 已移除
+    },
+    available={
+        'AKSHARE_AVAILABLE': 'AKShareProvider',
+        'TUSHARE_AVAILABLE': 'TushareProvider',
+        'BAOSTOCK_AVAILABLE': 'BaoStockProvider',
+        'HK_PROVIDER_AVAILABLE': ('ImprovedHKStockProvider', 'get_improved_hk_provider'),
+        'YFINANCE_AVAILABLE': 'YFinanceUtils',
+        'OPTIMIZED_US_AVAILABLE': 'OptimizedUSDataProvider',
+        'FINNHUB_AVAILABLE': 'get_data_in_range',
+    },
+)
 
 __all__ = [
     # 基类
@@ -449,20 +449,26 @@ class HKStockProvider:
             else:
                 result += "   数据不足，无法计算布林带\n\n"
 
-            # 最近交易日数据
-            result += "📅 最近交易日数据\n"
+            # 最近交易日数据（紧凑表格）
+            from tradingagents.utils.token_budget import active_model, compact_table, tool_token_budget
+            recent_rows = []
             for _, row in display_data.iterrows():
-                if 'Date' in row:
-                    date_str = row['Date'].strftime('%Y-%m-%d')
-                else:
-                    date_str = row.name.strftime('%Y-%m-%d')
-
-                result += f"   {date_str}: "
-                result += f"开盘HK${row['Open']:.2f}, "
-                result += f"收盘HK${row['Close']:.2f}, "
-                result += f"最高HK${row['High']:.2f}, "
-                result += f"最低HK${row['Low']:.2f}, "
-                result += f"成交量{row['Volume']:,.0f}\n"
+                date_value = row['Date'] if 'Date' in row else row.name
+                recent_rows.append({
+                    'date': date_value.strftime('%Y-%m-%d'),
+                    'open': row['Open'],
+                    'close': row['Close'],
+                    'high': row['High'],
+                    'low': row['Low'],
+                    'volume': f"{row['Volume']:,.0f}",
+                })
+            result += "📅 最近交易日数据\n"
+            result += compact_table(
+                recent_rows,
+                ['date', 'open', 'close', 'high', 'low', 'volume'],
+                budget=tool_token_budget("market", active_model()) // 4,
+                headers=['日期', '开盘(HK$)', '收盘(HK$)', '最高(HK$)', '最低(HK$)', '成交量'],
+            ) + "\n"
 
             result += "\n数据来源: Yahoo Finance (港股)\n"
 
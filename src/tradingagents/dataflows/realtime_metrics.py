@@ -3,11 +3,251 @@
 基于实时行情和财务数据计算PE/PB等指标
 """
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterable, List
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+DB_NAME = 'tradingagents'
+
+
+def _resolve_sync_client(db_client=None):
+    """
+    获取同步 MongoDB 客户端
+
+    - 传入同步客户端：直接使用
+    - 传入异步客户端（Motor）：复用进程级连接池客户端，不再每次新建 MongoClient
+    - 未传入：使用 database_manager 的客户端（MongoDB 不可用时返回 None）
+    """
+    if db_client is None:
+        from tradingagents.config.database_manager import get_database_manager
+        db_manager = get_database_manager()
+        if not db_manager.is_mongodb_available():
+            return None
+        return db_manager.get_mongodb_client()
+
+    client_type = type(db_client).__name__
+    if 'AsyncIOMotorClient' in client_type or 'Motor' in client_type:
+        from app.core.database import get_mongo_db_sync
+        logger.debug(f"检测到异步客户端 {client_type}，使用进程级同步连接池")
+        return get_mongo_db_sync().client
+    return db_client
+
+
+def _compute_realtime_pe_pb(
+    code6: str,
+    quote: Dict[str, Any],
+    basic_info: Dict[str, Any],
+    load_financial: Callable[[str], Optional[Dict[str, Any]]],
+    verbose: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    根据已查询到的行情与基础信息计算动态 PE/PB（不访问数据库）
+
+    Args:
+        code6: 6位股票代码
+        quote: market_quotes 文档
+        basic_info: stock_basic_info 文档（优先 Tushare 数据源）
+        load_financial: 按代码返回最新一期 stock_financial_data 的函数（仅在需要计算 PB 时调用）
+        verbose: 是否输出逐步计算日志（批量计算时降为 debug）
+    """
+    log = logger.info if verbose else logger.debug
+    warn = logger.warning if verbose else logger.debug
+
+    realtime_price = quote.get("close")
+    pre_close = quote.get("pre_close")  # 昨日收盘价
+    quote_updated_at = quote.get("updated_at", "N/A")
+
+    if not realtime_price or realtime_price <= 0:
+        warn(f"⚠️ [实时PE计算-失败] 股票 {code6} 的实时价格无效: {realtime_price}")
+        return None
+
+    log(f"   ✓ 实时股价: {realtime_price}元 (更新时间: {quote_updated_at})")
+    log(f"   ✓ 昨日收盘价: {pre_close}元")
+
+    # 获取 Tushare 的 pe_ttm（基于昨日收盘价）
+    pe_ttm_tushare = basic_info.get("pe_ttm")
+    pe_tushare = basic_info.get("pe")
+    pb_tushare = basic_info.get("pb")
+    total_mv_yi = basic_info.get("total_mv")  # 总市值（亿元）
+    total_share = basic_info.get("total_share")  # 总股本（万股）
+    basic_info_updated_at = basic_info.get("updated_at")  # 更新时间
+
+    log(f"   ✓ Tushare PE_TTM: {pe_ttm_tushare}倍")
+    log(f"   ✓ Tushare PE: {pe_tushare}倍")
+    log(f"   ✓ Tushare 总市值: {total_mv_yi}亿元")
+    log(f"   ✓ 总股本: {total_share}万股")
+    log(f"   ✓ stock_basic_info 更新时间: {basic_info_updated_at}")
+
+    # 🔥 3. 判断是否需要重新计算市值
+    # 如果 stock_basic_info 的更新时间在今天收盘后（15:00之后），说明数据已经是最新的
+    from datetime import datetime, time as dtime
+    from zoneinfo import ZoneInfo
+
+    need_recalculate = True
+    if basic_info_updated_at:
+        # 确保时间带有时区信息
+        if isinstance(basic_info_updated_at, datetime):
+            if basic_info_updated_at.tzinfo is None:
+                basic_info_updated_at = basic_info_updated_at.replace(tzinfo=ZoneInfo("Asia/Shanghai"))
+
+            # 获取今天的日期
+            today = datetime.now(ZoneInfo("Asia/Shanghai")).date()
+            update_date = basic_info_updated_at.date()
+            update_time = basic_info_updated_at.time()
+
+            # 如果更新日期是今天，且更新时间在15:00之后，说明数据已经是今天收盘后的最新数据
+            if update_date == today and update_time >= dtime(15, 0):
+                need_recalculate = False
+                log(f"   💡 stock_basic_info 已在今天收盘后更新，直接使用其数据")
+
+    if not need_recalculate:
+        # 直接使用 stock_basic_info 的数据，不需要重新计算
+        log(f"   ✓ 使用 stock_basic_info 的最新数据（无需重新计算）")
+
+        result = {
+            "pe": round(pe_tushare, 2) if pe_tushare else None,
+            "pb": round(pb_tushare, 2) if pb_tushare else None,
+            "pe_ttm": round(pe_ttm_tushare, 2) if pe_ttm_tushare else None,
+            "price": round(realtime_price, 2),
+            "market_cap": round(total_mv_yi, 2) if total_mv_yi else None,
+            "updated_at": quote.get("updated_at"),
+            "source": "stock_basic_info_latest",
+            "is_realtime": False,
+            "note": "使用stock_basic_info收盘后最新数据",
+        }
+
+        log(f"✅ [动态PE计算-成功] 股票 {code6}: PE_TTM={result['pe_ttm']}倍, PB={result['pb']}倍 (来自stock_basic_info)")
+        return result
+
+    # 4. 🔥 计算总股本（需要判断 stock_basic_info 的市值是昨天的还是今天的）
+    total_shares_wan = None
+    yesterday_mv_yi = None
+
+    # 方案1：优先使用 stock_basic_info 中的 total_share（如果有）
+    if total_share and total_share > 0:
+        total_shares_wan = total_share
+        log(f"   ✓ 使用 stock_basic_info.total_share: {total_shares_wan:.2f}万股")
+
+        # 计算昨日市值 = 总股本 × 昨日收盘价
+        if pre_close and pre_close > 0:
+            yesterday_mv_yi = (total_shares_wan * pre_close) / 10000
+            log(f"   ✓ 昨日市值: {total_shares_wan:.2f}万股 × {pre_close:.2f}元 / 10000 = {yesterday_mv_yi:.2f}亿元")
+        elif total_mv_yi and total_mv_yi > 0:
+            # 如果没有昨日收盘价，使用 stock_basic_info 的市值（假设是昨天的）
+            yesterday_mv_yi = total_mv_yi
+            log(f"   ⚠️ market_quotes 中无 pre_close，使用 stock_basic_info 市值作为昨日市值: {yesterday_mv_yi:.2f}亿元")
+        else:
+            # 既没有 pre_close，也没有 total_mv_yi，无法计算
+            warn(f"⚠️ [动态PE计算-失败] 无法获取昨日市值: pre_close={pre_close}, total_mv={total_mv_yi}")
+            return None
+
+    # 方案2：使用 market_quotes 的 pre_close（昨日收盘价）反推股本
+    elif pre_close and pre_close > 0 and total_mv_yi and total_mv_yi > 0:
+        # 🔥 关键：判断 total_mv_yi 是昨天的还是今天的
+        # 如果 stock_basic_info 更新时间在今天收盘前，说明 total_mv_yi 是昨天的市值
+        # 如果更新时间在今天收盘后，说明 total_mv_yi 是今天的市值，需要用 realtime_price 反推
+
+        # 判断 stock_basic_info 是否是昨天的数据
+        is_yesterday_data = True
+        if basic_info_updated_at and isinstance(basic_info_updated_at, datetime):
+            if basic_info_updated_at.tzinfo is None:
+                basic_info_updated_at = basic_info_updated_at.replace(tzinfo=ZoneInfo("Asia/Shanghai"))
+            today = datetime.now(ZoneInfo("Asia/Shanghai")).date()
+            update_date = basic_info_updated_at.date()
+            update_time = basic_info_updated_at.time()
+            # 如果更新日期是今天，且更新时间在15:00之后，说明是今天的数据
+            if update_date == today and update_time >= dtime(15, 0):
+                is_yesterday_data = False
+
+        if is_yesterday_data:
+            # total_mv_yi 是昨天的市值，用 pre_close 反推股本
+            total_shares_wan = (total_mv_yi * 10000) / pre_close
+            yesterday_mv_yi = total_mv_yi
+            log(f"   ✓ stock_basic_info 是昨天的数据，用 pre_close 反推总股本: {total_mv_yi:.2f}亿元 / {pre_close:.2f}元 = {total_shares_wan:.2f}万股")
+        else:
+            # total_mv_yi 是今天的市值，用 realtime_price 反推股本
+            total_shares_wan = (total_mv_yi * 10000) / realtime_price
+            yesterday_mv_yi = (total_shares_wan * pre_close) / 10000
+            log(f"   ✓ stock_basic_info 是今天的数据，用 realtime_price 反推总股本: {total_mv_yi:.2f}亿元 / {realtime_price:.2f}元 = {total_shares_wan:.2f}万股")
+            log(f"   ✓ 昨日市值: {total_shares_wan:.2f}万股 × {pre_close:.2f}元 / 10000 = {yesterday_mv_yi:.2f}亿元")
+
+    # 方案3：只有 total_mv_yi，没有 pre_close（market_quotes 数据不完整）
+    elif total_mv_yi and total_mv_yi > 0:
+        # 使用 realtime_price 反推股本，假设 total_mv_yi 是昨天的市值
+        total_shares_wan = (total_mv_yi * 10000) / realtime_price
+        yesterday_mv_yi = total_mv_yi
+        warn(f"   ⚠️ market_quotes 中无 pre_close，假设 stock_basic_info.total_mv 是昨日市值")
+        log(f"   ✓ 用 realtime_price 反推总股本: {total_mv_yi:.2f}亿元 / {realtime_price:.2f}元 = {total_shares_wan:.2f}万股")
+        log(f"   ✓ 昨日市值（假设）: {yesterday_mv_yi:.2f}亿元")
+
+    # 方案4：如果都没有，无法计算
+    else:
+        warn(f"⚠️ [动态PE计算-失败] 无法获取总股本数据")
+        warn(f"   - total_share: {total_share}")
+        warn(f"   - pre_close: {pre_close}")
+        warn(f"   - total_mv: {total_mv_yi}")
+        return None
+
+    # 5. 从 Tushare pe_ttm 反推 TTM 净利润（使用昨日市值）
+
+    if not pe_ttm_tushare or pe_ttm_tushare <= 0 or not yesterday_mv_yi or yesterday_mv_yi <= 0:
+        warn(f"⚠️ [动态PE计算-失败] 无法反推TTM净利润: pe_ttm={pe_ttm_tushare}, yesterday_mv={yesterday_mv_yi}")
+        warn(f"   💡 提示: 可能是亏损股票（PE为负或空）")
+        return None
+
+    # 反推 TTM 净利润（亿元）= 昨日市值 / PE_TTM
+    ttm_net_profit_yi = yesterday_mv_yi / pe_ttm_tushare
+    log(f"   ✓ 反推 TTM净利润: {yesterday_mv_yi:.2f}亿元 / {pe_ttm_tushare:.2f}倍 = {ttm_net_profit_yi:.2f}亿元")
+
+    # 6. 计算实时市值（亿元）= 总股本（万股）× 实时股价（元）/ 10000
+    realtime_mv_yi = (realtime_price * total_shares_wan) / 10000
+    log(f"   ✓ 实时市值: {realtime_price:.2f}元 × {total_shares_wan:.2f}万股 / 10000 = {realtime_mv_yi:.2f}亿元")
+
+    # 7. 计算动态 PE_TTM = 实时市值 / TTM净利润
+    dynamic_pe_ttm = realtime_mv_yi / ttm_net_profit_yi
+    log(f"   ✓ 动态PE_TTM计算: {realtime_mv_yi:.2f}亿元 / {ttm_net_profit_yi:.2f}亿元 = {dynamic_pe_ttm:.2f}倍")
+
+    # 8. 获取财务数据（用于计算 PB）
+    financial_data = load_financial(code6)
+    pb = None
+    total_equity_yi = None
+
+    if financial_data:
+        total_equity = financial_data.get("total_equity")  # 净资产（元）
+        if total_equity and total_equity > 0:
+            total_equity_yi = total_equity / 100000000  # 转换为亿元
+            pb = realtime_mv_yi / total_equity_yi
+            log(f"   ✓ 动态PB计算: {realtime_mv_yi:.2f}亿元 / {total_equity_yi:.2f}亿元 = {pb:.2f}倍")
+        else:
+            warn(f"   ⚠️ PB计算失败: 净资产无效 ({total_equity})")
+    else:
+        warn(f"   ⚠️ 未找到财务数据，无法计算PB")
+        # 使用 Tushare 的 PB 作为降级
+        if pb_tushare:
+            pb = pb_tushare
+            log(f"   ✓ 使用 Tushare PB: {pb}倍")
+
+    # 9. 构建返回结果
+    result = {
+        "pe": round(dynamic_pe_ttm, 2),  # 动态PE（基于TTM）
+        "pb": round(pb, 2) if pb else None,
+        "pe_ttm": round(dynamic_pe_ttm, 2),  # 动态PE_TTM
+        "price": round(realtime_price, 2),
+        "market_cap": round(realtime_mv_yi, 2),  # 实时市值（亿元）
+        "ttm_net_profit": round(ttm_net_profit_yi, 2),  # TTM净利润（亿元）
+        "updated_at": quote.get("updated_at"),
+        "source": "realtime_calculated_from_market_quotes",
+        "is_realtime": True,
+        "note": "基于market_quotes实时股价和pre_close计算",
+        "total_shares": round(total_shares_wan, 2),  # 总股本（万股）
+        "yesterday_close": round(pre_close, 2) if pre_close else None,  # 昨日收盘价（参考）
+        "tushare_pe_ttm": round(pe_ttm_tushare, 2),  # Tushare PE_TTM（参考）
+        "tushare_pe": round(pe_tushare, 2) if pe_tushare else None,  # Tushare PE（参考）
+    }
+
+    log(f"✅ [动态PE计算-成功] 股票 {code6}: 动态PE_TTM={result['pe_ttm']}倍, PB={result['pb']}倍")
+    return result
 
 def calculate_realtime_pe_pb(
     symbol: str,
@@ -42,25 +282,12 @@ def calculate_realtime_pe_pb(
     """
     try:
         # 获取数据库连接（确保是同步客户端）
+        db_client = _resolve_sync_client(db_client)
         if db_client is None:
-            from tradingagents.config.database_manager import get_database_manager
-            db_manager = get_database_manager()
-            if not db_manager.is_mongodb_available():
-                logger.debug("MongoDB不可用，无法计算实时PE/PB")
-                return None
-            db_client = db_manager.get_mongodb_client()
-
-        # 检查是否是异步客户端（AsyncIOMotorClient）
-        # 如果是异步客户端，需要转换为同步客户端
-        client_type = type(db_client).__name__
-        if 'AsyncIOMotorClient' in client_type or 'Motor' in client_type:
-            # 这是异步客户端，创建同步客户端
-            from pymongo import MongoClient
-            from app.core.config import settings
-            logger.debug(f"检测到异步客户端 {client_type}，转换为同步客户端")
-            db_client = MongoClient(settings.MONGO_URI)
-
-        db = db_client['tradingagents']
+            logger.debug("MongoDB不可用，无法计算实时PE/PB")
+            return None
+
+        db = db_client[DB_NAME]
         code6 = str(symbol).zfill(6)
 
         logger.info(f"🔍 [实时PE计算] 开始计算股票 {code6}")
@@ -71,17 +298,6 @@ def calculate_realtime_pe_pb(
             logger.warning(f"⚠️ [实时PE计算-失败] 未找到股票 {code6} 的实时行情数据")
             return None
 
-        realtime_price = quote.get("close")
-        pre_close = quote.get("pre_close")  # 昨日收盘价
-        quote_updated_at = quote.get("updated_at", "N/A")
-
-        if not realtime_price or realtime_price <= 0:
-            logger.warning(f"⚠️ [实时PE计算-失败] 股票 {code6} 的实时价格无效: {realtime_price}")
-            return None
-
-        logger.info(f"   ✓ 实时股价: {realtime_price}元 (更新时间: {quote_updated_at})")
-        logger.info(f"   ✓ 昨日收盘价: {pre_close}元")
-
         # 2. 获取基础信息（stock_basic_info）- 获取 Tushare 的 pe_ttm 和市值数据
         # 🔥 优先查询 Tushare 数据源（因为只有 Tushare 有 pe_ttm、total_mv、total_share 等字段）
         logger.info(f"🔍 [MongoDB查询] 查询条件: code={code6}, source=tushare")
@@ -107,193 +323,106 @@ def calculate_realtime_pe_pb(
                     logger.warning(f"   可用字段: {list(basic_info.keys())}")
                     return None
 
-        # 获取 Tushare 的 pe_ttm（基于昨日收盘价）
-        pe_ttm_tushare = basic_info.get("pe_ttm")
-        pe_tushare = basic_info.get("pe")
-        pb_tushare = basic_info.get("pb")
-        total_mv_yi = basic_info.get("total_mv")  # 总市值（亿元）
-        total_share = basic_info.get("total_share")  # 总股本（万股）
-        basic_info_updated_at = basic_info.get("updated_at")  # 更新时间
-
-        logger.info(f"   ✓ Tushare PE_TTM: {pe_ttm_tushare}倍")
-        logger.info(f"   ✓ Tushare PE: {pe_tushare}倍")
-        logger.info(f"   ✓ Tushare 总市值: {total_mv_yi}亿元")
-        logger.info(f"   ✓ 总股本: {total_share}万股")
-        logger.info(f"   ✓ stock_basic_info 更新时间: {basic_info_updated_at}")
-
-        # 🔥 3. 判断是否需要重新计算市值
-        # 如果 stock_basic_info 的更新时间在今天收盘后（15:00之后），说明数据已经是最新的
-        from datetime import datetime, time as dtime
-        from zoneinfo import ZoneInfo
-
-        need_recalculate = True
-        if basic_info_updated_at:
-            # 确保时间带有时区信息
-            if isinstance(basic_info_updated_at, datetime):
-                if basic_info_updated_at.tzinfo is None:
-                    basic_info_updated_at = basic_info_updated_at.replace(tzinfo=ZoneInfo("Asia/Shanghai"))
-
-                # 获取今天的日期
-                today = datetime.now(ZoneInfo("Asia/Shanghai")).date()
-                update_date = basic_info_updated_at.date()
-                update_time = basic_info_updated_at.time()
-
-                # 如果更新日期是今天，且更新时间在15:00之后，说明数据已经是今天收盘后的最新数据
-                if update_date == today and update_time >= dtime(15, 0):
-                    need_recalculate = False
-                    logger.info(f"   💡 stock_basic_info 已在今天收盘后更新，直接使用其数据")
-
-        if not need_recalculate:
-            # 直接使用 stock_basic_info 的数据，不需要重新计算
-            logger.info(f"   ✓ 使用 stock_basic_info 的最新数据（无需重新计算）")
-
-            result = {
-                "pe": round(pe_tushare, 2) if pe_tushare else None,
-                "pb": round(pb_tushare, 2) if pb_tushare else None,
-                "pe_ttm": round(pe_ttm_tushare, 2) if pe_ttm_tushare else None,
-                "price": round(realtime_price, 2),
-                "market_cap": round(total_mv_yi, 2) if total_mv_yi else None,
-                "updated_at": quote.get("updated_at"),
-                "source": "stock_basic_info_latest",
-                "is_realtime": False,
-                "note": "使用stock_basic_info收盘后最新数据",
-            }
-
-            logger.info(f"✅ [动态PE计算-成功] 股票 {code6}: PE_TTM={result['pe_ttm']}倍, PB={result['pb']}倍 (来自stock_basic_info)")
-            return result
-
-        # 4. 🔥 计算总股本（需要判断 stock_basic_info 的市值是昨天的还是今天的）
-        total_shares_wan = None
-        yesterday_mv_yi = None
-
-        # 方案1：优先使用 stock_basic_info 中的 total_share（如果有）
-        if total_share and total_share > 0:
-            total_shares_wan = total_share
-            logger.info(f"   ✓ 使用 stock_basic_info.total_share: {total_shares_wan:.2f}万股")
-
-            # 计算昨日市值 = 总股本 × 昨日收盘价
-            if pre_close and pre_close > 0:
-                yesterday_mv_yi = (total_shares_wan * pre_close) / 10000
-                logger.info(f"   ✓ 昨日市值: {total_shares_wan:.2f}万股 × {pre_close:.2f}元 / 10000 = {yesterday_mv_yi:.2f}亿元")
-            elif total_mv_yi and total_mv_yi > 0:
-                # 如果没有昨日收盘价，使用 stock_basic_info 的市值（假设是昨天的）
-                yesterday_mv_yi = total_mv_yi
-                logger.info(f"   ⚠️ market_quotes 中无 pre_close，使用 stock_basic_info 市值作为昨日市值: {yesterday_mv_yi:.2f}亿元")
-            else:
-                # 既没有 pre_close，也没有 total_mv_yi，无法计算
-                logger.warning(f"⚠️ [动态PE计算-失败] 无法获取昨日市值: pre_close={pre_close}, total_mv={total_mv_yi}")
-                return None
+        return _compute_realtime_pe_pb(
+            code6,
+            quote,
+            basic_info,
+            lambda code: db.stock_financial_data.find_one({"code": code}, sort=[("report_period", -1)]),
+        )
 
-        # 方案2：使用 market_quotes 的 pre_close（昨日收盘价）反推股本
-        elif pre_close and pre_close > 0 and total_mv_yi and total_mv_yi > 0:
-            # 🔥 关键：判断 total_mv_yi 是昨天的还是今天的
-            # 如果 stock_basic_info 更新时间在今天收盘前，说明 total_mv_yi 是昨天的市值
-            # 如果更新时间在今天收盘后，说明 total_mv_yi 是今天的市值，需要用 realtime_price 反推
-
-            # 判断 stock_basic_info 是否是昨天的数据
-            is_yesterday_data = True
-            if basic_info_updated_at and isinstance(basic_info_updated_at, datetime):
-                if basic_info_updated_at.tzinfo is None:
-                    basic_info_updated_at = basic_info_updated_at.replace(tzinfo=ZoneInfo("Asia/Shanghai"))
-                today = datetime.now(ZoneInfo("Asia/Shanghai")).date()
-                update_date = basic_info_updated_at.date()
-                update_time = basic_info_updated_at.time()
-                # 如果更新日期是今天，且更新时间在15:00之后，说明是今天的数据
-                if update_date == today and update_time >= dtime(15, 0):
-                    is_yesterday_data = False
-
-            if is_yesterday_data:
-                # total_mv_yi 是昨天的市值，用 pre_close 反推股本
-                total_shares_wan = (total_mv_yi * 10000) / pre_close
-                yesterday_mv_yi = total_mv_yi
-                logger.info(f"   ✓ stock_basic_info 是昨天的数据，用 pre_close 反推总股本: {total_mv_yi:.2f}亿元 / {pre_close:.2f}元 = {total_shares_wan:.2f}万股")
-            else:
-                # total_mv_yi 是今天的市值，用 realtime_price 反推股本
-                total_shares_wan = (total_mv_yi * 10000) / realtime_price
-                yesterday_mv_yi = (total_shares_wan * pre_close) / 10000
-                logger.info(f"   ✓ stock_basic_info 是今天的数据，用 realtime_price 反推总股本: {total_mv_yi:.2f}亿元 / {realtime_price:.2f}元 = {total_shares_wan:.2f}万股")
-                logger.info(f"   ✓ 昨日市值: {total_shares_wan:.2f}万股 × {pre_close:.2f}元 / 10000 = {yesterday_mv_yi:.2f}亿元")
+    except Exception as e:
+        logger.error(f"计算股票 {symbol} 的实时PE/PB失败: {e}", exc_info=True)
+        return None
 
-        # 方案3：只有 total_mv_yi，没有 pre_close（market_quotes 数据不完整）
-        elif total_mv_yi and total_mv_yi > 0:
-            # 使用 realtime_price 反推股本，假设 total_mv_yi 是昨天的市值
-            total_shares_wan = (total_mv_yi * 10000) / realtime_price
-            yesterday_mv_yi = total_mv_yi
-            logger.warning(f"   ⚠️ market_quotes 中无 pre_close，假设 stock_basic_info.total_mv 是昨日市值")
-            logger.info(f"   ✓ 用 realtime_price 反推总股本: {total_mv_yi:.2f}亿元 / {realtime_price:.2f}元 = {total_shares_wan:.2f}万股")
-            logger.info(f"   ✓ 昨日市值（假设）: {yesterday_mv_yi:.2f}亿元")
 
-        # 方案4：如果都没有，无法计算
-        else:
-            logger.warning(f"⚠️ [动态PE计算-失败] 无法获取总股本数据")
-            logger.warning(f"   - total_share: {total_share}")
-            logger.warning(f"   - pre_close: {pre_close}")
-            logger.warning(f"   - total_mv: {total_mv_yi}")
-            return None
+def _fetch_batch_docs(db, codes: List[str]):
+    """
+    批量查询行情、基础信息（每个集合一次 $in 查询）
 
-        # 5. 从 Tushare pe_ttm 反推 TTM 净利润（使用昨日市值）
+    Returns:
+        (quotes, basics)：{code: doc}，基础信息优先 Tushare 数据源
+    """
+    quotes = {doc["code"]: doc for doc in db.market_quotes.find({"code": {"$in": codes}})}
 
-        if not pe_ttm_tushare or pe_ttm_tushare <= 0 or not yesterday_mv_yi or yesterday_mv_yi <= 0:
-            logger.warning(f"⚠️ [动态PE计算-失败] 无法反推TTM净利润: pe_ttm={pe_ttm_tushare}, yesterday_mv={yesterday_mv_yi}")
-            logger.warning(f"   💡 提示: 可能是亏损股票（PE为负或空）")
-            return None
+    basics: Dict[str, Dict[str, Any]] = {}
+    for doc in db.stock_basic_info.find({"code": {"$in": codes}}):
+        code = doc.get("code")
+        if code not in basics or doc.get("source") == "tushare":
+            basics[code] = doc
+    return quotes, basics
 
-        # 反推 TTM 净利润（亿元）= 昨日市值 / PE_TTM
-        ttm_net_profit_yi = yesterday_mv_yi / pe_ttm_tushare
-        logger.info(f"   ✓ 反推 TTM净利润: {yesterday_mv_yi:.2f}亿元 / {pe_ttm_tushare:.2f}倍 = {ttm_net_profit_yi:.2f}亿元")
-
-        # 6. 计算实时市值（亿元）= 总股本（万股）× 实时股价（元）/ 10000
-        realtime_mv_yi = (realtime_price * total_shares_wan) / 10000
-        logger.info(f"   ✓ 实时市值: {realtime_price:.2f}元 × {total_shares_wan:.2f}万股 / 10000 = {realtime_mv_yi:.2f}亿元")
-
-        # 7. 计算动态 PE_TTM = 实时市值 / TTM净利润
-        dynamic_pe_ttm = realtime_mv_yi / ttm_net_profit_yi
-        logger.info(f"   ✓ 动态PE_TTM计算: {realtime_mv_yi:.2f}亿元 / {ttm_net_profit_yi:.2f}亿元 = {dynamic_pe_ttm:.2f}倍")
-
-        # 8. 获取财务数据（用于计算 PB）
-        financial_data = db.stock_financial_data.find_one({"code": code6}, sort=[("report_period", -1)])
-        pb = None
-        total_equity_yi = None
-
-        if financial_data:
-            total_equity = financial_data.get("total_equity")  # 净资产（元）
-            if total_equity and total_equity > 0:
-                total_equity_yi = total_equity / 100000000  # 转换为亿元
-                pb = realtime_mv_yi / total_equity_yi
-                logger.info(f"   ✓ 动态PB计算: {realtime_mv_yi:.2f}亿元 / {total_equity_yi:.2f}亿元 = {pb:.2f}倍")
-            else:
-                logger.warning(f"   ⚠️ PB计算失败: 净资产无效 ({total_equity})")
-        else:
-            logger.warning(f"   ⚠️ 未找到财务数据，无法计算PB")
-            # 使用 Tushare 的 PB 作为降级
-            if pb_tushare:
-                pb = pb_tushare
-                logger.info(f"   ✓ 使用 Tushare PB: {pb}倍")
 
-        # 9. 构建返回结果
-        result = {
-            "pe": round(dynamic_pe_ttm, 2),  # 动态PE（基于TTM）
-            "pb": round(pb, 2) if pb else None,
-            "pe_ttm": round(dynamic_pe_ttm, 2),  # 动态PE_TTM
-            "price": round(realtime_price, 2),
-            "market_cap": round(realtime_mv_yi, 2),  # 实时市值（亿元）
-            "ttm_net_profit": round(ttm_net_profit_yi, 2),  # TTM净利润（亿元）
-            "updated_at": quote.get("updated_at"),
-            "source": "realtime_calculated_from_market_quotes",
-            "is_realtime": True,
-            "note": "基于market_quotes实时股价和pre_close计算",
-            "total_shares": round(total_shares_wan, 2),  # 总股本（万股）
-            "yesterday_close": round(pre_close, 2) if pre_close else None,  # 昨日收盘价（参考）
-            "tushare_pe_ttm": round(pe_ttm_tushare, 2),  # Tushare PE_TTM（参考）
-            "tushare_pe": round(pe_tushare, 2) if pe_tushare else None,  # Tushare PE（参考）
-        }
+def _fetch_latest_financials(db, codes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """批量查询每只股票最新一期财务数据（一次聚合查询）"""
+    if not codes:
+        return {}
+    pipeline = [
+        {"$match": {"code": {"$in": codes}}},
+        {"$sort": {"report_period": -1}},
+        {"$group": {"_id": "$code", "total_equity": {"$first": "$total_equity"}}},
+    ]
+    return {doc["_id"]: doc for doc in db.stock_financial_data.aggregate(pipeline)}
 
-        logger.info(f"✅ [动态PE计算-成功] 股票 {code6}: 动态PE_TTM={result['pe_ttm']}倍, PB={result['pb']}倍")
-        return result
-        
+
+def _calculate_batch(db, codes: List[str]):
+    """
+    批量计算动态 PE/PB
+
+    Returns:
+        (results, basics)：results 为 {code: 计算结果或 None}，basics 为查询到的基础信息（供降级使用）
+    """
+    quotes, basics = _fetch_batch_docs(db, codes)
+    financials = _fetch_latest_financials(
+        db, [c for c in codes if c in quotes and basics.get(c, {}).get("source") == "tushare"]
+    )
+
+    results: Dict[str, Optional[Dict[str, Any]]] = {code: None for code in codes}
+    for code in codes:
+        quote = quotes.get(code)
+        basic_info = basics.get(code)
+        if not quote or not basic_info or basic_info.get("source") != "tushare":
+            continue
+        try:
+            results[code] = _compute_realtime_pe_pb(code, quote, basic_info, financials.get, verbose=False)
+        except Exception as e:
+            logger.warning(f"计算股票 {code} 的实时PE/PB失败: {e}")
+
+    calculated = sum(1 for v in results.values() if v)
+    logger.info(f"📊 [批量动态PE计算] {calculated}/{len(codes)} 只股票计算成功")
+    return results, basics
+
+
+def calculate_realtime_pe_pb_many(
+    symbols: Iterable[str],
+    db_client=None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    批量计算动态 PE/PB（计算逻辑同 calculate_realtime_pe_pb）
+
+    market_quotes、stock_basic_info、stock_financial_data 各只查询一次（$in），
+    并复用进程级连接池，适合筛选结果补充、批量报告等场景。
+
+    Args:
+        symbols: 股票代码列表
+        db_client: MongoDB客户端（可选，异步客户端会替换为进程级同步连接池）
+
+    Returns:
+        {6位代码: 计算结果或 None}
+    """
+    codes = list(dict.fromkeys(str(s).zfill(6) for s in symbols))
+    results: Dict[str, Optional[Dict[str, Any]]] = {code: None for code in codes}
+    if not codes:
+        return results
+
+    try:
+        db_client = _resolve_sync_client(db_client)
+        if db_client is None:
+            logger.debug("MongoDB不可用，无法批量计算实时PE/PB")
+            return results
+        results, _ = _calculate_batch(db_client[DB_NAME], codes)
     except Exception as e:
-        logger.error(f"计算股票 {symbol} 的实时PE/PB失败: {e}", exc_info=True)
-        return None
+        logger.error(f"批量计算实时PE/PB失败: {e}", exc_info=True)
+    return results
 
 
 def validate_pe_pb(pe: Optional[float], pb: Optional[float]) -> bool:
@@ -320,6 +449,29 @@ def validate_pe_pb(pe: Optional[float], pb: Optional[float]) -> bool:
     return True
 
 
+def _static_pe_pb(basic_info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """从 stock_basic_info 文档提取 Tushare 静态 PE/PB（降级方案），无可用数据时返回 None"""
+    if not basic_info:
+        return None
+
+    pe_static = basic_info.get("pe")
+    pb_static = basic_info.get("pb")
+    pe_ttm = basic_info.get("pe_ttm")
+    if not (pe_ttm or pe_static or pb_static):
+        return None
+
+    return {
+        "pe": pe_static,
+        "pb": pb_static,
+        "pe_ttm": pe_ttm,
+        "pb_mrq": basic_info.get("pb_mrq"),
+        "source": "daily_basic",
+        "is_realtime": False,
+        "updated_at": basic_info.get("updated_at", "N/A"),
+        "note": "使用Tushare最近一个交易日的数据（基于TTM）"
+    }
+
+
 def get_pe_pb_with_fallback(
     symbol: str,
     db_client=None
@@ -356,21 +508,10 @@ def get_pe_pb_with_fallback(
 
     # 准备数据库连接
     try:
+        db_client = _resolve_sync_client(db_client)
         if db_client is None:
-            from tradingagents.config.database_manager import get_database_manager
-            db_manager = get_database_manager()
-            if not db_manager.is_mongodb_available():
-                logger.error("❌ [PE智能策略-失败] MongoDB不可用")
-                return {}
-            db_client = db_manager.get_mongodb_client()
-
-        # 检查是否是异步客户端
-        client_type = type(db_client).__name__
-        if 'AsyncIOMotorClient' in client_type or 'Motor' in client_type:
-            from pymongo import MongoClient
-            from app.core.config import settings
-            logger.debug(f"检测到异步客户端 {client_type}，转换为同步客户端")
-            db_client = MongoClient(settings.MONGO_URI)
+            logger.error("❌ [PE智能策略-失败] MongoDB不可用")
+            return {}
 
     except Exception as e:
         logger.error(f"❌ [PE智能策略-失败] 数据库连接失败: {e}")
@@ -398,7 +539,7 @@ def get_pe_pb_with_fallback(
     logger.info("   💡 说明: 使用Tushare官方PE_TTM，基于昨日收盘价")
 
     try:
-        db = db_client['tradingagents']
+        db = db_client[DB_NAME]
         code6 = str(symbol).zfill(6)
 
         # 🔥 优先查询 Tushare 数据源
@@ -407,27 +548,11 @@ def get_pe_pb_with_fallback(
             # 如果没有 Tushare 数据，尝试查询其他数据源
             basic_info = db.stock_basic_info.find_one({"code": code6})
 
-        if basic_info:
-            pe_static = basic_info.get("pe")
-            pb_static = basic_info.get("pb")
-            pe_ttm = basic_info.get("pe_ttm")
-            pb_mrq = basic_info.get("pb_mrq")
-            updated_at = basic_info.get("updated_at", "N/A")
-
-            if pe_ttm or pe_static or pb_static:
-                logger.info(f"✅ [PE智能策略-成功] 使用Tushare静态PE: PE={pe_static}, PE_TTM={pe_ttm}, PB={pb_static}")
-                logger.info(f"   └─ 数据来源: stock_basic_info (更新时间: {updated_at})")
-
-                return {
-                    "pe": pe_static,
-                    "pb": pb_static,
-                    "pe_ttm": pe_ttm,
-                    "pb_mrq": pb_mrq,
-                    "source": "daily_basic",
-                    "is_realtime": False,
-                    "updated_at": updated_at,
-                    "note": "使用Tushare最近一个交易日的数据（基于TTM）"
-                }
+        static_metrics = _static_pe_pb(basic_info)
+        if static_metrics:
+            logger.info(f"✅ [PE智能策略-成功] 使用Tushare静态PE: PE={static_metrics['pe']}, PE_TTM={static_metrics['pe_ttm']}, PB={static_metrics['pb']}")
+            logger.info(f"   └─ 数据来源: stock_basic_info (更新时间: {static_metrics['updated_at']})")
+            return static_metrics
 
         logger.warning("⚠️ [PE智能策略-方案2失败] Tushare静态数据不可用")
 
@@ -437,3 +562,45 @@ def get_pe_pb_with_fallback(
     logger.error(f"❌ [PE智能策略-全部失败] 无法获取股票 {symbol} 的PE/PB")
     return {}
 
+
+def get_pe_pb_with_fallback_many(
+    symbols: Iterable[str],
+    db_client=None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    批量获取PE/PB，降级策略同 get_pe_pb_with_fallback
+
+    动态计算结果不可用或超出合理范围时，使用同一批查询得到的 stock_basic_info 静态数据，
+    不再逐只股票访问数据库。
+
+    Args:
+        symbols: 股票代码列表
+        db_client: MongoDB客户端（可选）
+
+    Returns:
+        {6位代码: PE/PB 字典（全部失败时为空字典）}
+    """
+    codes = list(dict.fromkeys(str(s).zfill(6) for s in symbols))
+    if not codes:
+        return {}
+
+    try:
+        db_client = _resolve_sync_client(db_client)
+        if db_client is None:
+            logger.error("❌ [PE智能策略-失败] MongoDB不可用")
+            return {code: {} for code in codes}
+        realtime, basics = _calculate_batch(db_client[DB_NAME], codes)
+    except Exception as e:
+        logger.error(f"❌ [PE智能策略-失败] 批量获取PE/PB失败: {e}")
+        return {code: {} for code in codes}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for code in codes:
+        metrics = realtime.get(code)
+        if metrics and validate_pe_pb(metrics.get('pe'), metrics.get('pb')):
+            results[code] = metrics
+            continue
+        results[code] = _static_pe_pb(basics.get(code)) or {}
+
+    logger.info(f"✅ [PE智能策略-批量] {sum(1 for v in results.values() if v)}/{len(codes)} 只股票获取成功")
+    return results
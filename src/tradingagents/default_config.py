@@ -16,7 +16,21 @@ DEFAULT_CONFIG = {
     # Debate and discussion settings
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
+    # 风险讨论模式：sequential（三位分析师轮流发言）或 concurrent（每轮三位分析师并发发言）
+    "risk_debate_mode": os.getenv("TA_RISK_DEBATE_MODE", "sequential"),
+    # 辩论历史超过该 token 数时压缩为滚动摘要（0 表示不压缩）
+    "debate_digest_tokens": int(os.getenv("TA_DEBATE_DIGEST_TOKENS", "6000")),
     "max_recur_limit": 100,
+    # LLM 流式输出合并：每个节点至少累积 min_chars 个字符且间隔 interval 秒才推送一次
+    "llm_stream_min_chars": int(os.getenv("TA_LLM_STREAM_MIN_CHARS", "200")),
+    "llm_stream_interval": float(os.getenv("TA_LLM_STREAM_INTERVAL", "0.5")),
+    "llm_stream_max_pending_chars": int(os.getenv("TA_LLM_STREAM_MAX_PENDING_CHARS", "8000")),
+    # LLM 录制/回放：off / record（录制真实调用到夹具目录）/ replay（离线回放，不访问网络）
+    "llm_fixture_mode": os.getenv("TA_LLM_FIXTURE_MODE", "off"),
+    "llm_fixture_dir": os.getenv("TA_LLM_FIXTURE_DIR", "./results/llm_fixtures"),
+    # 回放时的合成延迟：固定秒数 + 录制耗时 × 倍数
+    "llm_replay_latency": float(os.getenv("TA_LLM_REPLAY_LATENCY", "0")),
+    "llm_replay_latency_scale": float(os.getenv("TA_LLM_REPLAY_LATENCY_SCALE", "0")),
     # Tool settings - 从环境变量读取，提供默认值
     "online_tools": os.getenv("ONLINE_TOOLS_ENABLED", "false").lower() == "true",
     "online_news": os.getenv("ONLINE_NEWS_ENABLED", "true").lower() == "true", 
@@ -1,18 +1,32 @@
 # TradingAgents/graph/__init__.py
 
-from .trading_graph import TradingAgentsGraph
-from .conditional_logic import ConditionalLogic
-from .setup import GraphSetup
-from .propagation import Propagator
-from .reflection import Reflector
-from .signal_processing import SignalProcessor
+# 各组件在首次访问时才导入：仅使用 graph_pool、streaming 等轻量模块时
+# 不会加载 LangGraph、LLM 适配器和数据源
+from tradingagents.utils.lazy_import import lazy_exports
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "TradingAgentsGraph": [".trading_graph"],
+        "TradingGraphPool": [".graph_pool"],
+        "get_trading_graph_pool": [".graph_pool"],
+        "ConditionalLogic": [".conditional_logic"],
+        "GraphSetup": [".setup"],
+        "Propagator": [".propagation"],
+        "Reflector": [".reflection"],
+        "SignalProcessor": [".signal_processing"],
+    },
+    optional=False,
+)
+
 __all__ = [
     "TradingAgentsGraph",
+    "TradingGraphPool",
+    "get_trading_graph_pool",
     "ConditionalLogic",
     "GraphSetup",
     "Propagator",
@@ -278,3 +278,14 @@ class ConditionalLogic:
 
         logger.info(f"🔄 [风险讨论控制] 继续讨论 -> {next_speaker}")
         return next_speaker
+
+    def should_continue_risk_round(self, state: AgentState) -> str:
+        """并发风险讨论模式：每轮三位分析师同时发言，达到轮次后交给风险经理"""
+        current_count = state["risk_debate_state"]["count"]
+        max_count = 3 * self.max_risk_discuss_rounds
+        logger.info(f"🔍 [风险讨论控制] 并发模式，当前发言次数: {current_count}, 最大次数: {max_count}")
+
+        if current_count >= max_count:
+            logger.info(f"✅ [风险讨论控制] 达到最大次数，结束讨论 -> Risk Judge")
+            return "Risk Judge"
+        return "Risk Debate Round"
@@ -0,0 +1,143 @@
+# TradingAgents/graph/debate.py
+"""
+辩论引擎扩展
+
+顺序辩论中每位发言者的提示词都包含完整的辩论历史，提示 token 随轮次二次增长。本模块提供：
+- HistoryDigest：历史超过 token 阈值时，将较早的内容压缩为滚动摘要，只保留最近的发言原文
+- with_history_digest：为顺序辩论节点（多空研究员、风险分析师）追加历史压缩
+- create_concurrent_risk_round：一轮内激进/保守/中性三位分析师基于上一轮状态并发发言
+"""
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from tradingagents.graph.streaming import run_as_stream_role
+from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.token_budget import compact_report, estimate_tokens
+
+logger = get_logger("default")
+
+DIGEST_MARKER = "【辩论摘要】"
+
+_DIGEST_PROMPT = """请将以下投资辩论记录压缩为简明摘要，供后续发言者参考。
+要求：按发言方分别列出核心论点、关键数据和尚未解决的分歧，删除重复和寒暄内容，不要加入新的观点。
+摘要长度控制在约 {target} 个 token 以内，使用中文。
+
+辩论记录：
+{history}"""
+
+
+def merge_debate_outputs(before: Dict[str, Any], outputs: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    合并多位发言者基于同一输入状态产生的输出
+
+    - *history 字段视为追加，按发言顺序拼接各自新增的部分
+    - count 累加各自的增量
+    - 其他被修改的字段取最后一个修改者的值
+    """
+    merged = dict(before)
+    for output in outputs:
+        for key, value in output.items():
+            old = before.get(key)
+            if key == "count":
+                merged[key] = merged.get(key, 0) + (value - (old or 0))
+            elif key.endswith("history") and isinstance(value, str) and value.startswith(old or ""):
+                merged[key] = merged.get(key, "") + value[len(old or ""):]
+            elif value != old:
+                merged[key] = value
+    return merged
+
+
+class HistoryDigest:
+    """辩论历史的滚动摘要"""
+
+    def __init__(self, llm, max_tokens: int = 6000, keep_recent_tokens: int = None):
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.keep_recent_tokens = keep_recent_tokens or max_tokens // 3
+        self._lock = threading.Lock()
+
+    def _split(self, history: str):
+        """按行从尾部保留最近的发言原文"""
+        lines = history.split("\n")
+        used, cut = 0, len(lines)
+        for idx in range(len(lines) - 1, -1, -1):
+            cost = estimate_tokens(lines[idx]) + 1
+            if used + cost > self.keep_recent_tokens and cut < len(lines):
+                break
+            used += cost
+            cut = idx
+        return "\n".join(lines[:cut]), "\n".join(lines[cut:])
+
+    def _summarize(self, older: str) -> str:
+        target = max(200, self.max_tokens - self.keep_recent_tokens) // 2
+        try:
+            response = self.llm.invoke(_DIGEST_PROMPT.format(target=target, history=older))
+            return getattr(response, "content", str(response))
+        except Exception as e:
+            logger.warning(f"⚠️ [辩论摘要] LLM 摘要失败，使用规则压缩: {e}")
+            return compact_report(older, target, "debate_history")
+
+    def compress(self, history: str) -> str:
+        """超过阈值时返回“摘要 + 最近发言”，否则原样返回"""
+        if not self.max_tokens or not history or estimate_tokens(history) <= self.max_tokens:
+            return history
+        with self._lock:
+            older, recent = self._split(history)
+            if not older.strip():
+                return history
+            before = estimate_tokens(history)
+            digest = self._summarize(older.replace(DIGEST_MARKER, ""))
+            result = f"{DIGEST_MARKER}{digest.strip()}\n{recent}"
+            logger.info(f"🗜️ [辩论摘要] 历史 {before} → {estimate_tokens(result)} tokens (阈值 {self.max_tokens})")
+            return result
+
+
+def with_history_digest(node: Callable, state_key: str, digest: HistoryDigest) -> Callable:
+    """为辩论节点追加历史压缩：节点输出的 history 超过阈值时替换为滚动摘要"""
+
+    def wrapped(state) -> dict:
+        result = node(state)
+        debate_state = result.get(state_key)
+        if debate_state and debate_state.get("history"):
+            compressed = digest.compress(debate_state["history"])
+            if compressed is not debate_state["history"]:
+                result = {**result, state_key: {**debate_state, "history": compressed}}
+        return result
+
+    return wrapped
+
+
+def create_concurrent_risk_round(
+    debators: List[Callable],
+    digest: HistoryDigest = None,
+    roles: Optional[Sequence[str]] = None,
+) -> Callable:
+    """
+    并发风险讨论轮次节点
+
+    三位分析师都基于上一轮结束时的状态发言（互相看到的是对方上一轮的论点），
+    本轮发言按传入顺序合并到历史中，计数一次增加 len(debators)。
+    roles 为各分析师的节点名，流式输出按角色区分而不是都归到本节点。
+    """
+    roles = list(roles) if roles else [None] * len(debators)
+
+    def risk_round_node(state) -> dict:
+        before = state["risk_debate_state"]
+        logger.info(f"⚡ [并发风险讨论] 第 {before.get('count', 0) // len(debators) + 1} 轮，{len(debators)} 位分析师并发发言")
+        # 每位分析师在当前上下文的副本中运行，LangGraph 的 RunnableConfig（回调、流式输出）随之传入工作线程
+        with ThreadPoolExecutor(max_workers=len(debators)) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, run_as_stream_role, role, debator, state)
+                for role, debator in zip(roles, debators)
+            ]
+            outputs = [future.result()["risk_debate_state"] for future in futures]
+
+        merged = merge_debate_outputs(before, outputs)
+        if digest is not None:
+            merged["history"] = digest.compress(merged.get("history", ""))
+        return {"risk_debate_state": merged}
+
+    return risk_round_node
@@ -0,0 +1,133 @@
+# TradingAgents/graph/graph_pool.py
+
+"""
+TradingAgentsGraph 实例池
+
+构建 TradingAgentsGraph 需要创建 LLM 客户端、Toolkit、5 个 FinancialSituationMemory
+（解析 embedding 客户端与 ChromaDB 集合）、工具节点并编译 LangGraph，耗时数秒。
+这些部分只由「分析师组合 + 配置」决定，可以复用；每次运行的可变状态
+（ticker、curr_state、log_states_dict）在借出时重置。
+
+并发隔离：实例以独占方式借出（acquire/release），同一实例不会同时被两个任务使用；
+池中没有空闲实例时直接新建，归还时超出上限的实例被丢弃。
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("agents")
+
+GraphFactory = Callable[[List[str], bool, Dict[str, Any]], Any]
+
+
+def _default_factory(selected_analysts: List[str], debug: bool, config: Dict[str, Any]):
+    from .trading_graph import TradingAgentsGraph
+    return TradingAgentsGraph(selected_analysts=selected_analysts, debug=debug, config=config)
+
+
+class TradingGraphPool:
+    """按「分析师组合 + 配置指纹」复用 TradingAgentsGraph 实例"""
+
+    def __init__(
+        self,
+        max_idle_per_key: int = 2,
+        max_keys: int = 8,
+        factory: Optional[GraphFactory] = None,
+    ):
+        self.max_idle_per_key = max_idle_per_key
+        self.max_keys = max_keys
+        self._factory = factory or _default_factory
+        self._idle: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def fingerprint(selected_analysts: List[str], debug: bool, config: Dict[str, Any]) -> str:
+        """配置指纹（只保存哈希，避免在内存中以明文形式作为键保存 API Key）"""
+        raw = json.dumps(
+            {"analysts": list(selected_analysts), "debug": bool(debug), "config": config},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def acquire(self, selected_analysts: List[str], debug: bool, config: Dict[str, Any]):
+        """借出一个实例（优先复用空闲实例，否则新建）"""
+        key = self.fingerprint(selected_analysts, debug, config)
+        graph = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                graph = idle.pop()
+                self._idle.move_to_end(key)
+                self.reused += 1
+
+        if graph is not None:
+            graph.reset_run_state()
+            logger.info(f"♻️ [Graph池] 复用TradingAgents实例（实例ID: {id(graph)}）")
+            return graph
+
+        graph = self._factory(list(selected_analysts), debug, config)
+        graph._pool_key = key
+        with self._lock:
+            self.created += 1
+        logger.info(f"🔧 [Graph池] 创建新的TradingAgents实例（实例ID: {id(graph)}）")
+        return graph
+
+    def release(self, graph) -> None:
+        """归还实例；超出空闲上限时丢弃"""
+        key = getattr(graph, "_pool_key", None)
+        if key is None:
+            return
+        graph.reset_run_state()
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle_per_key:
+                idle.append(graph)
+            while len(self._idle) > self.max_keys:
+                self._idle.popitem(last=False)
+
+    @contextmanager
+    def lease(self, selected_analysts: List[str], debug: bool, config: Dict[str, Any]):
+        graph = self.acquire(selected_analysts, debug, config)
+        try:
+            yield graph
+        finally:
+            self.release(graph)
+
+    def clear(self) -> None:
+        """清空空闲实例（如 LLM 配置变更后）"""
+        with self._lock:
+            self._idle.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "idle": sum(len(v) for v in self._idle.values()),
+                "keys": len(self._idle),
+            }
+
+
+_graph_pool: Optional[TradingGraphPool] = None
+_graph_pool_lock = threading.Lock()
+
+
+def get_trading_graph_pool() -> TradingGraphPool:
+    """获取全局 TradingAgentsGraph 实例池"""
+    global _graph_pool
+    if _graph_pool is None:
+        with _graph_pool_lock:
+            if _graph_pool is None:
+                _graph_pool = TradingGraphPool()
+    return _graph_pool
@@ -1,12 +1,24 @@
 # TradingAgents/graph/reflection.py
 
-from typing import Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
 from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
+# 参与反思的组件：名称 -> (提示中的组件标签, 从状态中取出待反思内容的函数)
+REFLECTION_COMPONENTS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Any]]] = {
+    "bull": ("BULL", lambda s: s["investment_debate_state"]["bull_history"]),
+    "bear": ("BEAR", lambda s: s["investment_debate_state"]["bear_history"]),
+    "trader": ("TRADER", lambda s: s["trader_investment_plan"]),
+    "invest_judge": ("INVEST JUDGE", lambda s: s["investment_debate_state"]["judge_decision"]),
+    "risk_manager": ("RISK JUDGE", lambda s: s["risk_debate_state"]["judge_decision"]),
+}
+
 
 class Reflector:
     """Handles reflection on decisions and updating memory."""
@@ -123,3 +135,98 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             "RISK JUDGE", judge_decision, situation, returns_losses
         )
         risk_manager_memory.add_situations([(situation, result)])
+
+    def reflect_all(
+        self,
+        current_state: Dict[str, Any],
+        returns_losses,
+        memories: Dict[str, Any],
+        max_workers: int = 5,
+    ) -> Dict[str, str]:
+        """
+        并发完成全部组件的反思并写入各自的记忆库
+
+        共享的市场情境只提取和向量化一次；某个组件失败不影响其他组件。
+
+        Args:
+            memories: 组件名（见 REFLECTION_COMPONENTS）-> 记忆库，值为 None 的组件只反思不写入
+        Returns:
+            组件名 -> 反思内容（失败的组件不在结果中）
+        """
+        situation = self._extract_current_situation(current_state)
+        components = [name for name in REFLECTION_COMPONENTS if name in memories]
+
+        reflections: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(components) or 1))) as pool:
+            futures = {
+                pool.submit(
+                    self._reflect_on_component,
+                    REFLECTION_COMPONENTS[name][0],
+                    REFLECTION_COMPONENTS[name][1](current_state),
+                    situation,
+                    returns_losses,
+                ): name
+                for name in components
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    reflections[name] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ [反思] {name} 反思失败: {e}")
+
+        targets = [(name, memories[name]) for name in reflections if memories.get(name) is not None]
+        if targets:
+            embedding = targets[0][1].get_embedding(situation)
+            for name, memory in targets:
+                try:
+                    memory.add_situations([(situation, reflections[name])], embeddings=[embedding])
+                except Exception as e:
+                    logger.error(f"❌ [反思] {name} 写入记忆失败: {e}")
+        return reflections
+
+    def reflect_batch(
+        self,
+        items: Iterable[Tuple[Any, Dict[str, Any], Any]],
+        memories: Dict[str, Any],
+        max_workers: int = 4,
+        component_workers: int = 5,
+        progress_callback: Optional[Callable[[int, int, Any, Optional[Exception]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        批量反思多条历史决策
+
+        Args:
+            items: (标识, 状态, 收益) 列表，标识用于进度和结果（如 (ticker, date)）
+            max_workers: 同时处理的决策数；每条决策内部再并发 component_workers 个组件
+            progress_callback: 每完成一条调用 (已完成数, 总数, 标识, 异常或 None)
+        Returns:
+            每条决策的结果 {"key", "reflections", "error"}，顺序与输入一致
+        """
+        items = list(items)
+        total = len(items)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        started = time.time()
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {
+                pool.submit(self.reflect_all, state, returns_losses, memories, component_workers): idx
+                for idx, (_, state, returns_losses) in enumerate(items)
+            }
+            for future in as_completed(futures):
+                idx = futures[future]
+                key = items[idx][0]
+                error = None
+                try:
+                    reflections = future.result()
+                except Exception as e:
+                    reflections, error = {}, e
+                    logger.error(f"❌ [批量反思] {key} 失败: {e}")
+                results[idx] = {"key": key, "reflections": reflections, "error": str(error) if error else None}
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total, key, error)
+                if done == total or done % 10 == 0:
+                    logger.info(f"🪞 [批量反思] 进度 {done}/{total}，耗时 {time.time() - started:.1f}s")
+        return results
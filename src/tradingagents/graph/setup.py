@@ -10,6 +10,7 @@ from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
 
 from .conditional_logic import ConditionalLogic
+from .debate import HistoryDigest, create_concurrent_risk_round, with_history_digest
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -164,6 +165,18 @@ class GraphSetup:
             self.deep_thinking_llm, self.risk_manager_memory
         )
 
+        # 辩论历史超过阈值后压缩为滚动摘要，控制提示词增长
+        digest_tokens = int(self.config.get("debate_digest_tokens", 0) or 0)
+        digest = HistoryDigest(self.quick_thinking_llm, digest_tokens) if digest_tokens > 0 else None
+        if digest is not None:
+            bull_researcher_node = with_history_digest(bull_researcher_node, "investment_debate_state", digest)
+            bear_researcher_node = with_history_digest(bear_researcher_node, "investment_debate_state", digest)
+        concurrent_risk = self.config.get("risk_debate_mode", "sequential") == "concurrent"
+        if digest is not None and not concurrent_risk:
+            risky_analyst = with_history_digest(risky_analyst, "risk_debate_state", digest)
+            safe_analyst = with_history_digest(safe_analyst, "risk_debate_state", digest)
+            neutral_analyst = with_history_digest(neutral_analyst, "risk_debate_state", digest)
+
         # Create workflow
         workflow = StateGraph(AgentState)
 
@@ -180,9 +193,19 @@ class GraphSetup:
         workflow.add_node("Bear Researcher", bear_researcher_node)
         workflow.add_node("Research Manager", research_manager_node)
         workflow.add_node("Trader", trader_node)
-        workflow.add_node("Risky Analyst", risky_analyst)
-        workflow.add_node("Neutral Analyst", neutral_analyst)
-        workflow.add_node("Safe Analyst", safe_analyst)
+        if concurrent_risk:
+            workflow.add_node(
+                "Risk Debate Round",
+                create_concurrent_risk_round(
+                    [risky_analyst, safe_analyst, neutral_analyst],
+                    digest,
+                    roles=["Risky Analyst", "Safe Analyst", "Neutral Analyst"],
+                ),
+            )
+        else:
+            workflow.add_node("Risky Analyst", risky_analyst)
+            workflow.add_node("Neutral Analyst", neutral_analyst)
+            workflow.add_node("Safe Analyst", safe_analyst)
         workflow.add_node("Risk Judge", risk_manager_node)
 
         # Define edges
@@ -229,31 +252,42 @@ class GraphSetup:
             },
         )
         workflow.add_edge("Research Manager", "Trader")
-        workflow.add_edge("Trader", "Risky Analyst")
-        workflow.add_conditional_edges(
-            "Risky Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Safe Analyst": "Safe Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
-        workflow.add_conditional_edges(
-            "Safe Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Neutral Analyst": "Neutral Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
-        workflow.add_conditional_edges(
-            "Neutral Analyst",
-            self.conditional_logic.should_continue_risk_analysis,
-            {
-                "Risky Analyst": "Risky Analyst",
-                "Risk Judge": "Risk Judge",
-            },
-        )
+        if concurrent_risk:
+            workflow.add_edge("Trader", "Risk Debate Round")
+            workflow.add_conditional_edges(
+                "Risk Debate Round",
+                self.conditional_logic.should_continue_risk_round,
+                {
+                    "Risk Debate Round": "Risk Debate Round",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
+        else:
+            workflow.add_edge("Trader", "Risky Analyst")
+            workflow.add_conditional_edges(
+                "Risky Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Safe Analyst": "Safe Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
+            workflow.add_conditional_edges(
+                "Safe Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Neutral Analyst": "Neutral Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
+            workflow.add_conditional_edges(
+                "Neutral Analyst",
+                self.conditional_logic.should_continue_risk_analysis,
+                {
+                    "Risky Analyst": "Risky Analyst",
+                    "Risk Judge": "Risk Judge",
+                },
+            )
 
         workflow.add_edge("Risk Judge", END)
 
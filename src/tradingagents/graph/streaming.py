@@ -0,0 +1,202 @@
+# TradingAgents/graph/streaming.py
+"""
+LLM 流式输出
+
+propagate 传入 token_callback 时，图的回调中挂载 LLMTokenStreamHandler：
+- 该处理器实现了流式回调协议（tap_output_iter），各节点的 llm.invoke 会自动走适配器的流式接口
+- 逐 token 回调经 TokenStreamCoalescer 合并后再交给 token_callback，
+  每个节点最多每 interval 秒输出一次（累积超过 max_pending_chars 时立即输出），
+  快速模型不会以 token 粒度冲击 Redis 或 WebSocket
+
+输出事件：
+    {"type": "llm_stream", "node": "Market Analyst", "step": "📊 市场分析师", "run_id": "...",
+     "delta": "...", "offset": 0, "seq": 0, "final": False}
+offset 为 delta 在该次 LLM 调用输出中的起始位置，客户端据此拼接或检测丢失；
+run_id 标识一次 LLM 调用，同一节点内并发的多次调用（如并发风险讨论）据此区分。
+"""
+
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("default")
+
+# 图节点 -> 进度消息（与分析服务的节点进度映射一致）
+NODE_PROGRESS_MESSAGES = {
+    "Market Analyst": "📊 市场分析师",
+    "Fundamentals Analyst": "💼 基本面分析师",
+    "News Analyst": "📰 新闻分析师",
+    "Social Analyst": "💬 社交媒体分析师",
+    "Bull Researcher": "🐂 看涨研究员",
+    "Bear Researcher": "🐻 看跌研究员",
+    "Research Manager": "👔 研究经理",
+    "Trader": "💼 交易员决策",
+    "Risky Analyst": "🔥 激进风险评估",
+    "Safe Analyst": "🛡️ 保守风险评估",
+    "Neutral Analyst": "⚖️ 中性风险评估",
+    "Risk Debate Round": "⚡ 风险并发讨论",
+    "Risk Judge": "🎯 风险经理",
+}
+
+
+# 节点内并发执行的子角色（如并发风险讨论中的各位分析师），流式输出按该角色归属
+_stream_role: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_stream_role", default=None)
+
+
+def node_progress_message(node: str) -> Optional[str]:
+    """图节点对应的进度消息；工具节点和消息清理节点返回 None"""
+    return NODE_PROGRESS_MESSAGES.get(node)
+
+
+def run_as_stream_role(role: Optional[str], func: Callable, *args, **kwargs):
+    """以指定角色运行 func，期间发起的 LLM 调用的流式输出归属该角色"""
+    token = _stream_role.set(role)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _stream_role.reset(token)
+
+
+class TokenStreamCoalescer:
+    """按 LLM 调用合并 token，限制输出频率和单次缓冲大小（线程安全）"""
+
+    def __init__(
+        self,
+        sink: Callable[[Dict[str, Any]], None],
+        min_chars: int = 200,
+        interval: float = 0.5,
+        max_pending_chars: int = 8000,
+    ):
+        self.sink = sink
+        self.min_chars = min_chars
+        self.interval = interval
+        self.max_pending_chars = max_pending_chars
+        self._lock = threading.Lock()
+        # run_id -> 流状态
+        self._streams: Dict[Any, Dict[str, Any]] = {}
+        self.emitted = 0
+
+    def add(self, run_id: Any, node: str, text: str) -> None:
+        if not text:
+            return
+        with self._lock:
+            stream = self._streams.setdefault(run_id, {
+                "node": node, "run_id": str(run_id), "pending": [], "pending_chars": 0, "offset": 0, "seq": 0, "last_flush": time.monotonic(),
+            })
+            stream["pending"].append(text)
+            stream["pending_chars"] += len(text)
+            due = (stream["pending_chars"] >= self.min_chars
+                   and time.monotonic() - stream["last_flush"] >= self.interval)
+            event = self._take(stream, final=False) if due or stream["pending_chars"] >= self.max_pending_chars else None
+        self._emit(event)
+
+    def started(self, run_id: Any) -> bool:
+        with self._lock:
+            return run_id in self._streams
+
+    def finish(self, run_id: Any) -> None:
+        """LLM 调用结束：输出剩余内容并标记 final"""
+        with self._lock:
+            stream = self._streams.pop(run_id, None)
+            event = self._take(stream, final=True) if stream and stream["offset"] + stream["pending_chars"] > 0 else None
+        self._emit(event)
+
+    def _take(self, stream: Dict[str, Any], final: bool) -> Dict[str, Any]:
+        delta = "".join(stream["pending"])
+        event = {
+            "type": "llm_stream",
+            "node": stream["node"],
+            "step": node_progress_message(stream["node"]) or stream["node"],
+            "run_id": stream["run_id"],
+            "delta": delta,
+            "offset": stream["offset"],
+            "seq": stream["seq"],
+            "final": final,
+        }
+        stream["offset"] += len(delta)
+        stream["seq"] += 1
+        stream["pending"] = []
+        stream["pending_chars"] = 0
+        stream["last_flush"] = time.monotonic()
+        return event
+
+    def _emit(self, event: Optional[Dict[str, Any]]) -> None:
+        if event is None:
+            return
+        self.emitted += 1
+        try:
+            self.sink(event)
+        except Exception as e:
+            logger.debug(f"⚠️ [流式输出] 推送失败: {e}")
+
+
+class LLMTokenStreamHandler(BaseCallbackHandler):
+    """
+    图节点内 LLM 的 token 回调处理器
+
+    实现 tap_output_iter / tap_output_aiter 后即满足 LangChain 的流式回调协议，
+    挂载该处理器的聊天模型在 invoke 时会自动使用流式接口并逐 token 回调。
+    """
+
+    raise_error = False
+
+    def __init__(self, coalescer: TokenStreamCoalescer):
+        self.coalescer = coalescer
+        self._runs: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+
+    def tap_output_iter(self, run_id, output):
+        return output
+
+    def tap_output_aiter(self, run_id, output):
+        return output
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        with self._lock:
+            # 只转发图节点内的顶层 LLM 调用（录制包装等嵌套调用不重复输出）
+            if node and parent_run_id not in self._runs:
+                self._runs[run_id] = _stream_role.get() or node
+
+    def on_llm_new_token(self, token, *, chunk=None, run_id, **kwargs):
+        node = self._runs.get(run_id)
+        if node is None:
+            return
+        if not isinstance(token, str):
+            token = "".join(b.get("text", "") for b in token if isinstance(b, dict)) if isinstance(token, list) else ""
+        self.coalescer.add(run_id, node, token)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            node = self._runs.pop(run_id, None)
+        if node is None:
+            return
+        # 不支持流式的模型没有 token 回调，结束时一次性输出完整内容
+        if response is not None and not self.coalescer.started(run_id):
+            text = "".join(
+                generation.text for generations in response.generations for generation in generations
+            )
+            self.coalescer.add(run_id, node, text)
+        self.coalescer.finish(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.on_llm_end(None, run_id=run_id)
+
+
+def create_token_stream_handler(
+    token_callback: Callable[[Dict[str, Any]], None],
+    config: Optional[Dict[str, Any]] = None,
+) -> Tuple[LLMTokenStreamHandler, TokenStreamCoalescer]:
+    config = config or {}
+    coalescer = TokenStreamCoalescer(
+        token_callback,
+        min_chars=int(config.get("llm_stream_min_chars", 200)),
+        interval=float(config.get("llm_stream_interval", 0.5)),
+        max_pending_chars=int(config.get("llm_stream_max_pending_chars", 8000)),
+    )
+    return LLMTokenStreamHandler(coalescer), coalescer
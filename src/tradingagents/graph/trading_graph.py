@@ -66,7 +66,11 @@ class TradingAgentsGraph:
         )
 
         # Initialize LLMs
-        if self.config["llm_provider"].lower() == "openai":
+        fixture_mode = self.config.get("llm_fixture_mode", "off")
+        if fixture_mode == "replay":
+            # 离线回放：不创建真实 LLM，不需要 API 密钥
+            self.deep_thinking_llm, self.quick_thinking_llm = self._create_replay_llms()
+        elif self.config["llm_provider"].lower() == "openai":
             self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
             self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
         elif self.config["llm_provider"] == "siliconflow":
@@ -231,7 +235,10 @@ class TradingAgentsGraph:
             logger.info("✅ [千帆] 文心一言适配器已配置成功")
         else:
             raise ValueError(f"Unsupported LLM provider: {self.config['llm_provider']}")
-        
+
+        if fixture_mode == "record":
+            self._wrap_recording_llms()
+
         self.toolkit = Toolkit(config=self.config)
 
         # Initialize memories (如果启用)
@@ -283,6 +290,62 @@ class TradingAgentsGraph:
         # Set up the graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
 
+    def _fixture_store(self):
+        from tradingagents.llm_adapters.record_replay import FixtureStore
+        return FixtureStore(self.config.get("llm_fixture_dir", "./results/llm_fixtures"))
+
+    def _wrap_recording_llms(self):
+        """录制模式：包装真实 LLM，调用记录写入夹具目录"""
+        from tradingagents.llm_adapters.record_replay import create_recording_llm
+
+        store = self._fixture_store()
+        store.write_meta({
+            "llm_provider": self.config["llm_provider"],
+            "deep_think_llm": {
+                "model": self.config["deep_think_llm"],
+                "class": self.deep_thinking_llm.__class__.__name__,
+                "temperature": getattr(self.deep_thinking_llm, "temperature", None),
+            },
+            "quick_think_llm": {
+                "model": self.config["quick_think_llm"],
+                "class": self.quick_thinking_llm.__class__.__name__,
+                "temperature": getattr(self.quick_thinking_llm, "temperature", None),
+            },
+        })
+        self.deep_thinking_llm = create_recording_llm(self.deep_thinking_llm, store, self.config["deep_think_llm"])
+        self.quick_thinking_llm = create_recording_llm(self.quick_thinking_llm, store, self.config["quick_think_llm"])
+        logger.info(f"🎙️ [LLM录制] 调用将录制到: {store.directory}")
+
+    def _create_replay_llms(self):
+        """回放模式：按录制时的模型名和类名创建回放 LLM"""
+        from tradingagents.llm_adapters.record_replay import create_replay_llm
+
+        store = self._fixture_store()
+        meta = store.read_meta()
+        latency = float(self.config.get("llm_replay_latency", 0.0))
+        latency_scale = float(self.config.get("llm_replay_latency_scale", 0.0))
+        llms = []
+        for key in ("deep_think_llm", "quick_think_llm"):
+            info = meta.get(key, {})
+            llms.append(create_replay_llm(
+                store,
+                model_name=info.get("model", self.config[key]),
+                source_class=info.get("class", ""),
+                latency=latency,
+                latency_scale=latency_scale,
+                temperature=info.get("temperature"),
+            ))
+        logger.info(f"▶️ [LLM回放] 使用夹具: {store.directory} ({store.count('llm')} 条记录)")
+        return llms[0], llms[1]
+
+    def reset_run_state(self):
+        """重置单次运行的可变状态，供实例池复用实例时调用"""
+        self.curr_state = None
+        self.ticker = None
+        self.log_states_dict = {}
+        # 数据接口配置是全局的，复用时重新应用本实例的配置
+        set_config(self.config)
+
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources."""
         return {
@@ -328,8 +391,14 @@ class TradingAgentsGraph:
             ),
         }
 
-    def propagate(self, company_name, trade_date):
-        """Run the trading agents graph for a company on a specific date."""
+    def propagate(self, company_name, trade_date, progress_callback=None, task_id=None, token_callback=None):
+        """Run the trading agents graph for a company on a specific date.
+
+        Args:
+            progress_callback: 每个节点完成时以进度消息（如 "📊 市场分析师"）回调
+            task_id: 分析任务ID（用于日志）
+            token_callback: LLM 流式输出回调，接收合并后的 llm_stream 事件（见 graph/streaming.py）
+        """
 
         # 添加详细的接收日志
         logger.debug(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
@@ -359,6 +428,8 @@ class TradingAgentsGraph:
                     trace.append(chunk)
 
             final_state = trace[-1]
+        elif progress_callback or token_callback:
+            final_state = self._stream_graph(init_agent_state, args, progress_callback, token_callback, task_id)
         else:
             # Standard mode without tracing
             final_state = self.graph.invoke(init_agent_state, **args)
@@ -372,6 +443,40 @@ class TradingAgentsGraph:
         # Return decision and processed signal
         return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
 
+    def _stream_graph(self, init_agent_state, args, progress_callback=None, token_callback=None, task_id=None):
+        """按节点流式执行图：节点完成时回调进度，LLM 输出经合并后回调 token_callback"""
+        from .streaming import create_token_stream_handler, node_progress_message
+
+        config = dict(args.get("config", {}))
+        coalescer = None
+        if token_callback:
+            handler, coalescer = create_token_stream_handler(token_callback, self.config)
+            config["callbacks"] = list(config.get("callbacks") or []) + [handler]
+
+        final_state = None
+        for mode, chunk in self.graph.stream(init_agent_state, stream_mode=["updates", "values"], config=config):
+            if mode == "values":
+                final_state = chunk
+                continue
+            if not progress_callback:
+                continue
+            for node in (chunk or {}):
+                message = node_progress_message(node)
+                if message:
+                    try:
+                        progress_callback(message)
+                    except Exception as e:
+                        logger.warning(f"⚠️ [进度回调] 节点 {node} 回调失败: {e}")
+
+        if coalescer is not None:
+            logger.info(f"📡 [流式输出] 任务 {task_id or '-'} 共推送 {coalescer.emitted} 个片段")
+        if progress_callback:
+            try:
+                progress_callback("📊 生成报告")
+            except Exception as e:
+                logger.warning(f"⚠️ [进度回调] 生成报告回调失败: {e}")
+        return final_state
+
     def _log_state(self, trade_date, final_state):
         """Log the final state to a JSON file."""
         self.log_states_dict[str(trade_date)] = {
@@ -415,33 +520,90 @@ class TradingAgentsGraph:
             "final_trade_decision": final_state["final_trade_decision"],
         }
 
-        # Save to file
-        directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
+        # 每个交易日单独一个文件：实例复用时 log_states_dict 会被清空，
+        # 批量运行时同一股票的不同日期也不会互相覆盖
+        directory = self._state_log_dir(self.ticker)
         directory.mkdir(parents=True, exist_ok=True)
 
-        with open(
-            f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/full_states_log.json",
-            "w",
-        ) as f:
-            json.dump(self.log_states_dict, f, indent=4)
+        with open(directory / f"full_states_log_{trade_date}.json", "w") as f:
+            json.dump(self.log_states_dict[str(trade_date)], f, indent=4)
+
+    def _reflection_memories(self) -> Dict[str, Any]:
+        return {
+            "bull": self.bull_memory,
+            "bear": self.bear_memory,
+            "trader": self.trader_memory,
+            "invest_judge": self.invest_judge_memory,
+            "risk_manager": self.risk_manager_memory,
+        }
 
     def reflect_and_remember(self, returns_losses):
         """Reflect on decisions and update memory based on returns."""
-        self.reflector.reflect_bull_researcher(
-            self.curr_state, returns_losses, self.bull_memory
-        )
-        self.reflector.reflect_bear_researcher(
-            self.curr_state, returns_losses, self.bear_memory
-        )
-        self.reflector.reflect_trader(
-            self.curr_state, returns_losses, self.trader_memory
-        )
-        self.reflector.reflect_invest_judge(
-            self.curr_state, returns_losses, self.invest_judge_memory
-        )
-        self.reflector.reflect_risk_manager(
-            self.curr_state, returns_losses, self.risk_manager_memory
+        # 五个组件的反思并发执行，共享情境只向量化一次
+        self.reflector.reflect_all(self.curr_state, returns_losses, self._reflection_memories())
+
+    @staticmethod
+    def _state_log_dir(ticker: str) -> Path:
+        return Path(f"eval_results/{ticker}/TradingAgentsStrategy_logs")
+
+    @classmethod
+    def _load_state_log(cls, ticker: str, trade_date) -> Optional[Dict[str, Any]]:
+        """读取 _log_state 写入的某个交易日的状态
+
+        优先读取按日期拆分的 full_states_log_{date}.json，
+        找不到时回退到旧版按交易日索引的 full_states_log.json。
+        """
+        directory = cls._state_log_dir(ticker)
+        path = directory / f"full_states_log_{trade_date}.json"
+        if path.exists():
+            with open(path, "r") as f:
+                return json.load(f)
+        legacy = directory / "full_states_log.json"
+        if not legacy.exists():
+            return None
+        with open(legacy, "r") as f:
+            return json.load(f).get(str(trade_date))
+
+    @staticmethod
+    def _state_from_log(logged: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not logged:
+            return None
+        # 日志中交易员计划的字段名与运行时状态不同
+        return {**logged, "trader_investment_plan": logged.get("trader_investment_decision", "")}
+
+    def load_logged_state(self, ticker: str, trade_date) -> Optional[Dict[str, Any]]:
+        """读取某次历史决策的状态（用于事后反思）"""
+        return self._state_from_log(self._load_state_log(ticker, trade_date))
+
+    def reflect_and_remember_batch(
+        self,
+        decisions,
+        max_workers: int = 4,
+        progress_callback=None,
+    ) -> List[Dict[str, Any]]:
+        """
+        批量反思历史决策
+
+        Args:
+            decisions: (ticker, trade_date, returns_losses) 列表，状态从 _log_state 写入的状态日志读取
+            max_workers: 同时处理的决策数
+            progress_callback: 每完成一条调用 (已完成数, 总数, (ticker, trade_date), 异常或 None)
+        """
+        items, missing = [], []
+        for ticker, trade_date, returns_losses in decisions:
+            state = self.load_logged_state(ticker, trade_date)
+            if state is None:
+                missing.append((ticker, trade_date))
+                continue
+            items.append(((ticker, trade_date), state, returns_losses))
+
+        if missing:
+            logger.warning(f"⚠️ [批量反思] {len(missing)} 条决策缺少状态日志，已跳过: {missing[:5]}")
+        results = self.reflector.reflect_batch(
+            items, self._reflection_memories(), max_workers=max_workers, progress_callback=progress_callback
         )
+        results.extend({"key": key, "reflections": {}, "error": "state log not found"} for key in missing)
+        return results
 
     def process_signal(self, full_signal, stock_symbol=None):
         """Process a signal to extract the core decision."""
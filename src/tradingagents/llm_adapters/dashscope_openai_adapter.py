@@ -10,6 +10,8 @@ from langchain_openai import ChatOpenAI
 from langchain_core.tools import BaseTool
 from pydantic import Field, SecretStr
 from ..config.config_manager import token_tracker
+from .response_cache import get_llm_response_cache
+from .streaming import track_stream
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -99,9 +101,34 @@ class ChatDashScopeOpenAI(ChatOpenAI):
         api_base = getattr(self, 'base_url', None) or getattr(self, 'openai_api_base', None) or kwargs.get('base_url', 'unknown')
         logger.info(f"   API Base: {api_base}")
     
-    def _generate(self, *args, **kwargs):
-        """重写生成方法，添加 token 使用量追踪"""
-        
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        """重写生成方法，添加响应缓存和 token 使用量追踪"""
+        return get_llm_response_cache().generate(
+            self, "dashscope", messages, stop, kwargs,
+            lambda: self._generate_uncached(messages, stop, run_manager, **kwargs),
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        """重写流式生成方法（图回调挂载流式处理器时使用），结束后追踪 token 使用量"""
+
+        def on_usage(input_tokens: int, output_tokens: int):
+            if input_tokens > 0 or output_tokens > 0:
+                token_tracker.track_usage(
+                    provider="dashscope",
+                    model_name=self.model_name,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    session_id=kwargs.get('session_id', f"dashscope_openai_{hash(str(messages))%10000}"),
+                    analysis_type=kwargs.get('analysis_type', 'stock_analysis')
+                )
+
+        def stream():
+            chunks = super(ChatDashScopeOpenAI, self)._stream(messages, stop, run_manager, **kwargs)
+            return track_stream(chunks, messages, on_usage)
+
+        yield from get_llm_response_cache().stream(self, "dashscope", messages, stop, kwargs, stream)
+
+    def _generate_uncached(self, *args, **kwargs):
         # 调用父类的生成方法
         result = super()._generate(*args, **kwargs)
         
@@ -4,14 +4,16 @@ DeepSeek LLM适配器，支持Token使用统计
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
 from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
-from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 from langchain_openai import ChatOpenAI
 from langchain_core.callbacks import CallbackManagerForLLMRun
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
+from tradingagents.llm_adapters.response_cache import get_llm_response_cache
+from tradingagents.llm_adapters.streaming import track_stream
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger, get_logger_manager
@@ -123,8 +125,14 @@ class ChatDeepSeek(ChatOpenAI):
         analysis_type = kwargs.pop('analysis_type', None)
 
         try:
-            # 调用父类方法生成响应
-            result = super()._generate(messages, stop, run_manager, **kwargs)
+            # 调用父类方法生成响应（确定性调用可命中响应缓存）
+            result = get_llm_response_cache().generate(
+                self, "deepseek", messages, stop,
+                {**kwargs, "session_id": session_id, "analysis_type": analysis_type},
+                lambda: super(ChatDeepSeek, self)._generate(messages, stop, run_manager, **kwargs),
+            )
+            if result.llm_output and result.llm_output.get("cache_hit"):
+                return result
             
             # 提取token使用量
             input_tokens = 0
@@ -189,6 +197,43 @@ class ChatDeepSeek(ChatOpenAI):
             logger.error(f"❌ [DeepSeek] 调用失败: {e}", exc_info=True)
             raise
     
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        流式生成聊天响应（图回调挂载流式处理器时使用），结束后记录token使用量
+        """
+        session_id = kwargs.pop('session_id', None) or f"deepseek_{hash(str(messages))%10000}"
+        analysis_type = kwargs.pop('analysis_type', None) or 'stock_analysis'
+
+        def on_usage(input_tokens: int, output_tokens: int):
+            if TOKEN_TRACKING_ENABLED and (input_tokens > 0 or output_tokens > 0):
+                try:
+                    token_tracker.track_usage(
+                        provider="deepseek",
+                        model_name=self.model_name,
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        session_id=session_id,
+                        analysis_type=analysis_type
+                    )
+                except Exception as track_error:
+                    logger.error(f"⚠️ [DeepSeek] Token统计失败: {track_error}", exc_info=True)
+
+        def stream() -> Iterator[ChatGenerationChunk]:
+            chunks = super(ChatDeepSeek, self)._stream(messages, stop, run_manager, **kwargs)
+            return track_stream(chunks, messages, on_usage)
+
+        yield from get_llm_response_cache().stream(
+            self, "deepseek", messages, stop,
+            {**kwargs, "session_id": session_id, "analysis_type": analysis_type},
+            stream,
+        )
+
     def _estimate_input_tokens(self, messages: List[BaseMessage]) -> int:
         """
         估算输入token数量
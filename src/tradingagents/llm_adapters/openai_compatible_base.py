@@ -5,14 +5,17 @@ OpenAI兼容适配器基类
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
 from langchain_core.messages import BaseMessage
-from langchain_core.outputs import ChatResult
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
 from langchain_openai import ChatOpenAI
 from langchain_core.callbacks import CallbackManagerForLLMRun
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
+from tradingagents.utils.token_budget import estimate_tokens
+from tradingagents.llm_adapters.response_cache import get_llm_response_cache
+from tradingagents.llm_adapters.streaming import track_stream
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger, get_logger_manager
@@ -165,14 +168,45 @@ class OpenAICompatibleBase(ChatOpenAI):
         
         # 记录开始时间
         start_time = time.time()
-        
-        # 调用父类生成方法
-        result = super()._generate(messages, stop, run_manager, **kwargs)
-        
-        # 记录token使用
-        self._track_token_usage(result, kwargs, start_time)
-        
-        return result
+
+        def generate() -> ChatResult:
+            # 调用父类生成方法
+            result = super(OpenAICompatibleBase, self)._generate(messages, stop, run_manager, **kwargs)
+            # 记录token使用
+            self._track_token_usage(result, kwargs, start_time)
+            return result
+
+        # 确定性调用可命中响应缓存（TA_LLM_CACHE_ENABLED 开启时）
+        return get_llm_response_cache().generate(
+            self, self.provider_name or "openai_compatible", messages, stop, kwargs, generate
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        流式生成（图回调挂载流式处理器时使用），结束后记录token使用量
+        """
+        start_time = time.time()
+
+        def on_usage(input_tokens: int, output_tokens: int):
+            if TOKEN_TRACKING_ENABLED:
+                logger.info(
+                    f"📊 Token使用(流式) - Provider: {self.provider_name}, Model: {getattr(self, 'model_name', 'unknown')}, "
+                    f"提示: {input_tokens}, 补全: {output_tokens}, 用时: {time.time() - start_time:.2f}s"
+                )
+
+        def stream() -> Iterator[ChatGenerationChunk]:
+            chunks = super(OpenAICompatibleBase, self)._stream(messages, stop, run_manager, **kwargs)
+            return track_stream(chunks, messages, on_usage)
+
+        yield from get_llm_response_cache().stream(
+            self, self.provider_name or "openai_compatible", messages, stop, kwargs, stream
+        )
 
     def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
         """记录token使用量并输出日志"""
@@ -303,10 +337,8 @@ class ChatQianfanOpenAI(OpenAICompatibleBase):
         )
     
     def _estimate_tokens(self, text: str) -> int:
-        """估算文本的token数量（千帆模型专用）"""
-        # 千帆模型的token估算：中文约1.5字符/token，英文约4字符/token
-        # 保守估算：2字符/token
-        return max(1, len(text) // 2)
+        """估算文本的token数量（千帆模型专用，使用统一估算器）"""
+        return estimate_tokens(text)
     
     def _truncate_messages(self, messages: List[BaseMessage], max_tokens: int = 4500) -> List[BaseMessage]:
         """截断消息以适应千帆模型的token限制"""
@@ -388,10 +420,8 @@ class ChatZhipuOpenAI(OpenAICompatibleBase):
         )
     
     def _estimate_tokens(self, text: str) -> int:
-        """估算文本的token数量（GLM模型专用）"""
-        # GLM模型的token估算：中文约1.5字符/token，英文约4字符/token
-        # 保守估算：2字符/token
-        return max(1, len(text) // 2)
+        """估算文本的token数量（GLM模型专用，使用统一估算器）"""
+        return estimate_tokens(text)
 
 
 class ChatCustomOpenAI(OpenAICompatibleBase):
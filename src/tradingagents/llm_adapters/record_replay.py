@@ -0,0 +1,282 @@
+"""
+LLM 录制 / 回放适配器
+
+录制模式下包装真实的 LLM，把每次调用的请求摘要和完整响应（含工具调用）写入夹具目录；
+回放模式下不访问网络，按请求内容从夹具中取回响应，并可注入可配置的合成延迟，
+用于离线、确定性地运行整个分析流程（性能基准、回归测试）。
+
+夹具目录结构：
+    meta.json         录制时的 LLM 类名 / 模型名
+    llm_calls.jsonl   LLM 调用记录，一行一条
+    tool_calls.jsonl  数据工具调用记录（见 tradingagents.utils.pipeline_benchmark）
+
+请求键由消息类型、内容、工具调用名称与参数、绑定的工具名和模型名计算，
+不包含每次运行都会变化的工具调用 id；时间戳等易变内容可通过 normalizers 统一替换。
+相同请求多次出现时按录制顺序依次回放，超出录制次数后重复最后一条。
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+FIXTURE_MODES = ("off", "record", "replay")
+
+# 默认的易变内容替换规则：日期时间（含秒）不参与请求键计算
+DEFAULT_NORMALIZERS: Tuple[Tuple[str, str], ...] = (
+    (r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d+)?", "<datetime>"),
+)
+
+
+class FixtureMissError(KeyError):
+    """回放时找不到对应的录制记录"""
+
+
+class FixtureStore:
+    """
+    夹具存储（线程安全）
+
+    按 (kind, key) 保存录制记录，kind 为 "llm" 或 "tool"；
+    录制时追加写入 JSONL，回放时一次性加载并按顺序取用。
+    """
+
+    FILES = {"llm": "llm_calls.jsonl", "tool": "tool_calls.jsonl"}
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._cursors: Dict[Tuple[str, str], int] = {}
+        self._loaded = False
+
+    def _path(self, kind: str) -> str:
+        return os.path.join(self.directory, self.FILES[kind])
+
+    def _load(self):
+        if self._loaded:
+            return
+        for kind in self.FILES:
+            path = self._path(kind)
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault((kind, entry["key"]), []).append(entry)
+        self._loaded = True
+
+    def clear(self):
+        """清空夹具（重新录制前调用）"""
+        with self._lock:
+            for kind in self.FILES:
+                if os.path.exists(self._path(kind)):
+                    os.remove(self._path(kind))
+            self._entries.clear()
+            self._cursors.clear()
+            self._loaded = True
+
+    def record(self, kind: str, key: str, payload: Dict[str, Any]):
+        entry = {"key": key, **payload}
+        with self._lock:
+            self._load()
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(kind), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self._entries.setdefault((kind, key), []).append(entry)
+
+    def next(self, kind: str, key: str) -> Dict[str, Any]:
+        """按录制顺序取下一条记录；超出录制次数后重复最后一条"""
+        with self._lock:
+            self._load()
+            entries = self._entries.get((kind, key))
+            if not entries:
+                raise FixtureMissError(f"{kind}:{key}")
+            cursor = self._cursors.get((kind, key), 0)
+            self._cursors[(kind, key)] = cursor + 1
+            return entries[min(cursor, len(entries) - 1)]
+
+    def rewind(self):
+        """重置回放游标，同一夹具可以重复回放"""
+        with self._lock:
+            self._cursors.clear()
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            self._load()
+            return sum(len(v) for (k, _), v in self._entries.items() if k == kind)
+
+    def write_meta(self, meta: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    def read_meta(self) -> Dict[str, Any]:
+        path = os.path.join(self.directory, "meta.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def normalize_text(text: Any, normalizers: Sequence[Tuple[str, str]] = DEFAULT_NORMALIZERS) -> Any:
+    if not isinstance(text, str):
+        return text
+    for pattern, replacement in normalizers:
+        text = re.sub(pattern, replacement, text)
+    return text
+
+
+def fixture_key(parts: Any) -> str:
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def message_signature(message: BaseMessage, normalizers) -> Dict[str, Any]:
+    signature = {"type": message.type, "content": normalize_text(message.content, normalizers)}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        signature["tool_calls"] = [
+            {"name": call.get("name"), "args": normalize_text(json.dumps(call.get("args", {}), ensure_ascii=False, sort_keys=True), normalizers)}
+            for call in tool_calls
+        ]
+    if getattr(message, "name", None):
+        signature["name"] = message.name
+    return signature
+
+
+def _tool_names(tools: Optional[Sequence[Dict[str, Any]]]) -> List[str]:
+    names = []
+    for tool in tools or []:
+        function = tool.get("function", tool) if isinstance(tool, dict) else {}
+        names.append(function.get("name", ""))
+    return sorted(names)
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """
+    录制 / 回放聊天模型
+
+    mode="record"：调用 inner（真实 LLM），并把响应写入 store
+    mode="replay"：从 store 取回响应，等待 latency + latency_scale × 录制耗时 秒后返回
+
+    source_class 记录被包装的 LLM 类名（各分析师按它选择提供商相关的处理路径，见 llm_class_name）；
+    包装类本身的类名不含提供商名称，不会命中按类名重建真实 LLM 客户端的分支。
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, protected_namespaces=())
+
+    store: Any
+    mode: str = "replay"
+    inner: Optional[Any] = None
+    model_name: str = "replay"
+    source_class: str = ""
+    temperature: Optional[float] = None
+    latency: float = 0.0
+    latency_scale: float = 0.0
+    normalizers: Tuple[Tuple[str, str], ...] = DEFAULT_NORMALIZERS
+
+    @property
+    def _llm_type(self) -> str:
+        return f"record-replay-{self.mode}"
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        if tool_choice is not None:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+    def request_key(self, messages: List[BaseMessage], tools: Optional[Sequence[Dict[str, Any]]] = None) -> str:
+        return fixture_key({
+            "model": self.model_name,
+            "tools": _tool_names(tools),
+            "messages": [message_signature(m, self.normalizers) for m in messages],
+        })
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tools = kwargs.get("tools")
+        key = self.request_key(messages, tools)
+
+        if self.mode == "record":
+            runnable = self.inner
+            if tools:
+                bind_kwargs = {"tool_choice": kwargs["tool_choice"]} if kwargs.get("tool_choice") is not None else {}
+                runnable = self.inner.bind_tools(tools, **bind_kwargs)
+            start = time.perf_counter()
+            message = runnable.invoke(messages, stop=stop)
+            elapsed = time.perf_counter() - start
+            self.store.record("llm", key, {
+                "model": self.model_name,
+                "latency_s": round(elapsed, 4),
+                "request_preview": str(messages[-1].content)[:200] if messages else "",
+                "response": message_to_dict(message),
+            })
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        try:
+            entry = self.store.next("llm", key)
+        except FixtureMissError:
+            logger.error(f"❌ [LLM回放] 未找到录制记录: model={self.model_name}, "
+                         f"最后一条消息: {str(messages[-1].content)[:100] if messages else ''}")
+            raise
+        delay = self.latency + self.latency_scale * float(entry.get("latency_s", 0.0))
+        if delay > 0:
+            time.sleep(delay)
+        message = messages_from_dict([entry["response"]])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def llm_class_name(llm: Any) -> str:
+    """LLM 的提供商类名；录制 / 回放包装返回被包装 LLM 的类名"""
+    return getattr(llm, "source_class", "") or llm.__class__.__name__
+
+
+def create_recording_llm(llm: Any, store: FixtureStore, model_name: Optional[str] = None) -> RecordReplayChatModel:
+    """包装真实 LLM，录制其所有调用"""
+    return RecordReplayChatModel(
+        store=store,
+        mode="record",
+        inner=llm,
+        model_name=model_name or getattr(llm, "model_name", None) or getattr(llm, "model", "unknown"),
+        source_class=llm.__class__.__name__,
+        temperature=getattr(llm, "temperature", None),
+    )
+
+
+def create_replay_llm(
+    store: FixtureStore,
+    model_name: str,
+    source_class: str = "",
+    latency: float = 0.0,
+    latency_scale: float = 0.0,
+    temperature: Optional[float] = None,
+) -> RecordReplayChatModel:
+    """创建回放 LLM，不需要 API 密钥和网络"""
+    return RecordReplayChatModel(
+        store=store,
+        mode="replay",
+        model_name=model_name,
+        source_class=source_class,
+        temperature=temperature,
+        latency=latency,
+        latency_scale=latency_scale,
+    )
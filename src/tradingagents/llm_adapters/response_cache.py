@@ -0,0 +1,381 @@
+"""
+LLM 响应缓存
+
+分析链路下游失败后重跑同一股票、同一日期的分析时，信号处理、分析师总结、反思等调用的输入完全相同，
+每次都要重新付费。本模块在适配器层为这类幂等调用提供可选的响应缓存：
+
+- 缓存键：供应商 + 模型 + 规范化消息（类型、内容、工具调用名称与参数）+ 绑定的工具 + 采样参数
+- 只缓存确定性调用：temperature 非 0（或未设置）时自动跳过，TA_LLM_CACHE_FORCE=true 时强制缓存
+- 存储：Redis（可用时）或进程内，均带 TTL 和条目数上限，超出上限按 LRU 淘汰
+- 命中时以 0 成本写入 Token 使用记录（cached=True），便于统计节省的调用
+- 流式调用（stream）同样适用：命中时以单个片段返回缓存内容，未命中时透传并在结束后写入
+
+配置（环境变量）：
+    TA_LLM_CACHE_ENABLED      是否启用，默认 false
+    TA_LLM_CACHE_FORCE        非 0 temperature 也缓存，默认 false
+    TA_LLM_CACHE_TTL          缓存有效期（秒），默认 86400
+    TA_LLM_CACHE_MAX_ENTRIES  条目数上限，默认 2000
+    TA_LLM_CACHE_BACKEND      auto / redis / local，默认 auto
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.messages.tool import tool_call_chunk as create_tool_call_chunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from tradingagents.config.runtime_settings import get_bool, get_int
+from tradingagents.llm_adapters.record_replay import message_signature
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+KEY_PREFIX = "llm_cache:"
+LRU_KEY = "llm_cache:__lru__"
+
+# 影响输出的采样参数：调用参数优先，其次取模型实例上的同名属性
+SAMPLING_PARAMS = ("temperature", "top_p", "max_tokens", "presence_penalty", "frequency_penalty", "seed", "response_format", "tool_choice")
+
+
+def cache_enabled() -> bool:
+    return get_bool("TA_LLM_CACHE_ENABLED", None, False)
+
+
+def _tool_signature(tools: Optional[Sequence[Any]]) -> List[Any]:
+    """工具按名称排序，保留参数定义（参数变化会影响模型输出）"""
+    signature = []
+    for tool in tools or []:
+        if isinstance(tool, dict):
+            function = tool.get("function", tool)
+            signature.append({"name": function.get("name"), "parameters": function.get("parameters")})
+        else:
+            signature.append({"name": getattr(tool, "name", str(tool))})
+    return sorted(signature, key=lambda item: str(item.get("name")))
+
+
+def sampling_params(llm: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    params = {}
+    for name in SAMPLING_PARAMS:
+        value = kwargs.get(name, getattr(llm, name, None))
+        if value is not None:
+            params[name] = value
+    return params
+
+
+def make_llm_cache_key(
+    provider: str,
+    model: str,
+    messages: Sequence[BaseMessage],
+    tools: Optional[Sequence[Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    stop: Optional[Sequence[str]] = None,
+) -> str:
+    payload = {
+        "provider": provider,
+        "model": model,
+        "messages": [message_signature(m, ()) for m in messages],
+        "tools": _tool_signature(tools),
+        "params": params or {},
+        "stop": list(stop or []),
+    }
+    digest = hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{KEY_PREFIX}{provider}:{model}:{digest[:32]}"
+
+
+def _is_cacheable(result: ChatResult) -> bool:
+    """只缓存单条、有内容（或有工具调用）的结果"""
+    if not result or len(result.generations) != 1:
+        return False
+    message = result.generations[0].message
+    return bool(getattr(message, "tool_calls", None)) or bool(str(message.content or "").strip())
+
+
+def _usage_of(payload: Dict[str, Any]) -> Tuple[int, int]:
+    usage = (payload.get("llm_output") or {}).get("token_usage") or {}
+    input_tokens = usage.get("prompt_tokens") or usage.get("input_tokens") or 0
+    output_tokens = usage.get("completion_tokens") or usage.get("output_tokens") or 0
+    if not input_tokens and not output_tokens:
+        metadata = payload["message"].get("data", {}).get("usage_metadata") or {}
+        input_tokens = metadata.get("input_tokens", 0)
+        output_tokens = metadata.get("output_tokens", 0)
+    return int(input_tokens or 0), int(output_tokens or 0)
+
+
+class LLMResponseCache:
+    """LLM 响应缓存（Redis 优先，进程内兜底），TTL + 条目数上限 + LRU 淘汰"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[int] = None, backend: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+
+    # ---- 配置 -------------------------------------------------------------
+
+    def _max_entries(self) -> int:
+        return self.max_entries or get_int("TA_LLM_CACHE_MAX_ENTRIES", None, 2000)
+
+    def _ttl(self) -> int:
+        return self.ttl or get_int("TA_LLM_CACHE_TTL", None, 86400)
+
+    def _redis(self):
+        backend = self.backend or os.getenv("TA_LLM_CACHE_BACKEND", "auto")
+        if backend == "local":
+            return None
+        try:
+            from tradingagents.utils.redis_pool import get_sync_redis
+            return get_sync_redis()
+        except Exception as e:
+            logger.debug(f"LLM缓存获取Redis失败: {e}")
+            return None
+
+    # ---- 存储 -------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        redis = self._redis()
+        if redis is not None:
+            try:
+                from tradingagents.utils.redis_pool import redis_timer
+                with redis_timer("llm_cache_get"):
+                    raw = redis.get(key)
+                    if raw is None:
+                        redis.zrem(LRU_KEY, key)
+                    else:
+                        redis.zadd(LRU_KEY, {key: time.time()})
+                if raw is not None:
+                    return json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+                return None
+            except Exception as e:
+                logger.debug(f"LLM缓存读取Redis失败: {e}")
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._local.pop(key, None)
+                return None
+            self._local.move_to_end(key)
+            return json.loads(entry[1])
+
+    def set(self, key: str, payload: Dict[str, Any]) -> None:
+        raw = json.dumps(payload, ensure_ascii=False, default=str)
+        ttl, max_entries = self._ttl(), self._max_entries()
+        redis = self._redis()
+        if redis is not None:
+            try:
+                from tradingagents.utils.redis_pool import redis_timer
+                with redis_timer("llm_cache_set"):
+                    pipe = redis.pipeline()
+                    pipe.setex(key, ttl, raw)
+                    pipe.zadd(LRU_KEY, {key: time.time()})
+                    pipe.zcard(LRU_KEY)
+                    size = pipe.execute()[-1]
+                    if size > max_entries:
+                        evicted = [k.decode("utf-8") if isinstance(k, bytes) else k
+                                   for k, _ in redis.zpopmin(LRU_KEY, size - max_entries)]
+                        if evicted:
+                            redis.delete(*evicted)
+                            self._count("evictions", len(evicted))
+                self._count("stores")
+                return
+            except Exception as e:
+                logger.debug(f"LLM缓存写入Redis失败，使用进程内缓存: {e}")
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, raw)
+            self._local.move_to_end(key)
+            while len(self._local) > max_entries:
+                self._local.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._stats["stores"] += 1
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    # ---- 统计 -------------------------------------------------------------
+
+    def _count(self, field: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[field] += n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["local_entries"] = len(self._local)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    # ---- 主流程 -----------------------------------------------------------
+
+    def generate(
+        self,
+        llm: Any,
+        provider: str,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        kwargs: Dict[str, Any],
+        generate: Callable[[], ChatResult],
+    ) -> ChatResult:
+        """
+        带缓存的生成：命中时返回缓存结果并记录 0 成本使用，未命中时调用 generate 并写入缓存
+
+        Args:
+            llm: 适配器实例（读取模型名和采样参数）
+            provider: 供应商名称，计入缓存键和使用记录
+            generate: 未命中时执行真实调用
+        """
+        key = self._lookup_key(llm, provider, messages, stop, kwargs)
+        if key is None:
+            return generate()
+
+        payload = self._hit(key, llm, provider, kwargs)
+        if payload is not None:
+            message = messages_from_dict([payload["message"]])[0]
+            llm_output = dict(payload.get("llm_output") or {})
+            llm_output["cache_hit"] = True
+            return ChatResult(
+                generations=[ChatGeneration(message=message, generation_info=payload.get("generation_info"))],
+                llm_output=llm_output,
+            )
+
+        self._count("misses")
+        result = generate()
+        self._store(key, result)
+        return result
+
+    def stream(
+        self,
+        llm: Any,
+        provider: str,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        kwargs: Dict[str, Any],
+        stream: Callable[[], Iterator[ChatGenerationChunk]],
+    ) -> Iterator[ChatGenerationChunk]:
+        """带缓存的流式生成：命中时一次性返回缓存内容，未命中时透传并在结束后写入缓存"""
+        key = self._lookup_key(llm, provider, messages, stop, kwargs)
+        if key is None:
+            yield from stream()
+            return
+
+        payload = self._hit(key, llm, provider, kwargs)
+        if payload is not None:
+            message = messages_from_dict([payload["message"]])[0]
+            yield ChatGenerationChunk(message=_to_chunk(message), generation_info=payload.get("generation_info"))
+            return
+
+        self._count("misses")
+        merged: Optional[ChatGenerationChunk] = None
+        for chunk in stream():
+            merged = chunk if merged is None else merged + chunk
+            yield chunk
+        if merged is not None:
+            message = message_chunk_to_message(merged.message)
+            self._store(key, ChatResult(generations=[ChatGeneration(message=message, generation_info=merged.generation_info)]))
+
+    def _lookup_key(self, llm: Any, provider: str, messages: List[BaseMessage], stop, kwargs: Dict[str, Any]) -> Optional[str]:
+        """返回缓存键；未启用或非确定性调用返回 None"""
+        if not cache_enabled():
+            return None
+
+        params = sampling_params(llm, kwargs)
+        temperature = params.get("temperature")
+        if (temperature is None or float(temperature) > 0) and not get_bool("TA_LLM_CACHE_FORCE", None, False):
+            self._count("bypassed")
+            return None
+
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", "unknown")
+        try:
+            return make_llm_cache_key(provider, model, messages, kwargs.get("tools"), params, stop)
+        except Exception as e:
+            logger.debug(f"LLM缓存键计算失败，直接调用: {e}")
+            return None
+
+    def _hit(self, key: str, llm: Any, provider: str, kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        payload = self.get(key)
+        if payload is None:
+            return None
+        self._count("hits")
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", "unknown")
+        input_tokens, output_tokens = _usage_of(payload)
+        logger.info(f"⚡ [LLM缓存] 命中: {provider}/{model}, 节省 {input_tokens}+{output_tokens} tokens")
+        _track_cached_usage(provider, model, input_tokens, output_tokens, kwargs)
+        return payload
+
+    def _store(self, key: str, result: ChatResult) -> None:
+        if _is_cacheable(result):
+            generation = result.generations[0]
+            self.set(key, {
+                "message": message_to_dict(generation.message),
+                "generation_info": generation.generation_info,
+                "llm_output": result.llm_output,
+            })
+
+
+def _to_chunk(message: AIMessage) -> AIMessageChunk:
+    """缓存的完整消息转换为单个流式片段"""
+    return AIMessageChunk(
+        content=message.content,
+        additional_kwargs=message.additional_kwargs,
+        response_metadata=message.response_metadata,
+        tool_call_chunks=[
+            create_tool_call_chunk(
+                name=call.get("name"),
+                args=json.dumps(call.get("args", {}), ensure_ascii=False),
+                id=call.get("id"),
+                index=index,
+            )
+            for index, call in enumerate(getattr(message, "tool_calls", None) or [])
+        ],
+        usage_metadata=getattr(message, "usage_metadata", None),
+        id=message.id,
+    )
+
+
+def _track_cached_usage(provider: str, model: str, input_tokens: int, output_tokens: int, kwargs: Dict[str, Any]) -> None:
+    """缓存命中以 0 成本写入使用记录"""
+    try:
+        from tradingagents.config.config_manager import token_tracker
+        token_tracker.track_usage(
+            provider=provider,
+            model_name=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            session_id=kwargs.get("session_id"),
+            analysis_type=kwargs.get("analysis_type") or "stock_analysis",
+            cached=True,
+        )
+    except Exception as e:
+        logger.debug(f"LLM缓存命中记录失败: {e}")
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """获取全局 LLM 响应缓存"""
+    global _llm_cache
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -0,0 +1,40 @@
+"""
+适配器流式输出辅助
+
+图回调中挂载流式处理器时，LangChain 会调用适配器的 _stream 而不是 _generate，
+各适配器在 _generate 中的 token 统计不会执行。track_stream 透传流式片段，
+结束后按最后一个片段的 usage_metadata（没有时按文本估算）回调 token 用量。
+"""
+
+from typing import Callable, Iterator, List
+
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.token_budget import estimate_tokens
+
+logger = get_logger('agents')
+
+
+def track_stream(
+    chunks: Iterator[ChatGenerationChunk],
+    messages: List[BaseMessage],
+    on_usage: Callable[[int, int], None],
+) -> Iterator[ChatGenerationChunk]:
+    usage = None
+    output_chars: List[str] = []
+    for chunk in chunks:
+        usage = getattr(chunk.message, "usage_metadata", None) or usage
+        output_chars.append(chunk.text or "")
+        yield chunk
+
+    if usage:
+        input_tokens, output_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    else:
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens("".join(output_chars))
+    try:
+        on_usage(int(input_tokens or 0), int(output_tokens or 0))
+    except Exception as e:
+        logger.warning(f"⚠️ 流式调用Token统计失败: {e}")
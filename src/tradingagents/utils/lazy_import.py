@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+包级延迟导出
+
+数据源包的 __init__ 过去会在导入时加载全部提供器（akshare、baostock、yfinance、pandas、openai 等），
+导入其中任意一个子模块都要付出数秒的启动开销。lazy_exports 基于 PEP 562 的模块 __getattr__，
+在首次访问某个导出名时才导入对应子模块，并缓存到包的命名空间中：
+
+    __getattr__, __dir__ = lazy_exports(__name__, {
+        "AKShareProvider": [".akshare"],                       # 同名属性
+        "BaoStockProvider": [(".baostock", "BaostockProvider")],  # 重命名
+    }, available={"AKSHARE_AVAILABLE": "AKShareProvider"})
+
+每个导出名可以给出多个候选路径（新路径在前，旧路径兜底），全部导入失败时得到 None，
+与原先 try/except ImportError 的回退行为一致（optional=False 时直接抛出）；available 中的标志位在首次访问时按对应导出是否可用计算。
+"""
+
+import importlib
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+Candidate = Union[str, Tuple[str, str]]
+
+
+def _resolve(package: str, name: str, candidates: Sequence[Candidate], optional: bool = True):
+    for candidate in candidates:
+        module_name, attr = (candidate, name) if isinstance(candidate, str) else candidate
+        if not optional:
+            # 必需的导出：导入失败直接抛出，与原先的直接导入一致
+            return getattr(importlib.import_module(module_name, package), attr)
+        try:
+            value = getattr(importlib.import_module(module_name, package), attr)
+        except (ImportError, AttributeError):
+            continue
+        # 子包的延迟导出不可用时返回 None，继续尝试下一个候选
+        if value is not None:
+            return value
+    return None
+
+
+def lazy_exports(
+    package: str,
+    exports: Dict[str, Sequence[Candidate]],
+    available: Optional[Dict[str, Union[str, Iterable[str]]]] = None,
+    optional: bool = True,
+) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """
+    返回包模块使用的 (__getattr__, __dir__)
+
+    Args:
+        optional: 为 False 时导入失败直接抛出 ImportError（原先直接导入、没有回退的包使用）
+    """
+    available = available or {}
+
+    def __getattr__(name: str):
+        module = sys.modules[package]
+        if name in exports:
+            value = _resolve(package, name, exports[name], optional)
+        elif name in available:
+            required = available[name]
+            names = [required] if isinstance(required, str) else list(required)
+            value = all(getattr(module, n) is not None for n in names)
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        setattr(module, name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports) | set(available))
+
+    return __getattr__, __dir__
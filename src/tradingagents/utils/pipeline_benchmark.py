@@ -0,0 +1,361 @@
+"""
+分析流程端到端性能基准
+
+在 LLM 录制/回放（tradingagents.llm_adapters.record_replay）的基础上：
+- stub_data_providers：录制或回放数据工具（Toolkit 工具及分析师直接调用的数据接口）的返回值，
+  回放时完全不访问网络和数据库
+- PipelineProfiler：LangChain 回调，按图节点统计节点耗时、LLM 耗时和工具耗时
+- profile_graph_run：运行编译后的图，同时统计每个节点状态更新的序列化开销
+- run_pipeline_benchmark：离线运行完整的 TradingAgentsGraph 并生成报告
+- compare_reports：与基线报告比较，找出耗时回退的节点
+
+典型用法（先联网录制一次，之后离线回放）：
+    python scripts/benchmark_pipeline.py --record --ticker AAPL --date 2024-05-10
+    python scripts/benchmark_pipeline.py --ticker AAPL --date 2024-05-10 --baseline baseline.json
+"""
+
+import importlib
+import json
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tools import BaseTool
+
+from tradingagents.llm_adapters.record_replay import (
+    FixtureMissError,
+    FixtureStore,
+    fixture_key,
+    normalize_text,
+)
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("default")
+
+# 分析师节点中直接调用（不经过工具）的数据接口，回放时一并替换
+DATA_FUNCTIONS: Tuple[Tuple[str, str], ...] = (
+    ("tradingagents.dataflows.interface", "get_china_stock_info_unified"),
+    ("tradingagents.dataflows.data_source_manager", "get_china_stock_info_unified"),
+    ("tradingagents.dataflows.providers.hk.improved_hk", "get_hk_company_name_improved"),
+    ("tradingagents.dataflows.tools.sentiment_tools", "get_combined_sentiment"),
+)
+
+
+def tool_fixture_key(name: str, args: Sequence[Any], kwargs: Dict[str, Any]) -> str:
+    return fixture_key({"tool": name, "args": normalize_text(json.dumps([list(args), kwargs], ensure_ascii=False, sort_keys=True, default=str))})
+
+
+def _stub(name: str, original, store: FixtureStore, mode: str, latency: float, latency_scale: float):
+    def recorded(*args, **kwargs):
+        key = tool_fixture_key(name, args, kwargs)
+        if mode == "record":
+            start = time.perf_counter()
+            result = original(*args, **kwargs)
+            store.record("tool", key, {"tool": name, "latency_s": round(time.perf_counter() - start, 4), "result": result})
+            return result
+        try:
+            entry = store.next("tool", key)
+        except FixtureMissError:
+            logger.error(f"❌ [数据回放] 未找到录制记录: {name} args={args} kwargs={kwargs}")
+            raise
+        delay = latency + latency_scale * float(entry.get("latency_s", 0.0))
+        if delay > 0:
+            time.sleep(delay)
+        return entry["result"]
+
+    return recorded
+
+
+@contextmanager
+def stub_data_providers(
+    store: FixtureStore,
+    mode: str = "replay",
+    latency: float = 0.0,
+    latency_scale: float = 0.0,
+) -> Iterator[List[str]]:
+    """
+    录制 / 回放数据工具的返回值，退出时恢复原实现
+
+    Toolkit 的工具是类级别的 StructuredTool，替换其 func 即对所有实例生效；
+    DATA_FUNCTIONS 中的模块函数在分析师节点内按需 import，替换模块属性即可。
+    """
+    from tradingagents.agents.utils.agent_utils import Toolkit
+
+    patched: List[Tuple[Any, str, Any]] = []
+    for attr in list(vars(Toolkit)):
+        tool = getattr(Toolkit, attr)
+        if isinstance(tool, BaseTool) and getattr(tool, "func", None) is not None:
+            patched.append((tool, "func", tool.func))
+            tool.func = _stub(tool.name, tool.func, store, mode, latency, latency_scale)
+
+    for module_name, attr in DATA_FUNCTIONS:
+        try:
+            module = importlib.import_module(module_name)
+        except Exception as e:
+            logger.debug(f"⚠️ [数据回放] 跳过 {module_name}: {e}")
+            continue
+        original = getattr(module, attr, None)
+        if original is not None:
+            patched.append((module, attr, original))
+            setattr(module, attr, _stub(f"{module_name}.{attr}", original, store, mode, latency, latency_scale))
+
+    try:
+        yield [f"{getattr(target, 'name', getattr(target, '__name__', ''))}.{attr}" for target, attr, _ in patched]
+    finally:
+        for target, attr, original in reversed(patched):
+            setattr(target, attr, original)
+
+
+class PipelineProfiler(BaseCallbackHandler):
+    """按 LangGraph 节点统计节点耗时、LLM 耗时和工具耗时（毫秒）"""
+
+    raise_error = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._node_runs: Dict[Any, Tuple[str, float]] = {}
+        self._llm_runs: Dict[Any, Tuple[str, float]] = {}
+        self._tool_runs: Dict[Any, Tuple[str, float]] = {}
+        self.nodes: Dict[str, Dict[str, float]] = {}
+
+    def _node(self, name: str) -> Dict[str, float]:
+        return self.nodes.setdefault(name, {
+            "calls": 0, "wall_ms": 0.0, "llm_ms": 0.0, "llm_calls": 0,
+            "tool_ms": 0.0, "tool_calls": 0, "serialization_ms": 0.0,
+        })
+
+    def add(self, node: str, metric: str, value: float):
+        with self._lock:
+            self._node(node)[metric] += value
+
+    def _finish(self, runs: Dict[Any, Tuple[str, float]], run_id: Any, metric: str, counter: Optional[str]):
+        with self._lock:
+            started = runs.pop(run_id, None)
+            if started is None:
+                return
+            node, start = started
+            stats = self._node(node)
+            stats[metric] += (time.perf_counter() - start) * 1000
+            if counter:
+                stats[counter] += 1
+
+    # 节点
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            with self._lock:
+                self._node_runs[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(self._node_runs, run_id, "wall_ms", "calls")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(self._node_runs, run_id, "wall_ms", "calls")
+
+    # LLM（录制模式下包装类内部的真实调用是嵌套运行，不重复计时）
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node", "(outside graph)")
+        with self._lock:
+            if parent_run_id not in self._llm_runs:
+                self._llm_runs[run_id] = (node, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(self._llm_runs, run_id, "llm_ms", "llm_calls")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(self._llm_runs, run_id, "llm_ms", "llm_calls")
+
+    # 工具
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node", "(outside graph)")
+        with self._lock:
+            self._tool_runs[run_id] = (node, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(self._tool_runs, run_id, "tool_ms", "tool_calls")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(self._tool_runs, run_id, "tool_ms", "tool_calls")
+
+
+def _state_serializer():
+    """与 LangGraph 检查点相同的序列化器；不可用时退回 JSON"""
+    try:
+        from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+        return JsonPlusSerializer().dumps_typed
+    except Exception:
+        return lambda value: json.dumps(value, ensure_ascii=False, default=str)
+
+
+def profile_graph_run(graph, initial_state: Dict[str, Any], recursion_limit: int = 100) -> Tuple[Dict[str, Any], PipelineProfiler]:
+    """运行编译后的图，返回最终状态和按节点统计的耗时"""
+    profiler = PipelineProfiler()
+    serialize = _state_serializer()
+    final_state = None
+    config = {"recursion_limit": recursion_limit, "callbacks": [profiler]}
+    for mode, chunk in graph.stream(initial_state, stream_mode=["updates", "values"], config=config):
+        if mode == "values":
+            final_state = chunk
+            continue
+        for node, update in (chunk or {}).items():
+            start = time.perf_counter()
+            serialize(update)
+            profiler.add(node, "serialization_ms", (time.perf_counter() - start) * 1000)
+    return final_state, profiler
+
+
+def _summarize_runs(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """多次运行取各指标的中位数"""
+    node_names: List[str] = []
+    for run in runs:
+        node_names.extend(n for n in run["nodes"] if n not in node_names)
+    nodes = {}
+    for name in node_names:
+        samples = [run["nodes"][name] for run in runs if name in run["nodes"]]
+        nodes[name] = {
+            metric: round(statistics.median(s[metric] for s in samples), 3)
+            for metric in samples[0]
+        }
+        nodes[name]["self_ms"] = round(max(0.0, nodes[name]["wall_ms"] - nodes[name]["llm_ms"] - nodes[name]["tool_ms"]), 3)
+    return {
+        "total_ms": round(statistics.median(run["total_ms"] for run in runs), 3),
+        "total_ms_samples": [round(run["total_ms"], 3) for run in runs],
+        "signal_ms": round(statistics.median(run["signal_ms"] for run in runs), 3),
+        "state_log_ms": round(statistics.median(run["state_log_ms"] for run in runs), 3),
+        "nodes": nodes,
+    }
+
+
+def run_pipeline_benchmark(
+    ticker: str,
+    trade_date: str,
+    fixture_dir: str,
+    mode: str = "replay",
+    iterations: int = 1,
+    selected_analysts: Sequence[str] = ("market", "social", "news", "fundamentals"),
+    config: Optional[Dict[str, Any]] = None,
+    latency: float = 0.0,
+    latency_scale: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    运行完整的 TradingAgentsGraph 并统计性能
+
+    mode="record" 时联网运行一次并录制 LLM 与数据调用（iterations 固定为 1）；
+    mode="replay" 时离线回放，可多次运行取中位数。
+    """
+    from tradingagents.default_config import DEFAULT_CONFIG
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    run_config = {**DEFAULT_CONFIG, "memory_enabled": False, **(config or {})}
+    run_config.update({
+        "llm_fixture_mode": mode,
+        "llm_fixture_dir": fixture_dir,
+        "llm_replay_latency": latency,
+        "llm_replay_latency_scale": latency_scale,
+    })
+    store = FixtureStore(fixture_dir)
+    if mode == "record":
+        store.clear()
+        iterations = 1
+
+    build_start = time.perf_counter()
+    ta = TradingAgentsGraph(list(selected_analysts), debug=False, config=run_config)
+    build_ms = (time.perf_counter() - build_start) * 1000
+    # 回放 LLM 与数据桩共用同一个夹具目录，但使用各自的 FixtureStore 实例
+    data_store = FixtureStore(fixture_dir)
+
+    runs = []
+    decision = None
+    with stub_data_providers(data_store, mode, latency=latency, latency_scale=latency_scale):
+        for i in range(max(1, iterations)):
+            data_store.rewind()
+            llm_store = getattr(ta.quick_thinking_llm, "store", None)
+            if llm_store is not None:
+                llm_store.rewind()
+            ta.reset_run_state()
+            ta.ticker = ticker
+
+            start = time.perf_counter()
+            state = ta.propagator.create_initial_state(ticker, trade_date)
+            final_state, profiler = profile_graph_run(ta.graph, state, ta.propagator.max_recur_limit)
+            graph_ms = (time.perf_counter() - start) * 1000
+
+            log_start = time.perf_counter()
+            ta.curr_state = final_state
+            ta._log_state(trade_date, final_state)
+            state_log_ms = (time.perf_counter() - log_start) * 1000
+
+            signal_start = time.perf_counter()
+            decision = ta.process_signal(final_state["final_trade_decision"], ticker)
+            signal_ms = (time.perf_counter() - signal_start) * 1000
+
+            runs.append({
+                "total_ms": graph_ms + state_log_ms + signal_ms,
+                "signal_ms": signal_ms,
+                "state_log_ms": state_log_ms,
+                "nodes": profiler.nodes,
+            })
+            logger.info(f"⏱️ [性能基准] 第 {i + 1}/{iterations} 次运行完成，用时 {runs[-1]['total_ms']:.1f}ms")
+
+    report = {
+        "ticker": ticker,
+        "trade_date": trade_date,
+        "mode": mode,
+        "iterations": len(runs),
+        "analysts": list(selected_analysts),
+        "latency": latency,
+        "latency_scale": latency_scale,
+        "build_ms": round(build_ms, 3),
+        "llm_fixtures": FixtureStore(fixture_dir).count("llm"),
+        "tool_fixtures": FixtureStore(fixture_dir).count("tool"),
+        "decision": decision,
+        **_summarize_runs(runs),
+    }
+    return report
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.2,
+    min_delta_ms: float = 5.0,
+) -> List[Dict[str, Any]]:
+    """找出相对基线耗时增长超过 threshold（且绝对增长超过 min_delta_ms）的指标"""
+    regressions = []
+
+    def check(name: str, metric: str, before: float, after: float):
+        if after - before > min_delta_ms and after > before * (1 + threshold):
+            regressions.append({
+                "node": name,
+                "metric": metric,
+                "baseline_ms": before,
+                "current_ms": after,
+                "change": round(after / before - 1, 3) if before else None,
+            })
+
+    check("(pipeline)", "total_ms", baseline.get("total_ms", 0.0), current.get("total_ms", 0.0))
+    for name, stats in current.get("nodes", {}).items():
+        base = baseline.get("nodes", {}).get(name)
+        if not base:
+            continue
+        for metric in ("wall_ms", "self_ms", "serialization_ms"):
+            check(name, metric, base.get(metric, 0.0), stats.get(metric, 0.0))
+    return regressions
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"📊 {report['ticker']} @ {report['trade_date']}  mode={report['mode']}  iterations={report['iterations']}",
+        f"   总耗时 {report['total_ms']:.1f}ms  (构建图 {report['build_ms']:.1f}ms, "
+        f"状态日志 {report['state_log_ms']:.1f}ms, 信号处理 {report['signal_ms']:.1f}ms)",
+        f"   {'节点':<28}{'次数':>6}{'总耗时':>12}{'LLM':>12}{'工具':>12}{'自身':>12}{'序列化':>10}",
+    ]
+    for name, stats in sorted(report["nodes"].items(), key=lambda item: -item[1]["wall_ms"]):
+        lines.append(
+            f"   {name:<28}{int(stats['calls']):>6}{stats['wall_ms']:>12.1f}{stats['llm_ms']:>12.1f}"
+            f"{stats['tool_ms']:>12.1f}{stats['self_ms']:>12.1f}{stats['serialization_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+进程级 Redis 连接池（同步）与操作耗时统计
+
+进度跟踪器（API 与 Web 两套）原先在每个任务、每次查询时各自创建 redis.Redis，
+每个客户端都会新建连接池和 TCP 连接。本模块提供：
+
+- get_sync_redis：按 REDIS_* 环境变量构建的进程级共享客户端（单一连接池，线程安全）
+  连接失败时返回 None，并在冷却时间内不再重试，调用方退回文件存储
+- redis_timer / get_redis_op_stats：按操作名记录 Redis 调用次数与耗时
+- pool_stats：读取连接池的已创建/使用中/空闲连接数（同步与 asyncio 连接池通用）
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+# 连接失败后的重试冷却时间（秒）
+RETRY_COOLDOWN_SECONDS = 30
+
+_pool = None
+_client = None
+_failed_at: Optional[float] = None
+_lock = threading.Lock()
+
+
+def _redis_enabled() -> bool:
+    return os.getenv('REDIS_ENABLED', 'false').lower() == 'true'
+
+
+def get_sync_redis():
+    """获取进程级共享的同步 Redis 客户端（未启用或不可用时返回 None）"""
+    global _pool, _client, _failed_at
+    if not _redis_enabled():
+        return None
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is not None:
+            return _client
+        if _failed_at is not None and time.monotonic() - _failed_at < RETRY_COOLDOWN_SECONDS:
+            return None
+        try:
+            import redis
+
+            pool = redis.ConnectionPool(
+                host=os.getenv('REDIS_HOST', 'localhost'),
+                port=int(os.getenv('REDIS_PORT', 6379)),
+                password=os.getenv('REDIS_PASSWORD') or None,
+                db=int(os.getenv('REDIS_DB', 0)),
+                max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', 20)),
+                decode_responses=True,
+                socket_keepalive=True,
+                health_check_interval=30,
+            )
+            client = redis.Redis(connection_pool=pool)
+            with redis_timer("ping"):
+                client.ping()
+            _pool, _client, _failed_at = pool, client, None
+            logger.info(
+                f"✅ [Redis连接池] 同步连接池已建立: {os.getenv('REDIS_HOST', 'localhost')}:"
+                f"{os.getenv('REDIS_PORT', 6379)} (max_connections={pool.max_connections})"
+            )
+        except Exception as e:
+            _failed_at = time.monotonic()
+            logger.warning(f"⚠️ [Redis连接池] 连接失败，{RETRY_COOLDOWN_SECONDS}s 内不再重试: {e}")
+            return None
+    return _client
+
+
+def reset_sync_redis() -> None:
+    """断开并丢弃共享连接池（测试或配置变更后使用）"""
+    global _pool, _client, _failed_at
+    with _lock:
+        if _pool is not None:
+            try:
+                _pool.disconnect()
+            except Exception:
+                pass
+        _pool, _client, _failed_at = None, None, None
+
+
+# ---- 统计 -----------------------------------------------------------------
+
+class RedisOpStats:
+    """按操作名统计 Redis 调用次数、错误数与耗时（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops: Dict[str, Dict[str, float]] = {}
+
+    def record(self, op: str, elapsed_ms: float, error: bool = False) -> None:
+        with self._lock:
+            entry = self._ops.setdefault(op, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            if error:
+                entry["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                op: {
+                    "count": int(e["count"]),
+                    "errors": int(e["errors"]),
+                    "avg_ms": round(e["total_ms"] / e["count"], 3) if e["count"] else 0.0,
+                    "max_ms": round(e["max_ms"], 3),
+                }
+                for op, e in self._ops.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+
+
+_op_stats = RedisOpStats()
+
+
+def get_redis_op_stats() -> RedisOpStats:
+    return _op_stats
+
+
+@contextmanager
+def redis_timer(op: str):
+    """记录一次 Redis 操作（或一个 pipeline）的耗时"""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        _op_stats.record(op, (time.perf_counter() - start) * 1000, error)
+
+
+def pool_stats(pool) -> Optional[Dict[str, Any]]:
+    """连接池的连接数统计（同步与 asyncio 连接池结构相同）"""
+    if pool is None:
+        return None
+    available = len(getattr(pool, "_available_connections", []) or [])
+    in_use = len(getattr(pool, "_in_use_connections", []) or [])
+    return {
+        "max_connections": getattr(pool, "max_connections", None),
+        "created_connections": getattr(pool, "_created_connections", available + in_use),
+        "in_use_connections": in_use,
+        "available_connections": available,
+    }
+
+
+def get_sync_pool_stats() -> Optional[Dict[str, Any]]:
+    return pool_stats(_pool)
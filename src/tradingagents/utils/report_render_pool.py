@@ -0,0 +1,385 @@
+"""
+报告导出渲染池
+
+Word / PDF 导出需要调用 pandoc、wkhtmltopdf 等外部程序，单次耗时从数百毫秒到十几秒不等。
+过去每个导出请求都在请求线程中同步渲染，同一份报告反复下载也要重新渲染。本模块提供：
+
+- 进程池渲染：渲染函数在独立进程中执行，不阻塞 API 事件循环或 Streamlit 脚本线程
+- 结果缓存：按 渲染函数 + 参数 + 内容 的 sha256 缓存到磁盘，相同内容的重复导出直接返回；
+  同一内容正在渲染时，后到的请求等待同一个任务
+- 耗时统计：按格式记录渲染次数、缓存命中和耗时
+- ZipStreamWriter：把多份导出结果逐个写入 zip 并按块输出，用于批量导出
+
+渲染函数必须是模块级函数（可被子进程导入），这里提供 render_pandoc 和 render_pdfkit。
+app 与 web 的 ReportExporter 共用该渲染池；本模块不依赖 app 配置，默认按环境变量创建，
+后端通过 app.utils.report_render_pool 以 app 配置创建同一个单例。
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+from tradingagents.config.runtime_settings import get_float, get_int
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+# 已压缩的格式写入 zip 时不再压缩
+_STORED_EXTENSIONS = (".docx", ".pdf", ".zip")
+# 写入中的临时缓存文件前缀
+_TMP_PREFIX = ".tmp-"
+
+
+# ---------------------------------------------------------------------- 渲染函数（在子进程中执行）
+
+def _strip_text_direction(path: str) -> None:
+    """移除 Word 文档段落中的竖排/双向文本设置"""
+    try:
+        from docx import Document
+    except ImportError:
+        return
+    doc = Document(path)
+    paragraphs = list(doc.paragraphs)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                paragraphs.extend(cell.paragraphs)
+    for paragraph in paragraphs:
+        if paragraph._element.pPr is not None:
+            for child in list(paragraph._element.pPr):
+                if 'textDirection' in child.tag or 'bidi' in child.tag:
+                    paragraph._element.pPr.remove(child)
+    doc.save(path)
+
+
+def render_pandoc(content: str, to: str, extra_args: Sequence[str] = (),
+                  engines: Sequence[Optional[str]] = (None,), fix_text_direction: bool = False) -> bytes:
+    """
+    使用 pandoc 将 Markdown 转为 docx / pdf
+
+    Args:
+        engines: 依次尝试的 PDF 引擎（None 表示 pandoc 默认引擎），全部失败时抛出最后的错误
+        fix_text_direction: docx 生成后修正文本方向
+    """
+    import pypandoc
+
+    last_error: Optional[Exception] = None
+    for engine in engines:
+        fd, output_file = tempfile.mkstemp(suffix=f".{to}")
+        os.close(fd)
+        try:
+            args = list(extra_args) + ([f"--pdf-engine={engine}"] if engine else [])
+            pypandoc.convert_text(content, to, format='markdown', outputfile=output_file, extra_args=args)
+            if fix_text_direction:
+                try:
+                    _strip_text_direction(output_file)
+                except Exception as e:
+                    logger.warning(f"⚠️ Word 文档文本方向修复失败: {e}")
+            data = Path(output_file).read_bytes()
+            if not data:
+                raise RuntimeError(f"{to} 文件生成失败或为空")
+            return data
+        except Exception as e:
+            last_error = e
+            if len(engines) > 1:
+                logger.warning(f"⚠️ PDF 引擎 {engine or '默认'} 失败: {e}")
+        finally:
+            if os.path.exists(output_file):
+                os.unlink(output_file)
+    raise last_error
+
+
+def render_pdfkit(html: str, options: Dict[str, Any]) -> bytes:
+    """使用 pdfkit + wkhtmltopdf 将 HTML 转为 PDF"""
+    import pdfkit
+
+    return pdfkit.from_string(html, False, options=options)
+
+
+# ---------------------------------------------------------------------- 渲染池
+
+class ReportRenderPool:
+    """带磁盘缓存的报告渲染进程池"""
+
+    def __init__(self, max_workers: int = 2, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = 256 * 1024 * 1024, timeout: float = 120.0):
+        # max_workers 为 0 时在调用线程中渲染（调试或受限环境）
+        self.max_workers = max_workers
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_max_bytes = cache_max_bytes
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.RLock()
+        self._inflight: Dict[str, Future] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._cache_bytes: Optional[int] = None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------ 提交
+
+    def submit(self, fmt: str, func: Callable[..., bytes], *args: Any, cache_key: Optional[str] = None) -> Future:
+        """
+        提交渲染任务，返回 Future；命中缓存时返回已完成的 Future
+
+        Args:
+            cache_key: 与格式一起代替参数计算缓存键，参数中含有生成时间等易变内容时使用
+        """
+        key = self._key(func, args if cache_key is None else (fmt, cache_key))
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._record(fmt, hit=True)
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+
+        with self._lock:
+            if key in self._inflight:
+                self._record(fmt, hit=True)
+                return self._inflight[key]
+            start = time.perf_counter()
+            future = self._start(func, args)
+            self._inflight[key] = future
+        future.add_done_callback(lambda f: self._finish(key, fmt, start, f))
+        return future
+
+    def render(self, fmt: str, func: Callable[..., bytes], *args: Any, cache_key: Optional[str] = None) -> bytes:
+        """同步渲染（等待结果）"""
+        return self.submit(fmt, func, *args, cache_key=cache_key).result(timeout=self.timeout)
+
+    async def render_async(self, fmt: str, func: Callable[..., bytes], *args: Any,
+                           cache_key: Optional[str] = None) -> bytes:
+        """
+        异步渲染，等待期间不占用事件循环
+
+        渲染 Future 由相同内容的请求共享，超时或客户端断开只取消本次等待（shield），不取消渲染本身。
+        """
+        future = asyncio.wrap_future(self.submit(fmt, func, *args, cache_key=cache_key))
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+
+    def _start(self, func: Callable[..., bytes], args: tuple) -> Future:
+        if self.max_workers <= 0:
+            future: Future = Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        for attempt in range(2):
+            if self._executor is None:
+                # spawn：不复制父进程中的事件循环、数据库连接和线程
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            try:
+                return self._executor.submit(func, *args)
+            except BrokenProcessPool:
+                logger.warning("⚠️ 导出渲染进程池已损坏，重新创建")
+                self._executor = None
+        raise RuntimeError("导出渲染进程池不可用")
+
+    def _finish(self, key: str, fmt: str, start: float, future: Future) -> None:
+        seconds = time.perf_counter() - start
+        if future.cancelled() or future.exception() is not None:
+            self._record(fmt, error=True)
+        else:
+            data = future.result()
+            self._record(fmt, seconds=seconds)
+            logger.info(f"⏱️ 导出渲染 {fmt}: {seconds:.2f}s，{len(data)} 字节")
+            # 先写缓存再移出进行中列表，避免间隙中的请求重复渲染
+            self._cache_put(key, data)
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    # ------------------------------------------------------------------ 缓存
+
+    @staticmethod
+    def _key(func: Callable[..., bytes], args: tuple) -> str:
+        payload = json.dumps([f"{func.__module__}.{func.__qualname__}", args], ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        path = self.cache_dir / key
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # 按访问时间淘汰
+            return data
+        except OSError:
+            return None
+
+    def _cache_put(self, key: str, data: bytes) -> None:
+        if not self.cache_dir or len(data) > self.cache_max_bytes:
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=_TMP_PREFIX)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.cache_dir / key)
+            with self._lock:
+                if self._cache_bytes is None:
+                    self._cache_bytes = sum(p.stat().st_size for p in self._cache_files())
+                else:
+                    self._cache_bytes += len(data)
+                if self._cache_bytes > self.cache_max_bytes:
+                    self._evict()
+        except OSError as e:
+            logger.warning(f"⚠️ 写入导出缓存失败: {e}")
+
+    def _cache_files(self) -> Iterator[Path]:
+        """已写入完成的缓存文件（其他线程或进程正在写入的临时文件不计入、不淘汰）"""
+        return (p for p in self.cache_dir.iterdir() if p.is_file() and not p.name.startswith(_TMP_PREFIX))
+
+    def _evict(self) -> None:
+        """删除最久未访问的缓存，直到总大小降到上限的 80%"""
+        files = sorted(self._cache_files(), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.cache_max_bytes * 0.8:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            total -= size
+        self._cache_bytes = total
+
+    # ------------------------------------------------------------------ 统计
+
+    def _record(self, fmt: str, seconds: Optional[float] = None, hit: bool = False, error: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(fmt, {
+                "renders": 0, "cache_hits": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+            })
+            if hit:
+                stats["cache_hits"] += 1
+            elif error:
+                stats["errors"] += 1
+            else:
+                stats["renders"] += 1
+                stats["total_seconds"] += seconds
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+                stats["last_seconds"] = seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """按格式返回渲染次数、缓存命中和耗时"""
+        with self._lock:
+            formats = {}
+            for fmt, stats in self._stats.items():
+                renders = stats["renders"]
+                formats[fmt] = {
+                    **{k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()},
+                    "avg_seconds": round(stats["total_seconds"] / renders, 4) if renders else None,
+                }
+            return {
+                "workers": self.max_workers,
+                "inflight": len(self._inflight),
+                "cache_dir": str(self.cache_dir) if self.cache_dir else None,
+                "cache_bytes": self._cache_bytes,
+                "formats": formats,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class ZipStreamWriter:
+    """逐个写入 zip 条目，每次返回新产生的字节，用于流式响应"""
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        # 非可定位流：zipfile 使用数据描述符，不需要回写本地文件头
+        self._zip = zipfile.ZipFile(_UnseekableWriter(self._buffer), "w", compression=zipfile.ZIP_DEFLATED)
+        self._names: set = set()
+
+    def add(self, name: str, data: bytes) -> bytes:
+        name = self._unique(name)
+        compress = zipfile.ZIP_STORED if name.lower().endswith(_STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+        self._zip.writestr(name, data, compress_type=compress)
+        return self._drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._drain()
+
+    def _unique(self, name: str) -> str:
+        candidate, index = name, 1
+        stem, dot, ext = name.rpartition(".")
+        while candidate in self._names:
+            candidate = f"{stem}_{index}.{ext}" if dot else f"{name}_{index}"
+            index += 1
+        self._names.add(candidate)
+        return candidate
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class _UnseekableWriter(io.RawIOBase):
+    def __init__(self, target: io.BytesIO):
+        self._target = target
+        self._written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._target.write(data)
+        self._written += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self) -> None:
+        pass
+
+
+_render_pool: Optional[ReportRenderPool] = None
+_render_pool_lock = threading.Lock()
+
+
+def _pool_from_env() -> ReportRenderPool:
+    return ReportRenderPool(
+        max_workers=get_int("REPORT_EXPORT_WORKERS", None, 2),
+        cache_dir=os.getenv("REPORT_EXPORT_CACHE_DIR", "./data/export_cache") or None,
+        cache_max_bytes=get_int("REPORT_EXPORT_CACHE_MAX_MB", None, 256) * 1024 * 1024,
+        timeout=get_float("REPORT_EXPORT_TIMEOUT", None, 120.0),
+    )
+
+
+def get_report_render_pool(factory: Optional[Callable[[], ReportRenderPool]] = None) -> ReportRenderPool:
+    """获取报告渲染池（单例）；首次创建时使用 factory，默认按 REPORT_EXPORT_* 环境变量配置"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = (factory or _pool_from_env)()
+    return _render_pool
+
+
+def shutdown_report_render_pool() -> None:
+    """关闭渲染池（未创建时不做任何事），下次获取时重新创建"""
+    global _render_pool
+    with _render_pool_lock:
+        pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Token 预算与报告压缩
+
+分析师工具输出的 Markdown 报告会原样发送给 LLM。本模块提供：
+- estimate_tokens：统一的 token 估算（中文约 1.5 字符/token，其他约 4 字符/token）
+- get_context_window / tool_token_budget：按模型上下文窗口为每个工具分配 token 预算
+- compact_table / dedupe_by_title：生成紧凑的表格摘要、新闻去重
+- compact_report：超出预算时逐级压缩（空白与重复行 → 长表格 → 按章节等比例缩减），
+  被省略的内容都会留下明确标记并记录日志，不会静默截断
+- budgeted_tool：工具装饰器，按当前模型预算压缩工具返回的报告；
+  工具执行期间 active_model() 返回该模型，供数据层按同一预算生成表格
+"""
+
+import contextvars
+import functools
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+_CJK_RE = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+_TABLE_ROW_RE = re.compile(r"^\s*\|.*\|\s*$")
+_TABLE_SEP_RE = re.compile(r"^\s*\|?\s*:?-{3,}")
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+
+# 模型上下文窗口（token），按名称前缀匹配，越具体的前缀越靠前
+MODEL_CONTEXT_WINDOWS = [
+    ("qwen-long", 1_000_000),
+    ("qwen-turbo", 1_000_000),
+    ("qwen-plus", 131_072),
+    ("qwen-max", 32_768),
+    ("qwen", 32_768),
+    ("deepseek", 65_536),
+    ("gpt-4o", 128_000),
+    ("gpt-4.1", 1_000_000),
+    ("gpt-4-turbo", 128_000),
+    ("gpt-4", 8_192),
+    ("gpt-3.5", 16_385),
+    ("o1", 128_000),
+    ("o3", 200_000),
+    ("o4", 200_000),
+    ("gemini", 1_000_000),
+    ("claude", 200_000),
+    ("glm-4", 128_000),
+    ("glm", 32_768),
+    ("ernie", 5_120),
+    ("moonshot", 128_000),
+    ("kimi", 128_000),
+]
+DEFAULT_CONTEXT_WINDOW = 32_768
+
+# 各工具可使用的上下文比例，以及预算上下限（token）
+TOOL_BUDGET_SHARES = {
+    "market": 0.15,
+    "fundamentals": 0.2,
+    "news": 0.12,
+    "sentiment": 0.08,
+}
+MIN_TOOL_BUDGET = 800
+MAX_TOOL_BUDGET = 12_000
+
+# 当前工具调用所用的模型（由 budgeted_tool 设置）
+_active_model: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("token_budget_model", default=None)
+
+
+def estimate_tokens(text: Any) -> int:
+    """估算文本 token 数：中文约 1.5 字符/token，其他字符约 4 字符/token"""
+    if not text:
+        return 0
+    text = str(text)
+    cjk = len(_CJK_RE.findall(text))
+    return max(1, int(cjk / 1.5 + (len(text) - cjk) / 4 + 0.5))
+
+
+def get_context_window(model: Optional[str]) -> int:
+    name = (model or "").lower()
+    for prefix, window in MODEL_CONTEXT_WINDOWS:
+        if name.startswith(prefix) or f"/{prefix}" in name:
+            return window
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def active_model() -> Optional[str]:
+    """budgeted_tool 包装的工具执行期间返回当前模型名称，否则返回 None"""
+    return _active_model.get()
+
+
+def tool_token_budget(tool: str, model: Optional[str] = None) -> int:
+    """工具输出的 token 预算 = 模型上下文窗口 × 工具比例（限制在上下限之间）"""
+    share = TOOL_BUDGET_SHARES.get(tool, 0.1)
+    budget = int(get_context_window(model) * share)
+    return max(MIN_TOOL_BUDGET, min(MAX_TOOL_BUDGET, budget))
+
+
+def _format_cell(value: Any, float_digits: int) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return "-"
+        return f"{value:.{float_digits}f}"
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def compact_table(
+    rows: Sequence[Dict[str, Any]],
+    columns: Sequence[str],
+    budget: int,
+    headers: Optional[Sequence[str]] = None,
+    float_digits: int = 2,
+    keep: str = "tail",
+) -> str:
+    """
+    生成紧凑的 Markdown 表格，在预算内尽量多地保留行
+
+    Args:
+        rows: 行数据（字典）
+        columns: 列名
+        budget: token 预算
+        headers: 表头显示名（默认使用列名）
+        keep: "tail" 保留最后的行（时间序列），"head" 保留前面的行
+    """
+    if not rows:
+        return ""
+    header = "| " + " | ".join(headers or columns) + " |"
+    sep = "|" + "|".join(["---"] * len(columns)) + "|"
+    lines = [
+        "| " + " | ".join(_format_cell(row.get(col), float_digits) for col in columns) + " |"
+        for row in rows
+    ]
+    ordered = list(reversed(lines)) if keep == "tail" else lines
+
+    used = estimate_tokens(header) + estimate_tokens(sep)
+    kept: List[str] = []
+    for line in ordered:
+        cost = estimate_tokens(line) + 1
+        if kept and used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    if keep == "tail":
+        kept.reverse()
+
+    table = "\n".join([header, sep, *kept])
+    if len(kept) < len(lines):
+        position = "最近" if keep == "tail" else "前"
+        table += f"\n（共 {len(lines)} 行，按预算展示{position} {len(kept)} 行）"
+    return table
+
+
+def _normalize_title(title: str) -> str:
+    return re.sub(r"[\s\W_]+", "", str(title or "")).lower()
+
+
+def dedupe_by_title(items: Iterable[Any], title: Callable[[Any], str]) -> List[Any]:
+    """按规范化标题去重（忽略空白与标点），保留首次出现的条目"""
+    seen = set()
+    result = []
+    for item in items:
+        key = _normalize_title(title(item))
+        if key and key in seen:
+            continue
+        seen.add(key)
+        result.append(item)
+    return result
+
+
+def _collapse_lines(text: str) -> str:
+    """去除多余空行与连续重复的非表格行"""
+    out: List[str] = []
+    seen_paragraphs = set()
+    blank = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            if not blank and out:
+                out.append("")
+            blank = True
+            continue
+        blank = False
+        if len(stripped) > 30 and not _TABLE_ROW_RE.match(line) and not _HEADING_RE.match(stripped):
+            if stripped in seen_paragraphs:
+                continue
+            seen_paragraphs.add(stripped)
+        out.append(line.rstrip())
+    return "\n".join(out).strip()
+
+
+def _shrink_tables(text: str, max_rows: int) -> str:
+    """长表格只保留表头、前后若干行，并标注省略的行数"""
+    lines = text.splitlines()
+    out: List[str] = []
+    i = 0
+    while i < len(lines):
+        if _TABLE_ROW_RE.match(lines[i]):
+            j = i
+            while j < len(lines) and _TABLE_ROW_RE.match(lines[j]):
+                j += 1
+            table = lines[i:j]
+            head = table[:2] if len(table) > 1 and _TABLE_SEP_RE.match(table[1]) else table[:1]
+            body = table[len(head):]
+            if len(body) > max_rows:
+                keep_head = max_rows // 2
+                keep_tail = max_rows - keep_head
+                omitted = len(body) - max_rows
+                body = body[:keep_head] + [f"| …省略 {omitted} 行… |"] + body[len(body) - keep_tail:]
+            out.extend(head + body)
+            i = j
+        else:
+            out.append(lines[i])
+            i += 1
+    return "\n".join(out)
+
+
+def _split_sections(text: str) -> List[List[str]]:
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if _HEADING_RE.match(line.strip()) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return sections
+
+
+def _shrink_sections(text: str, budget: int) -> str:
+    """按章节等比例缩减：保留每节标题和开头内容，省略部分用标记说明"""
+    sections = _split_sections(text)
+    total = sum(estimate_tokens("\n".join(s)) for s in sections) or 1
+    ratio = min(1.0, budget / total)
+    out: List[str] = []
+    for section in sections:
+        allowance = max(40, int(estimate_tokens("\n".join(section)) * ratio))
+        kept: List[str] = []
+        used = 0
+        for idx, line in enumerate(section):
+            cost = estimate_tokens(line) + 1
+            if kept and used + cost > allowance:
+                omitted = section[idx:]
+                omitted_chars = sum(len(l) for l in omitted)
+                kept.append(f"…（本节省略 {len(omitted)} 行、约 {omitted_chars} 字）")
+                break
+            kept.append(line)
+            used += cost
+        out.extend(kept)
+    return "\n".join(out)
+
+
+def compact_report(text: str, budget: int, label: str = "report") -> str:
+    """
+    将报告压缩到 token 预算内（未超预算时原样返回）
+
+    压缩顺序：合并空行/重复段落 → 缩短长表格 → 按章节等比例缩减。
+    """
+    if not isinstance(text, str) or not text:
+        return text
+    before = estimate_tokens(text)
+    if before <= budget:
+        return text
+
+    result = _collapse_lines(text)
+    for max_rows in (20, 10, 6):
+        if estimate_tokens(result) <= budget:
+            break
+        result = _shrink_tables(result, max_rows)
+    if estimate_tokens(result) > budget:
+        result = _shrink_sections(result, budget)
+
+    after = estimate_tokens(result)
+    note = f"\n\n> ℹ️ 报告已按 token 预算压缩：约 {before} → {after} tokens（预算 {budget}），省略处已标注。"
+    logger.info(f"🗜️ [报告压缩] {label}: {before} → {after} tokens (预算 {budget})")
+    return result + note
+
+
+def budgeted_tool(tool: str, model: Optional[Callable[[], Optional[str]]] = None, field: str = "report"):
+    """
+    工具输出预算装饰器
+
+    Args:
+        tool: 工具类别（market / fundamentals / news / sentiment），决定上下文比例
+        model: 返回当前模型名称的函数，用于确定上下文窗口
+        field: 返回值为字典时需要压缩的字段
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                model_name = model() if model else None
+            except Exception:
+                model_name = None
+            token = _active_model.set(model_name)
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _active_model.reset(token)
+            try:
+                budget = tool_token_budget(tool, model_name)
+                label = getattr(func, "__name__", tool)
+                if isinstance(result, str):
+                    return compact_report(result, budget, label)
+                if isinstance(result, dict) and isinstance(result.get(field), str):
+                    compacted = compact_report(result[field], budget, label)
+                    if compacted is not result[field]:
+                        result = {**result, field: compacted}
+            except Exception as e:
+                logger.warning(f"⚠️ [报告压缩] {tool} 压缩失败，返回原始报告: {e}")
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+统一工具结果缓存
+
+同一交易日内，不同用户对同一只热门股票的分析会反复调用统一工具
+（get_stock_market_data_unified / get_stock_fundamentals_unified / get_stock_news_unified 等），
+每次都重新拉取数据、计算指标并拼装报告。本模块为这些工具提供跨分析任务的结果缓存：
+
+- 缓存键：工具名 + 规范化参数（股票代码大写、日期统一为 YYYY-MM-DD）+ 影响结果的配置（如研究深度）
+- 存储：Redis（database_manager 可用时），否则进程内缓存
+- TTL：按交易日与市场交易时段计算，盘中短、盘后长、历史日期更长
+- 单飞：同一进程内相同参数的并发调用只执行一次，其余调用等待共享结果
+- 失败结果不缓存：status=error、工具通过 report_tool_failure() 报告的部分失败，
+  以及报告中任意位置出现的失败标记（"执行失败"、"获取失败"、"❌"）
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextvars import ContextVar
+from datetime import datetime, time as dtime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from tradingagents.config.runtime_settings import get_bool, get_int, get_zoneinfo
+from tradingagents.utils.logging_manager import get_logger
+
+logger = get_logger('agents')
+
+KEY_PREFIX = "tool_cache:"
+DATE_ARGS = ("curr_date", "end_date", "start_date")
+FAILURE_MARKERS = ("执行失败", "获取失败", "❌")
+
+# 当前缓存工具调用中报告的部分失败（不在缓存工具调用中时为 None）
+_partial_failures: ContextVar[Optional[List[str]]] = ContextVar("tool_cache_partial_failures", default=None)
+
+# 各市场交易时段（北京时间，含开盘前/收盘后少量缓冲）
+_SESSIONS = {
+    "CN": [(dtime(9, 15), dtime(11, 35)), (dtime(12, 55), dtime(15, 5))],
+    "HK": [(dtime(9, 15), dtime(12, 5)), (dtime(12, 55), dtime(16, 15))],
+    "US": [(dtime(21, 25), dtime(23, 59, 59)), (dtime(0, 0), dtime(5, 5))],
+}
+
+
+def _market_of(ticker: str) -> str:
+    code = (ticker or "").strip().upper()
+    if re.fullmatch(r"\d{6}(\.(SH|SZ|BJ|SS))?", code):
+        return "CN"
+    if code.endswith(".HK") or re.fullmatch(r"\d{4,5}", code):
+        return "HK"
+    return "US"
+
+
+def _parse_date(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    text = str(value).strip()
+    for fmt in ("%Y-%m-%d", "%Y%m%d", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(text[:10] if fmt != "%Y%m%d" else text[:8], fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return text
+
+
+def market_aware_ttl(trade_date: Optional[str], ticker: str = "", now: Optional[datetime] = None) -> int:
+    """
+    根据交易日和市场交易时段计算缓存 TTL（秒）
+
+    - 交易日早于今天：数据不再变化，使用长 TTL
+    - 今天且处于交易时段：行情持续变化，使用短 TTL
+    - 今天的非交易时段：使用中等 TTL
+    """
+    now = now or datetime.now(get_zoneinfo())
+    intraday = get_int("TA_TOOL_CACHE_INTRADAY_TTL", None, 300)
+    off_hours = get_int("TA_TOOL_CACHE_OFF_HOURS_TTL", None, 3600)
+    historical = get_int("TA_TOOL_CACHE_HISTORICAL_TTL", None, 86400)
+
+    day = _parse_date(trade_date) or now.strftime("%Y-%m-%d")
+    if day < now.strftime("%Y-%m-%d"):
+        return historical
+
+    # 美股夜盘跨越零点，按交易时段判断时不区分工作日
+    market = _market_of(ticker)
+    if market != "US" and now.weekday() > 4:
+        return off_hours
+    t = now.time()
+    if any(start <= t <= end for start, end in _SESSIONS[market]):
+        return intraday
+    return off_hours
+
+
+def report_tool_failure(reason: str) -> None:
+    """
+    报告工具结果中某个数据段获取失败
+
+    结果照常返回给调用方，但不会写入缓存，下次调用重新获取。不在缓存工具调用中时忽略。
+    """
+    failures = _partial_failures.get()
+    if failures is not None:
+        failures.append(reason)
+
+
+def _has_failure_marker(text: str) -> bool:
+    return any(marker in text for marker in FAILURE_MARKERS)
+
+
+def _is_cacheable(result: Any) -> bool:
+    """失败或部分失败的结果不缓存"""
+    if result is None:
+        return False
+    if isinstance(result, dict):
+        if result.get("status") == "error" or result.get("success") is False:
+            return False
+        report = result.get("report")
+        return not (isinstance(report, str) and _has_failure_marker(report))
+    if isinstance(result, str):
+        return bool(result.strip()) and not _has_failure_marker(result)
+    return True
+
+
+class ToolResultCache:
+    """工具结果缓存（Redis 优先，进程内兜底），带单飞和命中统计"""
+
+    def __init__(self, max_local_entries: int = 256):
+        self.max_local_entries = max_local_entries
+        self._local: Dict[str, Tuple[float, str]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    # ---- 存储 -------------------------------------------------------------
+
+    @staticmethod
+    def _redis():
+        try:
+            from tradingagents.config.database_manager import get_database_manager
+            manager = get_database_manager()
+            if manager.is_redis_available():
+                return manager.get_redis_client()
+        except Exception as e:
+            logger.debug(f"工具缓存获取Redis失败: {e}")
+        return None
+
+    def _get(self, key: str) -> Optional[str]:
+        redis = self._redis()
+        if redis is not None:
+            try:
+                raw = redis.get(key)
+                if raw is not None:
+                    return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+            except Exception as e:
+                logger.debug(f"工具缓存读取Redis失败: {e}")
+        with self._lock:
+            entry = self._local.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            if entry:
+                self._local.pop(key, None)
+        return None
+
+    def _set(self, key: str, raw: str, ttl: int) -> None:
+        redis = self._redis()
+        if redis is not None:
+            try:
+                redis.setex(key, ttl, raw)
+                return
+            except Exception as e:
+                logger.debug(f"工具缓存写入Redis失败，使用进程内缓存: {e}")
+        with self._lock:
+            if len(self._local) >= self.max_local_entries:
+                now = time.monotonic()
+                for k in [k for k, (expires, _) in self._local.items() if expires <= now]:
+                    self._local.pop(k, None)
+                while len(self._local) >= self.max_local_entries:
+                    self._local.pop(next(iter(self._local)))
+            self._local[key] = (time.monotonic() + ttl, raw)
+
+    # ---- 统计 -------------------------------------------------------------
+
+    def _count(self, tool_name: str, field: str) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(tool_name, {"hits": 0, "misses": 0, "shared": 0, "uncached": 0})
+            counters[field] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {name: dict(c) for name, c in self._stats.items()}
+            local_entries = len(self._local)
+        hits = sum(c["hits"] + c["shared"] for c in tools.values())
+        total = hits + sum(c["misses"] for c in tools.values())
+        return {
+            "hits": hits,
+            "misses": total - hits,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "local_entries": local_entries,
+            "tools": tools,
+        }
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    # ---- 主流程 -----------------------------------------------------------
+
+    def get_or_compute(self, tool_name: str, key: str, ttl: int, compute: Callable[[], Any]) -> Any:
+        raw = self._get(key)
+        if raw is not None:
+            self._count(tool_name, "hits")
+            logger.info(f"⚡ [工具缓存] 命中: {tool_name}")
+            return json.loads(raw)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            self._count(tool_name, "shared")
+            logger.info(f"⏳ [工具缓存] 等待相同调用结果: {tool_name}")
+            return future.result()
+
+        self._count(tool_name, "misses")
+        token = _partial_failures.set([])
+        try:
+            result = compute()
+            failures = _partial_failures.get()
+            if failures:
+                logger.info(f"⚠️ [工具缓存] 部分数据获取失败，不缓存: {tool_name} ({'; '.join(failures)})")
+            if not failures and _is_cacheable(result):
+                self._set(key, json.dumps(result, ensure_ascii=False, default=str), ttl)
+            else:
+                self._count(tool_name, "uncached")
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            _partial_failures.reset(token)
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+_tool_cache: Optional[ToolResultCache] = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """获取全局工具结果缓存"""
+    global _tool_cache
+    if _tool_cache is None:
+        with _tool_cache_lock:
+            if _tool_cache is None:
+                _tool_cache = ToolResultCache()
+    return _tool_cache
+
+
+def make_cache_key(tool_name: str, arguments: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> str:
+    """工具名 + 规范化参数 + 配置上下文 -> 缓存键"""
+    normalized = {}
+    for name, value in arguments.items():
+        if value is None:
+            continue
+        if name == "ticker":
+            value = str(value).strip().upper()
+        elif name in DATE_ARGS:
+            value = _parse_date(value)
+        normalized[name] = value
+    payload = {"args": normalized, "ctx": {k: v for k, v in (context or {}).items() if v is not None}}
+    digest = hashlib.sha1(
+        json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{KEY_PREFIX}{tool_name}:{normalized.get('ticker', '-')}:{digest[:24]}"
+
+
+def cached_tool(
+    tool_name: Optional[str] = None,
+    context: Optional[Callable[[], Dict[str, Any]]] = None,
+    date_args: Iterable[str] = DATE_ARGS,
+):
+    """
+    工具结果缓存装饰器
+
+    Args:
+        tool_name: 工具名称，默认使用函数名
+        context: 返回影响结果的配置（如研究深度）的函数，调用时求值并计入缓存键
+        date_args: 用于计算 TTL 的交易日参数名（按顺序取第一个有值的参数）
+    """
+    def decorator(func: Callable) -> Callable:
+        name = tool_name or getattr(func, "__name__", "unknown_tool")
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not get_bool("TA_TOOL_CACHE_ENABLED", None, True):
+                return func(*args, **kwargs)
+            try:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                key = make_cache_key(name, arguments, context() if context else None)
+            except Exception as e:
+                logger.debug(f"工具缓存键计算失败，直接执行: {name} - {e}")
+                return func(*args, **kwargs)
+
+            trade_date = next((arguments.get(a) for a in date_args if arguments.get(a)), None)
+            ttl = market_aware_ttl(trade_date, str(arguments.get("ticker", "")))
+            return get_tool_cache().get_or_compute(name, key, ttl, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
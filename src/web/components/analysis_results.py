@@ -50,285 +50,116 @@ def get_analysis_results_dir():
     return results_dir
 
 def get_favorites_file():
-    """获取收藏文件路径"""
+    """获取收藏文件路径（旧格式，首次打开目录时导入）"""
     return get_analysis_results_dir() / "favorites.json"
 
 def get_tags_file():
-    """获取标签文件路径"""
+    """获取标签文件路径（旧格式，首次打开目录时导入）"""
     return get_analysis_results_dir() / "tags.json"
 
+_catalog = None
+_mongodb_manager = None
+
+def get_analysis_catalog():
+    """获取分析历史目录（单例）"""
+    global _catalog
+    if _catalog is None:
+        from web.utils.analysis_catalog import AnalysisCatalog
+        results_dir = get_analysis_results_dir()
+        _catalog = AnalysisCatalog(
+            results_dir / "catalog.sqlite3",
+            results_dir,
+            detailed_dir=Path(__file__).parent.parent.parent / "data" / "analysis_results" / "detailed",
+        )
+    return _catalog
+
+def get_mongodb_manager():
+    """获取已连接的MongoDB报告管理器，不可用时返回None"""
+    global _mongodb_manager
+    if not MONGODB_AVAILABLE:
+        return None
+    if _mongodb_manager is None or not _mongodb_manager.connected:
+        _mongodb_manager = MongoDBReportManager()
+    return _mongodb_manager if _mongodb_manager.connected else None
+
 def load_favorites():
     """加载收藏列表"""
-    favorites_file = get_favorites_file()
-    if favorites_file.exists():
-        try:
-            with open(favorites_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
-
-def save_favorites(favorites):
-    """保存收藏列表"""
-    favorites_file = get_favorites_file()
-    try:
-        with open(favorites_file, 'w', encoding='utf-8') as f:
-            json.dump(favorites, f, ensure_ascii=False, indent=2)
-        return True
-    except:
-        return False
+    return get_analysis_catalog().favorite_ids()
 
 def load_tags():
     """加载标签数据"""
-    tags_file = get_tags_file()
-    if tags_file.exists():
-        try:
-            with open(tags_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def save_tags(tags):
-    """保存标签数据"""
-    tags_file = get_tags_file()
-    try:
-        with open(tags_file, 'w', encoding='utf-8') as f:
-            json.dump(tags, f, ensure_ascii=False, indent=2)
-        return True
-    except:
-        return False
+    return get_analysis_catalog().tags_map()
 
 def add_tag_to_analysis(analysis_id, tag):
     """为分析结果添加标签"""
-    tags = load_tags()
-    if analysis_id not in tags:
-        tags[analysis_id] = []
-    if tag not in tags[analysis_id]:
-        tags[analysis_id].append(tag)
-        save_tags(tags)
+    get_analysis_catalog().add_tag(analysis_id, tag)
 
 def remove_tag_from_analysis(analysis_id, tag):
     """从分析结果移除标签"""
-    tags = load_tags()
-    if analysis_id in tags and tag in tags[analysis_id]:
-        tags[analysis_id].remove(tag)
-        if not tags[analysis_id]:  # 如果没有标签了，删除该条目
-            del tags[analysis_id]
-        save_tags(tags)
+    get_analysis_catalog().remove_tag(analysis_id, tag)
 
 def get_analysis_tags(analysis_id):
     """获取分析结果的标签"""
-    tags = load_tags()
-    return tags.get(analysis_id, [])
+    return load_tags().get(analysis_id, [])
 
-def load_analysis_results(start_date=None, end_date=None, stock_symbol=None, analyst_type=None,
-                         limit=100, search_text=None, tags_filter=None, favorites_only=False):
-    """加载分析结果 - 优先从MongoDB加载"""
-    all_results = []
-    favorites = load_favorites() if favorites_only else []
-    tags_data = load_tags()
-    mongodb_loaded = False
+def query_analysis_results(start_date=None, end_date=None, stock_symbol=None, analyst_type=None,
+                           limit=100, offset=0, search_text=None, tags_filter=None, favorites_only=False):
+    """
+    从分析目录分页查询分析结果摘要 - 优先展示MongoDB中的数据
 
-    # 优先从MongoDB加载数据
-    if MONGODB_AVAILABLE:
-        try:
-            print("🔍 [数据加载] 从MongoDB加载分析结果")
-            mongodb_manager = MongoDBReportManager()
-            mongodb_results = mongodb_manager.get_all_reports()
-            print(f"🔍 [数据加载] MongoDB返回 {len(mongodb_results)} 个结果")
-
-            for mongo_result in mongodb_results:
-                # 转换MongoDB结果格式
-                result = {
-                    'analysis_id': mongo_result.get('analysis_id', ''),
-                    'timestamp': mongo_result.get('timestamp', 0),
-                    'stock_symbol': mongo_result.get('stock_symbol', ''),
-                    'analysts': mongo_result.get('analysts', []),
-                    'research_depth': mongo_result.get('research_depth', 1),
-                    'status': mongo_result.get('status', 'completed'),
-                    'summary': mongo_result.get('summary', ''),
-                    'performance': mongo_result.get('performance', {}),
-                    'tags': tags_data.get(mongo_result.get('analysis_id', ''), []),
-                    'is_favorite': mongo_result.get('analysis_id', '') in favorites,
-                    'reports': mongo_result.get('reports', {}),
-                    'source': 'mongodb'  # 标记数据来源
-                }
-                all_results.append(result)
+    Returns:
+        (当前页结果, 符合条件的总数)；结果不含报告正文，查看时用 ensure_result_content 加载
+    """
+    catalog = get_analysis_catalog()
+    source = "file_system"
 
-            mongodb_loaded = True
-            print(f"✅ 从MongoDB加载了 {len(mongodb_results)} 个分析结果")
+    mongodb_manager = None
+    try:
+        mongodb_manager = get_mongodb_manager()
+    except Exception as e:
+        logger.error(f"MongoDB连接失败: {e}")
 
+    if mongodb_manager is not None:
+        try:
+            catalog.sync_mongodb(mongodb_manager)
+            source = "mongodb"
         except Exception as e:
-            print(f"❌ MongoDB加载失败: {e}")
-            logger.error(f"MongoDB加载失败: {e}")
-            mongodb_loaded = False
-    else:
-        print("⚠️ MongoDB不可用，将使用文件系统数据")
-
-    # 只有在MongoDB加载失败或不可用时才从文件系统加载
-    if not mongodb_loaded:
-        print("🔄 [备用数据源] 从文件系统加载分析结果")
-
-        # 首先尝试从Web界面的保存位置读取
-        web_results_dir = get_analysis_results_dir()
-        for result_file in web_results_dir.glob("*.json"):
-            if result_file.name in ['favorites.json', 'tags.json']:
-                continue
-
-            try:
-                with open(result_file, 'r', encoding='utf-8') as f:
-                    result = json.load(f)
-
-                    # 添加标签信息
-                    result['tags'] = tags_data.get(result.get('analysis_id', ''), [])
-                    result['is_favorite'] = result.get('analysis_id', '') in favorites
-                    result['source'] = 'file_system'  # 标记数据来源
-
-                    all_results.append(result)
-            except Exception as e:
-                st.warning(f"读取分析结果文件 {result_file.name} 失败: {e}")
+            logger.error(f"MongoDB同步失败: {e}")
 
-        # 然后从实际的分析结果保存位置读取
-        project_results_dir = Path(__file__).parent.parent.parent / "data" / "analysis_results" / "detailed"
+    # 只有在MongoDB不可用时才使用文件系统数据
+    if source == "file_system":
+        catalog.sync_files()
 
-        if project_results_dir.exists():
-            # 遍历股票代码目录
-            for stock_dir in project_results_dir.iterdir():
-                if not stock_dir.is_dir():
-                    continue
-
-                stock_code = stock_dir.name
-
-                # 遍历日期目录
-                for date_dir in stock_dir.iterdir():
-                    if not date_dir.is_dir():
-                        continue
+    return catalog.query(
+        source,
+        start_date=start_date,
+        end_date=end_date,
+        stock_symbol=stock_symbol,
+        analyst_type=analyst_type,
+        search_text=search_text,
+        tags_filter=tags_filter,
+        favorites_only=favorites_only,
+        limit=limit,
+        offset=offset,
+    )
 
-                    date_str = date_dir.name
-                    reports_dir = date_dir / "reports"
+def load_analysis_results(start_date=None, end_date=None, stock_symbol=None, analyst_type=None,
+                         limit=100, search_text=None, tags_filter=None, favorites_only=False):
+    """加载分析结果摘要 - 优先从MongoDB加载"""
+    results, _ = query_analysis_results(
+        start_date=start_date, end_date=end_date, stock_symbol=stock_symbol, analyst_type=analyst_type,
+        limit=limit, search_text=search_text, tags_filter=tags_filter, favorites_only=favorites_only,
+    )
+    return results
 
-                    if not reports_dir.exists():
-                        continue
-
-                    # 读取所有报告文件
-                    reports = {}
-                    summary_content = ""
-
-                    for report_file in reports_dir.glob("*.md"):
-                        try:
-                            with open(report_file, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                report_name = report_file.stem
-                                reports[report_name] = content
-
-                                # 如果是最终决策报告，提取摘要
-                                if report_name == "final_trade_decision":
-                                    # 提取前200个字符作为摘要
-                                    summary_content = content[:200].replace('#', '').replace('*', '').strip()
-                                    if len(content) > 200:
-                                        summary_content += "..."
-
-                        except Exception as e:
-                            continue
-
-                    if reports:
-                        # 解析日期
-                        try:
-                            analysis_date = datetime.strptime(date_str, '%Y-%m-%d')
-                            timestamp = analysis_date.timestamp()
-                        except:
-                            timestamp = datetime.now().timestamp()
-
-                        # 创建分析结果条目
-                        analysis_id = f"{stock_code}_{date_str}_{int(timestamp)}"
-
-                        # 尝试从元数据文件中读取真实的研究深度和分析师信息
-                        research_depth = 1
-                        analysts = ['market', 'fundamentals', 'trader']  # 默认值
-
-                        metadata_file = date_dir / "analysis_metadata.json"
-                        if metadata_file.exists():
-                            try:
-                                with open(metadata_file, 'r', encoding='utf-8') as f:
-                                    metadata = json.load(f)
-                                    research_depth = metadata.get('research_depth', 1)
-                                    analysts = metadata.get('analysts', analysts)
-                            except Exception as e:
-                                # 如果读取元数据失败，使用推断逻辑
-                                if len(reports) >= 5:
-                                    research_depth = 3
-                                elif len(reports) >= 3:
-                                    research_depth = 2
-                        else:
-                            # 如果没有元数据文件，使用推断逻辑
-                            if len(reports) >= 5:
-                                research_depth = 3
-                            elif len(reports) >= 3:
-                                research_depth = 2
-
-                        result = {
-                            'analysis_id': analysis_id,
-                            'timestamp': timestamp,
-                            'stock_symbol': stock_code,
-                            'analysts': analysts,
-                            'research_depth': research_depth,
-                            'status': 'completed',
-                            'summary': summary_content,
-                            'performance': {},
-                            'tags': tags_data.get(analysis_id, []),
-                            'is_favorite': analysis_id in favorites,
-                            'reports': reports,  # 保存所有报告内容
-                            'source': 'file_system'  # 标记数据来源
-                        }
-
-                        all_results.append(result)
-
-        print(f"🔄 [备用数据源] 从文件系统加载了 {len(all_results)} 个分析结果")
-    
-    # 过滤结果
-    filtered_results = []
-    for result in all_results:
-        # 收藏过滤
-        if favorites_only and not result.get('is_favorite', False):
-            continue
-            
-        # 时间过滤
-        if start_date or end_date:
-            result_time = safe_timestamp_to_datetime(result.get('timestamp', 0))
-            if start_date and result_time.date() < start_date:
-                continue
-            if end_date and result_time.date() > end_date:
-                continue
-        
-        # 股票代码过滤
-        if stock_symbol and stock_symbol.upper() not in result.get('stock_symbol', '').upper():
-            continue
-        
-        # 分析师类型过滤
-        if analyst_type and analyst_type not in result.get('analysts', []):
-            continue
-            
-        # 文本搜索过滤
-        if search_text:
-            search_text = search_text.lower()
-            searchable_text = f"{result.get('stock_symbol', '')} {result.get('summary', '')} {' '.join(result.get('analysts', []))}".lower()
-            if search_text not in searchable_text:
-                continue
-                
-        # 标签过滤
-        if tags_filter:
-            result_tags = result.get('tags', [])
-            if not any(tag in result_tags for tag in tags_filter):
-                continue
-        
-        filtered_results.append(result)
-    
-    # 按时间倒序排列 - 使用安全的时间戳转换函数确保类型一致
-    filtered_results.sort(key=lambda x: safe_timestamp_to_datetime(x.get('timestamp', 0)), reverse=True)
-    
-    # 限制数量
-    return filtered_results[:limit]
+def ensure_result_content(result: Dict[str, Any]) -> Dict[str, Any]:
+    """按需加载分析结果的报告正文（reports / full_data）"""
+    if result.get('content_kind') and not result.get('content_loaded'):
+        content = get_analysis_catalog().load_content(result, mongodb_manager=get_mongodb_manager())
+        for key, value in content.items():
+            result.setdefault(key, value)
+        result['content_loaded'] = True
+    return result
 
 def render_analysis_results():
     """渲染分析结果管理界面"""
@@ -400,8 +231,8 @@ def render_analysis_results():
         else:
             selected_tags = []
     
-    # 加载分析结果
-    results = load_analysis_results(
+    # 加载分析结果（摘要，正文在查看详情时加载）
+    results, total_count = query_analysis_results(
         start_date=start_date,
         end_date=end_date,
         stock_symbol=stock_filter if stock_filter else None,
@@ -420,7 +251,7 @@ def render_analysis_results():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("📊 总分析数", len(results))
+        st.metric("📊 总分析数", total_count)
     
     with col2:
         unique_stocks = len(set(result.get('stock_symbol', 'unknown') for result in results))
@@ -590,12 +421,7 @@ def render_results_cards(results: List[Dict[str, Any]]):
 
 def toggle_favorite(analysis_id):
     """切换收藏状态"""
-    favorites = load_favorites()
-    if analysis_id in favorites:
-        favorites.remove(analysis_id)
-    else:
-        favorites.append(analysis_id)
-    save_favorites(favorites)
+    get_analysis_catalog().toggle_favorite(analysis_id)
 
 def render_results_comparison(results: List[Dict[str, Any]]):
     """渲染结果对比功能"""
@@ -955,6 +781,8 @@ def render_results_export(results: List[Dict[str, Any]]):
             
             else:  # 完整数据
                 if export_format == "JSON":
+                    for result in results:
+                        ensure_result_content(result)
                     json_data = json.dumps(results, ensure_ascii=False, indent=2)
                     
                     st.download_button(
@@ -1240,6 +1068,7 @@ def render_detailed_analysis(results: List[Dict[str, Any]]):
 def render_detailed_analysis_content(selected_result):
     """渲染详细分析结果内容"""
     st.subheader("📊 完整分析数据")
+    ensure_result_content(selected_result)
 
     # 检查是否有报告数据（支持文件系统和MongoDB）
     if 'reports' in selected_result and selected_result['reports']:
@@ -1446,7 +1275,8 @@ def render_detailed_analysis_content(selected_result):
         # 排除一些基础字段，只显示分析相关的数据
         excluded_keys = {'analysis_id', 'timestamp', 'stock_symbol', 'analysts', 
                         'research_depth', 'status', 'summary', 'performance', 
-                        'is_favorite', 'tags', 'full_data'}
+                        'is_favorite', 'tags', 'full_data',
+                        'content_kind', 'content_location', 'content_loaded'}
         
         # 获取所有分析相关的数据
         analysis_data = {}
@@ -1616,6 +1446,14 @@ def save_analysis_result(analysis_id: str, stock_symbol: str, analysts: List[str
         with open(result_file, 'w', encoding='utf-8') as f:
             json.dump(result_entry, f, ensure_ascii=False, indent=2)
 
+        # 写入分析目录，历史页面无需重新扫描该文件
+        try:
+            catalog = get_analysis_catalog()
+            catalog.upsert(result_entry, "file_system", "result_file", str(result_file))
+            catalog.record_file(result_file, analysis_id)
+        except Exception as e:
+            logger.warning(f"更新分析目录失败: {e}")
+
         # 2. 保存到MongoDB（如果可用）
         if MONGODB_AVAILABLE:
             try:
@@ -1694,6 +1532,7 @@ def save_analysis_result(analysis_id: str, stock_symbol: str, analysts: List[str
 
 def show_expanded_detail(result):
     """显示展开的详情内容"""
+    ensure_result_content(result)
 
     # 创建详情容器
     with st.container():
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+分析历史目录（SQLite）
+
+历史页面过去每次渲染都要遍历并 json.load 全部分析结果文件和报告目录，再在 Python 中过滤；
+收藏和标签各存一个 JSON 文件，每次修改整体重写。本模块用一个 SQLite 目录库记录每条分析的摘要：
+
+- analyses：摘要字段 + 来源位置（结果文件 / 报告目录 / MongoDB），时间、股票代码上有索引
+- analysis_analysts / analysis_tags：分析师、标签过滤走索引
+- favorites：收藏，按 analysis_id 记录，增删只写一行
+- catalog_files：已入库文件的 mtime，同步时只解析新增或变化的文件
+- 报告正文不入库，查看详情时通过 load_content 按需读取
+
+首次打开时导入旧的 favorites.json / tags.json。
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis_id TEXT PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    stock_symbol TEXT NOT NULL DEFAULT '',
+    analysts TEXT NOT NULL DEFAULT '[]',
+    research_depth INTEGER,
+    status TEXT,
+    summary TEXT NOT NULL DEFAULT '',
+    performance TEXT NOT NULL DEFAULT '{}',
+    search_text TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    location TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_source_ts ON analyses(source, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_symbol_ts ON analyses(stock_symbol, timestamp DESC);
+CREATE TABLE IF NOT EXISTS analysis_analysts (
+    analysis_id TEXT NOT NULL,
+    analyst TEXT NOT NULL,
+    PRIMARY KEY (analyst, analysis_id)
+);
+CREATE TABLE IF NOT EXISTS analysis_tags (
+    analysis_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (analysis_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON analysis_tags(tag);
+CREATE TABLE IF NOT EXISTS favorites (
+    analysis_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS catalog_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    analysis_id TEXT
+);
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 结果来源：MongoDB 可用时只展示 MongoDB 中的分析，否则展示本地文件
+SOURCE_MONGODB = "mongodb"
+SOURCE_FILE = "file_system"
+
+# 正文位置类型
+KIND_RESULT_FILE = "result_file"
+KIND_REPORT_DIR = "report_dir"
+KIND_MONGODB = "mongodb"
+
+LEGACY_FILES = ("favorites.json", "tags.json")
+DEFAULT_ANALYSTS = ['market', 'fundamentals', 'trader']
+
+
+def _to_timestamp(value: Any) -> Optional[float]:
+    """转换为时间戳，无法解析时返回 None"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.strip()).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _day_start(value: date) -> float:
+    return datetime(value.year, value.month, value.day).timestamp()
+
+
+def _summary_from_decision(content: str) -> str:
+    summary = content[:200].replace('#', '').replace('*', '').strip()
+    return summary + "..." if len(content) > 200 else summary
+
+
+class AnalysisCatalog:
+    """分析历史目录"""
+
+    def __init__(self, db_path: Path, results_dir: Path, detailed_dir: Optional[Path] = None,
+                 sync_interval: float = 30.0, reconcile_interval: float = 600.0):
+        self.db_path = Path(db_path)
+        self.results_dir = Path(results_dir)
+        self.detailed_dir = Path(detailed_dir) if detailed_dir else None
+        self.sync_interval = sync_interval
+        self.reconcile_interval = reconcile_interval
+        self._last_sync: Dict[str, float] = {}
+        # Streamlit 在多个线程中执行脚本，连接共享并用锁串行化
+        self._lock = threading.RLock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        self._import_legacy()
+
+    # ------------------------------------------------------------------ 写入
+
+    def upsert(self, entry: Dict[str, Any], source: str, kind: str, location: Optional[str] = None) -> bool:
+        """写入/更新一条分析摘要，缺少 ID 或时间无法解析时跳过并返回 False"""
+        with self._lock, self._conn:
+            return self._upsert(entry, source, kind, location)
+
+    def _upsert(self, entry: Dict[str, Any], source: str, kind: str, location: Optional[str]) -> bool:
+        analysis_id = entry.get('analysis_id')
+        if not analysis_id:
+            return False
+        timestamp = _to_timestamp(entry.get('timestamp'))
+        if timestamp is None:
+            logger.warning(f"⚠️ 分析时间无法解析，跳过 {analysis_id}: {entry.get('timestamp')!r}")
+            return False
+        analysts = [str(a) for a in (entry.get('analysts') or [])]
+        summary = entry.get('summary') or ''
+        if not isinstance(summary, str):
+            summary = str(summary)
+        stock_symbol = str(entry.get('stock_symbol') or '')
+        performance = entry.get('performance') or {}
+        self._conn.execute(
+            "INSERT OR REPLACE INTO analyses (analysis_id, timestamp, stock_symbol, analysts, research_depth,"
+            " status, summary, performance, search_text, source, kind, location)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                analysis_id, timestamp, stock_symbol,
+                json.dumps(analysts, ensure_ascii=False), entry.get('research_depth', 1),
+                entry.get('status', 'completed'), summary,
+                json.dumps(performance, ensure_ascii=False, default=str),
+                f"{stock_symbol} {summary} {' '.join(analysts)}".lower(),
+                source, kind, location,
+            ),
+        )
+        self._conn.execute("DELETE FROM analysis_analysts WHERE analysis_id = ?", (analysis_id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO analysis_analysts (analysis_id, analyst) VALUES (?, ?)",
+            [(analysis_id, analyst) for analyst in analysts],
+        )
+        return True
+
+    def remove(self, analysis_id: str) -> None:
+        with self._lock, self._conn:
+            self._delete(analysis_id)
+
+    def _delete(self, analysis_id: str) -> None:
+        self._conn.execute("DELETE FROM analyses WHERE analysis_id = ?", (analysis_id,))
+        self._conn.execute("DELETE FROM analysis_analysts WHERE analysis_id = ?", (analysis_id,))
+
+    def record_file(self, path: Path, analysis_id: Optional[str]) -> None:
+        """记录已入库文件的 mtime，下次同步时跳过"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalog_files (path, mtime, analysis_id) VALUES (?, ?, ?)",
+                (str(path), path.stat().st_mtime, analysis_id),
+            )
+
+    # ------------------------------------------------------------------ 同步
+
+    def _due(self, name: str, force: bool, interval: Optional[float] = None) -> bool:
+        now = time.monotonic()
+        interval = self.sync_interval if interval is None else interval
+        if not force and now - self._last_sync.get(name, float('-inf')) < interval:
+            return False
+        self._last_sync[name] = now
+        return True
+
+    def sync_files(self, force: bool = False) -> int:
+        """增量同步本地结果文件和报告目录，返回重新解析的条目数"""
+        if not self._due("files", force):
+            return 0
+
+        with self._lock:
+            known = {row["path"]: (row["mtime"], row["analysis_id"])
+                     for row in self._conn.execute("SELECT path, mtime, analysis_id FROM catalog_files")}
+        seen = set()
+        parsed = 0
+
+        # 一次事务写入全部变化，避免逐条提交
+        with self._lock, self._conn:
+            for path, mtime, parse in self._iter_sources():
+                key = str(path)
+                seen.add(key)
+                if key in known and known[key][0] == mtime:
+                    continue
+                try:
+                    analysis_id = parse(path)
+                except Exception as e:
+                    logger.warning(f"⚠️ 解析分析结果失败 {path}: {e}")
+                    analysis_id = None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO catalog_files (path, mtime, analysis_id) VALUES (?, ?, ?)",
+                    (key, mtime, analysis_id),
+                )
+                parsed += 1
+
+            # 已删除的文件
+            for key in set(known) - seen:
+                if known[key][1]:
+                    self._delete(known[key][1])
+                self._conn.execute("DELETE FROM catalog_files WHERE path = ?", (key,))
+
+        if parsed:
+            logger.info(f"📚 分析目录同步: 解析 {parsed} 个文件")
+        return parsed
+
+    def _iter_sources(self) -> Iterable[Tuple[Path, float, Any]]:
+        for result_file in self.results_dir.glob("*.json"):
+            if result_file.name not in LEGACY_FILES:
+                yield result_file, result_file.stat().st_mtime, self._parse_result_file
+
+        if not self.detailed_dir or not self.detailed_dir.exists():
+            return
+        for stock_dir in self.detailed_dir.iterdir():
+            if not stock_dir.is_dir():
+                continue
+            for date_dir in stock_dir.iterdir():
+                reports_dir = date_dir / "reports"
+                if not reports_dir.is_dir():
+                    continue
+                # 报告目录的 mtime 在增删文件时变化；元数据文件单独计入
+                mtime = reports_dir.stat().st_mtime
+                metadata_file = date_dir / "analysis_metadata.json"
+                if metadata_file.exists():
+                    mtime = max(mtime, metadata_file.stat().st_mtime)
+                yield reports_dir, mtime, self._parse_report_dir
+
+    def _parse_result_file(self, path: Path) -> Optional[str]:
+        with open(path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        if not self._upsert(result, SOURCE_FILE, KIND_RESULT_FILE, str(path)):
+            return None
+        return result.get('analysis_id')
+
+    def _parse_report_dir(self, reports_dir: Path) -> Optional[str]:
+        report_files = list(reports_dir.glob("*.md"))
+        if not report_files:
+            return None
+        date_dir = reports_dir.parent
+        stock_code, date_str = date_dir.parent.name, date_dir.name
+
+        summary = ""
+        decision_file = reports_dir / "final_trade_decision.md"
+        if decision_file.exists():
+            summary = _summary_from_decision(decision_file.read_text(encoding='utf-8'))
+
+        try:
+            timestamp = datetime.strptime(date_str, '%Y-%m-%d').timestamp()
+        except ValueError:
+            logger.warning(f"⚠️ 报告目录日期无法解析，跳过: {date_dir}")
+            return None
+
+        research_depth = 3 if len(report_files) >= 5 else 2 if len(report_files) >= 3 else 1
+        analysts = DEFAULT_ANALYSTS
+        metadata_file = date_dir / "analysis_metadata.json"
+        if metadata_file.exists():
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                research_depth = metadata.get('research_depth', 1)
+                analysts = metadata.get('analysts', analysts)
+            except Exception:
+                pass
+
+        analysis_id = f"{stock_code}_{date_str}_{int(timestamp)}"
+        self._upsert({
+            'analysis_id': analysis_id,
+            'timestamp': timestamp,
+            'stock_symbol': stock_code,
+            'analysts': analysts,
+            'research_depth': research_depth,
+            'status': 'completed',
+            'summary': summary,
+        }, SOURCE_FILE, KIND_REPORT_DIR, str(reports_dir))
+        return analysis_id
+
+    def sync_mongodb(self, manager, force: bool = False) -> int:
+        """
+        从 MongoDB 同步摘要（不含正文）
+
+        平时只拉取上次同步之后的报告；每 reconcile_interval 秒（或 force 时）全量对账一次，
+        更新已修改的摘要并移除 MongoDB 中已删除的报告。
+        """
+        if not self._due("mongodb", force):
+            return 0
+        reconcile = self._due("mongodb_reconcile", force, self.reconcile_interval)
+        since = None
+        if not reconcile:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT MAX(timestamp) AS ts FROM analyses WHERE source = ?", (SOURCE_MONGODB,)
+                ).fetchone()
+            since = datetime.fromtimestamp(row["ts"]) if row["ts"] is not None else None
+
+        docs = manager.get_report_summaries(since=since)
+        if docs is None:
+            # 查询失败：不改动目录，下次同步时重新对账
+            if reconcile:
+                self._last_sync.pop("mongodb_reconcile", None)
+            return 0
+
+        removed = 0
+        with self._lock, self._conn:
+            for doc in docs:
+                self._upsert(doc, SOURCE_MONGODB, KIND_MONGODB, doc.get('analysis_id'))
+            if reconcile:
+                present = {doc.get('analysis_id') for doc in docs}
+                stale = [row[0] for row in self._conn.execute(
+                    "SELECT analysis_id FROM analyses WHERE source = ?", (SOURCE_MONGODB,)
+                ) if row[0] not in present]
+                for analysis_id in stale:
+                    self._delete(analysis_id)
+                removed = len(stale)
+        if docs or removed:
+            logger.info(f"📚 分析目录同步: MongoDB {len(docs)} 条{'（全量对账）' if reconcile else ''}，移除 {removed} 条")
+        return len(docs)
+
+    # ------------------------------------------------------------------ 查询
+
+    def query(self, source: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+              stock_symbol: Optional[str] = None, analyst_type: Optional[str] = None,
+              search_text: Optional[str] = None, tags_filter: Optional[List[str]] = None,
+              favorites_only: bool = False, limit: int = 100, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """按条件分页查询，返回 (当前页摘要, 总数)，按时间倒序"""
+        where = ["a.source = ?"]
+        params: List[Any] = [source]
+        if favorites_only:
+            where.append("a.analysis_id IN (SELECT analysis_id FROM favorites)")
+        if start_date:
+            where.append("a.timestamp >= ?")
+            params.append(_day_start(start_date))
+        if end_date:
+            where.append("a.timestamp < ?")
+            params.append(_day_start(end_date + timedelta(days=1)))
+        if stock_symbol:
+            where.append("instr(upper(a.stock_symbol), ?) > 0")
+            params.append(stock_symbol.upper())
+        if analyst_type:
+            where.append("a.analysis_id IN (SELECT analysis_id FROM analysis_analysts WHERE analyst = ?)")
+            params.append(analyst_type)
+        if search_text:
+            where.append("instr(a.search_text, ?) > 0")
+            params.append(search_text.lower())
+        if tags_filter:
+            where.append(
+                f"a.analysis_id IN (SELECT analysis_id FROM analysis_tags WHERE tag IN ({','.join('?' * len(tags_filter))}))"
+            )
+            params.extend(tags_filter)
+        clause = " AND ".join(where)
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM analyses a WHERE {clause}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT a.* FROM analyses a WHERE {clause} ORDER BY a.timestamp DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+            ids = [row["analysis_id"] for row in rows]
+            tags = self._tags_for(ids)
+            favorites = self._favorites_among(ids)
+
+        results = []
+        for row in rows:
+            analysis_id = row["analysis_id"]
+            results.append({
+                'analysis_id': analysis_id,
+                'timestamp': row["timestamp"],
+                'stock_symbol': row["stock_symbol"],
+                'analysts': json.loads(row["analysts"]),
+                'research_depth': row["research_depth"],
+                'status': row["status"],
+                'summary': row["summary"],
+                'performance': json.loads(row["performance"]),
+                'tags': tags.get(analysis_id, []),
+                'is_favorite': analysis_id in favorites,
+                'source': row["source"],
+                'content_kind': row["kind"],
+                'content_location': row["location"],
+            })
+        return results, total
+
+    def load_content(self, result: Dict[str, Any], mongodb_manager=None) -> Dict[str, Any]:
+        """按需读取一条分析的正文（reports / full_data 等）"""
+        kind, location = result.get('content_kind'), result.get('content_location')
+        try:
+            if kind == KIND_RESULT_FILE:
+                with open(location, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                return {key: value for key, value in data.items() if key not in ('tags', 'is_favorite')}
+            if kind == KIND_REPORT_DIR:
+                return {'reports': {path.stem: path.read_text(encoding='utf-8')
+                                    for path in sorted(Path(location).glob("*.md"))}}
+            if kind == KIND_MONGODB and mongodb_manager is not None:
+                doc = mongodb_manager.get_report_by_id(result['analysis_id'])
+                if doc is None:
+                    # 报告已在其他地方删除
+                    self.remove(result['analysis_id'])
+                    return {}
+                return {'reports': doc.get('reports', {})}
+        except Exception as e:
+            logger.warning(f"⚠️ 读取分析正文失败 {result.get('analysis_id')}: {e}")
+        return {}
+
+    # ------------------------------------------------------------------ 收藏与标签
+
+    def favorite_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT analysis_id FROM favorites")]
+
+    def set_favorite(self, analysis_id: str, favorite: bool) -> None:
+        with self._lock, self._conn:
+            if favorite:
+                self._conn.execute("INSERT OR IGNORE INTO favorites (analysis_id) VALUES (?)", (analysis_id,))
+            else:
+                self._conn.execute("DELETE FROM favorites WHERE analysis_id = ?", (analysis_id,))
+
+    def toggle_favorite(self, analysis_id: str) -> bool:
+        with self._lock:
+            favorite = not self._favorites_among([analysis_id])
+            self.set_favorite(analysis_id, favorite)
+        return favorite
+
+    def add_tag(self, analysis_id: str, tag: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO analysis_tags (analysis_id, tag) VALUES (?, ?)", (analysis_id, tag))
+
+    def remove_tag(self, analysis_id: str, tag: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analysis_tags WHERE analysis_id = ? AND tag = ?", (analysis_id, tag))
+
+    def tags_map(self) -> Dict[str, List[str]]:
+        """{analysis_id: [标签]}（与旧 tags.json 格式一致）"""
+        with self._lock:
+            return self._tags_for(None)
+
+    def _tags_for(self, ids: Optional[List[str]]) -> Dict[str, List[str]]:
+        if ids is None:
+            rows = self._conn.execute("SELECT analysis_id, tag FROM analysis_tags ORDER BY rowid")
+        elif not ids:
+            return {}
+        else:
+            rows = self._conn.execute(
+                f"SELECT analysis_id, tag FROM analysis_tags WHERE analysis_id IN ({','.join('?' * len(ids))}) ORDER BY rowid",
+                ids,
+            )
+        tags: Dict[str, List[str]] = {}
+        for analysis_id, tag in rows:
+            tags.setdefault(analysis_id, []).append(tag)
+        return tags
+
+    def _favorites_among(self, ids: List[str]) -> set:
+        if not ids:
+            return set()
+        rows = self._conn.execute(
+            f"SELECT analysis_id FROM favorites WHERE analysis_id IN ({','.join('?' * len(ids))})", ids
+        )
+        return {row[0] for row in rows}
+
+    def _import_legacy(self) -> None:
+        """导入旧的 favorites.json / tags.json（只执行一次）"""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM catalog_meta WHERE key = 'legacy_imported'").fetchone():
+                return
+            favorites, tags = [], {}
+            try:
+                favorites_file = self.results_dir / "favorites.json"
+                if favorites_file.exists():
+                    favorites = json.loads(favorites_file.read_text(encoding='utf-8'))
+                tags_file = self.results_dir / "tags.json"
+                if tags_file.exists():
+                    tags = json.loads(tags_file.read_text(encoding='utf-8'))
+            except Exception as e:
+                logger.warning(f"⚠️ 读取旧的收藏/标签文件失败: {e}")
+            with self._conn:
+                self._conn.executemany("INSERT OR IGNORE INTO favorites (analysis_id) VALUES (?)",
+                                       [(analysis_id,) for analysis_id in favorites])
+                self._conn.executemany("INSERT OR IGNORE INTO analysis_tags (analysis_id, tag) VALUES (?, ?)",
+                                       [(analysis_id, tag) for analysis_id, tag_list in tags.items() for tag in tag_list])
+                self._conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('legacy_imported', ?)",
+                                   (datetime.now().isoformat(),))
+            if favorites or tags:
+                logger.info(f"📚 已导入旧收藏 {len(favorites)} 条、标签 {len(tags)} 条")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
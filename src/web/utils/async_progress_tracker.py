@@ -154,34 +154,14 @@ class AsyncProgressTracker:
                 logger.info(f"📊 [异步进度] Redis已禁用，使用文件存储")
                 return False
 
-            import redis
-
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-
-            # 创建Redis连接
-            if redis_password:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    password=redis_password,
-                    db=redis_db,
-                    decode_responses=True
-                )
-            else:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True
-                )
-
-            # 测试连接
-            self.redis_client.ping()
-            logger.info(f"📊 [异步进度] Redis连接成功: {redis_host}:{redis_port}")
+            from tradingagents.utils.redis_pool import get_sync_redis
+
+            # 进程级共享连接池，避免每个跟踪器各自建立连接
+            self.redis_client = get_sync_redis()
+            if self.redis_client is None:
+                logger.warning(f"📊 [异步进度] Redis不可用，使用文件存储")
+                return False
+            logger.info(f"📊 [异步进度] 使用共享Redis连接池")
             return True
         except Exception as e:
             logger.warning(f"📊 [异步进度] Redis连接失败，使用文件存储: {e}")
@@ -604,30 +584,11 @@ def get_progress_by_id(analysis_id: str) -> Optional[Dict[str, Any]]:
         # 如果Redis启用，先尝试Redis
         if redis_enabled:
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
+                from tradingagents.utils.redis_pool import get_sync_redis
+
+                redis_client = get_sync_redis()
+                if redis_client is None:
+                    raise RuntimeError("Redis不可用")
 
                 key = f"progress:{analysis_id}"
                 data = redis_client.get(key)
@@ -668,43 +629,23 @@ def get_latest_analysis_id() -> Optional[str]:
         # 如果Redis启用，先尝试从Redis获取
         if redis_enabled:
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
-                # 获取所有progress键
-                keys = redis_client.keys("progress:*")
+                from tradingagents.utils.redis_pool import get_sync_redis
+
+                redis_client = get_sync_redis()
+                if redis_client is None:
+                    raise RuntimeError("Redis不可用")
+
+                # 获取所有progress键（SCAN 不阻塞服务端）
+                keys = list(redis_client.scan_iter(match="progress:*", count=500))
                 if not keys:
                     return None
 
-                # 获取每个键的数据，找到最新的
+                # 批量读取（MGET 一次往返），找到最新的
                 latest_time = 0
                 latest_id = None
 
-                for key in keys:
+                for key, data in zip(keys, redis_client.mget(keys)):
                     try:
-                        data = redis_client.get(key)
                         if data:
                             progress_data = json.loads(data)
                             last_update = progress_data.get('last_update', 0)
@@ -20,6 +20,12 @@ except ImportError:
     MONGODB_AVAILABLE = False
     logger.warning("pymongo未安装，MongoDB功能不可用")
 
+try:
+    # API 写入的报告正文可能单独存放在 report_blobs 集合中
+    from app.services.report_blob_store import hydrate_sync
+except ImportError:
+    hydrate_sync = None
+
 
 class MongoDBReportManager:
     """MongoDB报告管理器"""
@@ -205,6 +211,15 @@ class MongoDBReportManager:
             logger.error(f"❌ 保存分析报告到MongoDB失败: {e}")
             return False
     
+    def _hydrate(self, doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """还原外部存储的报告正文"""
+        if doc and doc.get("report_refs") and hydrate_sync is not None:
+            try:
+                return hydrate_sync(self.db, doc)
+            except Exception as e:
+                logger.warning(f"⚠️ 加载报告正文失败 {doc.get('analysis_id')}: {e}")
+        return doc
+
     def get_analysis_reports(self, limit: int = 100, stock_symbol: str = None,
                            start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
         """从MongoDB获取分析报告"""
@@ -231,6 +246,7 @@ class MongoDBReportManager:
             
             results = []
             for doc in cursor:
+                doc = self._hydrate(doc)
                 # 处理timestamp字段，兼容不同的数据类型
                 timestamp_value = doc.get("timestamp")
                 if hasattr(timestamp_value, 'timestamp'):
@@ -268,13 +284,33 @@ class MongoDBReportManager:
             logger.error(f"❌ 从MongoDB获取分析报告失败: {e}")
             return []
     
+    def get_report_summaries(self, since: Optional[datetime] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取报告摘要（不含报告正文），since 给出时只返回该时间之后的报告
+
+        未连接或查询失败时返回 None（与“没有报告”区分，调用方据此避免误删本地目录）
+        """
+        if not self.connected:
+            return None
+
+        query = {"timestamp": {"$gte": since}} if since else {}
+        projection = {
+            "_id": 0, "analysis_id": 1, "timestamp": 1, "stock_symbol": 1, "analysts": 1,
+            "research_depth": 1, "status": 1, "summary": 1, "performance": 1,
+        }
+        try:
+            return list(self.collection.find(query, projection).sort("timestamp", 1))
+        except Exception as e:
+            logger.error(f"❌ 从MongoDB获取报告摘要失败: {e}")
+            return None
+
     def get_report_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
         """根据ID获取单个分析报告"""
         if not self.connected:
             return None
         
         try:
-            doc = self.collection.find_one({"analysis_id": analysis_id})
+            doc = self._hydrate(self.collection.find_one({"analysis_id": analysis_id}))
             
             if doc:
                 # 转换为Web应用期望的格式
@@ -327,7 +363,7 @@ class MongoDBReportManager:
         try:
             # 获取所有报告，按时间戳降序排列
             cursor = self.collection.find().sort("timestamp", -1).limit(limit)
-            reports = list(cursor)
+            reports = [self._hydrate(doc) for doc in cursor]
 
             # 转换ObjectId为字符串
             for report in reports:
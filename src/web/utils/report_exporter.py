@@ -163,8 +163,8 @@ class ReportExporter:
 
         return content
 
-    def generate_markdown_report(self, results: Dict[str, Any]) -> str:
-        """生成Markdown格式的报告"""
+    def generate_markdown_report(self, results: Dict[str, Any], timestamp: Optional[str] = None) -> str:
+        """生成Markdown格式的报告（timestamp 为空时使用当前时间）"""
 
         stock_symbol = self._clean_text_for_markdown(results.get('stock_symbol', 'N/A'))
         decision = results.get('decision', {})
@@ -172,7 +172,8 @@ class ReportExporter:
         is_demo = results.get('is_demo', False)
         
         # 生成时间戳
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if timestamp is None:
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # 清理关键数据
         action = self._clean_text_for_markdown(decision.get('action', 'N/A')).upper()
@@ -368,6 +369,11 @@ class ReportExporter:
 
         return formatted_content
 
+    def _render_cache_key(self, results: Dict[str, Any], *extra: Any) -> str:
+        """渲染缓存键：不含生成时间的报告内容，同一份分析重复导出可命中缓存"""
+        content = self._clean_markdown_for_pandoc(self.generate_markdown_report(results, timestamp=""))
+        return json.dumps([content, *extra], ensure_ascii=False, default=str)
+
     def generate_docx_report(self, results: Dict[str, Any]) -> bytes:
         """生成Word文档格式的报告"""
 
@@ -383,59 +389,18 @@ class ReportExporter:
         logger.info(f"✅ Markdown内容生成完成，长度: {len(md_content)} 字符")
 
         try:
-            logger.info("📁 创建临时文件用于docx输出...")
-            # 创建临时文件用于docx输出
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp_file:
-                output_file = tmp_file.name
-            logger.info(f"📁 临时文件路径: {output_file}")
-
-            # 使用强制禁用YAML的参数
-            extra_args = ['--from=markdown-yaml_metadata_block']  # 禁用YAML解析
-            logger.info(f"🔧 pypandoc参数: {extra_args} (禁用YAML解析)")
-
-            logger.info("🔄 使用pypandoc将markdown转换为docx...")
-
-            # 调试：保存实际的Markdown内容
-            debug_file = '/app/debug_markdown.md'
-            try:
-                with open(debug_file, 'w', encoding='utf-8') as f:
-                    f.write(md_content)
-                logger.info(f"🔍 实际Markdown内容已保存到: {debug_file}")
-                logger.info(f"📊 内容长度: {len(md_content)} 字符")
-
-                # 显示前几行内容
-                lines = md_content.split('\n')[:5]
-                logger.info("🔍 前5行内容:")
-                for i, line in enumerate(lines, 1):
-                    logger.info(f"  {i}: {repr(line)}")
-            except Exception as e:
-                logger.error(f"保存调试文件失败: {e}")
+            from tradingagents.utils.report_render_pool import get_report_render_pool, render_pandoc
 
             # 清理内容避免YAML解析问题
             cleaned_content = self._clean_markdown_for_pandoc(md_content)
             logger.info(f"🧹 内容清理完成，清理后长度: {len(cleaned_content)} 字符")
 
-            # 使用测试成功的参数进行转换
-            pypandoc.convert_text(
-                cleaned_content,
-                'docx',
-                format='markdown',  # 基础markdown格式
-                outputfile=output_file,
-                extra_args=extra_args
+            # 在共享渲染进程池中转换（禁用YAML解析），相同内容直接命中磁盘缓存
+            docx_content = get_report_render_pool().render(
+                "docx", render_pandoc, cleaned_content, "docx", ['--from=markdown-yaml_metadata_block'],
+                cache_key=self._render_cache_key(results),
             )
-            logger.info("✅ pypandoc转换完成")
-
-            logger.info("📖 读取生成的docx文件...")
-            # 读取生成的docx文件
-            with open(output_file, 'rb') as f:
-                docx_content = f.read()
-            logger.info(f"✅ 文件读取完成，大小: {len(docx_content)} 字节")
-
-            logger.info("🗑️ 清理临时文件...")
-            # 清理临时文件
-            os.unlink(output_file)
-            logger.info("✅ 临时文件清理完成")
-
+            logger.info(f"✅ Word文档生成完成，大小: {len(docx_content)} 字节")
             return docx_content
         except Exception as e:
             logger.error(f"❌ Word文档生成失败: {e}", exc_info=True)
@@ -456,72 +421,26 @@ class ReportExporter:
         md_content = self.generate_markdown_report(results)
         logger.info(f"✅ Markdown内容生成完成，长度: {len(md_content)} 字符")
 
-        # 简化的PDF引擎列表，优先使用最可能成功的
-        pdf_engines = [
-            ('wkhtmltopdf', 'HTML转PDF引擎，推荐安装'),
-            ('weasyprint', '现代HTML转PDF引擎'),
-            (None, '使用pandoc默认引擎')  # 不指定引擎，让pandoc自己选择
-        ]
-
-        last_error = None
+        # 依次尝试的PDF引擎：wkhtmltopdf（推荐）、weasyprint、pandoc默认引擎
+        pdf_engines = ('wkhtmltopdf', 'weasyprint', None)
 
-        for engine_info in pdf_engines:
-            engine, description = engine_info
-            try:
-                # 创建临时文件用于PDF输出
-                with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-                    output_file = tmp_file.name
-
-                # 使用禁用YAML解析的参数（与Word导出一致）
-                extra_args = ['--from=markdown-yaml_metadata_block']
-
-                # 如果指定了引擎，添加引擎参数
-                if engine:
-                    extra_args.append(f'--pdf-engine={engine}')
-                    logger.info(f"🔧 使用PDF引擎: {engine}")
-                else:
-                    logger.info(f"🔧 使用默认PDF引擎")
+        # 清理内容避免YAML解析问题（与Word导出一致）
+        cleaned_content = self._clean_markdown_for_pandoc(md_content)
 
-                logger.info(f"🔧 PDF参数: {extra_args}")
-
-                # 清理内容避免YAML解析问题（与Word导出一致）
-                cleaned_content = self._clean_markdown_for_pandoc(md_content)
-
-                # 使用pypandoc将markdown转换为PDF - 禁用YAML解析
-                pypandoc.convert_text(
-                    cleaned_content,
-                    'pdf',
-                    format='markdown',  # 基础markdown格式
-                    outputfile=output_file,
-                    extra_args=extra_args
-                )
-
-                # 检查文件是否生成且有内容
-                if os.path.exists(output_file) and os.path.getsize(output_file) > 0:
-                    # 读取生成的PDF文件
-                    with open(output_file, 'rb') as f:
-                        pdf_content = f.read()
-
-                    # 清理临时文件
-                    os.unlink(output_file)
-
-                    logger.info(f"✅ PDF生成成功，使用引擎: {engine or '默认'}")
-                    return pdf_content
-                else:
-                    raise Exception("PDF文件生成失败或为空")
-
-            except Exception as e:
-                last_error = str(e)
-                logger.error(f"PDF引擎 {engine or '默认'} 失败: {e}")
-
-                # 清理可能存在的临时文件
-                try:
-                    if 'output_file' in locals() and os.path.exists(output_file):
-                        os.unlink(output_file)
-                except:
-                    pass
+        try:
+            # 渲染依赖（pypandoc 等）导入失败时同样给出下面的详细错误信息
+            from tradingagents.utils.report_render_pool import get_report_render_pool, render_pandoc
 
-                continue
+            pdf_content = get_report_render_pool().render(
+                "pdf", render_pandoc, cleaned_content, "pdf",
+                ['--from=markdown-yaml_metadata_block'], pdf_engines,
+                cache_key=self._render_cache_key(results, pdf_engines),
+            )
+            logger.info(f"✅ PDF生成成功，大小: {len(pdf_content)} 字节")
+            return pdf_content
+        except Exception as e:
+            last_error = str(e)
+            logger.error(f"❌ 所有PDF引擎均失败: {e}")
 
         # 如果所有引擎都失败，提供详细的错误信息和解决方案
         error_msg = f"""PDF生成失败，最后错误: {last_error}